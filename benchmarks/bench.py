@@ -0,0 +1,807 @@
+"""Benchmarks of SimpleLang workloads.
+
+Every workload is a program from ``benchmarks/programs`` with input
+values. Front end (parse, compile and load of bytecode file) is measured
+once per workload, execution is measured for every engine, so engines
+are compared side by side::
+
+    python -m benchmarks.bench run --output baseline.json
+    python -m benchmarks.bench run --engine pyjit --output current.json
+    python -m benchmarks.bench compare baseline.json current.json
+
+Every measurement is repeated after warmup runs, mean is reported with
+95% confidence interval. Compare command exits with code 1 if any metric
+is worse than in baseline by more than threshold.
+
+Scaling command measures parse and streaming compile of generated sources
+of growing size, time per line stays the same when they are linear::
+
+    python -m benchmarks.bench scaling --lines 1000 --lines 1000000 --memory
+"""
+
+import gc
+import sys
+import json
+import math
+import time
+import pathlib
+import argparse
+import platform
+import tempfile
+import statistics
+import tracemalloc
+import typing
+import dataclasses
+
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler
+from interpreter.src.virtual_machine.bytecode_cache import load_program_file
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.profiler import format_table
+from interpreter.src.virtual_machine.vm.program import Program
+from interpreter.src.virtual_machine.vm.vm_executor import (
+    ENGINES,
+    initialize_vm
+)
+
+PROGRAMS_DIR = pathlib.Path(__file__).parent / "programs"
+
+# Version of baseline file format
+BASELINE_VERSION: int = 1
+
+DEFAULT_WARMUP: int = 2
+DEFAULT_REPETITIONS: int = 10
+
+# Allowed relative change of metric before it's a regression
+DEFAULT_THRESHOLD: float = 0.1
+
+# Counts of lines of generated sources for scaling command
+DEFAULT_SCALING_LINES: typing.Tuple[int, ...] = (1000, 10000, 100000, 1000000)
+DEFAULT_SCALING_REPETITIONS: int = 3
+
+# Metrics which are better when they are bigger, others are times
+HIGHER_IS_BETTER = frozenset(["instructions_per_second"])
+
+# Two-sided 95% quantiles of Student's t-distribution, degrees of freedom
+# - quantile, normal quantile is used for more degrees
+T_QUANTILES_95: typing.Tuple[float, ...] = (
+    12.706, 4.303, 3.182, 2.776, 2.571, 2.447, 2.365, 2.306, 2.262, 2.228,
+    2.201, 2.179, 2.160, 2.145, 2.131, 2.120, 2.110, 2.101, 2.093, 2.086,
+    2.080, 2.074, 2.069, 2.064, 2.060, 2.056, 2.052, 2.048, 2.045, 2.042,
+)
+NORMAL_QUANTILE_95: float = 1.960
+
+
+@dataclasses.dataclass(frozen=True)
+class Workload:
+    """Benchmarked program.
+
+    :param str name: Name of workload
+    :param str filename: Source file in programs directory
+
+    :param inputs: Values for INPUT operations
+    :type inputs: Tuple[int, ...]
+    """
+
+    name: str
+    filename: str
+    inputs: typing.Tuple[int, ...] = ()
+
+    @property
+    def source(self) -> str:
+        """Source code of program."""
+        return (PROGRAMS_DIR / self.filename).read_text()
+
+
+WORKLOADS: typing.Dict[str, Workload] = {
+    workload.name: workload
+    for workload in (
+        Workload("fibonacci", "fibonacci.small", (200, )),
+        Workload("memory_scan", "memory_scan.small", (10, )),
+        Workload("memory_blocks", "memory_blocks.small", (1000, )),
+        Workload("vectors", "vectors.small", (1000, )),
+        Workload("call_chain", "call_chain.small", (1000, )),
+        Workload("branching", "branching.small", (10000, )),
+        Workload("print_heavy", "print_heavy.small", (10000, )),
+    )
+}
+
+
+@dataclasses.dataclass
+class Statistics:
+    """Statistics of repeated measurement.
+
+    :param float mean: Mean of samples
+    :param float stdev: Sample standard deviation, 0 for one sample
+    :param float ci: Half-width of 95% confidence interval of mean
+
+    :param samples: Measured values
+    :type samples: List[float]
+    """
+
+    mean: float
+    stdev: float
+    ci: float
+    samples: typing.List[float]
+
+    @classmethod
+    def from_samples(cls, samples: typing.List[float]) -> 'Statistics':
+        """Calculate statistics of samples.
+
+        :raise ValueError: If there are no samples
+        """
+        if not samples:
+            raise ValueError("No samples")
+
+        mean = statistics.mean(samples)
+
+        if len(samples) == 1:
+            return cls(mean, 0.0, 0.0, list(samples))
+
+        stdev = statistics.stdev(samples)
+        ci = t_quantile(len(samples) - 1) * stdev / math.sqrt(len(samples))
+
+        return cls(mean, stdev, ci, list(samples))
+
+
+@dataclasses.dataclass
+class Comparison:
+    """Change of one metric against baseline.
+
+    :param str workload: Name of workload
+    :param str engine: Name of engine, empty for front end metrics
+    :param str metric: Name of metric
+    :param float baseline: Mean in baseline
+    :param float current: Mean in current results
+    :param float change: Relative change of mean
+    :param bool regression: Metric is worse more than threshold
+    """
+
+    workload: str
+    engine: str
+    metric: str
+    baseline: float
+    current: float
+    change: float
+    regression: bool
+
+
+def t_quantile(degrees: int) -> float:
+    """Two-sided 95% quantile of t-distribution."""
+    if degrees <= len(T_QUANTILES_95):
+        return T_QUANTILES_95[degrees - 1]
+
+    return NORMAL_QUANTILE_95
+
+
+def measure(func: typing.Callable[[], typing.Any], warmup: int,
+            repetitions: int) -> typing.List[float]:
+    """Measure time of function calls.
+
+    Garbage collector is disabled while function is called, like timeit
+    does, so collection of previous garbage doesn't add noise.
+
+    :param func: Measured function
+    :param int warmup: Count of calls which are not measured
+    :param int repetitions: Count of measured calls
+
+    :return: Time of every measured call
+    :rtype: List[float]
+    """
+    for _ in range(warmup):
+        func()
+
+    samples = []
+    gc_enabled = gc.isenabled()
+
+    gc.disable()
+
+    try:
+        for _ in range(repetitions):
+            started = time.perf_counter()
+            func()
+            samples.append(time.perf_counter() - started)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    return samples
+
+
+def bench_frontend(workload: Workload, directory: pathlib.Path,
+                   warmup: int, repetitions: int
+                   ) -> typing.Tuple[Program, typing.Dict[str, Statistics]]:
+    """Measure parse, compile and load of bytecode file of workload.
+
+    :param Workload workload: Benchmarked program
+    :param directory: Directory for bytecode file
+    :type directory: pathlib.Path
+
+    :return: Loaded program and statistics by metrics
+    :rtype: Tuple[Program, Dict[str, Statistics]]
+    """
+    source = workload.source
+    bytecode_file = directory / (workload.filename + "_c")
+
+    parser = Parser()
+    operations = parser.parse(source)
+
+    def parse():
+        Parser().parse(source)
+
+    def compile_bytecode():
+        BytecodeCompiler(0).compile(operations, parser.labels_table)
+
+    bytecode_file.write_bytes(
+        BytecodeCompiler(0).compile(
+            operations, parser.labels_table
+        ).getvalue()
+    )
+
+    def load():
+        load_program_file(bytecode_file)
+
+    metrics = {
+        "parse_seconds": measure(parse, warmup, repetitions),
+        "compile_seconds": measure(compile_bytecode, warmup, repetitions),
+        "load_seconds": measure(load, warmup, repetitions),
+    }
+
+    return load_program_file(bytecode_file), {
+        name: Statistics.from_samples(samples)
+        for name, samples in metrics.items()
+    }
+
+
+def bench_engine(workload: Workload, program: Program, engine: str,
+                 warmup: int,
+                 repetitions: int) -> typing.Dict[str, typing.Any]:
+    """Measure execution of program by engine.
+
+    Program is shared by runs, so code compiled by engine (e.g. pyjit)
+    is reused and its compilation is measured only without warmup.
+
+    :param Workload workload: Benchmarked program
+    :param program: Loaded program of workload
+    :type program: :class:`~.Program`
+    :param str engine: Name of execution engine
+
+    :return: Count of executed instructions and statistics by metrics
+    :rtype: Dict[str, Any]
+    """
+    run_engine = ENGINES[engine]
+    # Count of executed instructions is the same in every run
+    executed = [0]
+
+    def execute():
+        vm_state = initialize_vm(program, ListSink(), workload.inputs)
+        executed[0] = run_engine(vm_state).vm_steps
+
+    samples = measure(execute, warmup, repetitions)
+    steps = executed[0]
+
+    return {
+        "steps": steps,
+        "execute_seconds": Statistics.from_samples(samples),
+        "instructions_per_second": Statistics.from_samples(
+            [steps / seconds for seconds in samples]
+        ),
+    }
+
+
+def run_benchmarks(workloads: typing.Iterable[str],
+                   engines: typing.Iterable[str],
+                   warmup: int = DEFAULT_WARMUP,
+                   repetitions: int = DEFAULT_REPETITIONS
+                   ) -> typing.Dict[str, typing.Any]:
+    """Run benchmarks of workloads for every engine.
+
+    :param workloads: Names of workloads
+    :type workloads: Iterable[str]
+
+    :param engines: Names of engines
+    :type engines: Iterable[str]
+
+    :param int warmup: Count of runs before measurement
+    :param int repetitions: Count of measured runs
+
+    :raise ValueError: If unknown workload or engine given, or there are
+                       no repetitions
+
+    :return: Results in format of baseline file
+    :rtype: Dict[str, Any]
+    """
+    workloads = list(workloads)
+    engines = list(engines)
+
+    for name in workloads:
+        if name not in WORKLOADS:
+            raise ValueError(f"Unknown workload {name}")
+
+    for engine in engines:
+        if engine not in ENGINES:
+            raise ValueError(f"Unknown engine {engine}")
+
+    if repetitions < 1:
+        raise ValueError("At least one repetition is needed")
+
+    results: typing.Dict[str, typing.Any] = {
+        "version": BASELINE_VERSION,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "warmup": warmup,
+        "repetitions": repetitions,
+        "workloads": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        for name in workloads:
+            workload = WORKLOADS[name]
+            program, frontend = bench_frontend(
+                workload, pathlib.Path(directory), warmup, repetitions
+            )
+
+            results["workloads"][name] = {
+                "frontend": frontend,
+                "engines": {
+                    engine: bench_engine(workload, program, engine,
+                                         warmup, repetitions)
+                    for engine in engines
+                },
+            }
+
+    return json.loads(json.dumps(results, default=dataclasses.asdict))
+
+
+def generate_source(lines: int) -> str:
+    """Source code like generated by machine with given count of lines.
+
+    Every block of four lines has its own label and jump to label of next
+    block (last block jumps to first one), so count of labels grows with
+    size of source.
+    """
+    block = ("LABEL block_{0}\n"
+             "    ADD r1, 1\n"
+             "    CMP r1, @r2 ; compare with value in memory\n"
+             "    JMP_LT block_{1}")
+
+    blocks = lines // 4
+
+    return "\n".join(
+        block.format(index, (index + 1) % blocks)
+        for index in range(blocks)
+    )
+
+
+def compile_source_file(source_file: pathlib.Path,
+                        bytecode_file: pathlib.Path) -> int:
+    """Compile source file into bytecode file by streams of lines.
+
+    :return: Count of compiled operations
+    :rtype: int
+    """
+    parser = Parser()
+
+    with open(source_file) as source, open(bytecode_file, 'wb') as output:
+        return BytecodeCompiler(0).compile_stream(
+            parser.iter_parse(source), output, parser.labels_table
+        )
+
+
+def measure_peak_memory(func: typing.Callable[[], typing.Any]) -> int:
+    """Measure peak of memory allocated by Python while function is called.
+
+    :return: Peak size of traced memory in bytes
+    :rtype: int
+    """
+    tracemalloc.start()
+
+    try:
+        func()
+
+        return tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+
+def run_scaling(line_counts: typing.Iterable[int],
+                warmup: int = 0,
+                repetitions: int = DEFAULT_SCALING_REPETITIONS,
+                memory: bool = False) -> typing.Dict[str, typing.Any]:
+    """Measure parse and compile of generated sources of every size.
+
+    Source is parsed from string into list of operations, then it's
+    compiled from file into bytecode file by streams, like by simple_lang.
+
+    :param line_counts: Counts of lines of sources
+    :type line_counts: Iterable[int]
+
+    :param int warmup: Count of runs before measurement
+    :param int repetitions: Count of measured runs
+    :param bool memory: Measure peak memory of compile by tracemalloc,
+                        it's slow, so it's done once
+
+    :raise ValueError: If count of lines is less than one block, or there
+                       are no repetitions
+
+    :return: Statistics and time per line of parse and compile by count
+             of lines
+    :rtype: Dict[str, Any]
+    """
+    line_counts = list(line_counts)
+
+    for lines in line_counts:
+        if lines < 4:
+            raise ValueError(f"Bad count of lines {lines}")
+
+    if repetitions < 1:
+        raise ValueError("At least one repetition is needed")
+
+    results: typing.Dict[str, typing.Any] = {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "warmup": warmup,
+        "repetitions": repetitions,
+        "sources": {},
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        source_file = pathlib.Path(directory) / "generated.small"
+        bytecode_file = pathlib.Path(directory) / "generated.small_c"
+
+        for lines in line_counts:
+            source = generate_source(lines)
+            source_file.write_text(source)
+
+            def compile_file():
+                compile_source_file(source_file, bytecode_file)
+
+            parse_seconds = Statistics.from_samples(measure(
+                lambda: Parser().parse(source), warmup, repetitions
+            ))
+            compile_seconds = Statistics.from_samples(measure(
+                compile_file, warmup, repetitions
+            ))
+
+            result = results["sources"][str(lines)] = {
+                "labels": lines // 4,
+                "parse_seconds": parse_seconds,
+                "compile_seconds": compile_seconds,
+                "seconds_per_line": parse_seconds.mean / (lines // 4 * 4),
+                "compile_seconds_per_line":
+                    compile_seconds.mean / (lines // 4 * 4),
+            }
+
+            if memory:
+                result["compile_peak_bytes"] = measure_peak_memory(
+                    compile_file
+                )
+
+    return json.loads(json.dumps(results, default=dataclasses.asdict))
+
+
+def format_scaling(results: typing.Dict[str, typing.Any]) -> str:
+    """Scaling results as text table, time per line is relative to first."""
+    sources = results["sources"]
+    first = next(iter(sources.values()))
+
+    def cell(stats: typing.Dict[str, float]) -> str:
+        return f"{stats['mean']:.3f} ± {stats['ci']:.3f}"
+
+    def per_line(result: typing.Dict[str, typing.Any], metric: str) -> str:
+        return f"{result[metric] * 1e6:.3f}" \
+               f" ({result[metric] / first[metric]:.2f})"
+
+    def peak(result: typing.Dict[str, typing.Any]) -> str:
+        if "compile_peak_bytes" not in result:
+            return "-"
+
+        return f"{result['compile_peak_bytes'] / 1024:.1f}"
+
+    lines = [f"Python {results['python']} on {results['platform']},"
+             f" {results['warmup']} warmup runs,"
+             f" {results['repetitions']} repetitions."]
+
+    lines += format_table(
+        "Generated sources, us per line relative to first source",
+        ("lines", "labels", "parse, s", "us per line", "compile, s",
+         "us per line", "peak, KiB"),
+        [
+            (lines_count, result["labels"],
+             cell(result["parse_seconds"]),
+             per_line(result, "seconds_per_line"),
+             cell(result["compile_seconds"]),
+             per_line(result, "compile_seconds_per_line"),
+             peak(result))
+            for lines_count, result in sources.items()
+        ]
+    )
+
+    return "\n".join(lines)
+
+
+def iter_metrics(
+        results: typing.Dict[str, typing.Any]
+) -> typing.Iterator[typing.Tuple[str, str, str, float]]:
+    """Iterate means of metrics of results.
+
+    :return: Iterator of workload, engine (empty for front end), metric
+             and mean
+    :rtype: Iterator[Tuple[str, str, str, float]]
+    """
+    for workload, result in results["workloads"].items():
+        for metric, stats in result["frontend"].items():
+            yield workload, "", metric, stats["mean"]
+
+        for engine, engine_result in result["engines"].items():
+            for metric, stats in engine_result.items():
+                if isinstance(stats, dict):
+                    yield workload, engine, metric, stats["mean"]
+
+
+def compare(baseline: typing.Dict[str, typing.Any],
+            current: typing.Dict[str, typing.Any],
+            threshold: float = DEFAULT_THRESHOLD
+            ) -> typing.List[Comparison]:
+    """Compare results with baseline.
+
+    Only metrics which are in both results are compared.
+
+    :param baseline: Results of baseline file
+    :type baseline: Dict[str, Any]
+
+    :param current: Results to check
+    :type current: Dict[str, Any]
+
+    :param float threshold: Allowed relative change, 0.1 - 10%
+
+    :raise Exception: If version of results is unknown
+
+    :return: Changes of metrics
+    :rtype: List[Comparison]
+    """
+    for results in (baseline, current):
+        if results.get("version") != BASELINE_VERSION:
+            raise Exception("Bad version of benchmark results")
+
+    baseline_means = {
+        (workload, engine, metric): mean
+        for workload, engine, metric, mean in iter_metrics(baseline)
+    }
+    comparisons = []
+
+    for workload, engine, metric, mean in iter_metrics(current):
+        baseline_mean = baseline_means.get((workload, engine, metric))
+
+        if not baseline_mean:
+            continue
+
+        change = (mean - baseline_mean) / baseline_mean
+
+        if metric in HIGHER_IS_BETTER:
+            regression = change < -threshold
+        else:
+            regression = change > threshold
+
+        comparisons.append(Comparison(
+            workload, engine, metric, baseline_mean, mean, change, regression
+        ))
+
+    return comparisons
+
+
+def format_results(results: typing.Dict[str, typing.Any]) -> str:
+    """Results as text tables, engines side by side."""
+    workloads = results["workloads"]
+    engines = sorted(set(
+        engine
+        for result in workloads.values()
+        for engine in result["engines"]
+    ), key=list(ENGINES).index)
+
+    def cell(stats: typing.Dict[str, float], scale: float = 1.0) -> str:
+        return f"{stats['mean'] * scale:.3f} ± {stats['ci'] * scale:.3f}"
+
+    lines = [f"Python {results['python']} on {results['platform']},"
+             f" {results['warmup']} warmup runs,"
+             f" {results['repetitions']} repetitions."]
+
+    lines += format_table(
+        "Front end, ms",
+        ("workload", "parse", "compile", "load"),
+        [
+            (workload,
+             cell(result["frontend"]["parse_seconds"], 1000),
+             cell(result["frontend"]["compile_seconds"], 1000),
+             cell(result["frontend"]["load_seconds"], 1000))
+            for workload, result in workloads.items()
+        ]
+    )
+    lines += format_table(
+        "Millions of instructions per second",
+        ("workload", "instructions") + tuple(engines),
+        [
+            (workload,
+             max((engine_result["steps"]
+                  for engine_result in result["engines"].values()),
+                 default=0)) +
+            tuple(
+                cell(result["engines"][engine]["instructions_per_second"],
+                     1e-6)
+                if engine in result["engines"] else "-"
+                for engine in engines
+            )
+            for workload, result in workloads.items()
+        ]
+    )
+
+    return "\n".join(lines)
+
+
+def format_comparison(comparisons: typing.List[Comparison],
+                      threshold: float) -> str:
+    """Comparison as text table with regressions marked."""
+    regressions = [item for item in comparisons if item.regression]
+
+    lines = [f"{len(regressions)} of {len(comparisons)} metrics regressed"
+             f" by more than {threshold * 100:.1f}%."]
+
+    lines += format_table(
+        "Changes",
+        ("workload", "engine", "metric", "baseline", "current", "change %",
+         ""),
+        [
+            (item.workload, item.engine or "-", item.metric,
+             f"{item.baseline:.6g}", f"{item.current:.6g}",
+             item.change * 100, "REGRESSION" if item.regression else "")
+            for item in comparisons
+        ]
+    )
+
+    return "\n".join(lines)
+
+
+def read_results(filename: str) -> typing.Dict[str, typing.Any]:
+    """Read results from JSON file."""
+    return json.loads(pathlib.Path(filename).read_text())
+
+
+def main(args: typing.List[str]) -> int:
+    """Main function of benchmarks command."""
+    args_obj = parse_args(args)
+
+    if args_obj.command == 'run':
+        results = run_benchmarks(
+            args_obj.workload or list(WORKLOADS),
+            args_obj.engine or list(ENGINES),
+            args_obj.warmup,
+            args_obj.repetitions
+        )
+
+        print(format_results(results))
+
+        if args_obj.output:
+            pathlib.Path(args_obj.output).write_text(
+                json.dumps(results, indent=2)
+            )
+
+        return 0
+
+    if args_obj.command == 'scaling':
+        results = run_scaling(
+            args_obj.lines or DEFAULT_SCALING_LINES,
+            args_obj.warmup,
+            args_obj.repetitions,
+            args_obj.memory
+        )
+
+        print(format_scaling(results))
+
+        if args_obj.output:
+            pathlib.Path(args_obj.output).write_text(
+                json.dumps(results, indent=2)
+            )
+
+        return 0
+
+    comparisons = compare(
+        read_results(args_obj.baseline),
+        read_results(args_obj.current),
+        args_obj.threshold
+    )
+
+    print(format_comparison(comparisons, args_obj.threshold))
+
+    return 1 if any(item.regression for item in comparisons) else 0
+
+
+def parse_args(args: typing.List[str]):
+    """Parser for command line arguments."""
+    parser = argparse.ArgumentParser(prog="python -m benchmarks.bench")
+    commands = parser.add_subparsers(dest='command')
+    commands.required = True
+
+    run_parser = commands.add_parser('run')
+
+    run_parser.add_argument(
+        '--workload',
+        action='append',
+        choices=list(WORKLOADS)
+    )
+
+    run_parser.add_argument(
+        '--engine',
+        action='append',
+        choices=list(ENGINES)
+    )
+
+    run_parser.add_argument(
+        '--warmup',
+        action='store',
+        type=int,
+        default=DEFAULT_WARMUP
+    )
+
+    run_parser.add_argument(
+        '--repetitions',
+        action='store',
+        type=int,
+        default=DEFAULT_REPETITIONS
+    )
+
+    run_parser.add_argument(
+        '--output',
+        action='store',
+        default=''
+    )
+
+    scaling_parser = commands.add_parser('scaling')
+
+    scaling_parser.add_argument(
+        '--lines',
+        action='append',
+        type=int
+    )
+
+    scaling_parser.add_argument(
+        '--warmup',
+        action='store',
+        type=int,
+        default=0
+    )
+
+    scaling_parser.add_argument(
+        '--repetitions',
+        action='store',
+        type=int,
+        default=DEFAULT_SCALING_REPETITIONS
+    )
+
+    scaling_parser.add_argument(
+        '--memory',
+        action='store_true'
+    )
+
+    scaling_parser.add_argument(
+        '--output',
+        action='store',
+        default=''
+    )
+
+    compare_parser = commands.add_parser('compare')
+
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+
+    compare_parser.add_argument(
+        '--threshold',
+        action='store',
+        type=float,
+        default=DEFAULT_THRESHOLD
+    )
+
+    return parser.parse_args(args)
+
+
+if __name__ == '__main__':
+    sys.exit(main(sys.argv[1:]))
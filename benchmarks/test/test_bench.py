@@ -0,0 +1,160 @@
+import json
+
+import pytest
+
+from benchmarks.bench import (
+    BASELINE_VERSION,
+    WORKLOADS,
+    Statistics,
+    compare,
+    format_comparison,
+    format_results,
+    format_scaling,
+    generate_source,
+    main,
+    run_benchmarks,
+    run_scaling,
+)
+from interpreter.src.parser.parser import Parser
+
+
+def make_results(**means):
+    """Results of one workload with given means of metrics."""
+    def stats(mean):
+        return {"mean": mean, "stdev": 0.0, "ci": 0.0, "samples": [mean]}
+
+    return {
+        "version": BASELINE_VERSION,
+        "workloads": {
+            "fibonacci": {
+                "frontend": {"parse_seconds": stats(means["parse"])},
+                "engines": {
+                    "interpreter": {
+                        "steps": 100,
+                        "instructions_per_second": stats(means["speed"]),
+                    }
+                },
+            }
+        },
+    }
+
+
+def test_statistics():
+    stats = Statistics.from_samples([1.0, 2.0, 3.0])
+
+    assert stats.mean == 2.0
+    assert stats.stdev == 1.0
+    assert stats.ci == pytest.approx(4.303 / 3 ** 0.5)
+
+    assert Statistics.from_samples([5.0]).ci == 0.0
+
+    with pytest.raises(ValueError):
+        Statistics.from_samples([])
+
+
+def test_compare():
+    baseline = make_results(parse=1.0, speed=100.0)
+
+    comparisons = compare(baseline, make_results(parse=1.05, speed=95.0))
+
+    assert [(item.metric, item.regression) for item in comparisons] == [
+        ("parse_seconds", False), ("instructions_per_second", False)
+    ]
+
+    comparisons = compare(baseline, make_results(parse=1.5, speed=50.0))
+
+    assert [(item.metric, item.regression) for item in comparisons] == [
+        ("parse_seconds", True), ("instructions_per_second", True)
+    ]
+    assert comparisons[1].change == -0.5
+    assert "2 of 2 metrics regressed" in format_comparison(comparisons, 0.1)
+
+    # Faster code is not a regression
+    comparisons = compare(baseline, make_results(parse=0.5, speed=200.0))
+
+    assert not any(item.regression for item in comparisons)
+
+    with pytest.raises(Exception, match="Bad version"):
+        compare(baseline, {"version": 0, "workloads": {}})
+
+
+def test_run_benchmarks():
+    results = run_benchmarks(["call_chain"], ["interpreter", "pyjit"],
+                             warmup=0, repetitions=2)
+
+    workload = results["workloads"]["call_chain"]
+
+    assert set(workload["frontend"]) == {
+        "parse_seconds", "compile_seconds", "load_seconds"
+    }
+    assert workload["engines"]["interpreter"]["steps"] == \
+        workload["engines"]["pyjit"]["steps"] == 27004
+    assert len(
+        workload["engines"]["pyjit"]["instructions_per_second"]["samples"]
+    ) == 2
+
+    table = format_results(results)
+
+    assert "interpreter" in table and "pyjit" in table
+
+    with pytest.raises(ValueError):
+        run_benchmarks(["unknown"], ["interpreter"])
+
+    with pytest.raises(ValueError):
+        run_benchmarks(["call_chain"], ["interpreter"], repetitions=0)
+
+
+def test_compare_command(tmp_path):
+    baseline = tmp_path / "baseline.json"
+    current = tmp_path / "current.json"
+
+    baseline.write_text(json.dumps(make_results(parse=1.0, speed=100.0)))
+    current.write_text(json.dumps(make_results(parse=1.0, speed=80.0)))
+
+    assert main(["compare", str(baseline), str(current)]) == 1
+    assert main(["compare", str(baseline), str(current),
+                 "--threshold", "0.25"]) == 0
+
+
+def test_run_scaling():
+    parser = Parser()
+
+    assert len(parser.parse(generate_source(400))) == 400
+    assert len(parser.labels_table) == 100
+
+    results = run_scaling([40, 400], repetitions=2)
+
+    assert list(results["sources"]) == ["40", "400"]
+    assert results["sources"]["400"]["labels"] == 100
+    assert len(
+        results["sources"]["400"]["compile_seconds"]["samples"]
+    ) == 2
+    assert "compile_peak_bytes" not in results["sources"]["400"]
+    assert "us per line" in format_scaling(results)
+
+    results = run_scaling([40, 4000], repetitions=1, memory=True)
+
+    # Only labels are kept while source is compiled, not operations
+    assert results["sources"]["4000"]["compile_peak_bytes"] < \
+        results["sources"]["40"]["compile_peak_bytes"] + 1000 * 400
+    assert "peak, KiB" in format_scaling(results)
+
+    with pytest.raises(ValueError):
+        run_scaling([3])
+
+    with pytest.raises(ValueError):
+        run_scaling([40], repetitions=0)
+
+
+def test_scaling_command(tmp_path, capsys):
+    output = tmp_path / "scaling.json"
+
+    assert main(["scaling", "--lines", "40", "--repetitions", "1",
+                 "--output", str(output)]) == 0
+    assert "relative" in capsys.readouterr().out
+    assert json.loads(output.read_text())["sources"]["40"]["labels"] == 10
+
+
+def test_workloads_exist():
+    for workload in WORKLOADS.values():
+        assert workload.source
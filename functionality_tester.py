@@ -1,6 +1,11 @@
 import io
 from interpreter.src.parser.parser import Parser
-from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler
+from interpreter.src.virtual_machine.byte_cc import (
+    BytecodeCompiler,
+    META_SIZE,
+    OP_SIZE,
+    read_metadata,
+)
 from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
 
 with open('test_examples/input.small', 'r') as inp_file:
@@ -22,8 +27,8 @@ with open('test_examples/output.small_c', 'wb') as bytecode_file:
 with open('test_examples/output.small_c', 'rb') as bcode_file:
     file_bcode = bcode_file.read()
 
-meta_pos = 8
-meta, bcode = file_bcode[:meta_pos], file_bcode[meta_pos:]
+code_size = read_metadata(file_bcode).code_size
+bcode = file_bcode[META_SIZE:META_SIZE + code_size * OP_SIZE]
 
 _end_state = execute_bytecode(io.BytesIO(bcode))
 # print(_end_state)
@@ -41,6 +41,17 @@ LANGUAGE_OPTYPES: Dict[Keyword, OperationType] = {
     # Control flow, through calls and returns used subroutins
     Keyword("CALL"): OperationType.Unary,
     Keyword("RET"): OperationType.Nop,
+    # Block memory operations, count of cells is in register A
+    Keyword("MEMCPY"): OperationType.Binary,
+    Keyword("MEMSET"): OperationType.Binary,
+    Keyword("MEMCMP"): OperationType.Binary,
+    # Vector operations on ranges of cells, count of cells is in register A
+    Keyword("VADD"): OperationType.Binary,
+    Keyword("VSUB"): OperationType.Binary,
+    Keyword("VMUL"): OperationType.Binary,
+    Keyword("VAND"): OperationType.Binary,
+    Keyword("VXOR"): OperationType.Binary,
+    Keyword("VSUM"): OperationType.Binary,
 }
 
 
@@ -0,0 +1,538 @@
+"""Module with peephole optimizer of operations.
+
+Optimizer works on operations made by Parser, before labels are resolved
+by BytecodeCompiler. LABEL operations are never removed, so symbol section
+stays the same, and peephole rules never look through labels.
+
+Levels of optimization:
+
+    * 0 - code is not changed
+    * 1 - NOP removal, dead code removal, removal of jumps to next
+      operation, ``MOV r, r`` removal and constant folding of in-place values
+    * 2 - everything from level 1, jump threading and removal of moves
+      through temporary register and of overwritten moves
+"""
+
+import typing
+import operator
+import dataclasses
+
+from interpreter.src.parser.operation import (
+    Operation,
+    OperationType,
+    OperationArgument,
+    OperationArgumentType,
+)
+
+OPTIMIZATION_LEVELS: typing.Tuple[int, ...] = (0, 1, 2)
+
+# Passes are repeated while they change code, but not more than that
+MAX_PASSES: int = 32
+
+JUMPS = ("JMP", "JMP_EQ", "JMP_GT", "JMP_LT", "JMP_NE", "CALL")
+
+# Operations after which next operation is executed only if jumped on it
+UNCONDITIONAL_TRANSFERS = ("JMP", "RET", "END")
+
+# In-place values are 32-bit integers only
+IN_PLACE_MIN: int = -2 ** 31
+IN_PLACE_MAX: int = 2 ** 31 - 1
+
+FOLDABLE_OPERATIONS: typing.Dict[str, typing.Callable[[int, int], int]] = {
+    "ADD": operator.add,
+    "SUB": operator.sub,
+    "MUL": operator.mul,
+    "AND": operator.and_,
+    "OR": operator.or_,
+    "XOR": operator.xor,
+    # NOT operation works because it's a parser dependent hack
+    "NOT": lambda _, y: ~y,
+    "MOV": lambda _, y: y,
+}
+
+# Operations which can be moved out of temporary register
+ARITHMETIC_OPERATIONS = (
+    "ADD", "SUB", "DIV", "MUL", "AND", "OR", "XOR", "NOT"
+)
+
+
+@dataclasses.dataclass
+class OptimizationReport:
+    """Report of optimizer.
+
+    LABEL operations are not counted, because they are not written
+    to bytecode.
+
+    :param int level: Level of optimization
+    :param int operations_before: Count of operations before optimization
+    :param int operations_after: Count of operations after optimization
+
+    :param removed: Count of removed operations by passes, name - count
+    :type removed: Dict[str, int]
+
+    :param int threaded_jumps: Count of jumps retargeted by jump threading
+    """
+
+    level: int
+    operations_before: int = 0
+    operations_after: int = 0
+    removed: typing.Dict[str, int] = dataclasses.field(default_factory=dict)
+    threaded_jumps: int = 0
+
+    @property
+    def removed_count(self) -> int:
+        """Count of all removed operations."""
+        return self.operations_before - self.operations_after
+
+    def count_removed(self, pass_name: str, count: int):
+        """Add count of operations removed by pass."""
+        if count:
+            self.removed[pass_name] = self.removed.get(pass_name, 0) + count
+
+
+class Optimizer:
+    """Peephole optimizer.
+
+    Provides optimize method which returns optimized copy of operations,
+    report of last optimization is stored in report attribute.
+    """
+
+    def __init__(self, level: int = 1):
+        """Initialize optimizer with level of optimization.
+
+        :raise ValueError: If unknown level of optimization given
+        """
+        if level not in OPTIMIZATION_LEVELS:
+            raise ValueError(f"Unknown optimization level {level}")
+
+        self.level = level
+        self.report = OptimizationReport(level=level)
+
+    def optimize(self, code: typing.List[Operation]) -> typing.List[Operation]:
+        """Optimize list of operations.
+
+        :param code: Operations made by Parser, with labels
+        :type code: List[Operation]
+
+        :return: Optimized operations
+        :rtype: List[Operation]
+        """
+        self.report = OptimizationReport(
+            level=self.level,
+            operations_before=count_operations(code)
+        )
+
+        passes = [
+            ("nop", self.remove_nops),
+            ("dead_code", self.remove_dead_code),
+            ("jump_to_next", self.remove_jumps_to_next),
+            ("peephole", self.run_peephole),
+        ]
+
+        if self.level >= 2:
+            passes.insert(0, ("jump_threading", self.thread_jumps))
+
+        if self.level == 0:
+            passes = []
+
+        for _ in range(MAX_PASSES):
+            previous_code = code
+
+            for pass_name, optimization_pass in passes:
+                operations_count = count_operations(code)
+
+                code = optimization_pass(code)
+
+                # Peephole rules count removed operations by themselves
+                if pass_name != "peephole":
+                    self.report.count_removed(
+                        pass_name,
+                        operations_count - count_operations(code)
+                    )
+
+            if code == previous_code:
+                break
+
+        self.report.operations_after = count_operations(code)
+
+        return code
+
+    def remove_nops(self,
+                    code: typing.List[Operation]) -> typing.List[Operation]:
+        """Remove NOP operations."""
+        return [
+            operation
+            for operation in code
+            if operation.op_word != "NOP"
+        ]
+
+    def remove_dead_code(
+            self,
+            code: typing.List[Operation]
+    ) -> typing.List[Operation]:
+        """Remove operations which can't be executed.
+
+        Operations after JMP, RET or END are unreachable until label
+        which is used by any jump.
+        """
+        entries = find_entry_labels(code)
+        reachable = True
+        result = []
+
+        for position, operation in enumerate(code):
+            if operation.op_word == "LABEL":
+                reachable = reachable or position in entries
+                result.append(operation)
+
+            elif reachable:
+                reachable = operation.op_word not in UNCONDITIONAL_TRANSFERS
+                result.append(operation)
+
+        return result
+
+    def remove_jumps_to_next(
+            self,
+            code: typing.List[Operation]
+    ) -> typing.List[Operation]:
+        """Remove jumps (but not calls) to label right after jump."""
+        labels = find_label_positions(code)
+        result = []
+
+        for position, operation in enumerate(code):
+            if operation.op_word in JUMPS and operation.op_word != "CALL":
+                target = labels.get(operation.op_args[0].arg_word)
+
+                if target is not None and target > position and all(
+                    next_operation.op_word == "LABEL"
+                    for next_operation in code[position + 1:target]
+                ):
+                    continue
+
+            result.append(operation)
+
+        return result
+
+    def thread_jumps(self,
+                     code: typing.List[Operation]) -> typing.List[Operation]:
+        """Retarget jumps and calls to JMP operations to targets of them.
+
+        Also JMP to RET or END replaced by that operation.
+        """
+        labels = find_label_positions(code)
+
+        def first_operation(label: int) -> typing.Optional[Operation]:
+            position = labels.get(label)
+
+            if position is None:
+                return None
+
+            for operation in code[position + 1:]:
+                if operation.op_word != "LABEL":
+                    return operation
+
+            return None
+
+        result = []
+
+        for operation in code:
+            if operation.op_word not in JUMPS:
+                result.append(operation)
+                continue
+
+            label = operation.op_args[0].arg_word
+            visited = {label}
+            target = first_operation(label)
+
+            while target is not None and target.op_word == "JMP":
+                next_label = target.op_args[0].arg_word
+
+                if next_label in visited:
+                    # Endless loop of jumps is left as is
+                    label = operation.op_args[0].arg_word
+                    target = None
+                    break
+
+                visited.add(next_label)
+                label = next_label
+                target = first_operation(label)
+
+            if (operation.op_word == "JMP" and target is not None
+                    and target.op_word in ("RET", "END")):
+                operation = target
+                self.report.threaded_jumps += 1
+
+            elif label != operation.op_args[0].arg_word:
+                operation = dataclasses.replace(
+                    operation,
+                    op_args=[
+                        OperationArgument(
+                            arg_type=OperationArgumentType.Label,
+                            arg_word=label
+                        ),
+                        operation.op_args[1],
+                    ]
+                )
+                self.report.threaded_jumps += 1
+
+            result.append(operation)
+
+        return result
+
+    def run_peephole(self,
+                     code: typing.List[Operation]) -> typing.List[Operation]:
+        """Apply peephole rules to every sequence of operations without labels.
+
+        Rules are applied to the end of already optimized operations after
+        every added operation, so result of rule can be optimized again.
+        """
+        rules = [
+            (1, "redundant_moves", rule_self_move),
+            (2, "constant_folding", rule_fold_constant),
+        ]
+
+        if self.level >= 2:
+            rules += [
+                (2, "redundant_moves", rule_overwritten_move),
+                (2, "redundant_moves", rule_move_back),
+                (3, "redundant_moves", rule_temporary_register),
+            ]
+
+        result: typing.List[Operation] = []
+        sequence_start = 0
+
+        for operation in code:
+            if operation.op_word == "LABEL":
+                result.append(operation)
+                sequence_start = len(result)
+                continue
+
+            result.append(operation)
+
+            rule_applied = True
+
+            while rule_applied:
+                rule_applied = False
+
+                for size, rule_name, rule in rules:
+                    if len(result) - sequence_start < size:
+                        continue
+
+                    replacement = rule(*result[-size:])
+
+                    if replacement is None:
+                        continue
+
+                    result[-size:] = replacement
+                    self.report.count_removed(
+                        rule_name,
+                        size - len(replacement)
+                    )
+                    rule_applied = True
+                    break
+
+        return result
+
+
+def count_operations(code: typing.List[Operation]) -> int:
+    """Count operations which are written to bytecode."""
+    return sum(operation.op_word != "LABEL" for operation in code)
+
+
+def find_label_positions(
+        code: typing.List[Operation]
+) -> typing.Dict[int, int]:
+    """Find positions of labels, first definition of label is used.
+
+    :return: Positions of LABEL operations, label index - position
+    :rtype: Dict[int, int]
+    """
+    labels: typing.Dict[int, int] = {}
+
+    for position, operation in enumerate(code):
+        if operation.op_word == "LABEL":
+            labels.setdefault(operation.op_args[0].arg_word, position)
+
+    return labels
+
+
+def find_entry_labels(code: typing.List[Operation]) -> typing.Set[int]:
+    """Find positions of labels used by jumps and calls.
+
+    :return: Positions of LABEL operations
+    :rtype: Set[int]
+    """
+    used_labels = {
+        operation.op_args[0].arg_word
+        for operation in code
+        if operation.op_word in JUMPS
+    }
+
+    return {
+        position
+        for label, position in find_label_positions(code).items()
+        if label in used_labels
+    }
+
+
+def is_register(argument: OperationArgument) -> bool:
+    """Check that argument is register."""
+    return argument.arg_type is OperationArgumentType.Register
+
+
+def reads_register(argument: OperationArgument, register: int) -> bool:
+    """Check that value of argument depends on register."""
+    return argument.arg_type in (
+        OperationArgumentType.Register,
+        OperationArgumentType.RegisterPointer,
+    ) and argument.arg_word == register
+
+
+def make_move(destination: OperationArgument,
+              source: OperationArgument) -> Operation:
+    """Make MOV operation."""
+    return Operation(
+        op_type=OperationType.Binary,
+        op_word="MOV",
+        op_args=[destination, source]
+    )
+
+
+def rule_self_move(
+        operation: Operation
+) -> typing.Optional[typing.List[Operation]]:
+    """``MOV r, r`` does nothing."""
+    destination, source = operation.op_args
+
+    if (operation.op_word == "MOV" and is_register(destination)
+            and destination == source):
+        return []
+
+    return None
+
+
+def rule_fold_constant(
+        first: Operation,
+        second: Operation
+) -> typing.Optional[typing.List[Operation]]:
+    """``MOV r, 2; ADD r, 3`` is ``MOV r, 5``.
+
+    Second operand of operation can be in-place value or same register.
+    DIV is not folded, because its result is not an integer.
+    """
+    destination, source = first.op_args
+
+    if (first.op_word != "MOV" or not is_register(destination)
+            or source.arg_type is not OperationArgumentType.InPlaceValue):
+        return None
+
+    if (second.op_word not in FOLDABLE_OPERATIONS
+            or second.op_args[0] != destination):
+        return None
+
+    second_source = second.op_args[1]
+
+    if second_source.arg_type is OperationArgumentType.InPlaceValue:
+        right = second_source.arg_word
+    elif second_source == destination:
+        right = source.arg_word
+    else:
+        return None
+
+    value = FOLDABLE_OPERATIONS[second.op_word](source.arg_word, right)
+
+    if not IN_PLACE_MIN <= value <= IN_PLACE_MAX:
+        return None
+
+    return [
+        make_move(
+            destination,
+            OperationArgument(
+                arg_type=OperationArgumentType.InPlaceValue,
+                arg_word=value
+            )
+        )
+    ]
+
+
+def rule_overwritten_move(
+        first: Operation,
+        second: Operation
+) -> typing.Optional[typing.List[Operation]]:
+    """``MOV r, x; MOV r, y`` is ``MOV r, y`` if y is not depends on r.
+
+    First source must be register or in-place value, so removed operation
+    can't fail.
+    """
+    if first.op_word != "MOV" or second.op_word != "MOV":
+        return None
+
+    destination, source = first.op_args
+
+    if not is_register(destination) or second.op_args[0] != destination:
+        return None
+
+    if source.arg_type not in (OperationArgumentType.Register,
+                               OperationArgumentType.InPlaceValue):
+        return None
+
+    if reads_register(second.op_args[1], destination.arg_word):
+        return None
+
+    return [second]
+
+
+def rule_move_back(
+        first: Operation,
+        second: Operation
+) -> typing.Optional[typing.List[Operation]]:
+    """``MOV a, b; MOV b, a`` is ``MOV a, b``."""
+    if first.op_word != "MOV" or second.op_word != "MOV":
+        return None
+
+    destination, source = first.op_args
+
+    if not is_register(destination) or not is_register(source):
+        return None
+
+    if second.op_args != [source, destination]:
+        return None
+
+    return [first]
+
+
+def rule_temporary_register(
+        first: Operation,
+        second: Operation,
+        third: Operation
+) -> typing.Optional[typing.List[Operation]]:
+    """``MOV A, r2; ADD A, r3; MOV r2, A`` is ``ADD r2, r3; MOV A, r2``.
+
+    Second operand of operation must not depend on temporary register.
+    """
+    if first.op_word != "MOV" or third.op_word != "MOV":
+        return None
+
+    temporary, register = first.op_args
+
+    if not is_register(temporary) or not is_register(register):
+        return None
+
+    if temporary == register or third.op_args != [register, temporary]:
+        return None
+
+    if (second.op_word not in ARITHMETIC_OPERATIONS
+            or second.op_args[0] != temporary):
+        return None
+
+    if second.op_word == "NOT":
+        # Both arguments of NOT are same register
+        operation_args = [register, register]
+    elif reads_register(second.op_args[1], temporary.arg_word):
+        return None
+    else:
+        operation_args = [register, second.op_args[1]]
+
+    return [
+        dataclasses.replace(second, op_args=operation_args),
+        make_move(temporary, register),
+    ]
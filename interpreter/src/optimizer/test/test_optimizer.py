@@ -0,0 +1,257 @@
+import pytest
+
+from interpreter.src.optimizer.optimizer import (
+    Optimizer,
+    OptimizationReport,
+    count_operations,
+)
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.byte_cc import (
+    BytecodeCompiler,
+    META_SIZE,
+)
+from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
+
+from interpreter.src.virtual_machine.test.vm.test_threaded import PROGRAMS
+
+
+def optimize(level, *lines):
+    code = Parser().parse('\n'.join(lines))
+
+    optimizer = Optimizer(level)
+
+    return optimizer.optimize(code), optimizer.report
+
+
+def words(code):
+    return [
+        ' '.join([operation.op_word] + [
+            str(arg.arg_word) for arg in operation.op_args
+        ])
+        for operation in code
+    ]
+
+
+def execute(code):
+    bytecode = BytecodeCompiler(0).compile(code).getvalue()
+
+    return execute_bytecode(bytecode[META_SIZE:])
+
+
+def test_bad_level():
+    with pytest.raises(ValueError):
+        Optimizer(3)
+
+
+def test_level_zero():
+    lines = ["NOP", "MOV r1, r1", "END", "MOV r2, 1"]
+
+    code, report = optimize(0, *lines)
+
+    assert code == Parser().parse('\n'.join(lines))
+    assert report.removed_count == 0
+    assert report.removed == {}
+
+
+def test_remove_nops_and_self_moves():
+    code, report = optimize(1, "NOP", "MOV r1, r1", "MOV @r1, @r1", "NOP")
+
+    assert words(code) == ["MOV 0 0"]
+    assert report.removed == {"nop": 2, "redundant_moves": 1}
+    assert report.operations_before == 4
+    assert report.operations_after == 1
+    assert report.removed_count == 3
+
+
+def test_remove_dead_code():
+    code, report = optimize(
+        1,
+        "CALL sub",
+        "END",
+        "PRINT 1",
+        "LABEL unused",
+        "PRINT 2",
+        "LABEL sub",
+        "PRINT 3",
+        "RET",
+        "PRINT 4",
+    )
+
+    assert words(code) == [
+        "CALL 1 0", "END 0 0", "LABEL 2 0", "LABEL 1 0", "PRINT 3 0",
+        "RET 0 0",
+    ]
+    assert report.removed == {"dead_code": 3}
+
+
+def test_remove_dead_code_iterative():
+    # Label used only from dead code is dead too
+    code, report = optimize(
+        1,
+        "END",
+        "JMP dead",
+        "LABEL dead",
+        "PRINT 1",
+    )
+
+    assert words(code) == ["END 0 0", "LABEL 1 0"]
+    assert report.removed == {"dead_code": 2}
+
+
+def test_remove_jumps_to_next():
+    code, report = optimize(
+        1,
+        "CMP r1, 0",
+        "JMP_EQ next",
+        "LABEL other",
+        "LABEL next",
+        "CALL sub",
+        "LABEL sub",
+        "RET",
+    )
+
+    assert words(code) == [
+        "CMP 0 0", "LABEL 2 0", "LABEL 1 0", "CALL 3 0", "LABEL 3 0",
+        "RET 0 0",
+    ]
+    assert report.removed == {"jump_to_next": 1}
+
+
+def test_constant_folding():
+    code, report = optimize(
+        1,
+        "MOV r1, 2", "ADD r1, 3", "MUL r1, r1", "SUB r1, 5", "NOT r1",
+        "MOV r2, 6", "DIV r2, 2",
+        "MOV r3, 1", "ADD r3, r1",
+    )
+
+    assert words(code) == [
+        "MOV 0 -21", "MOV 1 6", "DIV 1 2", "MOV 2 1", "ADD 2 0",
+    ]
+    assert report.removed == {"constant_folding": 4}
+
+
+def test_constant_folding_limits():
+    code, _ = optimize(1, "MOV r1, 2147483647", "ADD r1, 1")
+
+    assert words(code) == ["MOV 0 2147483647", "ADD 0 1"]
+
+
+def test_peephole_stops_on_labels():
+    code, report = optimize(1, "MOV r1, 2", "LABEL l", "ADD r1, 3")
+
+    assert words(code) == ["MOV 0 2", "LABEL 1 0", "ADD 0 3"]
+    assert report.removed_count == 0
+
+
+def test_jump_threading():
+    code, report = optimize(
+        2,
+        "CMP r1, 0",
+        "JMP_EQ first",
+        "CALL first",
+        "JMP exit",
+        "LABEL first",
+        "JMP second",
+        "LABEL second",
+        "LABEL other",
+        "JMP third",
+        "LABEL exit",
+        "PRINT 1",
+        "LABEL third",
+        "RET",
+    )
+
+    # Labels: first - 1, exit - 2, second - 3, other - 4, third - 5
+    assert words(code) == [
+        "CMP 0 0", "JMP_EQ 5 0", "CALL 5 0", "LABEL 1 0", "LABEL 3 0",
+        "LABEL 4 0", "LABEL 2 0", "PRINT 1 0", "LABEL 5 0", "RET 0 0",
+    ]
+    assert report.removed == {"dead_code": 2, "jump_to_next": 1}
+    assert report.threaded_jumps == 4
+
+
+def test_jump_threading_loop():
+    code, report = optimize(
+        2,
+        "JMP first",
+        "LABEL first",
+        "JMP second",
+        "LABEL second",
+        "JMP first",
+    )
+
+    assert words(code) == ["LABEL 1 0", "LABEL 2 0", "JMP 1 0"]
+    assert report.removed == {"jump_to_next": 2}
+    assert report.threaded_jumps == 0
+
+
+def test_jump_threading_only_on_level_two():
+    _, report = optimize(1, "JMP first", "END", "LABEL first", "JMP end",
+                         "LABEL end")
+
+    assert report.threaded_jumps == 0
+
+
+def test_temporary_register():
+    code, report = optimize(
+        2,
+        "MOV A, r2", "ADD A, r3", "MOV r2, A",
+        "MOV A, r1", "NOT A", "MOV r1, A",
+        "MOV A, r3", "SUB A, @A", "MOV r3, A",
+    )
+
+    # Moves into A are overwritten by next moves into A
+    assert words(code) == [
+        "ADD 1 2", "NOT 0 0", "MOV 4 2", "SUB 4 4", "MOV 2 4",
+    ]
+    assert report.removed == {"redundant_moves": 4}
+
+
+def test_overwritten_moves():
+    code, report = optimize(
+        2,
+        "MOV r1, r2", "MOV r1, 3",
+        "MOV r2, 1", "MOV r2, @r2",
+        "MOV r3, r4", "MOV r4, r3",
+    )
+
+    assert words(code) == ["MOV 0 3", "MOV 1 1", "MOV 1 1", "MOV 2 3"]
+    assert report.removed == {"redundant_moves": 2}
+
+
+def test_report():
+    report = OptimizationReport(level=1, operations_before=3)
+
+    report.count_removed("nop", 0)
+    report.count_removed("nop", 2)
+    report.operations_after = 1
+
+    assert report.removed == {"nop": 2}
+    assert report.removed_count == 2
+
+
+@pytest.mark.parametrize("level", [1, 2])
+@pytest.mark.parametrize("lines", PROGRAMS + [
+    [
+        "MOV r1, 5",
+        "LABEL loop",
+        "MOV A, r2", "ADD A, r1", "MOV r2, A",
+        "SUB r1, 1", "CMP r1, 0", "JMP_GT next", "JMP done",
+        "LABEL next", "JMP loop",
+        "LABEL done", "MOV r3, r3", "NOP", "END", "MOV r4, 1",
+    ],
+])
+def test_optimized_same_as_not_optimized(lines, level):
+    code = Parser().parse('\n'.join(lines))
+
+    optimized_code = Optimizer(level).optimize(code)
+
+    assert count_operations(optimized_code) <= count_operations(code)
+
+    expected = execute(code)
+    state = execute(optimized_code)
+
+    assert state.vm_registers == expected.vm_registers
+    assert state.vm_memory == expected.vm_memory
+    assert state.vm_call_stack == expected.vm_call_stack
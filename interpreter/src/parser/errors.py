@@ -14,9 +14,16 @@ class BadInPlaceValue(Exception):
 
 
 class ParsingError(Exception):
-    """Parsing error."""
+    """Parsing error.
 
-    def __init__(self, line_index, line, exception):
+    :param int line_index: Index of line from 0
+    :param str line: Code of line
+    :param Exception exception: Error of line
+    :param int column: Offset of bad word in line
+    """
+
+    def __init__(self, line_index, line, exception, column=0):
         self.line_index = line_index
         self.line_code = line
         self.exception = exception
+        self.column = column
@@ -21,6 +21,8 @@ class OperationArgumentType(enum.Enum):
     Register = 2
     RegisterPointer = 3
     InPlaceValue = 4
+    # Number of operation in compiled code, labels are resolved into it
+    Address = 5
 
 
 @dataclasses.dataclass
@@ -1,13 +1,11 @@
 """Module with Parser for code."""
 
+import re
 import typing
-import itertools
 
 from interpreter.src.lexer.keywords import (
     LANGUAGE_OPTYPES,
     LANGUAGE_REGISTERS,
-    Keyword,
-    Register
 )
 from interpreter.src.parser.errors import (
     BadOperationIdentifier,
@@ -36,6 +34,21 @@ NOP_ARG = OperationArgument(
     arg_type=OperationArgumentType.Nop
 )
 
+# Words of line are separated by spaces, commas and colons, comment is
+# from ';' till end of line. Every group matches, words are empty when
+# line has less of them, words after arguments are ignored
+LINE_PATTERN = re.compile(r"""
+    [\s,:]*(?P<operation>[^\s,:;]*)
+    [\s,:]*(?P<arg1>[^\s,:;]*)
+    [\s,:]*(?P<arg2>[^\s,:;]*)
+""", re.VERBOSE)
+
+# Name of register - index of register
+REGISTER_INDEXES: typing.Dict[str, int] = {
+    register: index
+    for index, register in enumerate(LANGUAGE_REGISTERS)
+}
+
 
 class Parser:
     """Code parser class.
@@ -51,9 +64,6 @@ class Parser:
     def parse(self, code: str) -> typing.List[Operation]:
         """Parse code into list of line by line operations to execute.
 
-        Split code line by line, parse line into Operation object and add
-        to all operations list.
-
         :param str code: Source code for parsing into Operations
 
         :raise ParserError: If any parser errors occured
@@ -61,34 +71,45 @@ class Parser:
         :return: List of Operations parsed from code
         :rtype: List[Operation]
         """
-        operations = []
+        return list(self.iter_parse(code.split('\n')))
 
-        for line_index, line in enumerate(code.split('\n')):
+    def iter_parse(self, lines: typing.Iterable[str]
+                   ) -> typing.Iterator[Operation]:
+        """Parse lines of code into operations one by one.
 
-            line_unindented = itertools.dropwhile(str.isspace, line)
-            line_without_comments = ''.join(
-                itertools.takewhile(
-                    lambda symbol: symbol != ';',
-                    line_unindented
-                )
-            )
+        Match every line by one regular expression and build Operation
+        object from words of line. Lines are read only when next operation
+        is needed, so lines of file are parsed without reading whole file.
 
-            if not line_without_comments:
+        :param lines: Lines of source code, e.g. opened file
+        :type lines: Iterable[str]
+
+        :raise ParserError: If any parser errors occured
+
+        :return: Iterator of Operations parsed from lines
+        :rtype: Iterator[Operation]
+        """
+        match_line = LINE_PATTERN.match
+
+        for line_index, line in enumerate(lines):
+            match = match_line(line)
+
+            if not match.group('operation'):
                 continue
 
             try:
-                operation = self.parse_line(line_without_comments)
+                operation = self.parse_match(match)
             except Exception as e:
-                raise ParsingError(line_index, line, e)
+                raise ParsingError(line_index, line.rstrip('\n'), e,
+                                   getattr(e, 'column', 0))
 
-            operations.append(operation)
-
-        return operations
+            yield operation
 
     def parse_line(self, line: str) -> Operation:
         """Parse line of code with one operation into Operation object.
 
-        Split line by spaces, we assume that operation everything is first.
+        Words of line are split by spaces, commas and colons, operation
+        word is first, arguments are after it.
 
         Check the operation and if it if available operations parse arguments.
 
@@ -101,17 +122,32 @@ class Parser:
         :return: Operation object builded from code line
         :rtype: :class:`~.Operation`
         """
-        words = line.replace(',', ':')\
-                    .replace(': ', ' ')\
-                    .replace(':', ' ')\
-                    .split(' ')
+        return self.parse_match(LINE_PATTERN.match(line))
+
+    def parse_match(self, match: typing.Match) -> Operation:
+        """Build Operation object from words of matched line.
+
+        Exception raised on bad word has ``column`` attribute with offset
+        of that word in line. Words after arguments of operation are
+        ignored.
+
+        :param match: Match of line by LINE_PATTERN
+        :type match: Match
+
+        :raise BadOperationIdentifier: if operation is not in allowed
+        :raise BadOperationArgument: If argument is bad or missed
 
-        operation, *args = words
+        :return: Operation object builded from code line
+        :rtype: :class:`~.Operation`
+        """
+        operation = match.group('operation')
+        op_type = LANGUAGE_OPTYPES.get(operation)
 
-        if Keyword(operation) not in LANGUAGE_OPTYPES:
-            raise BadOperationIdentifier(operation)
+        if op_type is None:
+            error = BadOperationIdentifier(operation)
+            error.column = match.start('operation')
 
-        op_type = LANGUAGE_OPTYPES[Keyword(operation)]
+            raise error
 
         if op_type is OperationType.Nop:
             return Operation(
@@ -121,9 +157,8 @@ class Parser:
             )
 
         elif op_type is OperationType.Unary:
-            argument = args[0]
             is_label_or_jump = operation in LABELS_OR_JUMPS
-            arg1 = self.parse_argument(argument, is_label_or_jump)
+            arg1 = self.parse_group(match, 'arg1', is_label_or_jump)
 
             if operation == 'NOT':
                 op_args = [arg1, arg1]
@@ -137,11 +172,9 @@ class Parser:
             )
 
         # Binary operation
-        arguments = [args[0], args[1]]
-
         arg12 = [
-            self.parse_argument(arg)
-            for arg in arguments
+            self.parse_group(match, 'arg1'),
+            self.parse_group(match, 'arg2')
         ]
 
         return Operation(
@@ -150,10 +183,29 @@ class Parser:
             op_args=arg12
         )
 
+    def parse_group(self, match: typing.Match, group: str,
+                    is_label_or_jump: bool = False) -> OperationArgument:
+        """Parse argument from group of matched line.
+
+        :raise BadOperationArgument: If argument is missed or it's bad
+        """
+        argument = match.group(group)
+
+        try:
+            if not argument:
+                raise BadOperationArgument("Missing argument")
+
+            return self.parse_argument(argument, is_label_or_jump)
+        except Exception as e:
+            e.column = match.start(group)
+
+            raise
+
     def parse_argument(self, argument: str, is_label_or_jump: bool = False):
         """Parse argument for operation.
 
         Check the argument type and build OperationArgument object.
+        New label gets next number after count of labels in table.
 
         :param str argument: Argument string from code
 
@@ -163,18 +215,20 @@ class Parser:
         :return: OperationArgument object builded from argument string
         :rtype: :class:`~.OperationArgument`
         """
-        is_reference = '@' in argument
+        is_reference = argument.startswith('@')
 
         if is_reference:
             argument = argument[1:]
 
-        if Register(argument) in LANGUAGE_REGISTERS:
+        register_index = REGISTER_INDEXES.get(argument)
+
+        if register_index is not None:
             arg_type = (
                 OperationArgumentType.RegisterPointer
                 if is_reference
                 else OperationArgumentType.Register
             )
-            arg_word = LANGUAGE_REGISTERS.index(Register(argument))
+            arg_word = register_index
 
         elif is_inplace(argument):
             arg_type = OperationArgumentType.InPlaceValue
@@ -183,10 +237,11 @@ class Parser:
         elif is_label_or_jump:
             arg_type = OperationArgumentType.Label
 
-            if argument in self.labels_table:
-                label_index = self.labels_table[argument]
-            else:
-                label_index = max(self.labels_table.values() or [0, ]) + 1
+            label_index = self.labels_table.get(argument)
+
+            if label_index is None:
+                # Labels are numbered from 1 in order of first use
+                label_index = len(self.labels_table) + 1
                 self.labels_table[argument] = label_index
 
             arg_word = label_index
@@ -208,9 +263,4 @@ def is_inplace(argument: str) -> bool:
     :return: True if argument is a digit of decimal else False
     :rtype: bool
     """
-    checks = [
-        str.isdigit,
-        str.isdecimal,
-    ]
-
-    return any(check(argument) for check in checks)
+    return argument.isdigit() or argument.isdecimal()
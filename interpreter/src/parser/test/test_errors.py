@@ -8,3 +8,4 @@ def test_parsing_error():
     assert parse_error.exception is exc
     assert parse_error.line_code == "MOV A, c"
     assert parse_error.line_index == 1
+    assert parse_error.column == 0
@@ -259,3 +259,56 @@ def test_parser_parse_line():
     )
 
     assert parsed_op == expected_op
+
+
+def test_parser_separators():
+    code = "\tLABEL loop: ; comment\r\n  MOV  A,1\r\n" \
+        "CMP A :@r2;MOV A, 1\n ; NOP"
+
+    parser = Parser()
+
+    assert parser.parse(code) == [
+        parser.parse_line("LABEL loop"),
+        parser.parse_line("MOV A, 1"),
+        parser.parse_line("CMP A, @r2"),
+    ]
+
+
+@pytest.mark.parametrize("line,column,message", [
+    ("MVO r1, 14", 0, "MVO"),
+    ("    MOV r1, rr", 12, "rr"),
+    ("  JMP", 5, "Missing argument"),
+    ("MOV r1 ; 14", 7, "Missing argument"),
+])
+def test_parser_error_column(line, column, message):
+    with pytest.raises(ParsingError) as exc_info:
+        Parser().parse("NOP\n" + line)
+
+    assert exc_info.value.line_index == 1
+    assert exc_info.value.line_code == line
+    assert exc_info.value.column == column
+    assert str(exc_info.value.exception) == message
+
+
+def test_parser_extra_words_ignored():
+    parser = Parser()
+
+    assert parser.parse("PRINT r1, r2\nRET 1\nADD r1, 1, 2 3 ; comment") == [
+        parser.parse_line("PRINT r1"),
+        parser.parse_line("RET"),
+        parser.parse_line("ADD r1, 1"),
+    ]
+
+
+def test_parser_many_labels():
+    count = 10000
+    code = "\n".join(
+        f"LABEL l{index}\nJMP l{index + 1}" for index in range(count)
+    )
+
+    parser = Parser()
+    operations = parser.parse(code)
+
+    # Labels are numbered from 1 in order of first use
+    assert list(parser.labels_table.values()) == list(range(1, count + 2))
+    assert operations[-1].op_args[0].arg_word == count + 1
@@ -0,0 +1,262 @@
+"""Module with batch runner of bytecode files in pool of processes.
+
+Every job is a bytecode file with input values. Jobs are sent to worker
+processes by chunks, every worker keeps decoded programs of files, so
+file is decoded (and compiled by engine) once per worker::
+
+    for result in run_many(jobs, workers=8):
+        print(result.output)
+
+Results are returned in order of completion. Count of jobs sent to
+workers and not returned yet is bounded, so jobs can be generated lazily
+and memory doesn't grow with count of jobs.
+"""
+
+import os
+import time
+import typing
+import pathlib
+import collections
+import dataclasses
+import concurrent.futures
+
+from interpreter.src.virtual_machine.bytecode_cache import load_program_file
+from interpreter.src.virtual_machine.py_jit import compile_program
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.program import Program
+from interpreter.src.virtual_machine.vm.vm_def import VmState
+from interpreter.src.virtual_machine.vm.vm_executor import (
+    ENGINES,
+    initialize_vm
+)
+
+# Count of jobs sent to worker at once
+DEFAULT_CHUNK_SIZE: int = 16
+
+# Count of chunks in flight per worker
+IN_FLIGHT_PER_WORKER: int = 4
+
+# Count of decoded programs kept by worker
+MAX_CACHED_PROGRAMS: int = 64
+
+
+@dataclasses.dataclass(frozen=True)
+class Job:
+    """Execution of bytecode file with input values.
+
+    :param str filename: Bytecode file
+
+    :param inputs: Values for INPUT operations
+    :type inputs: Tuple[int, ...]
+    """
+
+    filename: str
+    inputs: typing.Tuple[int, ...] = ()
+
+
+@dataclasses.dataclass(frozen=True)
+class JobResult:
+    """Result of job.
+
+    :param int index: Number of job in order of given jobs
+    :param str filename: Bytecode file
+
+    :param output: Values printed by program
+    :type output: List[int]
+
+    :param registers: Register file at end of executing
+    :type registers: List[int]
+
+    :param int steps: Count of executed instructions
+    :param float seconds: Time of executing
+
+    :param error: Error of executing, None if program finished
+    :type error: Optional[str]
+    """
+
+    index: int
+    filename: str
+    output: typing.List[int] = dataclasses.field(default_factory=list)
+    registers: typing.List[int] = dataclasses.field(default_factory=list)
+    steps: int = 0
+    seconds: float = 0.0
+    error: typing.Optional[str] = None
+
+
+# Programs decoded by worker, file name - (file stat, program), least
+# recently used program is dropped when there are too many of them
+_PROGRAMS: typing.MutableMapping[str, typing.Tuple[
+    typing.Tuple[int, ...], Program]] = collections.OrderedDict()
+
+
+def get_program(filename: str, engine: str) -> Program:
+    """Get decoded program of bytecode file, cached by worker.
+
+    Program is decoded again if file is replaced or changed. Only
+    MAX_CACHED_PROGRAMS recently used programs are kept.
+
+    :param str filename: Bytecode file
+    :param str engine: Name of engine, pyjit code is cached on disk
+
+    :raise Exception: If file is not a bytecode file
+
+    :return: Decoded program
+    :rtype: :class:`~.Program`
+    """
+    stat = os.stat(filename)
+    file_key = (stat.st_ino, stat.st_size, stat.st_mtime_ns)
+
+    cached = _PROGRAMS.get(filename)
+
+    if cached is not None and cached[0] == file_key:
+        _PROGRAMS.move_to_end(filename)
+        return cached[1]
+
+    program = load_program_file(filename)
+
+    if program is None:
+        raise Exception(f"Bad bytecode file {filename}")
+
+    if engine == 'pyjit':
+        compile_program(
+            program,
+            pathlib.Path(filename).with_suffix('.small_py')
+        )
+
+    _PROGRAMS[filename] = (file_key, program)
+    _PROGRAMS.move_to_end(filename)
+
+    while len(_PROGRAMS) > MAX_CACHED_PROGRAMS:
+        _PROGRAMS.popitem(last=False)
+
+    return program
+
+
+def run_job(index: int, job: Job, engine: str) -> JobResult:
+    """Execute one job, error of executing is returned in result.
+
+    :param int index: Number of job
+    :param Job job: Job to execute
+    :param str engine: Name of execution engine
+
+    :return: Result of job
+    :rtype: JobResult
+    """
+    output = ListSink()
+    vm_state: typing.Optional[VmState] = None
+    error = None
+    started = time.perf_counter()
+
+    try:
+        program = get_program(job.filename, engine)
+        # State is changed in place, so on error it's state of failure
+        vm_state = initialize_vm(program, output, job.inputs)
+        vm_state = ENGINES[engine](vm_state)
+    except Exception as exception:
+        error = f'{type(exception).__name__}: {exception}'
+
+    return JobResult(
+        index=index,
+        filename=job.filename,
+        output=output.values,
+        registers=list(vm_state.vm_register_file) if vm_state else [],
+        steps=vm_state.vm_steps if vm_state else 0,
+        seconds=time.perf_counter() - started,
+        error=error,
+    )
+
+
+def run_chunk(chunk: typing.List[typing.Tuple[int, Job]],
+              engine: str) -> typing.List[JobResult]:
+    """Execute chunk of numbered jobs in worker.
+
+    :return: Results of jobs
+    :rtype: List[JobResult]
+    """
+    return [run_job(index, job, engine) for index, job in chunk]
+
+
+def iter_chunks(
+        jobs: typing.Iterable[Job],
+        chunk_size: int
+) -> typing.Iterator[typing.List[typing.Tuple[int, Job]]]:
+    """Split jobs into chunks of numbered jobs, jobs are read lazily."""
+    chunk = []
+
+    for index, job in enumerate(jobs):
+        chunk.append((index, job))
+
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+
+    if chunk:
+        yield chunk
+
+
+def run_many(jobs: typing.Iterable[Job],
+             engine: str = "interpreter",
+             workers: typing.Optional[int] = None,
+             chunk_size: int = DEFAULT_CHUNK_SIZE,
+             max_in_flight: typing.Optional[int] = None
+             ) -> typing.Iterator[JobResult]:
+    """Execute jobs in pool of processes.
+
+    Failed job doesn't stop other jobs, its error is returned in result.
+    Execution is stopped when returned iterator is closed.
+
+    :param jobs: Jobs to execute, can be a generator
+    :type jobs: Iterable[Job]
+
+    :param str engine: Name of execution engine
+
+    :param workers: Count of processes, count of CPUs by default,
+                    jobs are executed in current process if it's 1
+    :type workers: Optional[int]
+
+    :param int chunk_size: Count of jobs sent to worker at once
+
+    :param max_in_flight: Max count of chunks sent to workers and not
+                          returned yet, 4 per worker by default
+    :type max_in_flight: Optional[int]
+
+    :raise ValueError: If unknown engine given
+
+    :return: Iterator of results in order of completion
+    :rtype: Iterator[JobResult]
+    """
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}")
+
+    workers = workers or os.cpu_count() or 1
+    chunks = iter_chunks(jobs, chunk_size)
+
+    if workers == 1:
+        for chunk in chunks:
+            yield from run_chunk(chunk, engine)
+
+        return
+
+    max_in_flight = max_in_flight or workers * IN_FLIGHT_PER_WORKER
+
+    with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+        in_flight = set()
+
+        try:
+            for chunk in chunks:
+                if len(in_flight) >= max_in_flight:
+                    done, in_flight = concurrent.futures.wait(
+                        in_flight,
+                        return_when=concurrent.futures.FIRST_COMPLETED
+                    )
+
+                    for future in done:
+                        yield from future.result()
+
+                in_flight.add(executor.submit(run_chunk, chunk, engine))
+
+            for future in concurrent.futures.as_completed(in_flight):
+                yield from future.result()
+        finally:
+            for future in in_flight:
+                future.cancel()
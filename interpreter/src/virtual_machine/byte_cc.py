@@ -1,17 +1,74 @@
 """Module with bytecode compiler."""
 
 import io
+import array
 import typing
 import struct
+import hashlib
 import itertools
+import dataclasses
 
-from interpreter.src.parser.operation import Operation
+from interpreter.src.parser.operation import (
+    Operation,
+    OperationArgument,
+    OperationArgumentType,
+)
 
-from interpreter.src.virtual_machine.bytecode import BYTECODES, Keyword
-from interpreter.src.virtual_machine.errors import BadOperationSize
+from interpreter.src.virtual_machine.bytecode import (
+    BYTECODES,
+    OPERATION_STRUCT,
+    Keyword
+)
+from interpreter.src.virtual_machine.errors import (
+    BadOperationSize,
+    UndefinedLabel,
+)
 
-OP_SIZE: int = 12
-MAG_NUM: int = 0x1235
+OP_SIZE: int = OPERATION_STRUCT.size
+MAG_NUM: int = 0x1237
+
+# Change it on every change of generated bytecode, it invalidates bytecode
+COMPILER_VERSION: int = 2
+
+# Size of source digest in bytes
+DIGEST_SIZE: int = 16
+
+# Magical number, compiler version, optimization level, crc of source,
+# count of operations in code, digest of source and size of VM memory.
+# Little-endian without alignment, so header is the same on every platform
+META_STRUCT = struct.Struct(f'<HHBII{DIGEST_SIZE}sI')
+META_FORMAT: str = META_STRUCT.format
+META_SIZE: int = META_STRUCT.size
+
+# Offsets of first and second argument words in encoded operation
+ARGUMENT_OFFSETS: typing.Tuple[int, int] = (
+    struct.calcsize('=hb'),
+    struct.calcsize('=hbib'),
+)
+ARGUMENT_STRUCT = struct.Struct('=i')
+
+# Symbol entry: address of label, size of label name, then name itself
+SYMBOL_STRUCT = struct.Struct('=IH')
+
+
+@dataclasses.dataclass(frozen=True)
+class BytecodeMetadata:
+    """Metadata section of bytecode.
+
+    :param int file_crc: CRC32 of source
+    :param int code_size: Count of operations in code
+    :param bytes source_digest: BLAKE2b digest of source
+    :param int optimization_level: Level of optimizer used for compile
+    :param int compiler_version: Version of compiler made bytecode
+    :param int memory_size: Size of VM memory, 0 - default size
+    """
+
+    file_crc: int
+    code_size: int
+    source_digest: bytes = bytes(DIGEST_SIZE)
+    optimization_level: int = 0
+    compiler_version: int = COMPILER_VERSION
+    memory_size: int = 0
 
 
 class BytecodeCompiler:
@@ -20,50 +77,196 @@ class BytecodeCompiler:
     Compiles operations to bytecode.
     """
 
-    def __init__(self, file_crc: int):
-        """Initialize compiler with current file crc."""
+    def __init__(self, file_crc: int,
+                 source_digest: bytes = bytes(DIGEST_SIZE),
+                 optimization_level: int = 0,
+                 memory_size: int = 0):
+        """Initialize compiler with current file crc and digest.
+
+        :param int file_crc: CRC32 of source
+        :param bytes source_digest: Digest of source
+        :param int optimization_level: Level of optimizer used for code
+        :param int memory_size: Size of VM memory, 0 - default size
+        """
         self.file_crc = file_crc
+        self.source_digest = source_digest
+        self.optimization_level = optimization_level
+        self.memory_size = memory_size
 
-    def compile(self, code: typing.List[Operation]) -> io.BytesIO:
+    def compile(
+            self,
+            code: typing.List[Operation],
+            labels_table: typing.Optional[typing.Dict[str, int]] = None
+    ) -> io.BytesIO:
         """Compile list of operations in a single byte-code.
 
+        Labels are resolved into addresses of operations, so LABEL
+        operations are not written to bytecode. If labels table is given,
+        symbol section with addresses of labels written after code.
+
         :param code: List of operations to compile
         :type code: List[Operation]
 
+        :param labels_table: Labels table of parser, name - label index
+        :type labels_table: Dict[str, int]
+
         :raise BadOperationSize: If bad operation size will be generated
+        :raise UndefinedLabel: If jump to not defined label found
 
         :return: BytesIO with written bytecode
         :rtype: io.BytesIO
         """
         bytecode_buffer = io.BytesIO()
 
-        metadata = self.generate_metadata(self.file_crc)
+        self.compile_stream(code, bytecode_buffer, labels_table)
+
+        bytecode_buffer.seek(0)
+
+        return bytecode_buffer
+
+    def compile_stream(
+            self,
+            code: typing.Iterable[Operation],
+            output: typing.BinaryIO,
+            labels_table: typing.Optional[typing.Dict[str, int]] = None
+    ) -> int:
+        """Compile operations one by one straight into output.
+
+        Operations are encoded as they come, so code isn't kept in memory.
+        Label defined before jump is resolved at once, jump to label
+        defined later is written with address 0 and back-patched at the
+        end, as count of operations in metadata. Only addresses of labels
+        and offsets of not resolved jumps are kept until the end.
+
+        :param code: Operations to compile, e.g. iterator of parser
+        :type code: Iterable[Operation]
 
-        bytecode_buffer.write(metadata)
+        :param output: Seekable binary file, bytecode is written from its
+                       current position
+        :type output: BinaryIO
+
+        :param labels_table: Labels table of parser, name - label index.
+                             It's read after last operation, so table can
+                             be filled by the same parser meanwhile
+        :type labels_table: Dict[str, int]
+
+        :raise BadOperationSize: If bad operation size will be generated
+        :raise UndefinedLabel: If jump to not defined label found
+
+        :return: Count of operations in code
+        :rtype: int
+        """
+        start = output.tell()
+        position = start + META_SIZE
+        write = output.write
+        pack = OPERATION_STRUCT.pack
+
+        # Label index - address of operation after LABEL
+        labels: typing.Dict[int, int] = {}
+        # Labels of not resolved arguments and offsets of their words
+        patch_labels = array.array('q')
+        patch_offsets = array.array('Q')
+
+        def encode_argument(argument: OperationArgument,
+                            offset: int) -> typing.Tuple[int, int]:
+            if argument.arg_type is not OperationArgumentType.Label:
+                return argument.arg_type.value, argument.arg_word
+
+            label_address = labels.get(argument.arg_word)
+
+            if label_address is None:
+                patch_labels.append(argument.arg_word)
+                patch_offsets.append(position + offset)
+                label_address = 0
+
+            return OperationArgumentType.Address.value, label_address
+
+        write(self.generate_metadata(self.file_crc, 0))
+
+        address = 0
 
         for operation in code:
+            if operation.op_word == "LABEL":
+                # If label defined twice, first definition is used
+                labels.setdefault(operation.op_args[0].arg_word, address)
+                continue
+
             try:
-                encoded_operation = self.encode_operation(operation)
+                arg1, arg2 = operation.op_args
+
+                write(pack(
+                    BYTECODES[Keyword(operation.op_word)],
+                    *encode_argument(arg1, ARGUMENT_OFFSETS[0]),
+                    *encode_argument(arg2, ARGUMENT_OFFSETS[1])
+                ))
             except KeyError:
                 raise Exception("Bad opcode provided")
-            except struct.error:
+            except (struct.error, ValueError):
                 raise BadOperationSize("Bad size of arguments provided")
 
-            bytecode_buffer.write(encoded_operation)
+            position += OP_SIZE
+            address += 1
 
-        bytecode_buffer.seek(0)
+        for label_index in patch_labels:
+            if label_index not in labels:
+                raise UndefinedLabel(label_index)
 
-        return bytecode_buffer
+        if labels_table:
+            write(self.generate_symbols({
+                name: labels[label_index]
+                for name, label_index in labels_table.items()
+                if label_index in labels
+            }))
+
+        end = output.tell()
+
+        for label_index, offset in zip(patch_labels, patch_offsets):
+            output.seek(offset)
+            write(ARGUMENT_STRUCT.pack(labels[label_index]))
 
-    def generate_metadata(self, file_crc: int) -> bytes:
+        output.seek(start)
+        write(self.generate_metadata(self.file_crc, address))
+        output.seek(end)
+
+        return address
+
+    def generate_metadata(self, file_crc: int, code_size: int) -> bytes:
         """Generate bytecode-file metadata.
 
         :param int file_crc: CRC sum of file to compile
+        :param int code_size: Count of operations in code
 
         :return: Bytes of metadata
         :rtype: bytes
         """
-        return struct.pack('hI', MAG_NUM, file_crc)
+        return META_STRUCT.pack(
+            MAG_NUM,
+            COMPILER_VERSION,
+            self.optimization_level,
+            file_crc,
+            code_size,
+            self.source_digest,
+            self.memory_size
+        )
+
+    def generate_symbols(self, symbols: typing.Dict[str, int]) -> bytes:
+        """Generate symbol section used for debugging.
+
+        :param symbols: Addresses of labels, label name - address
+        :type symbols: Dict[str, int]
+
+        :return: Bytes of symbol section
+        :rtype: bytes
+        """
+        section = bytearray()
+
+        for name, address in symbols.items():
+            encoded_name = name.encode('utf-8')
+
+            section += SYMBOL_STRUCT.pack(address, len(encoded_name))
+            section += encoded_name
+
+        return bytes(section)
 
     def encode_operation(self, operation: Operation) -> bytes:
         """Encode operation to bytes in byte-code.
@@ -85,9 +288,136 @@ class BytecodeCompiler:
             )
         )
 
-        operation_code = struct.pack(
-            '=hbibi',
-            op_code, *arguments
-        )
+        operation_code = OPERATION_STRUCT.pack(op_code, *arguments)
 
         return operation_code
+
+
+def resolve_labels(
+        code: typing.List[Operation]
+) -> typing.Tuple[typing.List[Operation], typing.Dict[int, int]]:
+    """Resolve labels into addresses of operations.
+
+    Every LABEL operation is dropped from code and every label argument
+    replaced by address of operation which follows that LABEL.
+    If label defined twice, first definition is used.
+
+    :param code: List of operations with labels
+    :type code: List[Operation]
+
+    :raise UndefinedLabel: If jump to not defined label found
+
+    :return: Operations without labels and addresses of labels
+    :rtype: Tuple[List[Operation], Dict[int, int]]
+    """
+    labels: typing.Dict[int, int] = {}
+    address = 0
+
+    for operation in code:
+        if operation.op_word == "LABEL":
+            labels.setdefault(operation.op_args[0].arg_word, address)
+        else:
+            address += 1
+
+    def resolve(argument: OperationArgument) -> OperationArgument:
+        if argument.arg_type is not OperationArgumentType.Label:
+            return argument
+
+        if argument.arg_word not in labels:
+            raise UndefinedLabel(argument.arg_word)
+
+        return OperationArgument(
+            arg_type=OperationArgumentType.Address,
+            arg_word=labels[argument.arg_word]
+        )
+
+    resolved_code = [
+        dataclasses.replace(
+            operation,
+            op_args=[resolve(arg) for arg in operation.op_args]
+        )
+        for operation in code
+        if operation.op_word != "LABEL"
+    ]
+
+    return resolved_code, labels
+
+
+def read_symbols(section: bytes) -> typing.Dict[str, int]:
+    """Read symbol section of bytecode.
+
+    :param bytes section: Bytes of symbol section
+
+    :return: Addresses of labels, label name - address
+    :rtype: Dict[str, int]
+    """
+    symbols = {}
+    position = 0
+
+    while position < len(section):
+        address, name_size = SYMBOL_STRUCT.unpack_from(section, position)
+        position += SYMBOL_STRUCT.size
+
+        name = bytes(section[position:position + name_size]).decode('utf-8')
+        position += name_size
+
+        symbols[name] = address
+
+    return symbols
+
+
+def calculate_digest(source: bytes) -> bytes:
+    """Calculate digest of source, used for invalidation of bytecode.
+
+    :param bytes source: Source code
+
+    :return: BLAKE2b digest of source
+    :rtype: bytes
+    """
+    return new_digest(source).digest()
+
+
+def new_digest(source: bytes = b'') -> 'hashlib.blake2b':
+    """Make hash object of source digest, more data is added by update.
+
+    :param bytes source: Beginning of source code
+
+    :return: BLAKE2b hash object
+    :rtype: hashlib.blake2b
+    """
+    return hashlib.blake2b(source, digest_size=DIGEST_SIZE)
+
+
+def read_metadata(bytecode: bytes) -> typing.Optional[BytecodeMetadata]:
+    """Read metadata section of bytecode.
+
+    :param bytecode: Bytecode or its beginning
+    :type bytecode: bytes-like object
+
+    :return: Metadata or None if it's not a bytecode of this format
+    :rtype: Optional[BytecodeMetadata]
+    """
+    if len(bytecode) < META_SIZE:
+        return None
+
+    (
+        mag_number,
+        compiler_version,
+        optimization_level,
+        file_crc,
+        code_size,
+        source_digest,
+        memory_size
+    ) = META_STRUCT.unpack_from(bytecode)
+
+    if mag_number != MAG_NUM:
+        return None
+
+    return BytecodeMetadata(
+        file_crc=file_crc,
+        code_size=code_size,
+        source_digest=source_digest,
+        optimization_level=optimization_level,
+        compiler_version=compiler_version,
+        memory_size=memory_size,
+    )
@@ -1,6 +1,7 @@
 """Module with predefined bytecodes."""
 
-from typing import Dict
+import struct
+from typing import Dict, FrozenSet
 
 from interpreter.src.lexer.keywords import Keyword, LANGUAGE_OPTYPES
 
@@ -10,3 +11,22 @@ BYTECODES: Dict[Keyword, int] = {
     keyword: code
     for code, keyword in enumerate(LANGUAGE_OPTYPES.keys())
 }
+
+
+# Operations with address of another operation as first argument
+JUMP_BYTECODES: FrozenSet[int] = frozenset(
+    BYTECODES[Keyword(keyword)]
+    for keyword in ("JMP", "JMP_EQ", "JMP_GT", "JMP_LT", "JMP_NE", "CALL")
+)
+
+
+# Operations after which next instruction starts new basic block
+BLOCK_END_BYTECODES: FrozenSet[int] = JUMP_BYTECODES | frozenset(
+    BYTECODES[Keyword(keyword)]
+    for keyword in ("RET", "END")
+)
+
+
+# Every operation is packed as:
+# op_code, arg1 type, arg1, arg2 type, arg2
+OPERATION_STRUCT = struct.Struct('=hbibi')
@@ -0,0 +1,273 @@
+"""Module with content-addressed cache of compiled bytecode.
+
+Bytecode of source stored in cache directory by digest of source,
+compiler version, optimization level and size of VM memory (if it's not
+default), so identical sources share one compiled file::
+
+    cache_dir/ab/ab12...ef-v2-O2.small_c
+    cache_dir/ab/ab12...ef-v2-O2-M1048576.small_c
+
+Files are never changed in place, they are replaced atomically, so
+bytecode file can be a hard link to cached file.
+"""
+
+import os
+import typing
+import shutil
+import pathlib
+import tempfile
+import contextlib
+
+from interpreter.src.virtual_machine.byte_cc import (
+    COMPILER_VERSION,
+    META_SIZE,
+    OP_SIZE,
+    BytecodeMetadata,
+    read_metadata,
+    read_symbols,
+)
+from interpreter.src.virtual_machine.errors import BadOperationSize
+from interpreter.src.virtual_machine.vm.program import (
+    Program,
+    load_program,
+    map_file
+)
+
+PathLike = typing.Union[str, pathlib.Path]
+
+
+def cache_path(cache_dir: PathLike, source_digest: bytes,
+               optimization_level: int = 0,
+               memory_size: int = 0) -> pathlib.Path:
+    """Path of cached bytecode for source.
+
+    :param cache_dir: Cache directory
+    :type cache_dir: str or pathlib.Path
+
+    :param bytes source_digest: Digest of source
+    :param int optimization_level: Level of optimizer
+    :param int memory_size: Size of VM memory, 0 - default size
+
+    :return: Path of bytecode in cache
+    :rtype: pathlib.Path
+    """
+    digest = source_digest.hex()
+    memory_suffix = f"-M{memory_size}" if memory_size else ""
+
+    return (
+        pathlib.Path(cache_dir)
+        / digest[:2]
+        / f"{digest}-v{COMPILER_VERSION}-O{optimization_level}"
+          f"{memory_suffix}.small_c"
+    )
+
+
+def read_file_metadata(
+        filename: PathLike
+) -> typing.Optional[BytecodeMetadata]:
+    """Read metadata of bytecode file, only header of file is read.
+
+    :param filename: Bytecode file
+    :type filename: str or pathlib.Path
+
+    :return: Metadata or None if file not exists or it's not a bytecode
+    :rtype: Optional[BytecodeMetadata]
+    """
+    try:
+        with open(filename, 'rb') as bytecode_file:
+            return read_metadata(bytecode_file.read(META_SIZE))
+    except FileNotFoundError:
+        return None
+
+
+def load_program_file(filename: PathLike) -> typing.Optional[Program]:
+    """Decode code of bytecode file into Program.
+
+    Code is decoded right from mapped file, without reading it into memory.
+
+    :param filename: Bytecode file
+    :type filename: str or pathlib.Path
+
+    :raise BadOperationSize: If file is shorter than code in header
+
+    :return: Program or None if it's not a bytecode file
+    :rtype: Optional[Program]
+    """
+    with map_file(filename) as bytecode:
+        metadata = read_metadata(bytecode)
+
+        if metadata is None:
+            return None
+
+        code_size = metadata.code_size * OP_SIZE
+
+        # Symbol section after code is not needed for execution
+        with bytecode[META_SIZE:META_SIZE + code_size] as code:
+            if len(code) != code_size:
+                raise BadOperationSize("Bad size of code provided")
+
+            return load_program(code, metadata.memory_size)
+
+
+def load_symbols_file(filename: PathLike) -> typing.Dict[str, int]:
+    """Read symbol section of bytecode file.
+
+    :param filename: Bytecode file
+    :type filename: str or pathlib.Path
+
+    :return: Addresses of labels, label name - address, empty if it's
+             not a bytecode file
+    :rtype: Dict[str, int]
+    """
+    with map_file(filename) as bytecode:
+        metadata = read_metadata(bytecode)
+
+        if metadata is None:
+            return {}
+
+        with bytecode[META_SIZE + metadata.code_size * OP_SIZE:] as section:
+            return read_symbols(section)
+
+
+def is_actual(filename: PathLike, file_crc: int, source_digest: bytes,
+              optimization_level: int = 0, memory_size: int = 0) -> bool:
+    """Check that bytecode file is compiled from source by this compiler.
+
+    :param filename: Bytecode file
+    :type filename: str or pathlib.Path
+
+    :param int file_crc: CRC32 of source
+    :param bytes source_digest: Digest of source
+    :param int optimization_level: Level of optimizer
+    :param int memory_size: Size of VM memory, 0 - default size
+
+    :return: True if bytecode is actual
+    :rtype: bool
+    """
+    metadata = read_file_metadata(filename)
+
+    return metadata is not None and (
+        metadata.file_crc,
+        metadata.source_digest,
+        metadata.optimization_level,
+        metadata.compiler_version,
+        metadata.memory_size,
+    ) == (file_crc, source_digest, optimization_level, COMPILER_VERSION,
+          memory_size)
+
+
+def current_umask() -> int:
+    """Get umask of process, it can be read only by setting new one.
+
+    :return: File mode creation mask
+    :rtype: int
+    """
+    umask = os.umask(0o022)
+    os.umask(umask)
+
+    return umask
+
+
+@contextlib.contextmanager
+def open_atomic(filename: PathLike) -> typing.Iterator[typing.BinaryIO]:
+    """Open temporary file, which replaces file atomically after writing.
+
+    Temporary file is in the same directory, so it's renamed into file.
+    If exception raised while writing, temporary file is removed and
+    file is not changed. Mode of file is set by umask like for files made
+    by open, not 0o600 of temporary files.
+
+    :param filename: File to write
+    :type filename: str or pathlib.Path
+
+    :return: Context manager of temporary file opened for binary writing
+    :rtype: ContextManager[BinaryIO]
+    """
+    path = pathlib.Path(filename)
+    descriptor, temporary_name = tempfile.mkstemp(
+        dir=path.parent,
+        prefix=f'.{path.name}.',
+        suffix='.tmp'
+    )
+
+    try:
+        with os.fdopen(descriptor, 'w+b') as temporary_file:
+            os.fchmod(temporary_file.fileno(), 0o666 & ~current_umask())
+
+            yield temporary_file
+
+        os.replace(temporary_name, path)
+    except BaseException:
+        os.unlink(temporary_name)
+        raise
+
+
+def write_atomic(filename: PathLike, data: bytes):
+    """Write file atomically, readers see old or new file, never a part.
+
+    :param filename: File to write
+    :type filename: str or pathlib.Path
+
+    :param bytes data: Content of file
+    """
+    with open_atomic(filename) as temporary_file:
+        temporary_file.write(data)
+
+
+def link_atomic(source: PathLike, filename: PathLike):
+    """Make file a hard link to source atomically.
+
+    If hard link can't be made (e.g. files are on different file
+    systems), source is copied.
+
+    :param source: Existing file
+    :type source: str or pathlib.Path
+
+    :param filename: File to replace with link
+    :type filename: str or pathlib.Path
+    """
+    path = pathlib.Path(filename)
+    temporary_path = path.with_name(f'.{path.name}.{os.getpid()}.link')
+
+    try:
+        os.link(source, temporary_path)
+    except OSError:
+        with open(source, 'rb') as source_file, \
+                open_atomic(path) as temporary_file:
+            shutil.copyfileobj(source_file, temporary_file)
+
+        return
+
+    try:
+        os.replace(temporary_path, path)
+    except BaseException:
+        os.unlink(temporary_path)
+        raise
+
+
+def store_file(cache_dir: PathLike, source_digest: bytes,
+               optimization_level: int, bytecode_file: PathLike,
+               memory_size: int = 0) -> pathlib.Path:
+    """Store bytecode file in cache as hard link to it.
+
+    :param cache_dir: Cache directory
+    :type cache_dir: str or pathlib.Path
+
+    :param bytes source_digest: Digest of source
+    :param int optimization_level: Level of optimizer
+
+    :param bytecode_file: Compiled bytecode file
+    :type bytecode_file: str or pathlib.Path
+
+    :param int memory_size: Size of VM memory, 0 - default size
+
+    :return: Path of bytecode in cache
+    :rtype: pathlib.Path
+    """
+    path = cache_path(cache_dir, source_digest, optimization_level,
+                      memory_size)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    link_atomic(bytecode_file, path)
+
+    return path
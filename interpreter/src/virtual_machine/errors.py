@@ -3,3 +3,42 @@
 
 class BadOperationSize(Exception):
     """Bad operation size genegerated/written to bytecode."""
+
+
+class UndefinedLabel(Exception):
+    """Jump or call to label which is not defined in code."""
+
+    def __init__(self, label_index):
+        super().__init__(f"Undefined label {label_index}")
+        self.label_index = label_index
+
+
+class InputExhausted(Exception):
+    """INPUT operation executed, but input source has no more values."""
+
+
+class ExecutionLimitExceeded(Exception):
+    """Execution stopped by limit of executed instructions or of time.
+
+    :param str message: Description of exceeded limit
+    :param vm_state: VmState at moment of stop, it can be executed further
+    :type vm_state: :class:`~.VmState`
+    """
+
+    def __init__(self, message: str, vm_state):
+        super().__init__(message)
+        self.vm_state = vm_state
+        self.steps = vm_state.vm_steps
+
+
+class MemoryFault(Exception):
+    """Memory cell read or written by address out of memory.
+
+    :param int address: Bad address
+    :param int size: Size of memory
+    """
+
+    def __init__(self, address, size: int):
+        super().__init__(f"Address {address} is out of memory of size {size}")
+        self.address = address
+        self.size = size
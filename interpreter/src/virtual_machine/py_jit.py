@@ -0,0 +1,668 @@
+"""Module with ahead-of-time compiler of operations to Python code.
+
+Whole program translated into one Python function:
+
+    * registers become local variables
+    * memory is VM memory list
+    * every basic block becomes branch of ``while`` loop dispatched by
+      address of first operation in block
+    * CALL and RET use call stack of VmState with return addresses
+    * block memory and vector operations call functions of
+      :mod:`~.vm.memory_ops` and :mod:`~.vm.vector_ops`, which check
+      ranges of cells
+    * executed instructions are counted by whole blocks, limit of executed
+      instructions is checked before every block
+    * lines of every operation end with ``# op <address>`` comment, so
+      failed operation is found by line number of traceback, code pointer
+      points to it and only operations before it are counted
+
+Generated source compiled with ``compile()`` and can be cached on disk.
+"""
+
+import re
+import sys
+import typing
+import hashlib
+import pathlib
+
+from interpreter.src.lexer.keywords import LANGUAGE_REGISTERS
+from interpreter.src.parser.operation import (
+    Operation,
+    OperationArgument,
+    OperationArgumentType,
+)
+
+from interpreter.src.virtual_machine.byte_cc import resolve_labels
+from interpreter.src.virtual_machine.bytecode_cache import write_atomic
+from interpreter.src.virtual_machine.vm import VM_BYTECODE_FUNC
+from interpreter.src.virtual_machine.vm.vm_def import VmState
+from interpreter.src.virtual_machine.vm.memory_ops import (
+    memory_copy,
+    memory_set,
+    memory_compare
+)
+from interpreter.src.virtual_machine.vm.vector_ops import (
+    VECTOR_OPERATIONS,
+    vector_apply,
+    vector_sum
+)
+from interpreter.src.virtual_machine.vm.program import (
+    Program,
+    decode_operations
+)
+
+# Change it on every change of generated code, it invalidates caches
+PYJIT_VERSION: int = 9
+
+FUNCTION_NAME: str = "simple_lang_program"
+
+# Max count of blocks checked one by one in dispatch
+DISPATCH_LEAF_SIZE: int = 4
+
+# Comments of generated lines with address of block or operation
+BLOCK_COMMENT = re.compile(r"# block (\d+):(\d+)$")
+OPERATION_COMMENT = re.compile(r"# op (\d+)$")
+
+BINARY_OPERATIONS: typing.Dict[str, str] = {
+    # Format of result, 0 - first argument, 1 - second argument
+    "ADD": "{0} + {1}",
+    "SUB": "{0} - {1}",
+    "MUL": "{0} * {1}",
+    "DIV": "{0} / {1}",
+    "AND": "{0} & {1}",
+    "OR": "{0} | {1}",
+    "XOR": "{0} ^ {1}",
+    # NOT operation works because it's a parser dependent hack
+    "NOT": "~{1}",
+    "MOV": "{1}",
+}
+
+CONDITIONAL_JUMPS: typing.Dict[str, str] = {
+    "JMP_EQ": "r5",
+    "JMP_LT": "r6",
+    "JMP_GT": "r7",
+    "JMP_NE": "r8",
+}
+
+BLOCK_ENDS = ("JMP", "CALL", "RET", "END", *CONDITIONAL_JUMPS)
+
+# Lines which set EQ, LT, GT, NE registers by left and right values
+COMPARE_LINES: typing.List[str] = [
+    "if left > right:",
+    "    r7 = True",
+    "    r8 = True",
+    "elif left < right:",
+    "    r6 = True",
+    "    r8 = True",
+    "elif left == right:",
+    "    r5 = True",
+    "    r6 = False",
+    "    r7 = False",
+    "    r8 = False",
+]
+
+# Functions called by generated code
+GENERATED_GLOBALS: typing.Dict[str, typing.Callable] = {
+    "memory_copy": memory_copy,
+    "memory_set": memory_set,
+    "memory_compare": memory_compare,
+    "vector_apply": vector_apply,
+    "vector_sum": vector_sum,
+}
+
+# Operation - indexes of arguments which are starts of ranges of cells,
+# ranges are checked by called functions
+RANGE_ARGUMENTS: typing.Dict[str, typing.Tuple[int, ...]] = {
+    "MEMCPY": (0, 1),
+    "MEMSET": (0, ),
+    "MEMCMP": (0, 1),
+    **{op_word: (0, 1) for op_word in VECTOR_OPERATIONS},
+    "VSUM": (1, ),
+}
+
+
+class PythonCompiler:
+    """Compiler of operations into source of Python function.
+
+    Generated function has signature::
+
+        simple_lang_program(vm_state, read_input_value, print_value,
+                            max_steps=sys.maxsize)
+
+    and executes program from current instruction of VmState, which must
+    be first operation of basic block. Function returns before end of
+    code, at beginning of block, when count of executed instructions
+    reaches ``max_steps``, so it can exceed limit by one block.
+    """
+
+    def compile(self, code: typing.List[Operation]) -> str:
+        """Compile list of operations into Python source.
+
+        :param code: List of operations, labels may be already resolved
+        :type code: List[Operation]
+
+        :raise UndefinedLabel: If jump to not defined label found
+
+        :return: Source of Python module with one function
+        :rtype: str
+        """
+        code, _ = resolve_labels(code)
+
+        blocks = self.split_blocks(code)
+
+        lines = [
+            f"def {FUNCTION_NAME}(vm_state, read_input_value, print_value,"
+            f" max_steps={sys.maxsize}):",
+        ]
+
+        # Program without operations, e.g. with labels only, does nothing
+        if not blocks:
+            return "\n".join(lines + ["    return vm_state"]) + "\n"
+
+        lines += [
+            "    registers = vm_state.vm_register_file",
+            "    memory = vm_state.vm_memory",
+            "    memory_size = memory.size",
+            "    cells = memory.cells()",
+            "    call_stack = vm_state.vm_call_stack",
+        ]
+        lines += [
+            f"    r{index} = registers[{index}]"
+            for index, _ in enumerate(LANGUAGE_REGISTERS)
+        ]
+        lines += [
+            "    address = vm_state.vm_code_pointer",
+            "    steps = vm_state.vm_steps",
+            "    try:",
+            f"        while address < {len(code)} and steps < max_steps:",
+        ]
+        lines += self.generate_dispatch(code, blocks, sorted(blocks), 3)
+        lines += [
+            "    except BaseException as error:",
+            "        # Failed operation and operations after it in block",
+            "        # are not executed",
+            "        fault = fault_lines.get(error.__traceback__.tb_lineno)",
+            "        if fault is not None:",
+            "            address, block_end = fault",
+            "            steps -= block_end - address",
+            "        raise",
+            "    finally:",
+        ]
+        lines += [
+            f"        registers[{index}] = r{index}"
+            for index, _ in enumerate(LANGUAGE_REGISTERS)
+        ]
+        lines += [
+            "        vm_state.vm_code_pointer = address",
+            "        vm_state.vm_steps = steps",
+            "    return vm_state",
+        ]
+
+        return "\n".join(lines) + "\n"
+
+    def split_blocks(self,
+                     code: typing.List[Operation]) -> typing.Dict[int, int]:
+        """Split code into basic blocks.
+
+        Block starts at beginning of code, at target of jump and after
+        every jump, call, return and end of program.
+
+        :param code: Operations with resolved labels
+        :type code: List[Operation]
+
+        :return: Blocks, address of first operation - address after last
+        :rtype: Dict[int, int]
+        """
+        starts = {0} if code else set()
+
+        for address, operation in enumerate(code):
+            if operation.op_word not in BLOCK_ENDS:
+                continue
+
+            starts.add(address + 1)
+
+            target = operation.op_args[0]
+
+            if target.arg_type is OperationArgumentType.Address:
+                starts.add(target.arg_word)
+
+        starts = sorted(start for start in starts if start < len(code))
+
+        return dict(zip(starts, starts[1:] + [len(code)]))
+
+    def generate_dispatch(self, code: typing.List[Operation],
+                          blocks: typing.Dict[int, int],
+                          starts: typing.List[int],
+                          indent: int) -> typing.List[str]:
+        """Generate binary search of block by address.
+
+        :return: Lines of code
+        :rtype: List[str]
+        """
+        prefix = "    " * indent
+
+        if len(starts) > DISPATCH_LEAF_SIZE:
+            middle = len(starts) // 2
+
+            return [
+                f"{prefix}if address < {starts[middle]}:",
+                *self.generate_dispatch(code, blocks, starts[:middle],
+                                        indent + 1),
+                f"{prefix}else:",
+                *self.generate_dispatch(code, blocks, starts[middle:],
+                                        indent + 1),
+            ]
+
+        lines = []
+
+        for index, start in enumerate(starts):
+            keyword = "if" if index == 0 else "elif"
+
+            lines.append(f"{prefix}{keyword} address == {start}:")
+            lines += self.generate_block(code, start, blocks[start],
+                                         indent + 1)
+
+        lines += [
+            f"{prefix}else:",
+            f"{prefix}    raise ValueError("
+            "f'Address {address} is not a block')",
+        ]
+
+        return lines
+
+    def generate_block(self, code: typing.List[Operation],
+                       start: int, end: int,
+                       indent: int) -> typing.List[str]:
+        """Generate code of basic block, it ends by setting next address.
+
+        :return: Lines of code
+        :rtype: List[str]
+        """
+        prefix = "    " * indent
+        lines = [f"{prefix}steps += {end - start}  # block {start}:{end}"]
+
+        for address in range(start, end):
+            lines += [
+                f"{prefix}{line}  # op {address}"
+                for line in (
+                    self.generate_memory_checks(code[address])
+                    + self.generate_operation(code[address], address,
+                                              len(code))
+                )
+            ]
+
+        if code[end - 1].op_word not in BLOCK_ENDS:
+            lines.append(f"{prefix}address = {end}")
+
+        return lines
+
+    def generate_memory_checks(self,
+                               operation: Operation) -> typing.List[str]:
+        """Generate checks of addresses of register pointers of operation.
+
+        Cells of memory are accessed by checked addresses, so memory
+        doesn't check them again. Starts of ranges of cells are checked
+        with ranges by called functions.
+
+        :return: Lines of code
+        :rtype: List[str]
+        """
+        ranges = RANGE_ARGUMENTS.get(operation.op_word, ())
+
+        registers = sorted({
+            argument.arg_word
+            for index, argument in enumerate(operation.op_args)
+            if argument.arg_type is OperationArgumentType.RegisterPointer
+            and index not in ranges
+        })
+
+        lines = []
+
+        for register in registers:
+            lines += [
+                f"if not 0 <= r{register} < memory_size:",
+                f"    memory.fault(r{register})",
+            ]
+
+        return lines
+
+    def generate_operation(self, operation: Operation, address: int,
+                           code_size: int) -> typing.List[str]:
+        """Generate code of one operation.
+
+        :return: Lines of code
+        :rtype: List[str]
+        """
+        op_word = operation.op_word
+        arg1, arg2 = operation.op_args
+
+        if op_word in BINARY_OPERATIONS:
+            source = self.generate_value(arg2)
+
+            if source is None:
+                return [f"raise Exception('Bad argument for {op_word}')"]
+
+            destination = self.generate_destination(arg1)
+
+            if destination is None:
+                return [f"raise Exception('Bad argument on {op_word}')"]
+
+            result = BINARY_OPERATIONS[op_word].format(destination, source)
+
+            return [f"{destination} = {result}"]
+
+        if op_word == "CMP":
+            right = self.generate_value(arg2)
+
+            if right is None:
+                return ["raise Exception('Bad argument for CMP')"]
+
+            left = self.generate_value(arg1)
+
+            if left is None:
+                return ["raise Exception('Bad argument on CMP')"]
+
+            return [
+                f"left = {left}",
+                f"right = {right}",
+                *COMPARE_LINES,
+            ]
+
+        if op_word in ("MEMCPY", "MEMCMP"):
+            if arg2.arg_type is not OperationArgumentType.RegisterPointer:
+                return [f"raise Exception('Bad argument for {op_word}')"]
+
+            if arg1.arg_type is not OperationArgumentType.RegisterPointer:
+                return [f"raise Exception('Bad argument on {op_word}')"]
+
+            # Count of cells is in register A
+            if op_word == "MEMCPY":
+                return [
+                    f"memory_copy(memory, r{arg1.arg_word}, "
+                    f"r{arg2.arg_word}, r4)",
+                ]
+
+            return [
+                f"left, right = memory_compare(memory, r{arg1.arg_word}, "
+                f"r{arg2.arg_word}, r4)",
+                *COMPARE_LINES,
+            ]
+
+        if op_word in VECTOR_OPERATIONS:
+            if arg2.arg_type is not OperationArgumentType.RegisterPointer:
+                return [f"raise Exception('Bad argument for {op_word}')"]
+
+            if arg1.arg_type is not OperationArgumentType.RegisterPointer:
+                return [f"raise Exception('Bad argument on {op_word}')"]
+
+            return [
+                f"vector_apply(memory, '{op_word}', r{arg1.arg_word}, "
+                f"r{arg2.arg_word}, r4)",
+            ]
+
+        if op_word == "VSUM":
+            if arg2.arg_type is not OperationArgumentType.RegisterPointer:
+                return ["raise Exception('Bad argument for VSUM')"]
+
+            destination = self.generate_destination(arg1)
+
+            if destination is None:
+                return ["raise Exception('Bad argument on VSUM')"]
+
+            return [
+                f"{destination} = vector_sum(memory, {destination}, "
+                f"r{arg2.arg_word}, r4)",
+            ]
+
+        if op_word == "MEMSET":
+            value = self.generate_value(arg2)
+
+            if value is None:
+                return ["raise Exception('Bad argument for MEMSET')"]
+
+            if arg1.arg_type is not OperationArgumentType.RegisterPointer:
+                return ["raise Exception('Bad argument on MEMSET')"]
+
+            return [f"memory_set(memory, r{arg1.arg_word}, r4, {value})"]
+
+        if op_word == "JMP":
+            return [f"address = {arg1.arg_word}"]
+
+        if op_word in CONDITIONAL_JUMPS:
+            return [
+                f"if {CONDITIONAL_JUMPS[op_word]}:",
+                f"    address = {arg1.arg_word}",
+                "else:",
+                f"    address = {address + 1}",
+            ]
+
+        if op_word == "CALL":
+            return [
+                f"call_stack.append({address + 1})",
+                f"address = {arg1.arg_word}",
+            ]
+
+        if op_word == "RET":
+            return [
+                "if not call_stack:",
+                "    raise Exception('Bad RET before CALL.')",
+                "address = call_stack.pop()",
+            ]
+
+        if op_word == "END":
+            return [f"address = {code_size}"]
+
+        if op_word == "PRINT":
+            value = self.generate_value(arg1)
+
+            if value is None:
+                return ["raise Exception('Bad print source')"]
+
+            return [f"print_value({value})"]
+
+        if op_word == "INPUT":
+            destination = self.generate_destination(arg1)
+
+            if destination is None:
+                return ["raise Exception('Bad input destination')"]
+
+            return [f"{destination} = read_input_value()"]
+
+        # NOP and LABEL do nothing
+        return []
+
+    def generate_value(self,
+                       argument: OperationArgument) -> typing.Optional[str]:
+        """Generate expression which reads value of argument."""
+        if argument.arg_type is OperationArgumentType.InPlaceValue:
+            return str(argument.arg_word)
+
+        return self.generate_destination(argument)
+
+    def generate_destination(
+            self,
+            argument: OperationArgument
+    ) -> typing.Optional[str]:
+        """Generate expression which can be assigned."""
+        if argument.arg_type is OperationArgumentType.Register:
+            return f"r{argument.arg_word}"
+
+        if argument.arg_type is OperationArgumentType.RegisterPointer:
+            return f"cells[r{argument.arg_word}]"
+
+        return None
+
+
+def find_fault_lines(
+        source: str
+) -> typing.Dict[int, typing.Tuple[int, int]]:
+    """Find operations of lines of generated source by their comments.
+
+    :param str source: Source generated by :class:`~.PythonCompiler`
+
+    :return: Line number - address of operation and end of its block
+    :rtype: Dict[int, Tuple[int, int]]
+    """
+    fault_lines = {}
+    block_end = 0
+
+    for line_number, line in enumerate(source.split("\n"), 1):
+        block_match = BLOCK_COMMENT.search(line)
+
+        if block_match is not None:
+            block_end = int(block_match.group(2))
+            continue
+
+        operation_match = OPERATION_COMMENT.search(line)
+
+        if operation_match is not None:
+            fault_lines[line_number] = (int(operation_match.group(1)),
+                                        block_end)
+
+    return fault_lines
+
+
+def load_function(source: str, filename: str = "<simple_lang>"):
+    """Compile generated source into function.
+
+    :param str source: Source generated by :class:`~.PythonCompiler`
+    :param str filename: File name shown in tracebacks
+
+    :return: Function which executes program
+    :rtype: Callable[[VmState, Callable, Callable], VmState]
+    """
+    namespace: typing.Dict[str, typing.Any] = dict(GENERATED_GLOBALS)
+    namespace["fault_lines"] = find_fault_lines(source)
+
+    exec(compile(source, filename, 'exec'), namespace)
+
+    return namespace[FUNCTION_NAME]
+
+
+def cache_header(program: Program, body: bytes) -> bytes:
+    """First line of cached source, used for checks of staleness.
+
+    It has digest of program and digest of body (source after first
+    line), so source cut off by another writer is not executed.
+    """
+    body_digest = hashlib.blake2b(body, digest_size=16).hexdigest()
+
+    return f"# simple_lang pyjit {PYJIT_VERSION} {program.digest()}" \
+           f" {body_digest}\n".encode('utf-8')
+
+
+def read_cached_source(program: Program,
+                       cache_file: pathlib.Path) -> typing.Optional[str]:
+    """Read source from cache file if it's made for program and complete.
+
+    :return: Source or None if file not exists, it's stale or damaged
+    :rtype: Optional[str]
+    """
+    try:
+        cached_source = cache_file.read_bytes()
+    except FileNotFoundError:
+        return None
+
+    header, separator, body = cached_source.partition(b'\n')
+
+    if header + separator != cache_header(program, body):
+        return None
+
+    return cached_source.decode('utf-8')
+
+
+def compile_program(program: Program,
+                    cache_file: typing.Optional[pathlib.Path] = None):
+    """Compile program into Python function.
+
+    Result is cached in program, so it's compiled only once. If cache file
+    given, generated source is read from it when it's made for same
+    program and same compiler version and it's not damaged, else it's
+    written to that file atomically.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :param cache_file: File for generated source
+    :type cache_file: Optional[pathlib.Path]
+
+    :return: Function which executes program
+    :rtype: Callable[[VmState, Callable, Callable], VmState]
+    """
+    if 'pyjit' in program.engine_cache:
+        return program.engine_cache['pyjit']
+
+    source = None
+
+    if cache_file is not None:
+        source = read_cached_source(program, cache_file)
+
+    if source is None:
+        body = PythonCompiler().compile(
+            decode_operations(program)
+        ).encode('utf-8')
+        source_data = cache_header(program, body) + body
+
+        if cache_file is not None:
+            write_atomic(cache_file, source_data)
+
+        source = source_data.decode('utf-8')
+
+    function = load_function(
+        source,
+        str(cache_file) if cache_file is not None else "<simple_lang>"
+    )
+
+    program.engine_cache['pyjit'] = function
+
+    return function
+
+
+def block_starts(program: Program) -> typing.FrozenSet[int]:
+    """Addresses of first operations of basic blocks, cached in program."""
+    if 'pyjit_blocks' not in program.engine_cache:
+        program.engine_cache['pyjit_blocks'] = frozenset(
+            PythonCompiler().split_blocks(
+                resolve_labels(decode_operations(program))[0]
+            )
+        )
+
+    return program.engine_cache['pyjit_blocks']
+
+
+def run_pyjit(vm_state: VmState,
+              max_steps: typing.Optional[int] = None) -> VmState:
+    """Execute program of VmState from current instruction as Python code.
+
+    :param vm_state: Initialized VmState
+    :type vm_state: :class:`~.VmState`
+
+    :param max_steps: Execution stops at beginning of basic block when
+                      count of executed instructions reaches it
+    :type max_steps: Optional[int]
+
+    :return: VmState at end of executing
+    :rtype: :class:`~.VmState`
+    """
+    function = compile_program(vm_state.vm_program)
+    code_size = len(vm_state.vm_program)
+
+    # State stopped by other engine in the middle of block, e.g. restored
+    # from checkpoint, is executed by operations of VM till next block
+    if 0 < vm_state.vm_code_pointer < code_size:
+        op_codes = vm_state.vm_program.op_codes
+        blocks = block_starts(vm_state.vm_program)
+
+        while vm_state.vm_code_pointer not in blocks and \
+                vm_state.vm_code_pointer < code_size and \
+                (max_steps is None or vm_state.vm_steps < max_steps):
+            op_code = op_codes[vm_state.vm_code_pointer]
+            vm_state = VM_BYTECODE_FUNC[op_code](vm_state)
+            vm_state.vm_steps += 1
+
+    return function(
+        vm_state,
+        vm_state.vm_input.read,
+        vm_state.vm_output.write,
+        sys.maxsize if max_steps is None else max_steps
+    )
@@ -0,0 +1,158 @@
+import collections
+
+import mock
+import pytest
+
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler
+from interpreter.src.virtual_machine import batch_runner
+from interpreter.src.virtual_machine.batch_runner import (
+    Job,
+    get_program,
+    iter_chunks,
+    run_many,
+)
+
+FIBONACCI = """
+LABEL MAIN
+    INPUT r1
+    CALL FIBONACCI
+    PRINT r2
+    END
+
+LABEL FIBONACCI
+    MOV r2, 0
+    MOV r3, 1
+
+    LABEL FIBONACCI_LOOP
+        MOV A, r2
+        ADD A, r3
+        MOV r2, r3
+        MOV r3, A
+        SUB r1, 1
+        CMP r1, 0
+        JMP_GT FIBONACCI_LOOP
+
+    RET
+"""
+
+
+def write_bytecode(path, code):
+    parser = Parser()
+    operations = parser.parse(code)
+    bytecode = BytecodeCompiler(1).compile(operations, parser.labels_table)
+
+    path.write_bytes(bytecode.getvalue())
+
+    return str(path)
+
+
+@pytest.fixture
+def fibonacci_file(tmp_path):
+    return write_bytecode(tmp_path / "fibonacci.small_c", FIBONACCI)
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+def test_run_many_in_process(fibonacci_file, engine):
+    jobs = [Job(fibonacci_file, (n, )) for n in range(1, 8)]
+
+    results = list(run_many(jobs, engine=engine, workers=1, chunk_size=3))
+
+    assert [result.index for result in results] == list(range(7))
+    assert [result.output for result in results] == [
+        [1], [1], [2], [3], [5], [8], [13]
+    ]
+    assert all(result.error is None for result in results)
+    assert results[0].registers[1] == 1
+    assert results[0].steps == 14
+    assert results[1].steps == 21
+
+
+def test_run_many_in_pool(fibonacci_file, tmp_path):
+    bad_file = write_bytecode(tmp_path / "bad.small_c", "INPUT r1\nPRINT r1")
+    jobs = [Job(fibonacci_file, (n, )) for n in range(1, 51)]
+    jobs.append(Job(bad_file))
+
+    results = sorted(
+        run_many(jobs, workers=2, chunk_size=4, max_in_flight=2),
+        key=lambda result: result.index
+    )
+
+    assert len(results) == 51
+    assert results[9].output == [55]
+    assert results[-1].filename == bad_file
+    assert results[-1].output == []
+    assert results[-1].error == "InputExhausted: Input is exhausted"
+
+
+def test_run_many_errors(tmp_path):
+    not_bytecode = tmp_path / "not_bytecode.small_c"
+    not_bytecode.write_bytes(b"NOP")
+
+    results = list(run_many([
+        Job(str(not_bytecode)),
+        Job(str(tmp_path / "missing.small_c")),
+    ], workers=1))
+
+    assert results[0].error == f"Exception: Bad bytecode file {not_bytecode}"
+    assert results[1].error.startswith("FileNotFoundError")
+    assert results[1].registers == []
+
+    with pytest.raises(ValueError):
+        next(run_many([], engine="unknown"))
+
+
+def test_run_many_partial_state(tmp_path):
+    filename = write_bytecode(
+        tmp_path / "fail.small_c",
+        "MOV r1, 7\nPRINT r1\nDIV r1, r2"
+    )
+
+    result, = run_many([Job(filename)], workers=1)
+
+    assert result.error.startswith("ZeroDivisionError")
+    assert result.output == [7]
+    assert result.registers[0] == 7
+
+
+def test_get_program_cached(fibonacci_file, tmp_path):
+    program = get_program(fibonacci_file, "interpreter")
+
+    assert get_program(fibonacci_file, "interpreter") is program
+
+    write_bytecode(tmp_path / "fibonacci.small_c", "NOP")
+
+    assert len(get_program(fibonacci_file, "interpreter")) == 1
+
+
+def test_get_program_cache_bounded(tmp_path):
+    files = [write_bytecode(tmp_path / f"{index}.small_c", "NOP")
+             for index in range(3)]
+
+    with mock.patch.object(batch_runner, "MAX_CACHED_PROGRAMS", 2), \
+            mock.patch.object(batch_runner, "_PROGRAMS",
+                              collections.OrderedDict()):
+        first = get_program(files[0], "interpreter")
+        get_program(files[1], "interpreter")
+
+        # Recently used program is kept, the least recently used is dropped
+        assert get_program(files[0], "interpreter") is first
+
+        get_program(files[2], "interpreter")
+
+        assert list(batch_runner._PROGRAMS) == [files[0], files[2]]
+
+
+def test_iter_chunks_lazy():
+    consumed = []
+
+    def jobs():
+        for index in range(5):
+            consumed.append(index)
+            yield Job(f"{index}.small_c")
+
+    chunks = iter_chunks(jobs(), 2)
+
+    assert next(chunks) == [(0, Job("0.small_c")), (1, Job("1.small_c"))]
+    assert consumed == [0, 1]
+    assert [len(chunk) for chunk in chunks] == [2, 1]
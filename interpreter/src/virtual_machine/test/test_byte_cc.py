@@ -1,15 +1,27 @@
 import struct
+import tracemalloc
 
 import pytest
 
 from interpreter.src.virtual_machine.byte_cc import (
     BytecodeCompiler,
+    BytecodeMetadata,
+    COMPILER_VERSION,
+    DIGEST_SIZE,
     MAG_NUM,
+    META_FORMAT,
+    META_SIZE,
     OP_SIZE,
-    BadOperationSize
+    BadOperationSize,
+    UndefinedLabel,
+    calculate_digest,
+    new_digest,
+    read_metadata,
+    read_symbols,
+    resolve_labels,
 )
 
-from interpreter.src.parser.parser import NOP_ARG
+from interpreter.src.parser.parser import NOP_ARG, Parser
 from interpreter.src.parser.operation import (
     Operation,
     OperationType,
@@ -63,19 +75,18 @@ def test_compiler_compile_ok():
 
     bytecode = bytecode.read1()
 
-    meta_size = 8
+    meta, code = bytecode[:META_SIZE], bytecode[META_SIZE:]
 
-    meta, code = bytecode[:meta_size], bytecode[meta_size:]
+    meta_unpacked = struct.unpack(META_FORMAT, meta)
 
-    meta_unpacked = struct.unpack('hI', meta)
-
-    assert meta_unpacked == (MAG_NUM, 1234)
+    assert meta_unpacked == (
+        MAG_NUM, COMPILER_VERSION, 0, 1234, 2, bytes(DIGEST_SIZE), 0
+    )
 
+    # Labels are not compiled
     expected_code = [
         # mov, register-pointer, r1, in-place, 14
         (8, 3, 0, 4, 14),
-        # label, label-type, label, nop, nop
-        (15, 1, 1, 0, 0),
         # NOP, nop, nop, nop, nop
         (18, 0, 0, 0, 0),
     ]
@@ -135,3 +146,179 @@ def test_compiler_compile_exception():
 
     with pytest.raises(Exception):
         compiler.compile(operations)
+
+
+def test_resolve_labels():
+    code = """
+    LABEL start
+        JMP end
+        CALL start
+    LABEL end
+    LABEL start
+        NOP
+    """
+
+    operations, labels = resolve_labels(Parser().parse(code))
+
+    assert labels == {1: 0, 2: 2}
+
+    assert [op.op_word for op in operations] == ["JMP", "CALL", "NOP"]
+
+    assert operations[0].op_args[0] == OperationArgument(
+        arg_type=OperationArgumentType.Address,
+        arg_word=2
+    )
+    assert operations[1].op_args[0] == OperationArgument(
+        arg_type=OperationArgumentType.Address,
+        arg_word=0
+    )
+
+
+def test_resolve_labels_undefined():
+    code = """
+    LABEL start
+        JMP end
+    """
+
+    with pytest.raises(UndefinedLabel) as exc_info:
+        resolve_labels(Parser().parse(code))
+
+    assert exc_info.value.label_index == 2
+
+
+def test_compiler_compile_symbols():
+    code = """
+    LABEL main
+        JMP main
+    LABEL end
+    """
+
+    parser = Parser()
+    operations = parser.parse(code)
+
+    bytecode = BytecodeCompiler(file_crc=1).compile(
+        operations,
+        parser.labels_table
+    ).read1()
+
+    code_size = read_metadata(bytecode).code_size
+
+    assert code_size == 1
+
+    symbols = read_symbols(bytecode[META_SIZE + code_size * OP_SIZE:])
+
+    assert symbols == {"main": 0, "end": 1}
+
+    # Without labels table no symbols written
+    bytecode = BytecodeCompiler(file_crc=1).compile(operations).read1()
+
+    assert len(bytecode) == META_SIZE + OP_SIZE
+
+
+def test_compiler_metadata():
+    digest = calculate_digest(b"MOV r1, 1")
+
+    bytecode = BytecodeCompiler(
+        file_crc=0xFFFFFFFF,
+        source_digest=digest,
+        optimization_level=2,
+        memory_size=2 ** 20
+    ).compile(Parser().parse("NOP")).read1()
+
+    assert META_SIZE == 33
+    assert bytecode[:2] == b"\x37\x12"
+    assert read_metadata(bytecode) == BytecodeMetadata(
+        file_crc=0xFFFFFFFF,
+        code_size=1,
+        source_digest=digest,
+        optimization_level=2,
+        compiler_version=COMPILER_VERSION,
+        memory_size=2 ** 20,
+    )
+
+
+def test_read_metadata_not_bytecode():
+    assert read_metadata(b"") is None
+    assert read_metadata(b"\x00" * META_SIZE) is None
+    # Header of old format
+    assert read_metadata(struct.pack('hII', 0x1236, 1, 1)) is None
+
+
+def test_calculate_digest():
+    digest = calculate_digest(b"MOV r1, 1\nMOV r2, 2")
+
+    assert len(digest) == DIGEST_SIZE
+    assert digest == calculate_digest(b"MOV r1, 1\nMOV r2, 2")
+    # Reordered lines have same sum of bytes, but different digest
+    assert digest != calculate_digest(b"MOV r2, 2\nMOV r1, 1")
+
+
+def gen_lines(count):
+    """Lines of code with forward and backward jumps around count lines."""
+    yield "JMP end"
+    yield "LABEL loop"
+
+    for index in range(count):
+        yield f"    ADD r1, {index} ; add index"
+
+    yield "JMP_LT loop"
+    yield "LABEL end"
+    yield "CALL loop"
+
+
+def test_compiler_compile_stream(tmp_path):
+    parser = Parser()
+    operations = parser.parse("\n".join(gen_lines(10)))
+    bytecode = BytecodeCompiler(file_crc=1).compile(
+        operations, parser.labels_table
+    ).getvalue()
+
+    parser = Parser()
+    stream_file = tmp_path / "stream.small_c"
+
+    with open(stream_file, 'w+b') as output:
+        output.write(b"prefix")
+
+        # Bytecode is written from current position of output
+        code_size = BytecodeCompiler(file_crc=1).compile_stream(
+            parser.iter_parse(gen_lines(10)), output, parser.labels_table
+        )
+
+        assert output.tell() == len(b"prefix") + len(bytecode)
+
+    assert code_size == 13
+    assert stream_file.read_bytes() == b"prefix" + bytecode
+
+    with pytest.raises(UndefinedLabel):
+        with open(stream_file, 'w+b') as output:
+            BytecodeCompiler(file_crc=1).compile_stream(
+                Parser().iter_parse(["JMP a", "JMP b", "LABEL b"]), output
+            )
+
+
+def test_compiler_compile_stream_memory(tmp_path):
+    def peak_memory(count):
+        parser = Parser()
+
+        tracemalloc.start()
+
+        with open(tmp_path / "code.small_c", 'w+b') as output:
+            BytecodeCompiler(file_crc=1).compile_stream(
+                parser.iter_parse(gen_lines(count)), output,
+                parser.labels_table
+            )
+
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+
+        return peak
+
+    # Memory doesn't grow with count of operations
+    assert peak_memory(20000) < peak_memory(2000) + 4096
+
+
+def test_new_digest():
+    digest = new_digest(b"MOV ")
+    digest.update(b"r1, 1")
+
+    assert digest.digest() == calculate_digest(b"MOV r1, 1")
@@ -0,0 +1,167 @@
+import os
+
+import mock
+import pytest
+
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.byte_cc import (
+    COMPILER_VERSION,
+    BytecodeCompiler,
+    calculate_digest,
+)
+from interpreter.src.virtual_machine.bytecode_cache import (
+    cache_path,
+    is_actual,
+    link_atomic,
+    load_program_file,
+    open_atomic,
+    read_file_metadata,
+    store_file,
+    write_atomic,
+)
+
+DIGEST = calculate_digest(b"NOP")
+
+
+def gen_bytecode(file_crc=1, source_digest=DIGEST, optimization_level=0,
+                 memory_size=0):
+    return BytecodeCompiler(
+        file_crc,
+        source_digest,
+        optimization_level,
+        memory_size
+    ).compile(Parser().parse("NOP")).getvalue()
+
+
+def test_cache_path(tmp_path):
+    path = cache_path(tmp_path, DIGEST, 2)
+
+    assert path.parent == tmp_path / DIGEST.hex()[:2]
+    assert path.name == f"{DIGEST.hex()}-v{COMPILER_VERSION}-O2.small_c"
+    assert cache_path(tmp_path, DIGEST, 1) != path
+
+    path = cache_path(tmp_path, DIGEST, 2, 2 ** 20)
+
+    assert path.name == \
+        f"{DIGEST.hex()}-v{COMPILER_VERSION}-O2-M1048576.small_c"
+
+
+def test_is_actual(tmp_path):
+    bytecode_file = tmp_path / "file.small_c"
+
+    assert read_file_metadata(bytecode_file) is None
+    assert not is_actual(bytecode_file, 1, DIGEST)
+
+    bytecode_file.write_bytes(gen_bytecode(optimization_level=1))
+
+    assert read_file_metadata(bytecode_file).code_size == 1
+    assert is_actual(bytecode_file, 1, DIGEST, 1)
+    assert not is_actual(bytecode_file, 2, DIGEST, 1)
+    assert not is_actual(bytecode_file, 1, calculate_digest(b""), 1)
+    assert not is_actual(bytecode_file, 1, DIGEST, 0)
+    assert not is_actual(bytecode_file, 1, DIGEST, 1, 2 ** 20)
+
+    bytecode_file.write_bytes(gen_bytecode(memory_size=2 ** 20))
+
+    assert is_actual(bytecode_file, 1, DIGEST, 0, 2 ** 20)
+    assert not is_actual(bytecode_file, 1, DIGEST, 0)
+    assert load_program_file(bytecode_file).memory_size == 2 ** 20
+
+    bytecode_file.write_bytes(b"not a bytecode")
+
+    assert not is_actual(bytecode_file, 1, DIGEST, 1)
+
+
+def test_write_atomic(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"old")
+
+    write_atomic(path, b"new")
+
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["file"]
+
+    with mock.patch('os.replace') as replace:
+        replace.side_effect = OSError
+
+        with pytest.raises(OSError):
+            write_atomic(path, b"newer")
+
+    assert path.read_bytes() == b"new"
+    assert os.listdir(tmp_path) == ["file"]
+
+
+@pytest.mark.parametrize("umask", [0o022, 0o077])
+def test_write_atomic_mode(tmp_path, umask):
+    path = tmp_path / "file"
+    old_umask = os.umask(umask)
+
+    try:
+        write_atomic(path, b"new")
+    finally:
+        os.umask(old_umask)
+
+    assert path.stat().st_mode & 0o777 == 0o666 & ~umask
+
+
+def test_open_atomic(tmp_path):
+    path = tmp_path / "file"
+    path.write_bytes(b"old")
+
+    with pytest.raises(ValueError):
+        with open_atomic(path) as temporary_file:
+            temporary_file.write(b"new")
+
+            raise ValueError
+
+    assert path.read_bytes() == b"old"
+    assert os.listdir(tmp_path) == ["file"]
+
+    with open_atomic(path) as temporary_file:
+        temporary_file.write(b"new")
+        temporary_file.seek(0)
+        temporary_file.write(b"N")
+
+    assert path.read_bytes() == b"New"
+
+
+def test_store_file(tmp_path):
+    bytecode_file = tmp_path / "file.small_c"
+    bytecode_file.write_bytes(gen_bytecode())
+
+    cached_file = store_file(tmp_path / "cache", DIGEST, 2, bytecode_file)
+
+    assert cached_file == cache_path(tmp_path / "cache", DIGEST, 2)
+    assert os.path.samefile(bytecode_file, cached_file)
+
+
+def test_link_atomic(tmp_path):
+    bytecode = gen_bytecode()
+    cached_file = tmp_path / "cached.small_c"
+    write_atomic(cached_file, bytecode)
+
+    bytecode_file = tmp_path / "file.small_c"
+    bytecode_file.write_bytes(b"old")
+
+    link_atomic(cached_file, bytecode_file)
+
+    assert bytecode_file.read_bytes() == bytecode
+    assert os.path.samefile(bytecode_file, cached_file)
+
+    # Rewrite of linked file doesn't change cached file
+    write_atomic(bytecode_file, b"new")
+
+    assert cached_file.read_bytes() == bytecode
+
+
+def test_link_fallback_to_copy(tmp_path):
+    source = tmp_path / "source"
+    source.write_bytes(b"data")
+
+    with mock.patch('os.link') as link:
+        link.side_effect = OSError
+
+        link_atomic(source, tmp_path / "file")
+
+    assert (tmp_path / "file").read_bytes() == b"data"
+    assert not os.path.samefile(source, tmp_path / "file")
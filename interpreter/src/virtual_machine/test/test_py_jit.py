@@ -0,0 +1,185 @@
+import os
+
+import mock
+import pytest
+
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.py_jit import (
+    PythonCompiler,
+    compile_program,
+    load_function,
+    run_pyjit,
+    VmState,
+)
+from interpreter.src.virtual_machine.vm.io_streams import ConsoleSource
+from interpreter.src.virtual_machine.vm.program import decode_operations
+from interpreter.src.virtual_machine.vm.vm_executor import run_interpreter
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program,
+)
+from interpreter.src.virtual_machine.test.vm.test_threaded import PROGRAMS
+
+
+@pytest.mark.parametrize("lines", PROGRAMS)
+def test_pyjit_same_as_interpreter(lines):
+    program = gen_program(*lines)
+
+    expected = run_interpreter(VmState(vm_program=program))
+    state = run_pyjit(VmState(vm_program=program))
+
+    assert state.vm_code_pointer == expected.vm_code_pointer
+    assert state.vm_registers == expected.vm_registers
+    assert state.vm_memory == expected.vm_memory
+    assert state.vm_call_stack == expected.vm_call_stack
+
+
+def test_compiler_parsed_code():
+    code = """
+    LABEL main
+        MOV r1, 5
+    LABEL loop
+        ADD r2, r1
+        SUB r1, 1
+        CMP r1, 0
+        JMP_GT loop
+    """
+
+    source = PythonCompiler().compile(Parser().parse(code))
+
+    function = load_function(source)
+
+    state = function(VmState(vm_program=gen_program("NOP")), None, None)
+
+    assert state.vm_registers[0].value == 0
+    assert state.vm_registers[1].value == 15
+    assert state.vm_code_pointer == 5
+
+
+def test_split_blocks():
+    code = gen_program(
+        "MOV r1, 1",
+        "LABEL loop",
+        "SUB r1, 1",
+        "CMP r1, 0",
+        "JMP_GT loop",
+        "CALL sub",
+        "END",
+        "LABEL sub",
+        "RET",
+    )
+
+    blocks = PythonCompiler().split_blocks(decode_operations(code))
+
+    assert blocks == {0: 1, 1: 4, 4: 5, 5: 6, 6: 7}
+
+
+def test_pyjit_io():
+    program = gen_program("INPUT r1", "INPUT @r1", "PRINT @r1", "PRINT 3")
+
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp, mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.print'
+    ) as p:
+        inp.side_effect = ['a', 5, 8]
+        state = run_pyjit(VmState(vm_program=program,
+                                  vm_input=ConsoleSource()))
+
+        p.assert_any_call("VM PRINT: 8")
+        p.assert_called_with("VM PRINT: 3")
+
+    assert state.vm_registers[0].value == 5
+    assert state.vm_memory[5] == 8
+
+
+def test_pyjit_errors():
+    state = VmState(vm_program=gen_program("MOV r1, 3", "RET"))
+
+    with pytest.raises(Exception):
+        run_pyjit(state)
+
+    # Registers are written back on errors
+    assert state.vm_registers[0].value == 3
+    # Failed instruction is not counted, code pointer points to it
+    assert state.vm_code_pointer == 1
+    assert state.vm_steps == 1
+
+
+@pytest.mark.parametrize("lines", [[], ["LABEL a"], ["LABEL a", "LABEL b"]])
+def test_pyjit_without_operations(lines):
+    state = run_pyjit(VmState(vm_program=gen_program(*lines)))
+
+    assert state.vm_code_pointer == 0
+    assert state.vm_steps == 0
+
+
+def test_pyjit_resume_in_block():
+    # Execution stopped by other engine in the middle of block continues
+    # by operations of VM till next block
+    state = VmState(
+        vm_program=gen_program("MOV r1, 3", "MOV r2, 4", "ADD r1, r2"),
+        vm_code_pointer=1
+    )
+
+    run_pyjit(state)
+
+    assert state.vm_code_pointer == 3
+    assert state.vm_steps == 2
+    assert state.vm_registers[0].value == 4
+    assert state.vm_registers[1].value == 4
+
+
+def test_compile_program_cache(tmp_path):
+    cache_file = tmp_path / "code.small_py"
+
+    program = gen_program("MOV r1, 3", "ADD r1, r1")
+
+    function = compile_program(program, cache_file)
+
+    assert cache_file.is_file()
+    assert compile_program(program, cache_file) is function
+
+    source = cache_file.read_text()
+
+    # Cache used for same program
+    program = gen_program("MOV r1, 3", "ADD r1, r1")
+
+    with mock.patch.object(PythonCompiler, 'compile') as compile_mock:
+        compile_program(program, cache_file)
+
+        compile_mock.assert_not_called()
+
+    # Cache updated for another program
+    program = gen_program("MOV r1, 4")
+
+    compile_program(program, cache_file)
+
+    assert cache_file.read_text() != source
+
+    state = run_pyjit(VmState(vm_program=program))
+
+    assert state.vm_registers[0].value == 4
+
+
+def test_compile_program_cache_damaged(tmp_path):
+    cache_file = tmp_path / "code.small_py"
+
+    program = gen_program("MOV r1, 3", "PRINT r1")
+    compile_program(program, cache_file)
+
+    source = cache_file.read_bytes()
+
+    # Source cut off by another writer is compiled again
+    cache_file.write_bytes(source[:len(source) // 2])
+
+    program = gen_program("MOV r1, 3", "PRINT r1")
+
+    with mock.patch.object(PythonCompiler, 'compile',
+                           wraps=PythonCompiler().compile) as compile_mock:
+        compile_program(program, cache_file)
+
+        compile_mock.assert_called_once()
+
+    assert cache_file.read_bytes() == source
+    assert os.listdir(tmp_path) == ["code.small_py"]
@@ -0,0 +1,12 @@
+import pytest
+
+from interpreter.src.virtual_machine.vm.helpers import vm_snapshot
+
+
+@pytest.fixture(params=["in_place", "snapshot"])
+def vm_mode(request):
+    """Wrap operation for run in in-place or in snapshot mode."""
+    if request.param == "snapshot":
+        return vm_snapshot
+
+    return lambda func: func
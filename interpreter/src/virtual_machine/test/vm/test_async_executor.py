@@ -0,0 +1,203 @@
+import asyncio
+
+import pytest
+
+from interpreter.src.virtual_machine.errors import (
+    ExecutionLimitExceeded,
+    InputExhausted
+)
+from interpreter.src.virtual_machine.vm.async_executor import run_async
+from interpreter.src.virtual_machine.vm.async_streams import (
+    StreamSink,
+    StreamSource,
+    as_async_sink,
+)
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+FIBONACCI = (
+    "LABEL main",
+    "INPUT r1",
+    "CMP r1, 0",
+    "JMP_GT fibonacci",
+    "END",
+    "LABEL fibonacci",
+    "MOV r2, 0",
+    "MOV r3, 1",
+    "LABEL loop",
+    "MOV A, r2",
+    "ADD A, r3",
+    "MOV r2, r3",
+    "MOV r3, A",
+    "SUB r1, 1",
+    "CMP r1, 0",
+    "JMP_GT loop",
+    "PRINT r2",
+    "JMP main",
+)
+
+
+class FakeWriter:
+    """Writer with interface of asyncio.StreamWriter."""
+
+    def __init__(self):
+        self.data = b''
+        self.drains = 0
+
+    def write(self, data: bytes):
+        self.data += data
+
+    async def drain(self):
+        self.drains += 1
+
+
+def make_reader(data: bytes) -> asyncio.StreamReader:
+    reader = asyncio.StreamReader()
+    reader.feed_data(data)
+    reader.feed_eof()
+
+    return reader
+
+
+def test_run_async_streams():
+    program = gen_program(*FIBONACCI)
+    writer = FakeWriter()
+
+    async def run():
+        # Reader is bound to loop of coroutine
+        return await run_async(
+            program,
+            StreamSource(make_reader(b"1 2 \n10 3 0"), chunk_size=3),
+            StreamSink(writer, flush_threshold=2),
+            quantum=7
+        )
+
+    end_state = asyncio.run(run())
+
+    assert writer.data == b"1\n1\n55\n2\n"
+    assert writer.drains == 3
+
+    sync_output = ListSink()
+    sync_state = execute_bytecode(program, output=sync_output,
+                                  input_source=[1, 2, 10, 3, 0])
+
+    assert end_state.vm_steps == sync_state.vm_steps
+    assert end_state.vm_register_file == sync_state.vm_register_file
+
+
+def test_run_async_queues():
+    program = gen_program(*FIBONACCI)
+
+    async def serve(count: int):
+        queues = [(asyncio.Queue(), asyncio.Queue()) for _ in range(count)]
+        tasks = [
+            asyncio.ensure_future(run_async(program, stdin, stdout,
+                                            quantum=5))
+            for stdin, stdout in queues
+        ]
+
+        # Every VM waits for input, so results are got one by one
+        for index, (stdin, stdout) in enumerate(queues):
+            await stdin.put(index % 20 + 1)
+
+        results = [await stdout.get() for _, stdout in queues]
+
+        for stdin, _ in queues:
+            await stdin.put(0)
+
+        await asyncio.gather(*tasks)
+
+        return results
+
+    results = asyncio.run(serve(200))
+
+    fibonacci = [1, 1]
+
+    while len(fibonacci) < 20:
+        fibonacci.append(fibonacci[-1] + fibonacci[-2])
+
+    assert results == [fibonacci[index % 20] for index in range(200)]
+
+
+def test_run_async_yields():
+    program = gen_program("LABEL loop", "ADD r1, 1", "CMP r1, 3000",
+                          "JMP_LT loop")
+    ticks = []
+
+    async def ticker():
+        while True:
+            ticks.append(None)
+            await asyncio.sleep(0)
+
+    async def run():
+        ticker_task = asyncio.ensure_future(ticker())
+        await asyncio.sleep(0)
+
+        ticks.clear()
+        end_state = await run_async(program, quantum=100)
+
+        ticker_task.cancel()
+
+        return end_state
+
+    end_state = asyncio.run(run())
+
+    assert end_state.vm_register_file[0] == 3000
+    # 9000 instructions by 100 per quantum, no switch after the last one
+    assert len(ticks) == 89
+
+
+def test_run_async_errors():
+    program = gen_program("LABEL loop", "JMP loop")
+    output = ListSink()
+
+    with pytest.raises(ExecutionLimitExceeded) as exc_info:
+        asyncio.run(run_async(program, quantum=7, max_steps=50))
+
+    assert exc_info.value.steps == 50
+
+    with pytest.raises(asyncio.TimeoutError):
+        asyncio.run(asyncio.wait_for(run_async(program), 0.05))
+
+    with pytest.raises(InputExhausted):
+        asyncio.run(run_async(gen_program("PRINT 1", "INPUT r1"), [],
+                              output))
+
+    assert output.values == [1]
+
+    async def run_closed_queue():
+        stdin = asyncio.Queue()
+        await stdin.put(None)
+
+        return await run_async(gen_program("INPUT r1"), stdin, output)
+
+    with pytest.raises(InputExhausted):
+        asyncio.run(run_closed_queue())
+
+    with pytest.raises(ValueError):
+        asyncio.run(run_async(program, quantum=0))
+
+    with pytest.raises(ValueError):
+        as_async_sink(object())
+
+
+def test_stream_source_split_character():
+    async def read_all(source):
+        values = []
+
+        try:
+            while True:
+                values.append(await source.read())
+        except InputExhausted:
+            return values
+
+    async def run():
+        reader = make_reader("１２ 7".encode('utf-8'))
+
+        return await read_all(StreamSource(reader, chunk_size=1))
+
+    assert asyncio.run(run()) == [12, 7]
@@ -1,14 +1,18 @@
-import io
 import struct
 
 import pytest
 
 from interpreter.src.parser.parser import Parser
-from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler
+from interpreter.src.virtual_machine.byte_cc import (
+    BytecodeCompiler,
+    resolve_labels
+)
 from interpreter.src.virtual_machine.vm.binary_ops import (
     gen_binary_operation,
     VmState
 )
+from interpreter.src.virtual_machine.vm.helpers import vm_snapshot
+from interpreter.src.virtual_machine.vm.program import Program, load_program
 
 
 def gen_bytecode(line: str) -> bytes:
@@ -17,32 +21,42 @@ def gen_bytecode(line: str) -> bytes:
     return BytecodeCompiler(file_crc=123).encode_operation(operation)
 
 
-def test_gen_binary_ops_reg_reg():
+def gen_program(*lines: str) -> Program:
+    operations, _ = resolve_labels(Parser().parse("\n".join(lines)))
+
+    compiler = BytecodeCompiler(file_crc=123)
+
+    return load_program(
+        b"".join(compiler.encode_operation(op) for op in operations)
+    )
+
+
+def test_gen_binary_ops_reg_reg(vm_mode):
     start_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("ADD r1, r2")),
+        vm_program=load_program(gen_bytecode("ADD r1, r2")),
         vm_code_pointer=0
     )
 
     start_state.vm_registers[0].value = 1
     start_state.vm_registers[1].value = 2
 
-    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
+    bin_add = vm_mode(gen_binary_operation("ADD", lambda x, y: x+y))
 
     assert bin_add.__name__ == 'vm_add'
 
-    result_state: VmState = bin_add(start_state)
-
     x = start_state.vm_registers[0].value
     y = start_state.vm_registers[1].value
 
     expected_sum = x + y
 
+    result_state: VmState = bin_add(start_state)
+
     assert result_state.vm_registers[0].value == expected_sum
 
 
-def test_gen_binary_ops_point_reg():
+def test_gen_binary_ops_point_reg(vm_mode):
     start_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("ADD @r1, r2")),
+        vm_program=load_program(gen_bytecode("ADD @r1, r2")),
         vm_code_pointer=0
     )
 
@@ -51,22 +65,21 @@ def test_gen_binary_ops_point_reg():
     start_state.vm_memory[x_mem] = 1
     start_state.vm_registers[1].value = 2
 
-    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
-
-    result_state: VmState = bin_add(start_state)
+    bin_add = vm_mode(gen_binary_operation("ADD", lambda x, y: x+y))
 
-    x_mem = start_state.vm_registers[0].value
     x = start_state.vm_memory[x_mem]
     y = start_state.vm_registers[1].value
 
     expected_sum = x + y
 
+    result_state: VmState = bin_add(start_state)
+
     assert result_state.vm_memory[x_mem] == expected_sum
 
 
-def test_gen_binary_ops_point_point():
+def test_gen_binary_ops_point_point(vm_mode):
     start_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("ADD @r1, @r2")),
+        vm_program=load_program(gen_bytecode("ADD @r1, @r2")),
         vm_code_pointer=0
     )
 
@@ -77,53 +90,51 @@ def test_gen_binary_ops_point_point():
     y_mem = start_state.vm_registers[1].value
     start_state.vm_memory[y_mem] = 12
 
-    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
+    bin_add = vm_mode(gen_binary_operation("ADD", lambda x, y: x+y))
 
-    result_state: VmState = bin_add(start_state)
-
-    x_mem = start_state.vm_registers[0].value
     x = start_state.vm_memory[x_mem]
-    y_mem = start_state.vm_registers[1].value
     y = start_state.vm_memory[y_mem]
 
     expected_sum = x + y
 
+    result_state: VmState = bin_add(start_state)
+
     assert result_state.vm_memory[x_mem] == expected_sum
 
 
-def test_gen_binary_ops_reg_in_place():
+def test_gen_binary_ops_reg_in_place(vm_mode):
     start_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("ADD r1, 12")),
+        vm_program=load_program(gen_bytecode("ADD r1, 12")),
         vm_code_pointer=0
     )
 
     start_state.vm_registers[0].value = 1
 
-    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
-
-    result_state: VmState = bin_add(start_state)
+    bin_add = vm_mode(gen_binary_operation("ADD", lambda x, y: x+y))
 
     x = start_state.vm_registers[0].value
     y = 12
 
     expected_sum = x + y
 
+    result_state: VmState = bin_add(start_state)
+
     assert result_state.vm_registers[0].value == expected_sum
 
 
-def test_gen_binary_ops_error_1_arg():
+def test_gen_binary_ops_error_1_arg(vm_mode):
     start_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("ADD 12, @r1")),
+        vm_program=load_program(gen_bytecode("ADD 12, @r1")),
         vm_code_pointer=0
     )
 
-    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
+    bin_add = vm_mode(gen_binary_operation("ADD", lambda x, y: x+y))
 
     with pytest.raises(Exception):
         bin_add(start_state)
 
 
-def test_gen_binary_ops_error_2_arg():
+def test_gen_binary_ops_error_2_arg(vm_mode):
     bcode = gen_bytecode("ADD r1, 11")
 
     op_code = struct.unpack('=hbibi', bcode)
@@ -133,11 +144,33 @@ def test_gen_binary_ops_error_2_arg():
     bcode = struct.pack('=hbibi', *op_code)
 
     start_state = VmState(
-        vm_code_buffer=io.BytesIO(bcode),
+        vm_program=load_program(bcode),
         vm_code_pointer=0
     )
 
-    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
+    bin_add = vm_mode(gen_binary_operation("ADD", lambda x, y: x+y))
 
     with pytest.raises(Exception):
         bin_add(start_state)
+
+
+def test_binary_ops_modes():
+    start_state = VmState(
+        vm_program=load_program(gen_bytecode("ADD r1, 12")),
+        vm_code_pointer=0
+    )
+
+    bin_add = gen_binary_operation("ADD", lambda x, y: x+y)
+
+    result_state = vm_snapshot(bin_add)(start_state)
+
+    assert result_state is not start_state
+    assert result_state.vm_registers[0].value == 12
+    assert start_state.vm_registers[0].value == 0
+    assert start_state.vm_code_pointer == 0
+
+    result_state = bin_add(start_state)
+
+    assert result_state is start_state
+    assert start_state.vm_registers[0].value == 12
+    assert start_state.vm_code_pointer == 1
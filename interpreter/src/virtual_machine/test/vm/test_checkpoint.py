@@ -0,0 +1,167 @@
+import pytest
+
+from interpreter.src.virtual_machine.errors import ExecutionLimitExceeded
+from interpreter.src.virtual_machine.vm.checkpoint import (
+    CHECKPOINT_HEADER,
+    Checkpointer,
+    restore_checkpoint,
+    save_checkpoint
+)
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.vm_executor import (
+    execute_bytecode,
+    initialize_vm
+)
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+# Every iteration writes counter to memory at address 600 + counter and
+# prints it
+LOOP_CODE = [
+    "MOV r2, 600",
+    "LABEL loop",
+    "ADD r1, 1",
+    "MOV r3, r2",
+    "ADD r3, r1",
+    "MOV @r3, r1",
+    "PRINT r1",
+    "CMP r1, 100",
+    "JMP_LT loop",
+    "END",
+]
+
+
+def test_checkpoint_round_trip():
+    program = gen_program("MOV r1, 1")
+    vm_state = initialize_vm(program)
+
+    vm_state.vm_code_pointer = 1
+    vm_state.vm_steps = 12345
+    vm_state.vm_register_file[0] = -5
+    vm_state.vm_register_file[1] = 2.5
+    vm_state.vm_register_file[2] = 2 ** 100
+    vm_state.vm_register_file[5] = True
+    vm_state.vm_memory[3] = -2 ** 70
+    vm_state.vm_memory[700] = 7
+    vm_state.vm_memory[1023] = 0.25
+    vm_state.vm_memory[4] = False
+    vm_state.vm_memory[5] = True
+    vm_state.vm_call_stack = [1, 0]
+
+    restored = restore_checkpoint(initialize_vm(program),
+                                  save_checkpoint(vm_state))
+
+    assert restored.vm_code_pointer == 1
+    assert restored.vm_steps == 12345
+    assert restored.vm_register_file == vm_state.vm_register_file
+    assert restored.vm_memory == vm_state.vm_memory
+    assert restored.vm_call_stack == [1, 0]
+
+    assert isinstance(restored.vm_register_file[1], float)
+    assert isinstance(restored.vm_memory[1023], float)
+
+    # Booleans made by comparisons are not turned into integers
+    assert restored.vm_register_file[5] is True
+    assert restored.vm_memory[4] is False
+    assert restored.vm_memory[5] is True
+
+
+def test_checkpoint_zero_pages():
+    program = gen_program("MOV r1, 1")
+    vm_state = initialize_vm(program)
+
+    empty_size = len(save_checkpoint(vm_state))
+
+    # Only written pages are saved
+    vm_state.vm_memory[300] = 1
+    vm_state.vm_memory[301] = 2
+
+    assert len(save_checkpoint(vm_state)) == empty_size + 4 + 256 * 8
+
+
+def test_checkpoint_paged_memory():
+    program = gen_program("MOV r1, 1")
+    vm_state = initialize_vm(program, memory_size=2 ** 30)
+
+    vm_state.vm_memory[2 ** 29] = 5
+    vm_state.vm_memory[2 ** 30 - 1] = 2.5
+    vm_state.vm_memory[2 ** 29 + 1] = True
+
+    data = save_checkpoint(vm_state)
+
+    # Only written pages are saved, though memory is big
+    assert len(data) < 1024 * 8
+
+    restored = restore_checkpoint(initialize_vm(program), data)
+
+    assert len(restored.vm_memory) == 2 ** 30
+    assert restored.vm_memory == vm_state.vm_memory
+    assert restored.vm_memory[2 ** 29 + 1] is True
+
+
+def test_checkpoint_errors():
+    program = gen_program("MOV r1, 1")
+    data = save_checkpoint(initialize_vm(program))
+
+    with pytest.raises(Exception, match="Bad program"):
+        restore_checkpoint(initialize_vm(gen_program("MOV r1, 2")), data)
+
+    with pytest.raises(Exception, match="Bad checkpoint"):
+        restore_checkpoint(initialize_vm(program), b"XXXX" + data[4:])
+
+    with pytest.raises(Exception, match="Bad size"):
+        restore_checkpoint(initialize_vm(program), data[:-1])
+
+    with pytest.raises(Exception, match="Bad size"):
+        restore_checkpoint(initialize_vm(program),
+                           data[:CHECKPOINT_HEADER.size - 1])
+
+
+@pytest.mark.parametrize("first_engine", ["interpreter", "threaded", "pyjit"])
+@pytest.mark.parametrize("second_engine", ["interpreter", "threaded", "pyjit"])
+def test_checkpoint_resume(tmp_path, first_engine, second_engine):
+    program = gen_program(*LOOP_CODE)
+    expected = execute_bytecode(program, output=ListSink())
+
+    checkpoint_file = tmp_path / "code.small_checkpoint"
+    output = ListSink()
+
+    with pytest.raises(ExecutionLimitExceeded):
+        execute_bytecode(program, engine=first_engine, output=output,
+                         max_steps=255,
+                         checkpointer=Checkpointer(checkpoint_file))
+
+    # Execution is continued by new VM from checkpoint written on limit
+    end_state = execute_bytecode(gen_program(*LOOP_CODE),
+                                 engine=second_engine,
+                                 output=output,
+                                 resume=checkpoint_file.read_bytes())
+
+    assert output.values == list(range(1, 101))
+    assert end_state.vm_steps == expected.vm_steps
+    assert end_state.vm_register_file == expected.vm_register_file
+    assert end_state.vm_memory == expected.vm_memory
+
+
+def test_checkpointer_interval(tmp_path):
+    checkpoint_file = tmp_path / "code.small_checkpoint"
+    program = gen_program("LABEL loop", "ADD r1, 1", "CMP r1, 30000",
+                          "JMP_LT loop")
+
+    checkpointer = Checkpointer(checkpoint_file, interval=0)
+    end_state = execute_bytecode(program, checkpointer=checkpointer)
+
+    # Checkpoint is written after every unfinished slice of execution
+    assert checkpointer.count == 8
+
+    restored = restore_checkpoint(initialize_vm(program),
+                                  checkpoint_file.read_bytes())
+
+    assert 0 < restored.vm_steps < end_state.vm_steps
+
+    checkpointer = Checkpointer(checkpoint_file, interval=3600)
+    execute_bytecode(program, checkpointer=checkpointer)
+
+    assert checkpointer.count == 0
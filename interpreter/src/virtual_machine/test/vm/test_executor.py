@@ -1,12 +1,31 @@
 import io
+import dataclasses
+
+import mock
+import pytest
 
 from interpreter.src.virtual_machine.vm.vm_executor import (
+    ENGINES,
     initialize_vm,
     execute_bytecode,
 )
 
+from interpreter.src.virtual_machine.errors import (
+    ExecutionLimitExceeded,
+    InputExhausted,
+    MemoryFault
+)
+from interpreter.src.virtual_machine.vm.io_streams import (
+    ListSink,
+    TextSink,
+    TextSource,
+)
+from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler, META_SIZE
+from interpreter.src.parser.parser import Parser
+
 from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
-    gen_bytecode
+    gen_bytecode,
+    gen_program
 )
 
 
@@ -15,11 +34,12 @@ def test_initialize():
 
     vm = initialize_vm(bcode)
 
-    assert vm.vm_code_buffer is bcode
+    assert len(vm.vm_program) == 0
     assert vm.vm_code_pointer == 0
 
 
-def test_execute():
+@pytest.mark.parametrize("snapshots", [False, True])
+def test_execute(snapshots):
     bcode_lines = [
         gen_bytecode("MOV r1, 3"),
         gen_bytecode("MOV r2, 3"),
@@ -27,7 +47,282 @@ def test_execute():
     ]
     bcode = io.BytesIO(b"".join(bcode_lines))
 
-    end_state = execute_bytecode(bcode)
+    end_state = execute_bytecode(bcode, snapshots=snapshots)
 
-    assert end_state.vm_code_pointer == 12*3
+    assert end_state.vm_code_pointer == 3
     assert end_state.vm_registers[0].value == 6
+
+
+@pytest.mark.parametrize("snapshots", [False, True])
+def test_execute_labels(snapshots):
+    code = """
+    LABEL main
+        CALL sub
+        JMP end
+        MOV r1, 3
+    LABEL end
+        MOV r2, 3
+        END
+    LABEL sub
+        MOV r3, 3
+        RET
+    """
+
+    bcode = BytecodeCompiler(file_crc=1).compile(Parser().parse(code))
+
+    end_state = execute_bytecode(
+        bcode.read1()[META_SIZE:],
+        snapshots=snapshots
+    )
+
+    assert end_state.vm_registers[0].value == 0
+    assert end_state.vm_registers[1].value == 3
+    assert end_state.vm_registers[2].value == 3
+    assert end_state.vm_code_pointer == 7
+    assert end_state.vm_call_stack == []
+
+
+def test_execute_engines():
+    bcode = b"".join([
+        gen_bytecode("MOV r1, 3"),
+        gen_bytecode("ADD r1, r1"),
+    ])
+
+    end_state = execute_bytecode(bcode, engine="threaded")
+
+    assert end_state.vm_code_pointer == 2
+    assert end_state.vm_registers[0].value == 6
+
+    with pytest.raises(ValueError):
+        execute_bytecode(bcode, engine="unknown")
+
+    with pytest.raises(ValueError):
+        execute_bytecode(bcode, snapshots=True, engine="threaded")
+
+
+@pytest.mark.parametrize("engine,snapshots", [
+    ("interpreter", False),
+    ("interpreter", True),
+    ("threaded", False),
+    ("pyjit", False),
+])
+def test_execute_output(engine, snapshots):
+    bcode = b"".join([
+        gen_bytecode("MOV r1, 3"),
+        gen_bytecode("PRINT r1"),
+        gen_bytecode("PRINT @r1"),
+        gen_bytecode("PRINT 7"),
+    ])
+
+    output = ListSink()
+
+    end_state = execute_bytecode(bcode, snapshots=snapshots, engine=engine,
+                                 output=output)
+
+    assert output.values == [3, 0, 7]
+    assert end_state.vm_output is output
+
+
+def test_execute_output_flushed_on_error():
+    bcode = b"".join([
+        gen_bytecode("PRINT 1"),
+        gen_bytecode("RET"),
+    ])
+
+    stream = io.StringIO()
+
+    with pytest.raises(Exception):
+        execute_bytecode(bcode, output=TextSink(stream))
+
+    assert stream.getvalue() == "VM PRINT: 1\n"
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+def test_execute_input(engine):
+    bcode = b"".join([
+        gen_bytecode("INPUT r1"),
+        gen_bytecode("INPUT @r1"),
+        gen_bytecode("PRINT @r1"),
+        gen_bytecode("INPUT r2"),
+    ])
+
+    output = ListSink()
+
+    end_state = execute_bytecode(bcode, engine=engine, output=output,
+                                 input_source=TextSource(io.StringIO("3 4 5")))
+
+    assert output.values == [4]
+    assert end_state.vm_registers[1].value == 5
+
+    with pytest.raises(InputExhausted):
+        execute_bytecode(bcode, engine=engine, output=output,
+                         input_source=[1, 2])
+
+    assert output.values == [4, 2]
+
+
+def test_execute_input_default():
+    bcode = gen_bytecode("INPUT r1") + gen_bytecode("PRINT r1")
+    output = ListSink()
+
+    with mock.patch('sys.stdin', io.StringIO("7")), mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp:
+        execute_bytecode(bcode, output=output)
+
+    assert output.values == [7]
+    inp.assert_not_called()
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+def test_execute_max_steps(engine):
+    code = ["LABEL loop", "ADD r1, 1", "CMP r1, 100", "JMP_LT loop", "END"]
+
+    with pytest.raises(ExecutionLimitExceeded) as exc_info:
+        execute_bytecode(gen_program(*code), engine=engine, max_steps=50)
+
+    partial_state = exc_info.value.vm_state
+
+    # pyjit checks limit before every basic block of 3 instructions
+    assert 50 <= exc_info.value.steps < 53
+    assert exc_info.value.steps == partial_state.vm_steps
+    assert partial_state.vm_code_pointer < 4
+    assert 0 < partial_state.vm_registers[0].value < 100
+
+    # Stopped VmState can be executed further
+    end_state = ENGINES[engine](partial_state)
+
+    assert end_state.vm_registers[0].value == 100
+    assert end_state.vm_steps == 301
+
+    end_state = execute_bytecode(gen_program(*code), engine=engine,
+                                 max_steps=301)
+
+    assert end_state.vm_steps == 301
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded"])
+def test_steps_by_blocks(engine):
+    program = gen_program("MOV r1, 1", "MOV r2, 2", "LABEL loop",
+                          "ADD r1, 1", "CMP r1, 5", "JMP_LT loop",
+                          "MOV r3, 1020", "MOV A, 5", "MOV @r3, 1",
+                          "MEMSET @r3, 1", "MOV r4, 1")
+
+    # Limit inside of block stops execution exactly
+    vm_state = initialize_vm(program, ListSink(), [])
+    vm_state = ENGINES[engine](vm_state, max_steps=4)
+
+    assert vm_state.vm_steps == 4
+    assert vm_state.vm_code_pointer == 4
+
+    # Resumed from middle of block, fault counts executed instructions only
+    with pytest.raises(MemoryFault):
+        ENGINES[engine](vm_state)
+
+    assert vm_state.vm_steps == 2 + 3 * 4 + 3
+    assert vm_state.vm_code_pointer == 8
+
+
+@pytest.mark.parametrize("lines,error,code_pointer,steps", [
+    (["MOV r1, 5000", "MOV r2, 1", "MOV r3, @r1", "MOV r4, 1"],
+     MemoryFault, 2, 2),
+    (["MOV r1, 1", "CALL sub", "END", "LABEL sub", "ADD r1, 1", "DIV r1, 0",
+      "RET"], ZeroDivisionError, 4, 3),
+    (["LABEL loop", "ADD r1, 1", "CMP r1, 3", "JMP_LT loop", "INPUT r2"],
+     InputExhausted, 3, 9),
+    (["MOV r1, 1", "RET"], Exception, 1, 1),
+])
+def test_fault_state_same_in_engines(lines, error, code_pointer, steps):
+    program = gen_program(*lines)
+
+    # Code pointer points to failed instruction, which is not counted
+    for engine in ENGINES:
+        vm_state = initialize_vm(program, ListSink(), [])
+
+        with pytest.raises(error):
+            ENGINES[engine](vm_state)
+
+        assert (engine, vm_state.vm_code_pointer, vm_state.vm_steps) == \
+            (engine, code_pointer, steps)
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+def test_execute_timeout(engine):
+    program = gen_program("LABEL loop", "ADD r1, 1", "JMP loop")
+
+    with pytest.raises(ExecutionLimitExceeded, match="seconds") as exc_info:
+        execute_bytecode(program, engine=engine, timeout=0.05,
+                         max_steps=10 ** 9)
+
+    assert exc_info.value.steps > 0
+    assert exc_info.value.vm_state.vm_registers[0].value > 0
+
+    end_state = execute_bytecode(gen_program("MOV r1, 1"), engine=engine,
+                                 timeout=10)
+
+    assert end_state.vm_registers[0].value == 1
+
+
+def test_execute_limits_with_snapshots():
+    program = gen_program("LABEL loop", "JMP loop")
+
+    with pytest.raises(ExecutionLimitExceeded, match="10 instructions"):
+        execute_bytecode(program, snapshots=True, max_steps=10)
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+def test_execute_memory_size(engine):
+    code = ["MOV r1, 3000000", "MOV @r1, 5", "ADD @r1, @r1", "PRINT @r1"]
+    output = ListSink()
+
+    end_state = execute_bytecode(gen_program(*code), engine=engine,
+                                 output=output, memory_size=2 ** 22)
+
+    assert output.values == [10]
+    assert len(end_state.vm_memory) == 2 ** 22
+    assert end_state.vm_memory[3000000] == 10
+
+    # Size of memory from bytecode header
+    program = dataclasses.replace(gen_program(*code), memory_size=2 ** 22)
+
+    assert execute_bytecode(program, engine=engine,
+                            output=ListSink()).vm_memory[3000000] == 10
+
+    with pytest.raises(MemoryFault, match="Address 3000000"):
+        execute_bytecode(gen_program(*code), engine=engine,
+                         output=ListSink())
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+def test_execute_dense_and_paged_same_output(engine):
+    code = [
+        "MOV r1, 10", "CMP 1, 1", "MOV @r1, EQ", "PRINT @r1",
+        "MOV r2, 20", "MOV A, 3", "MEMCPY @r2, @r1", "PRINT @r2",
+        "MEMSET @r2, NE", "PRINT @r2", "MOV r3, 30", "MEMCPY @r3, @r2",
+        "PRINT @r3", "MOV r4, 7", "DIV r4, 2", "MOV @r1, r4", "PRINT @r1",
+    ]
+    outputs = []
+
+    for memory_size in (1024, 2 ** 20):
+        output = ListSink()
+        execute_bytecode(gen_program(*code), engine=engine, output=output,
+                         memory_size=memory_size)
+        outputs.append([(type(value), value) for value in output.values])
+
+    assert outputs[0] == outputs[1]
+    assert outputs[0][:4] == [(bool, True), (bool, True), (bool, False),
+                              (bool, False)]
+
+
+@pytest.mark.parametrize("engine", ["interpreter", "threaded", "pyjit"])
+@pytest.mark.parametrize("line", ["MOV @r1, 1", "PRINT @r1", "INPUT @r1",
+                                  "CMP r2, @r1", "ADD r2, @r1"])
+def test_execute_memory_fault(engine, line):
+    # Negative address doesn't wrap around to end of memory
+    program = gen_program("SUB r1, 1", line)
+
+    with pytest.raises(MemoryFault) as exc_info:
+        execute_bytecode(program, engine=engine, output=ListSink(),
+                         input_source=[1])
+
+    assert exc_info.value.address == -1
@@ -1,4 +1,3 @@
-import io
 import struct
 
 import mock
@@ -9,54 +8,62 @@ from interpreter.src.virtual_machine.vm.io_ops import (
     vm_print,
     VmState
 )
+from interpreter.src.virtual_machine.vm.io_streams import ConsoleSource
+from interpreter.src.virtual_machine.vm.program import load_program
 
 from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
     gen_bytecode
 )
 
 
-def test_vm_print():
+def test_vm_print(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("PRINT r1")),
+        vm_program=load_program(gen_bytecode("PRINT r1")),
         vm_code_pointer=0,
     )
 
-    with mock.patch('interpreter.src.virtual_machine.vm.io_ops.print') as p:
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.print'
+    ) as p:
         p.return_value = 1
-        state = vm_print(base_state)
+        state = vm_mode(vm_print)(base_state)
 
         p.assert_called_with("VM PRINT: 0")
 
-    assert state.vm_code_pointer == 12
+    assert state.vm_code_pointer == 1
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("PRINT @r1")),
+        vm_program=load_program(gen_bytecode("PRINT @r1")),
         vm_code_pointer=0,
     )
 
-    with mock.patch('interpreter.src.virtual_machine.vm.io_ops.print') as p:
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.print'
+    ) as p:
         p.return_value = 1
-        state = vm_print(base_state)
+        state = vm_mode(vm_print)(base_state)
 
         p.assert_called_with("VM PRINT: 0")
 
-    assert state.vm_code_pointer == 12
+    assert state.vm_code_pointer == 1
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("PRINT 12")),
+        vm_program=load_program(gen_bytecode("PRINT 12")),
         vm_code_pointer=0,
     )
 
-    with mock.patch('interpreter.src.virtual_machine.vm.io_ops.print') as p:
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.print'
+    ) as p:
         p.return_value = 1
-        state = vm_print(base_state)
+        state = vm_mode(vm_print)(base_state)
 
         p.assert_called_with("VM PRINT: 12")
 
-    assert state.vm_code_pointer == 12
+    assert state.vm_code_pointer == 1
 
 
-def test_vm_print_error():
+def test_vm_print_error(vm_mode):
     bcode = gen_bytecode("PRINT r1")
 
     op_code = struct.unpack('=hbibi', bcode)
@@ -66,42 +73,48 @@ def test_vm_print_error():
     bcode = struct.pack('=hbibi', *op_code)
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(bcode),
+        vm_program=load_program(bcode),
         vm_code_pointer=0,
     )
 
     with pytest.raises(Exception):
-        vm_print(base_state)
+        vm_mode(vm_print)(base_state)
 
 
-def test_vm_input():
+def test_vm_input(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("INPUT r1")),
+        vm_program=load_program(gen_bytecode("INPUT r1")),
         vm_code_pointer=0,
+        vm_input=ConsoleSource(),
     )
 
-    with mock.patch('interpreter.src.virtual_machine.vm.io_ops.input') as inp:
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp:
         inp.side_effect = ['a', 1]
-        state = vm_input(base_state)
+        state = vm_mode(vm_input)(base_state)
 
-    assert state.vm_code_pointer == 12
+    assert state.vm_code_pointer == 1
     assert state.vm_registers[0].value == 1
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("INPUT @r1")),
+        vm_program=load_program(gen_bytecode("INPUT @r1")),
         vm_code_pointer=0,
+        vm_input=ConsoleSource(),
     )
 
-    with mock.patch('interpreter.src.virtual_machine.vm.io_ops.input') as inp:
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp:
         inp.side_effect = ['a', 1]
-        state = vm_input(base_state)
+        state = vm_mode(vm_input)(base_state)
 
-    assert state.vm_code_pointer == 12
+    assert state.vm_code_pointer == 1
     mem_addr = state.vm_registers[0].value
     assert state.vm_memory[mem_addr] == 1
 
 
-def test_vm_input_error():
+def test_vm_input_error(vm_mode):
     bcode = gen_bytecode("INPUT r1")
 
     op_code = struct.unpack('=hbibi', bcode)
@@ -111,11 +124,13 @@ def test_vm_input_error():
     bcode = struct.pack('=hbibi', *op_code)
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(bcode),
+        vm_program=load_program(bcode),
         vm_code_pointer=0,
     )
 
-    with mock.patch('interpreter.src.virtual_machine.vm.io_ops.input') as inp:
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp:
         inp.side_effect = ['a', 1]
         with pytest.raises(Exception):
-            vm_input(base_state)
+            vm_mode(vm_input)(base_state)
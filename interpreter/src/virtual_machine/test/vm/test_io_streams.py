@@ -0,0 +1,239 @@
+import io
+import copy
+
+import mock
+import pytest
+
+from interpreter.src.virtual_machine.errors import InputExhausted
+from interpreter.src.virtual_machine.vm.io_streams import (
+    BinarySink,
+    BinarySource,
+    ConsoleSink,
+    ConsoleSource,
+    IterableSource,
+    ListSink,
+    RawSink,
+    TextSink,
+    TextSource,
+    open_input_source,
+    open_output_sink,
+    read_binary_output,
+    wrap_int64,
+)
+
+
+def test_console_sink():
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.print'
+    ) as p:
+        ConsoleSink().write(5)
+
+        p.assert_called_with("VM PRINT: 5")
+
+    stream = io.StringIO()
+
+    ConsoleSink(stream).write(6)
+
+    assert stream.getvalue() == "VM PRINT: 6\n"
+
+
+def test_text_sink_flush_threshold():
+    stream = io.StringIO()
+    sink = TextSink(stream, flush_threshold=2)
+
+    sink.write(1)
+
+    assert stream.getvalue() == ""
+
+    sink.write(True)
+
+    assert stream.getvalue() == "VM PRINT: 1\nVM PRINT: True\n"
+
+    sink.write(3)
+    sink.close()
+
+    assert stream.getvalue().endswith("VM PRINT: 3\n")
+    assert not stream.closed
+
+
+def test_raw_sink():
+    stream = io.StringIO()
+    sink = RawSink(stream)
+
+    for value in [1, -2, 3]:
+        sink.write(value)
+
+    sink.flush()
+
+    assert stream.getvalue() == "1\n-2\n3\n"
+
+
+def test_binary_sink():
+    stream = io.BytesIO()
+    sink = BinarySink(stream, flush_threshold=2)
+
+    sink.write(1)
+    sink.write(-1)
+
+    assert stream.getvalue() == (
+        b"\x01\x00\x00\x00\x00\x00\x00\x00" + b"\xff" * 8
+    )
+
+    sink.write(2 ** 63)
+    sink.write(7 / 2)
+    sink.write(True)
+    sink.flush()
+
+    assert read_binary_output(stream.getvalue()) == [
+        1, -1, -2 ** 63, 3, 1
+    ]
+
+
+def test_wrap_int64():
+    assert wrap_int64(5) == 5
+    assert wrap_int64(-5) == -5
+    assert wrap_int64(2 ** 63) == -2 ** 63
+    assert wrap_int64(-2 ** 63 - 1) == 2 ** 63 - 1
+
+
+def test_list_sink():
+    values = []
+    sink = ListSink(values)
+
+    sink.write(1)
+    sink.write(2)
+
+    assert values == [1, 2]
+    assert ListSink().values == []
+
+
+def test_sink_shared_by_copies():
+    sink = ListSink()
+
+    assert copy.deepcopy(sink) is sink
+
+
+def test_open_output_sink():
+    stream = io.StringIO()
+
+    assert isinstance(open_output_sink("console"), ConsoleSink)
+    assert isinstance(open_output_sink("raw", stream), RawSink)
+
+    sink = open_output_sink("text", stream, 10)
+
+    assert isinstance(sink, TextSink)
+    assert sink.flush_threshold == 10
+    assert sink.stream is stream
+
+    binary_stream = io.TextIOWrapper(io.BytesIO())
+
+    sink = open_output_sink("binary", binary_stream)
+
+    assert sink.stream is binary_stream.buffer
+
+    with pytest.raises(ValueError):
+        open_output_sink("unknown")
+
+
+def test_console_source():
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp:
+        inp.side_effect = ['a', '5', EOFError]
+        source = ConsoleSource()
+
+        assert source.read() == 5
+        inp.assert_called_with("VM INPUT: ")
+
+        with pytest.raises(InputExhausted):
+            source.read()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 3, 100])
+def test_text_source(chunk_size):
+    stream = io.StringIO("12 -3\n\n  456\t7\n8")
+    source = TextSource(stream, chunk_size=chunk_size)
+
+    assert [source.read() for _ in range(5)] == [12, -3, 456, 7, 8]
+
+    with pytest.raises(InputExhausted):
+        source.read()
+
+
+def test_text_source_bad_value():
+    source = TextSource(io.StringIO("1 abc 2"))
+
+    assert source.read() == 1
+
+    with pytest.raises(Exception) as error:
+        source.read()
+
+    assert str(error.value) == "Bad input value abc"
+    assert source.read() == 2
+
+
+def test_text_source_empty():
+    with pytest.raises(InputExhausted):
+        TextSource(io.StringIO(" \n ")).read()
+
+
+@pytest.mark.parametrize("chunk_size", [1, 2, 100])
+def test_binary_source(chunk_size):
+    stream = io.BytesIO()
+    sink = BinarySink(stream)
+
+    for value in [1, -1, 2 ** 40]:
+        sink.write(value)
+
+    sink.flush()
+    stream.seek(0)
+
+    source = BinarySource(stream, chunk_size=chunk_size)
+
+    assert [source.read() for _ in range(3)] == [1, -1, 2 ** 40]
+
+    with pytest.raises(InputExhausted):
+        source.read()
+
+
+def test_binary_source_bad_size():
+    source = BinarySource(io.BytesIO(b"\x01" + b"\x00" * 8))
+
+    assert source.read() == 1
+
+    with pytest.raises(Exception) as error:
+        source.read()
+
+    assert str(error.value) == "Bad size of binary input"
+
+
+def test_iterable_source():
+    source = IterableSource(range(2))
+
+    assert source.read() == 0
+    assert source.read() == 1
+    assert copy.deepcopy(source) is source
+
+    with pytest.raises(InputExhausted):
+        source.read()
+
+
+def test_open_input_source():
+    stream = io.StringIO("1")
+
+    assert isinstance(open_input_source("console", stream), ConsoleSource)
+
+    source = open_input_source("text", stream, 10)
+
+    assert isinstance(source, TextSource)
+    assert source.chunk_size == 10
+    assert source.stream is stream
+
+    binary_stream = io.TextIOWrapper(io.BytesIO())
+
+    source = open_input_source("binary", binary_stream)
+
+    assert source.stream is binary_stream.buffer
+
+    with pytest.raises(ValueError):
+        open_input_source("unknown")
@@ -1,4 +1,3 @@
-import io
 import struct
 
 import pytest
@@ -13,72 +12,78 @@ from interpreter.src.virtual_machine.vm.jumps_and_labels import (
     vm_cmp,
     VmState
 )
+from interpreter.src.virtual_machine.vm.program import load_program
 
 from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
-    gen_bytecode
+    gen_bytecode,
+    gen_program,
 )
 
 
-def test_generate_jump():
+def test_generate_jump(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("JMP LABEL")),
+        vm_program=gen_program("JMP end", "NOP", "LABEL end", "NOP"),
         vm_code_pointer=0,
-        vm_labels={1: 100500}
     )
 
     jmp_code = generate_jump("JMP", lambda x: True)
 
     assert jmp_code.__name__ == 'vm_jmp'
 
-    state = jmp_code(base_state)
+    state = vm_mode(jmp_code)(base_state)
 
-    assert state.vm_code_pointer == 100500 + 12
+    assert state.vm_code_pointer == 2
 
 
-def test_generate_jump_bad_label():
+def test_generate_jump_no_cond(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("JMP LABEL")),
+        vm_program=gen_program("JMP end", "NOP", "LABEL end", "NOP"),
         vm_code_pointer=0,
-        vm_labels={2: 100500}
     )
 
-    jmp_code = generate_jump("JMP", lambda x: True)
+    jmp_code = generate_jump("JMP", lambda x: False)
+
+    state = vm_mode(jmp_code)(base_state)
 
+    assert state.vm_code_pointer == 1
+
+
+def test_generate_jump_bad_label():
+    # Labels not resolved by compiler
     with pytest.raises(Exception):
-        jmp_code(base_state)
+        load_program(gen_bytecode("JMP LABEL"))
 
 
-def test_vm_label():
+def test_vm_label(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("LABEL main")),
+        vm_program=load_program(gen_bytecode("LABEL main")),
         vm_code_pointer=0,
-        vm_labels={2: 100500}
     )
 
-    state = vm_label(base_state)
+    state = vm_mode(vm_label)(base_state)
 
-    assert state.vm_labels == {2: 100500, 1: 0}
+    assert state.vm_code_pointer == 1
 
 
-def test_vm_nop():
+def test_vm_nop(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("NOP")),
+        vm_program=load_program(gen_bytecode("NOP")),
         vm_code_pointer=0,
     )
 
-    state = vm_nop(base_state)
+    state = vm_mode(vm_nop)(base_state)
 
-    assert state.vm_code_pointer == 12
+    assert state.vm_code_pointer == 1
 
 
-def test_vm_cmp():
+def test_vm_cmp(vm_mode):
     # In-place
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("CMP 3, 7")),
+        vm_program=load_program(gen_bytecode("CMP 3, 7")),
         vm_code_pointer=0,
     )
 
-    state = vm_cmp(base_state)
+    state = vm_mode(vm_cmp)(base_state)
 
     assert not state.vm_registers[5].value
     assert not state.vm_registers[7].value
@@ -86,13 +91,13 @@ def test_vm_cmp():
     assert state.vm_registers[8]
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("CMP r1, r2")),
+        vm_program=load_program(gen_bytecode("CMP r1, r2")),
         vm_code_pointer=0,
     )
     base_state.vm_registers[0].value = 7
     base_state.vm_registers[1].value = 3
 
-    state = vm_cmp(base_state)
+    state = vm_mode(vm_cmp)(base_state)
 
     assert not state.vm_registers[5].value
     assert not state.vm_registers[6].value
@@ -100,14 +105,14 @@ def test_vm_cmp():
     assert state.vm_registers[8].value
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("CMP @r1, @r2")),
+        vm_program=load_program(gen_bytecode("CMP @r1, @r2")),
         vm_code_pointer=0,
     )
 
     base_state.vm_registers[0].value = 7
     base_state.vm_registers[1].value = 7
 
-    state = vm_cmp(base_state)
+    state = vm_mode(vm_cmp)(base_state)
 
     assert state.vm_registers[5].value
     assert not state.vm_registers[6].value
@@ -115,7 +120,7 @@ def test_vm_cmp():
     assert not state.vm_registers[8].value
 
 
-def test_vm_cmp_error_1_arg():
+def test_vm_cmp_error_1_arg(vm_mode):
     bcode = gen_bytecode("CMP r1, 11")
 
     op_code = struct.unpack('=hbibi', bcode)
@@ -125,15 +130,15 @@ def test_vm_cmp_error_1_arg():
     bcode = struct.pack('=hbibi', *op_code)
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(bcode),
+        vm_program=load_program(bcode),
         vm_code_pointer=0,
     )
 
     with pytest.raises(Exception):
-        vm_cmp(base_state)
+        vm_mode(vm_cmp)(base_state)
 
 
-def test_vm_cmp_error_2_arg():
+def test_vm_cmp_error_2_arg(vm_mode):
     bcode = gen_bytecode("CMP r1, 11")
 
     op_code = struct.unpack('=hbibi', bcode)
@@ -143,68 +148,61 @@ def test_vm_cmp_error_2_arg():
     bcode = struct.pack('=hbibi', *op_code)
 
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(bcode),
+        vm_program=load_program(bcode),
         vm_code_pointer=0,
     )
 
     with pytest.raises(Exception):
-        vm_cmp(base_state)
+        vm_mode(vm_cmp)(base_state)
 
 
-def test_vm_end():
+def test_vm_end(vm_mode):
     bcode = b"".join(
         [gen_bytecode("MOV r1, 12"),
          gen_bytecode("END")]
     )
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(bcode),
-        vm_code_pointer=12,
+        vm_program=load_program(bcode),
+        vm_code_pointer=1,
     )
 
-    base_state.vm_code_buffer.seek(12)
-
-    state = vm_end(base_state)
-
-    last_code_addr = base_state.vm_code_pointer
+    state = vm_mode(vm_end)(base_state)
 
-    end_pointer = len(base_state.vm_code_buffer.read1())
+    assert state.vm_code_pointer == 2
 
-    assert state.vm_code_pointer == (last_code_addr + end_pointer)
 
-
-def test_vm_call():
+def test_vm_call(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("CALL abc")),
+        vm_program=gen_program("CALL abc", "NOP", "LABEL abc", "NOP"),
         vm_code_pointer=0,
-        vm_labels={1: 14}
     )
 
-    state = vm_call(base_state)
+    state = vm_mode(vm_call)(base_state)
 
-    assert state.vm_code_pointer == 14+12
+    assert state.vm_code_pointer == 2
 
-    assert state.vm_call_stack == [0, ]
+    assert state.vm_call_stack == [1, ]
 
 
-def test_vm_ret():
+def test_vm_ret(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("RET")),
+        vm_program=load_program(gen_bytecode("RET")),
         vm_code_pointer=0,
         vm_call_stack=[12, ]
     )
 
-    state = vm_ret(base_state)
+    state = vm_mode(vm_ret)(base_state)
 
-    assert state.vm_code_pointer == 12 + 12
+    assert state.vm_code_pointer == 12
 
     assert state.vm_call_stack == []
 
 
-def test_vm_ret_error():
+def test_vm_ret_error(vm_mode):
     base_state = VmState(
-        vm_code_buffer=io.BytesIO(gen_bytecode("RET")),
+        vm_program=load_program(gen_bytecode("RET")),
         vm_code_pointer=0,
     )
 
     with pytest.raises(Exception):
-        vm_ret(base_state)
+        vm_mode(vm_ret)(base_state)
@@ -0,0 +1,233 @@
+import dataclasses
+
+import pytest
+
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.threaded import run_threaded
+from interpreter.src.virtual_machine.vm.vm_executor import initialize_vm
+from interpreter.src.virtual_machine.vm.lockstep import (
+    FAULT_COUNT,
+    FAULT_DIVISION,
+    FAULT_INPUT,
+    FAULT_MEMORY,
+    FAULT_RET,
+    MAX_MEMORY_BYTES,
+    run_lockstep,
+)
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+from interpreter.src.virtual_machine.test.vm.test_threaded import PROGRAMS
+
+numpy = pytest.importorskip("numpy")
+
+FIBONACCI = [
+    "LABEL main", "INPUT r1", "CALL fibonacci", "PRINT r2", "END",
+    "LABEL fibonacci", "MOV r2, 0", "MOV r3, 1",
+    "LABEL loop",
+    "MOV A, r2", "ADD A, r3", "MOV r2, r3", "MOV r3, A", "SUB r1, 1",
+    "CMP r1, 0", "JMP_GT loop",
+    "RET",
+]
+
+# Lanes go by different branches, print and call different count of times
+DIVERGENT = [
+    "INPUT r1", "INPUT r2",
+    "LABEL loop",
+    "CMP r1, r2", "JMP_LT less", "JMP_EQ equal",
+    "CALL greater", "PRINT r1", "JMP next",
+    "LABEL less", "ADD r1, 3", "PRINT @r2", "JMP next",
+    "LABEL equal", "XOR r4, r1", "NOT r3",
+    "LABEL next",
+    "MOV @r1, r2", "SUB r2, 1", "CMP r2, 0", "JMP_GT loop",
+    "PRINT r4", "END",
+    "LABEL greater", "MUL r1, 3", "SUB r1, @r2", "AND r1, 255", "RET",
+]
+
+
+def run_scalar(program, inputs):
+    output = ListSink()
+    vm_state = run_threaded(initialize_vm(program, output, inputs))
+
+    return output.values, vm_state
+
+
+def check_same_as_scalar(lines, inputs, **kwargs):
+    program = gen_program(*lines)
+    result = run_lockstep(program, inputs, **kwargs)
+
+    assert len(result.output) == len(inputs)
+
+    for lane, lane_inputs in enumerate(numpy.atleast_2d(inputs.T).T):
+        output, vm_state = run_scalar(program, lane_inputs.tolist())
+        count = result.output_counts[lane]
+
+        assert result.output[lane, :count].tolist() == output
+        assert result.registers[lane].tolist() == vm_state.vm_register_file
+
+    assert not result.failed.any()
+
+    return result
+
+
+def test_lockstep_fibonacci():
+    result = check_same_as_scalar(FIBONACCI, numpy.arange(1, 41))
+
+    assert result.output[:10, 0].tolist() == [
+        1, 1, 2, 3, 5, 8, 13, 21, 34, 55
+    ]
+    assert result.output.shape == (40, 1)
+
+
+def test_lockstep_divergent():
+    inputs = numpy.array([
+        [first, second]
+        for first in range(0, 60, 7)
+        for second in range(1, 9)
+    ])
+
+    result = check_same_as_scalar(DIVERGENT, inputs)
+
+    assert len(set(result.output_counts.tolist())) > 1
+
+
+def test_lockstep_by_parts():
+    inputs = numpy.arange(1, 31)
+
+    whole = run_lockstep(gen_program(*FIBONACCI), inputs)
+    parts = check_same_as_scalar(FIBONACCI, inputs, lanes_per_run=7)
+
+    assert numpy.array_equal(whole.output, parts.output)
+    assert whole.steps == parts.steps
+
+
+@pytest.mark.parametrize("lines", PROGRAMS)
+def test_lockstep_same_as_threaded(lines):
+    check_same_as_scalar(lines, numpy.zeros((3, 0)))
+
+
+# Lanes fill, copy and compare ranges of different size at same time
+BLOCK_MEMORY = [
+    "INPUT r1", "INPUT r2", "INPUT A",
+    "MEMSET @r1, r2", "MOV r3, r1", "ADD r3, 2",
+    "MEMCPY @r3, @r1", "MEMCMP @r1, @r3", "PRINT @r1", "PRINT @r3",
+    "MOV r3, 100", "MEMSET @r3, 7", "MEMCMP @r3, @r1",
+    "JMP_GT greater", "PRINT A",
+    "LABEL greater",
+]
+
+
+@pytest.mark.parametrize("operation", ["ADD", "DIV"])
+def test_lockstep_block_memory(operation):
+    lines = BLOCK_MEMORY + [f"{operation} r4, 1"]
+
+    check_same_as_scalar(lines, numpy.array([
+        [10, 5, 4], [20, 3, 0], [0, -2, 6], [30, 9, 1], [7, 8, 3],
+    ]))
+
+    result = run_lockstep(gen_program(*lines), numpy.array([
+        [1020, 1, 10], [5, 1, -1], [5, 1, 3],
+    ]))
+
+    assert result.faults.tolist() == [FAULT_MEMORY, FAULT_COUNT, 0]
+    assert result.fault_message(1) == "Bad count of cells"
+
+
+# Lanes apply vector operations to ranges of different size at same time
+VECTORS = [
+    "INPUT r1", "INPUT r2", "INPUT A",
+    "MEMSET @r1, r2", "MOV r3, r1", "ADD r3, 3", "MEMSET @r3, 5",
+    "VADD @r1, @r3", "VMUL @r3, @r1", "VXOR @r1, @r3", "VSUB @r3, @r1",
+    "VAND @r1, @r3", "VSUM r4, @r3", "PRINT r4",
+    "MOV r3, 200", "VSUM @r3, @r1", "PRINT @r3",
+]
+
+
+@pytest.mark.parametrize("operation", ["ADD", "DIV"])
+def test_lockstep_vectors(operation):
+    lines = VECTORS + [f"{operation} r4, 2"]
+
+    check_same_as_scalar(lines, numpy.array([
+        [10, 5, 4], [20, 3, 0], [0, -2, 6], [30, 9, 1], [7, 8, 3],
+        # Empty range starts at end of memory
+        [1021, 5, 0],
+    ]))
+    check_same_as_scalar(lines, numpy.array([[10, 5, 4]] * 3))
+
+
+def test_lockstep_steps():
+    program = gen_program(*FIBONACCI)
+    result = run_lockstep(program, [1, 2])
+
+    assert result.steps == 14 + 21
+
+
+def test_lockstep_faults():
+    program = gen_program(
+        "INPUT r1", "INPUT r2", "PRINT r1",
+        "CMP r1, 3", "JMP_EQ ret",
+        "DIV r1, r2", "MOV r3, @r2",
+        "PRINT r1", "END",
+        "LABEL ret", "RET",
+    )
+
+    result = run_lockstep(program, [
+        [1, 0],
+        [1, 2000],
+        [3, 1],
+        [4, 2],
+        # Negative address doesn't wrap around
+        [1, -1],
+    ])
+
+    assert result.faults.tolist() == [
+        FAULT_DIVISION, FAULT_MEMORY, FAULT_RET, 0, FAULT_MEMORY
+    ]
+    assert result.fault_message(2) == "Bad RET before CALL."
+    assert result.fault_message(3) == ""
+    assert result.output_counts.tolist() == [1, 1, 1, 2, 1]
+    assert result.output[3].tolist() == [4, 2]
+    # Lane with fault keeps values from moment of fault
+    assert result.registers[0, 0] == 1
+
+    exhausted = run_lockstep(program, numpy.array([[1], [2]]))
+
+    assert exhausted.faults.tolist() == [FAULT_INPUT, FAULT_INPUT]
+    assert exhausted.output.shape == (2, 0)
+
+
+def test_lockstep_empty():
+    result = run_lockstep(gen_program(*FIBONACCI), numpy.zeros((0, 1)))
+
+    assert result.output.shape == (0, 0)
+    assert result.registers.shape == (0, 9)
+    assert result.steps == 0
+
+    with pytest.raises(ValueError):
+        run_lockstep(gen_program("NOP"), numpy.zeros((1, 1, 1)))
+
+
+def test_lockstep_memory_size():
+    program = gen_program("INPUT r1", "MOV @r1, 1", "PRINT @r1")
+    max_cells = MAX_MEMORY_BYTES // 8
+
+    result = run_lockstep(
+        dataclasses.replace(program, memory_size=max_cells),
+        [max_cells - 1, 0], lanes_per_run=2
+    )
+
+    assert result.output.tolist() == [[1], [1]]
+
+    with pytest.raises(ValueError, match="too big"):
+        run_lockstep(dataclasses.replace(program, memory_size=max_cells + 1),
+                     [0])
+
+    # Programs without memory operations don't allocate memory
+    run_lockstep(dataclasses.replace(gen_program("INPUT r1"),
+                                     memory_size=max_cells + 1), [0])
+
+
+def test_lockstep_bad_argument():
+    with pytest.raises(Exception, match="Bad input destination"):
+        run_lockstep(gen_program("INPUT 1"), [1])
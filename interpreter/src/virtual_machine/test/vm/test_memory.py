@@ -0,0 +1,222 @@
+import copy
+import array
+
+import pytest
+
+from interpreter.src.virtual_machine.errors import MemoryFault
+from interpreter.src.virtual_machine.vm.memory import (
+    DENSE_MEMORY_LIMIT,
+    MAX_MEMORY_SIZE,
+    PAGE_SIZE,
+    DenseMemory,
+    PagedMemory,
+    VmMemory,
+    make_memory
+)
+
+
+def test_make_memory():
+    assert isinstance(make_memory(1024), DenseMemory)
+    assert isinstance(make_memory(DENSE_MEMORY_LIMIT), DenseMemory)
+    assert isinstance(make_memory(DENSE_MEMORY_LIMIT + 1), PagedMemory)
+    assert isinstance(make_memory(MAX_MEMORY_SIZE), PagedMemory)
+
+    with pytest.raises(ValueError):
+        make_memory(0)
+
+    with pytest.raises(ValueError):
+        make_memory(MAX_MEMORY_SIZE + 1)
+
+    with pytest.raises(TypeError):
+        VmMemory(1024)
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+def test_memory_read_write(size):
+    memory = make_memory(size)
+
+    assert len(memory) == size
+    assert memory[0] == 0
+    assert memory[size - 1] == 0
+
+    memory[5] = 7
+    memory[size - 1] = -3
+
+    assert memory[5] == 7
+    assert memory[size - 1] == -3
+    assert list(memory.items()) == [(5, 7), (size - 1, -3)]
+
+    # Values out of int64 are kept as is
+    memory[6] = 2.5
+    memory[7] = 2 ** 70
+
+    assert memory[5] == 7
+    assert memory[6] == 2.5
+    assert isinstance(memory[6], float)
+    assert memory[7] == 2 ** 70
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+@pytest.mark.parametrize("address", [-1, -2 ** 40])
+def test_memory_fault(size, address):
+    memory = make_memory(size)
+
+    with pytest.raises(MemoryFault) as exc_info:
+        memory[address] = 1
+
+    assert exc_info.value.address == address
+    assert exc_info.value.size == size
+
+    for bad_address in (address, size, size + PAGE_SIZE):
+        with pytest.raises(MemoryFault, match=f"of size {size}"):
+            memory[bad_address]
+
+
+def test_paged_memory_lazy_pages():
+    memory = make_memory(2 ** 32 - 1)
+
+    # Reads don't allocate pages
+    assert memory[2 ** 31] == 0
+    assert memory.pages == {}
+
+    memory[2 ** 31] = 1
+    memory[2 ** 31 + 1] = 2
+    memory[5] = 3
+
+    assert len(memory.pages) == 2
+    assert all(isinstance(page, array.array) for page in memory.pages.values())
+
+    assert [start for start, _ in memory.regions()] == [0, 2 ** 31]
+
+    # Page with float value keeps Python values
+    memory[6] = 0.5
+
+    assert isinstance(memory.pages[0], list)
+    assert memory[5] == 3
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+def test_memory_keeps_booleans(size):
+    memory = make_memory(size)
+    # Ranges start in not allocated pages of paged memory
+    step = PAGE_SIZE if size > PAGE_SIZE else 100
+
+    memory[5] = 3
+    memory[6] = True
+    memory.write_values(step + 10, [False, 1])
+    memory.fill(3 * step, 2, True)
+    memory.fill(4 * step, 1, False)
+
+    assert memory[5] == 3
+    assert memory[6] is True
+    assert memory[step + 10] is False
+    assert memory[step + 11] == 1
+    assert [value is True for value in memory.read_values(3 * step, 3)] == \
+        [True, True, False]
+    assert memory[4 * step] is False
+
+
+def test_memory_last_page_region():
+    size = DENSE_MEMORY_LIMIT + 10
+    memory = make_memory(size)
+
+    memory[size - 1] = 1
+
+    (start, values), = memory.regions()
+
+    assert start + len(values) == size
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+def test_memory_write_values(size):
+    memory = make_memory(size)
+
+    memory.write_values(PAGE_SIZE - 2 if size > PAGE_SIZE else 10,
+                        array.array('q', [1, 2, 3, 4]))
+    memory.write_values(0, [0.5, 2 ** 70])
+
+    start = PAGE_SIZE - 2 if size > PAGE_SIZE else 10
+
+    assert [memory[start + index] for index in range(4)] == [1, 2, 3, 4]
+    assert memory[0] == 0.5
+    assert memory[1] == 2 ** 70
+
+    with pytest.raises(MemoryFault):
+        memory.write_values(size - 1, [1, 2])
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+def test_memory_copy_and_equality(size):
+    memory = make_memory(size)
+    memory[3] = 4
+
+    copied = copy.deepcopy(memory)
+    copied[3] = 5
+
+    assert memory[3] == 4
+    assert copied != memory
+
+    copied[3] = 4
+
+    assert copied == memory
+    assert make_memory(size) != make_memory(size + 1)
+
+    # Dense and paged memory of same size are compared by values
+    dense = DenseMemory(size)
+    dense[3] = 4
+
+    assert dense == memory
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+def test_memory_ranges(size):
+    memory = make_memory(size)
+    start = PAGE_SIZE - 3 if size > PAGE_SIZE else 10
+
+    memory.fill(start, 6, 7)
+
+    assert list(memory.read_values(start - 1, 8)) == [0] + [7] * 6 + [0]
+
+    # Overlapped ranges are copied as by temporary copy
+    memory[start] = 1
+    memory.copy_values(start + 1, start, 6)
+
+    assert list(memory.read_values(start, 7)) == [1, 1, 7, 7, 7, 7, 7]
+
+    memory.fill(start, 2, 0.5)
+
+    assert list(memory.read_values(start, 3)) == [0.5, 0.5, 7]
+
+    assert list(memory.read_values(size - 2, 2)) == [0, 0]
+    assert list(memory.read_values(0, 0)) == []
+    assert list(memory.read_values(size, 0)) == []
+
+    memory.fill(size, 0, 1)
+    memory.copy_values(0, size, 0)
+
+    for start, count in ((size - 1, 2), (-1, 1), (-1, 0), (size, 1),
+                         (size + 1, 0)):
+        with pytest.raises(MemoryFault):
+            memory.read_values(start, count)
+
+        with pytest.raises(MemoryFault):
+            memory.fill(start, count, 1)
+
+        with pytest.raises(MemoryFault):
+            memory.copy_values(0, start, count)
+
+
+def test_paged_memory_ranges_without_pages():
+    memory = make_memory(2 ** 32 - 1)
+
+    # Zeros are not written into not allocated pages
+    memory.fill(2 ** 31, 3 * PAGE_SIZE, 0)
+    memory.copy_values(2 ** 20, 2 ** 31, 3 * PAGE_SIZE)
+
+    assert memory.pages == {}
+
+    memory.fill(PAGE_SIZE - 1, 2, 2 ** 70)
+
+    assert isinstance(memory.read_values(2 ** 20, 10), array.array)
+    assert memory.read_values(PAGE_SIZE - 2, 3) == [0, 2 ** 70, 2 ** 70]
+    assert isinstance(memory.pages[1], list)
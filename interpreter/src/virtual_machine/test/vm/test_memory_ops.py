@@ -0,0 +1,115 @@
+import pytest
+
+from interpreter.src.virtual_machine.errors import MemoryFault
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+ENGINES = ["interpreter", "threaded", "pyjit"]
+
+
+def run(*lines, engine="interpreter", memory_size=None):
+    output = ListSink()
+    vm_state = execute_bytecode(gen_program(*lines), engine=engine,
+                                output=output, memory_size=memory_size)
+
+    return output.values, vm_state
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memset(engine):
+    _, vm_state = run(
+        "MOV r1, 10", "MOV r2, 9", "SUB r3, 3", "MOV @r2, r3", "MOV A, 4",
+        "MEMSET @r1, 5", "ADD r1, 1", "MOV A, 2", "MEMSET @r1, @r2",
+        "MOV A, 0", "MEMSET @r1, 1", "MOV r3, 7", "MEMSET @r3, r3",
+        engine=engine
+    )
+
+    assert vm_state.vm_memory.read_values(9, 6) == [-3, 5, -3, -3, 5, 0]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memcpy_overlap(engine):
+    code = ["MOV r1, 20", "MOV A, 5", "MEMSET @r1, 1"]
+    code += [f"MOV r1, {address}" for address in (21, 22, 23)]
+    code += ["MOV @r1, r1"]
+
+    # Overlapped ranges are copied in both directions as by temporary copy
+    _, forward = run(*code, "MOV r1, 20", "MOV r2, 22", "MEMCPY @r2, @r1",
+                     engine=engine)
+    _, backward = run(*code, "MOV r1, 20", "MOV r2, 18", "MEMCPY @r2, @r1",
+                      engine=engine)
+
+    assert forward.vm_memory.read_values(20, 7) == [1, 1, 1, 1, 1, 23, 1]
+    assert backward.vm_memory.read_values(18, 7) == [1, 1, 1, 23, 1, 23, 1]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_memcmp(engine):
+    output, _ = run(
+        "MOV r1, 10", "MOV r2, 20", "MOV A, 3",
+        "MEMSET @r1, 4", "MEMSET @r2, 4",
+        "MEMCMP @r1, @r2", "JMP_EQ equal", "PRINT 0",
+        "LABEL equal",
+        "ADD r2, 2", "MOV @r2, 5",
+        "MEMCMP @r1, @r2", "JMP_NE first", "PRINT 0",
+        "LABEL first",
+        "JMP_GT greater", "PRINT 1",
+        "LABEL greater",
+        # Empty ranges are equal
+        "MOV A, 0", "MEMCMP @r2, @r1", "JMP_EQ empty", "PRINT 0",
+        "LABEL empty",
+        "MOV A, 1", "MEMCMP @r2, @r1", "JMP_GT end", "PRINT 0",
+        "LABEL end",
+        engine=engine
+    )
+
+    assert output == [1]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+def test_block_memory_paged(engine):
+    output, vm_state = run(
+        "MOV r1, 3000000", "MOV r2, 1000000", "MOV A, 10000",
+        "MEMSET @r1, 2", "MEMCPY @r2, @r1", "MEMCMP @r1, @r2",
+        "JMP_NE end", "MOV r3, 1009999", "PRINT @r3",
+        "LABEL end",
+        engine=engine, memory_size=2 ** 22
+    )
+
+    assert output == [2]
+    assert len(vm_state.vm_memory.pages) == 6
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("line", ["MEMCPY @r2, @r1", "MEMCPY @r1, @r2",
+                                  "MEMSET @r1, 0", "MEMCMP @r2, @r1"])
+def test_block_memory_fault(engine, line):
+    # Range from last cell doesn't wrap around to start of memory
+    with pytest.raises(MemoryFault) as exc_info:
+        run("MOV r1, 1020", "MOV A, 5", line, engine=engine)
+
+    assert exc_info.value.address == 1024
+
+    with pytest.raises(MemoryFault) as exc_info:
+        run("SUB r1, 1", line, engine=engine)
+
+    assert exc_info.value.address == -1
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("line,message", [
+    ("MEMCPY @r2, @r1", "Bad count of cells for MEMCPY"),
+    ("MEMSET @r1, 1", "Bad count of cells for MEMSET"),
+    ("MEMCMP @r2, @r1", "Bad count of cells for MEMCMP"),
+    ("MEMCPY @r2, r1", "Bad argument for MEMCPY"),
+    ("MEMCPY r2, @r1", "Bad argument on MEMCPY"),
+    ("MEMSET r1, 1", "Bad argument on MEMSET"),
+    ("MEMCMP 1, @r1", "Bad argument on MEMCMP"),
+])
+def test_block_memory_errors(engine, line, message):
+    with pytest.raises(Exception, match=message):
+        run("SUB A, 1", line, engine=engine)
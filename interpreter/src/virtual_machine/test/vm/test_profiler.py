@@ -0,0 +1,148 @@
+import json
+
+import pytest
+
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.byte_cc import resolve_labels
+from interpreter.src.virtual_machine.vm import VM_BYTECODE_FUNC
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.profiler import Profiler
+from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+CODE = [
+    "LABEL main",
+    "MOV r1, 3",
+    "LABEL loop",
+    "CALL outer",
+    "SUB r1, 1",
+    "CMP r1, 0",
+    "JMP_GT loop",
+    "PRINT r2",
+    "END",
+    "LABEL outer",
+    "ADD r2, 1",
+    "CALL inner",
+    "RET",
+    "LABEL inner",
+    "ADD r2, 10",
+    "RET",
+]
+
+
+def profile_code(lines, **kwargs):
+    parser = Parser()
+    _, addresses = resolve_labels(parser.parse("\n".join(lines)))
+
+    symbols = {
+        name: addresses[label_index]
+        for name, label_index in parser.labels_table.items()
+    }
+
+    program = gen_program(*lines)
+    profiler = Profiler(program, symbols)
+    output = ListSink()
+
+    execute_bytecode(program, output=output, profiler=profiler, **kwargs)
+
+    return profiler.report(), output.values
+
+
+def test_profiler_counts():
+    report, output = profile_code(CODE)
+
+    assert output == [33]
+    assert report.steps == 1 + 3 * 4 + 2 + 3 * 3 + 3 * 2
+    assert report.seconds > 0
+
+    operations = {item.name: item.count for item in report.operations}
+
+    assert operations == {
+        "MOV": 1, "CALL": 6, "SUB": 3, "CMP": 3, "JMP_GT": 3,
+        "PRINT": 1, "END": 1, "ADD": 6, "RET": 6,
+    }
+    assert sum(item.seconds for item in report.operations) == \
+        pytest.approx(report.seconds)
+
+    labels = {item.label: (item.address, item.hits, item.count)
+              for item in report.labels}
+
+    assert labels == {
+        "main": (0, 1, 1),
+        "loop": (1, 3, 14),
+        "outer": (7, 3, 9),
+        "inner": (10, 3, 6),
+    }
+
+
+def test_profiler_calls():
+    report, _ = profile_code(CODE)
+
+    calls = {item.label: item for item in report.calls}
+
+    assert [item.label for item in report.calls] == ["outer", "inner"]
+    assert calls["outer"].calls == 3
+    assert calls["inner"].calls == 3
+    assert calls["outer"].inclusive >= calls["inner"].inclusive
+    assert calls["outer"].exclusive == pytest.approx(
+        calls["outer"].inclusive - calls["inner"].inclusive
+    )
+    assert calls["inner"].exclusive == pytest.approx(
+        calls["inner"].inclusive
+    )
+
+
+def test_profiler_loops():
+    report, _ = profile_code(CODE)
+
+    loop, = report.loops
+
+    assert (loop.label, loop.start, loop.end, loop.iterations) == \
+        ("loop", 1, 4, 2)
+
+
+def test_profiler_not_returned_call():
+    report, _ = profile_code(["CALL sub", "LABEL sub", "END"])
+
+    call, = report.calls
+
+    assert (call.label, call.calls) == ("sub", 1)
+    assert report.loops == []
+
+
+def test_profiler_report_formats():
+    report, _ = profile_code(CODE)
+
+    table = report.format_table()
+
+    assert table.startswith(f"Executed {report.steps} operations")
+    assert "Hottest loops" in table
+    assert "outer" in table
+
+    data = json.loads(report.to_json())
+
+    assert data["steps"] == report.steps
+    assert data["calls"][0]["label"] == "outer"
+
+
+def test_profiler_dispatch_table():
+    profiler = Profiler(gen_program("NOP"))
+
+    assert len(profiler.dispatch_table) == len(VM_BYTECODE_FUNC)
+    assert profiler.report().labels == []
+    assert profiler.report().format_table() == \
+        "Executed 0 operations in 0.000 ms."
+
+
+@pytest.mark.parametrize("kwargs", [
+    {"engine": "threaded"},
+    {"snapshots": True},
+])
+def test_profiler_not_supported(kwargs):
+    program = gen_program("NOP")
+
+    with pytest.raises(ValueError):
+        execute_bytecode(program, profiler=Profiler(program), **kwargs)
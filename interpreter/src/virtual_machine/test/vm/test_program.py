@@ -0,0 +1,184 @@
+import copy
+import struct
+
+import pytest
+
+from interpreter.src.parser.operation import (
+    OperationArgument,
+    OperationArgumentType,
+)
+from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler
+from interpreter.src.virtual_machine.vm.program import (
+    Program,
+    block_ends,
+    code_blocks,
+    count_executed,
+    decode_operations,
+    load_program,
+    map_file,
+    BadOperationSize,
+)
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_bytecode,
+    gen_program,
+)
+
+
+def test_load_program():
+    bcode = b"".join([
+        gen_bytecode("MOV r1, 3"),
+        gen_bytecode("PRINT @r2"),
+    ])
+
+    program = load_program(bcode)
+
+    assert len(program) == 2
+
+    # mov, register, r1, in-place, 3
+    assert program[0] == (8, 2, 0, 4, 3)
+    # print, register-pointer, r2, nop, nop
+    assert program[1] == (16, 3, 1, 0, 0)
+
+    assert list(program.op_codes) == [8, 16]
+    assert list(program.arg2s) == [3, 0]
+
+
+def test_load_program_columns():
+    operations = [(8, 2, 0x12345678, 4, -300), (16, -1, -2, 127, 2 ** 31 - 1)]
+    bcode = b"".join(struct.pack('=hbibi', *op) for op in operations)
+
+    program = load_program(bytearray(bcode))
+
+    assert [program[0], program[1]] == operations
+    assert load_program(memoryview(bcode)) == program
+
+
+def test_load_program_from_mapped_file(tmp_path):
+    bcode = gen_bytecode("MOV r1, 3") + gen_bytecode("PRINT @r2")
+
+    bytecode_file = tmp_path / "program.small_c"
+    bytecode_file.write_bytes(b"meta" + bcode)
+
+    with map_file(bytecode_file) as mapped:
+        assert mapped.readonly
+        assert len(mapped) == 4 + len(bcode)
+
+        with mapped[4:] as code:
+            program = load_program(code)
+
+    assert program == load_program(bcode)
+
+
+def test_map_empty_file(tmp_path):
+    bytecode_file = tmp_path / "empty.small_c"
+    bytecode_file.write_bytes(b"")
+
+    with map_file(bytecode_file) as mapped:
+        assert len(mapped) == 0
+
+
+def test_load_program_empty():
+    program = load_program(b"")
+
+    assert len(program) == 0
+    assert program == Program()
+
+
+def test_load_program_bad_size():
+    with pytest.raises(BadOperationSize):
+        load_program(gen_bytecode("NOP")[:-1])
+
+
+def test_load_program_bad_opcode():
+    bcode = struct.pack('=hbibi', 100, 0, 0, 0, 0)
+
+    with pytest.raises(Exception):
+        load_program(bcode)
+
+    bcode = struct.pack('=hbibi', -1, 0, 0, 0, 0)
+
+    with pytest.raises(Exception):
+        load_program(bcode)
+
+
+def test_program_copy_is_shared():
+    program = load_program(gen_bytecode("NOP"))
+
+    assert copy.deepcopy(program) is program
+
+
+def test_decode_operations():
+    program = gen_program("MOV r1, 3", "LABEL l", "JMP l")
+
+    operations = decode_operations(program)
+
+    assert [op.op_word for op in operations] == ["MOV", "JMP"]
+    assert operations[1].op_args[0] == OperationArgument(
+        arg_type=OperationArgumentType.Address,
+        arg_word=1
+    )
+
+    assert load_program(
+        b"".join(
+            BytecodeCompiler(file_crc=1).encode_operation(op)
+            for op in operations
+        )
+    ) == program
+
+
+def test_program_digest():
+    assert gen_program("MOV r1, 3").digest() == \
+        gen_program("MOV r1, 3").digest()
+
+    assert gen_program("MOV r1, 3").digest() != \
+        gen_program("MOV r1, 4").digest()
+
+
+def test_block_ends():
+    program = gen_program("MOV r1, 1", "LABEL loop", "ADD r1, 1",
+                          "CMP r1, 5", "JMP_LT loop", "CALL end",
+                          "LABEL end", "PRINT r1", "RET")
+
+    assert block_ends(program) == [1, 4, 4, 4, 5, 7, 7]
+    assert block_ends(gen_program()) == []
+
+    blocks = code_blocks(program, list(range(len(program))), 'test')
+
+    assert blocks == [(0, ), (1, 2, 3), None, None, (4, ), (5, 6), None]
+    assert code_blocks(program, [], 'test') is blocks
+
+
+def fail(error):
+    raise error
+
+
+def test_count_executed():
+    block = (1, 2, 3)
+
+    # Error of third operation, it's not executed
+    operations = iter(block)
+
+    try:
+        for operation in operations:
+            if operation == 3:
+                fail(ValueError())
+    except ValueError as error:
+        assert count_executed(block, operations, error) == 2
+
+    # Interrupt between operations, after whole block
+    operations = iter(block)
+
+    try:
+        for operation in operations:
+            pass
+
+        raise KeyboardInterrupt
+    except KeyboardInterrupt as error:
+        assert count_executed(block, operations, error) == 3
+
+    # Error before block
+    try:
+        fail(ValueError())
+    except ValueError as error:
+        assert count_executed(block, iter(block), error) == 0
@@ -0,0 +1,147 @@
+import struct
+
+import mock
+import pytest
+
+from interpreter.src.virtual_machine.vm.io_streams import ConsoleSource
+from interpreter.src.virtual_machine.vm.threaded import (
+    compile_threaded,
+    run_threaded,
+    VmState
+)
+from interpreter.src.virtual_machine.vm.vm_executor import run_interpreter
+from interpreter.src.virtual_machine.vm.program import load_program
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_bytecode,
+    gen_program,
+)
+
+
+PROGRAMS = [
+    # Binary operations with every form of arguments
+    [
+        "MOV r1, 10", "MOV r2, 3", "MOV @r2, 7", "MOV @r1, r2",
+        "ADD r1, r2", "SUB r1, 1", "MUL r1, @r2", "ADD @r2, 5",
+        "SUB @r2, r2", "MUL @r2, @r1", "XOR r3, 12", "AND r3, 4",
+        "OR r4, r3", "NOT r4", "MOV A, @r2", "DIV A, 2",
+    ],
+    # Compares and conditional jumps
+    [
+        "MOV r1, 3",
+        "LABEL loop",
+        "ADD r2, r1",
+        "SUB r1, 1",
+        "CMP r1, 0",
+        "JMP_GT loop",
+        "CMP r2, r1", "JMP_NE ne", "MOV r3, 1",
+        "LABEL ne",
+        "CMP @r1, @r2", "JMP_EQ eq", "MOV r4, 1",
+        "LABEL eq",
+        "CMP 1, r2", "JMP_LT end", "MOV A, 1",
+        "LABEL end",
+    ],
+    # Calls, returns and END
+    [
+        "CALL first", "CALL second", "END",
+        "LABEL first", "MOV r1, 1", "RET",
+        "LABEL second", "CALL first", "MOV r2, 2", "NOP", "RET",
+    ],
+    # Block memory operations, count of cells is in register A
+    [
+        "MOV r1, 10", "MOV r2, 14", "MOV r3, 40", "MOV @r3, 9",
+        "MOV A, 6", "MEMSET @r1, 5", "MOV A, 2", "MEMSET @r1, r3",
+        "MEMSET @r2, @r3", "MOV A, 6", "MEMCPY @r2, @r1",
+        "MEMCMP @r1, @r2", "JMP_NE ne", "MOV r4, 1",
+        "LABEL ne",
+        "MOV A, 0", "MEMCMP @r1, @r2", "JMP_EQ eq", "MOV r4, 2",
+        "LABEL eq",
+    ],
+    # Vector operations, count of cells is in register A
+    [
+        "MOV r1, 10", "MOV r2, 13", "MOV A, 6", "MEMSET @r1, 6",
+        "MOV A, 3", "MEMSET @r2, 3", "VADD @r1, @r2", "VMUL @r2, @r1",
+        "VSUB @r1, @r2", "VXOR @r2, @r1", "VAND @r1, @r2",
+        "VSUM r3, @r1", "MOV A, 5", "VSUM @r2, @r1", "VSUM A, @r2",
+    ],
+]
+
+
+@pytest.mark.parametrize("lines", PROGRAMS)
+def test_threaded_same_as_interpreter(lines):
+    program = gen_program(*lines)
+
+    expected = run_interpreter(VmState(vm_program=program))
+    state = run_threaded(VmState(vm_program=program))
+
+    assert state.vm_code_pointer == expected.vm_code_pointer
+    assert state.vm_registers == expected.vm_registers
+    assert state.vm_memory == expected.vm_memory
+    assert state.vm_call_stack == expected.vm_call_stack
+
+
+def test_compile_threaded_cached():
+    program = gen_program("MOV r1, 1", "ADD r1, r1")
+
+    code = compile_threaded(program)
+
+    assert len(code) == 2
+    assert compile_threaded(program) is code
+
+
+def test_threaded_io():
+    program = gen_program("INPUT r1", "INPUT @r1", "PRINT @r1", "PRINT 3")
+
+    with mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.input'
+    ) as inp, mock.patch(
+        'interpreter.src.virtual_machine.vm.io_streams.print'
+    ) as p:
+        inp.side_effect = ['a', 5, 8]
+        state = run_threaded(VmState(vm_program=program,
+                                     vm_input=ConsoleSource()))
+
+        p.assert_any_call("VM PRINT: 8")
+        p.assert_called_with("VM PRINT: 3")
+
+    assert state.vm_registers[0].value == 5
+    assert state.vm_memory[5] == 8
+
+
+def test_threaded_ret_error():
+    program = gen_program("RET")
+
+    state = VmState(vm_program=program)
+
+    with pytest.raises(Exception):
+        run_threaded(state)
+
+    # Points to failed instruction
+    assert state.vm_code_pointer == 0
+
+
+@pytest.mark.parametrize("line,arg_index", [
+    ("ADD r1, 11", 1),
+    ("ADD r1, 11", 3),
+    ("MOV r1, 11", 1),
+    ("MOV r1, 11", 3),
+    ("CMP r1, 11", 1),
+    ("CMP r1, 11", 3),
+    ("PRINT r1", 1),
+    ("INPUT r1", 1),
+])
+def test_threaded_bad_argument(line, arg_index):
+    op_code = list(struct.unpack('=hbibi', gen_bytecode(line)))
+    op_code[arg_index] = 0
+
+    bcode = struct.pack('=hbibi', *op_code)
+
+    program = load_program(gen_bytecode("END") + bcode)
+
+    # Bad operation is not executed
+    run_threaded(VmState(vm_program=program))
+
+    program = load_program(bcode)
+
+    with pytest.raises(Exception):
+        run_threaded(VmState(vm_program=program))
@@ -0,0 +1,200 @@
+import pytest
+
+from interpreter.src.virtual_machine.bytecode import BYTECODES
+from interpreter.src.virtual_machine.errors import (
+    InputExhausted,
+    MemoryFault,
+    UndefinedLabel
+)
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.tracer import (
+    WRITTEN_FLAGS,
+    WRITTEN_MEMORY,
+    WRITTEN_NOTHING,
+    WRITTEN_REGISTER,
+    Tracer,
+    is_vm_error,
+    read_trace,
+)
+from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+
+def test_tracer_records():
+    program = gen_program(
+        "MOV r1, 5", "MOV r2, 3", "MOV @r2, r1", "CMP r1, 5", "PRINT r1",
+    )
+    tracer = Tracer(program, size=8)
+
+    execute_bytecode(program, output=ListSink(), tracer=tracer)
+
+    trace = tracer.trace()
+
+    assert trace.steps == 5
+    assert trace.error == ""
+    assert [record.step for record in trace.records] == [0, 1, 2, 3, 4]
+    assert [record.address for record in trace.records] == [0, 1, 2, 3, 4]
+    assert [record.operation_name for record in trace.records] == [
+        "MOV", "MOV", "MOV", "CMP", "PRINT"
+    ]
+    assert [
+        (record.written_kind, record.written_at, record.written_value)
+        for record in trace.records
+    ] == [
+        (WRITTEN_REGISTER, 0, 5),
+        (WRITTEN_REGISTER, 1, 3),
+        (WRITTEN_MEMORY, 3, 5),
+        (WRITTEN_FLAGS, 0, 1),
+        (WRITTEN_NOTHING, 0, 0),
+    ]
+
+    first, second, third, compare, print_record = trace.records
+
+    assert first.op_code == BYTECODES["MOV"]
+    assert (first.arg1_type, first.arg1, first.arg2_type, first.arg2) == \
+        (2, 0, 4, 5)
+    assert first.format().endswith("0: MOV r1, 5  ; r1 = 5")
+    assert third.format().endswith("MOV @r2, r1  ; [3] = 5")
+    assert compare.format().endswith("CMP r1, 5  ; flags EQ")
+    assert print_record.format().endswith("4: PRINT r1")
+
+
+def test_tracer_ring_buffer():
+    program = gen_program(
+        "LABEL loop", "ADD r1, 1", "CMP r1, 10", "JMP_LT loop"
+    )
+    tracer = Tracer(program, size=4)
+
+    execute_bytecode(program, tracer=tracer)
+
+    trace = tracer.trace()
+
+    assert trace.steps == 30
+    assert [record.step for record in trace.records] == [26, 27, 28, 29]
+    assert [record.operation_name for record in trace.records] == [
+        "JMP_LT", "ADD", "CMP", "JMP_LT"
+    ]
+    assert trace.records[1].written_value == 10
+    assert trace.records[2].format().endswith("flags EQ")
+    assert trace.records[3].format().endswith("JMP_LT <0>")
+
+
+def test_tracer_dump_on_error(tmp_path):
+    dump_file = tmp_path / "program.small_trace"
+    program = gen_program("MOV r1, 2", "RET")
+    tracer = Tracer(program, dump_file=str(dump_file))
+
+    with pytest.raises(Exception, match="Bad RET before CALL."):
+        execute_bytecode(program, tracer=tracer)
+
+    trace = read_trace(dump_file.read_bytes())
+
+    assert trace.error == "Bad RET before CALL."
+    assert [record.operation_name for record in trace.records] == [
+        "MOV", "RET"
+    ]
+    assert trace.format().splitlines()[:2] == [
+        "Last 2 of 2 instructions.",
+        "Error: Bad RET before CALL.",
+    ]
+
+
+def test_tracer_dump_on_memory_fault(tmp_path):
+    dump_file = tmp_path / "program.small_trace"
+    program = gen_program("SUB r1, 1", "MOV @r1, 2")
+    tracer = Tracer(program, dump_file=str(dump_file))
+
+    with pytest.raises(MemoryFault):
+        execute_bytecode(program, tracer=tracer)
+
+    trace = read_trace(dump_file.read_bytes())
+
+    assert trace.error.startswith("Address -1 is out of memory")
+    assert [record.operation_name for record in trace.records] == [
+        "SUB", "MOV"
+    ]
+
+
+@pytest.mark.parametrize("exception, expected", [
+    (MemoryFault(-1, 10), True),
+    (UndefinedLabel(3), True),
+    (Exception("Bad RET before CALL."), True),
+    (Exception("Bad argument for VADD"), True),
+    (ZeroDivisionError("division by zero"), False),
+    (InputExhausted("Input is exhausted"), False),
+    (ValueError("Bad value of other code"), False),
+    (KeyboardInterrupt(), False),
+])
+def test_is_vm_error(exception, expected):
+    assert is_vm_error(exception) is expected
+
+
+def test_tracer_no_dump_on_other_errors(tmp_path):
+    dump_file = tmp_path / "program.small_trace"
+    program = gen_program("DIV r1, 0")
+    tracer = Tracer(program, dump_file=str(dump_file))
+
+    with pytest.raises(ZeroDivisionError):
+        execute_bytecode(program, tracer=tracer)
+
+    assert not dump_file.exists()
+
+    tracer.dump(str(dump_file))
+
+    assert read_trace(dump_file.read_bytes()).records[0].address == 0
+
+
+def test_tracer_block_memory():
+    program = gen_program(
+        "MOV r1, 10", "MOV r2, 20", "MOV A, 3", "MEMSET @r1, 7",
+        "MEMCPY @r2, @r1", "MEMCMP @r1, @r2",
+    )
+    tracer = Tracer(program)
+
+    execute_bytecode(program, tracer=tracer)
+
+    memset, memcpy, memcmp = tracer.trace().records[3:]
+
+    assert memset.format().endswith("MEMSET @r1, 7  ; [10] = 7")
+    assert memcpy.format().endswith("MEMCPY @r2, @r1  ; [20] = 7")
+    assert memcmp.format().endswith("MEMCMP @r1, @r2  ; flags EQ")
+
+
+def test_tracer_wraps_values():
+    program = gen_program("MOV r1, 1", "DIV r1, 2", "MUL r2, 0")
+    tracer = Tracer(program)
+
+    execute_bytecode(program, tracer=tracer)
+
+    assert [record.written_value for record in tracer.trace().records] == \
+        [1, 0, 0]
+
+
+def test_tracer_errors():
+    program = gen_program("NOP")
+
+    with pytest.raises(ValueError):
+        Tracer(program, size=0)
+
+    with pytest.raises(ValueError):
+        Tracer(program).dump()
+
+    with pytest.raises(Exception, match="Bad trace file"):
+        read_trace(b"NOPE" + bytes(20))
+
+    with pytest.raises(Exception, match="Bad size of trace file"):
+        read_trace(_truncated_trace(program))
+
+    with pytest.raises(ValueError):
+        execute_bytecode(program, engine="threaded", tracer=Tracer(program))
+
+
+def _truncated_trace(program):
+    tracer = Tracer(program)
+
+    execute_bytecode(program, tracer=tracer)
+
+    return tracer.to_bytes()[:-1]
@@ -0,0 +1,193 @@
+import sys
+import array
+import operator
+import functools
+import subprocess
+
+import mock
+import pytest
+
+from interpreter.src.virtual_machine.errors import MemoryFault
+from interpreter.src.virtual_machine.vm import vector_ops
+from interpreter.src.virtual_machine.vm.io_streams import ListSink
+from interpreter.src.virtual_machine.vm.memory import make_memory
+from interpreter.src.virtual_machine.vm.vector_ops import (
+    NUMPY_MIN_COUNT,
+    apply_values,
+    sum_values,
+    vector_apply,
+)
+from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+ENGINES = ["interpreter", "threaded", "pyjit"]
+
+# Cells 0..199 are i * i - 3000, cells 200..399 are 7 * i + 1
+FILL_CODE = [
+    "LABEL fill",
+    "MOV r3, r1", "MUL r3, r1", "SUB r3, 3000", "MOV @r1, r3",
+    "MOV r2, r1", "ADD r2, 200", "MOV r3, r1", "MUL r3, 7", "ADD r3, 1",
+    "MOV @r2, r3",
+    "ADD r1, 1", "CMP r1, 200", "JMP_LT fill",
+    "MOV r1, 0", "MOV r2, 200", "MOV A, 200",
+]
+
+# Scalar loop, which does the same as vector operation
+SCALAR_LOOP = [
+    "MOV r4, 200",
+    "LABEL loop",
+    "{operation} {destination}, @r2",
+    "ADD r1, 1", "ADD r2, 1", "SUB r4, 1", "CMP r4, 0", "JMP_GT loop",
+]
+
+
+@pytest.fixture(params=[True, False], ids=["numpy", "python"])
+def with_numpy(request):
+    if request.param:
+        pytest.importorskip("numpy")
+        yield
+    else:
+        with mock.patch.object(vector_ops, "load_numpy", return_value=None):
+            yield
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("operation", ["ADD", "SUB", "MUL", "AND", "XOR"])
+@pytest.mark.parametrize("memory_size", [None, 2 ** 20])
+def test_vector_same_as_scalar(with_numpy, engine, operation, memory_size):
+    scalar = execute_bytecode(
+        gen_program(*FILL_CODE, *[
+            line.format(operation=operation, destination="@r1")
+            for line in SCALAR_LOOP
+        ]),
+        engine=engine, memory_size=memory_size
+    )
+    vector = execute_bytecode(
+        gen_program(*FILL_CODE, f"V{operation} @r1, @r2"),
+        engine=engine, memory_size=memory_size
+    )
+
+    assert vector.vm_memory == scalar.vm_memory
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("destination", ["r3", "@r3"])
+@pytest.mark.parametrize("memory_size", [None, 2 ** 20])
+def test_vsum_same_as_scalar(with_numpy, engine, destination, memory_size):
+    code = FILL_CODE + ["MOV r3, 500", "MOV @r3, 5"]
+    output = ListSink()
+
+    execute_bytecode(
+        gen_program(*code, *[
+            line.format(operation="ADD", destination=destination)
+            for line in SCALAR_LOOP
+        ], f"PRINT {destination}"),
+        engine=engine, output=output, memory_size=memory_size
+    )
+    execute_bytecode(
+        gen_program(*code, f"VSUM {destination}, @r2",
+                    f"PRINT {destination}"),
+        engine=engine, output=output, memory_size=memory_size
+    )
+
+    first, second = output.values
+
+    assert first == second
+
+
+def test_apply_values(with_numpy):
+    count = NUMPY_MIN_COUNT + 3
+
+    # Result out of int64 is a Python integer
+    assert apply_values("VADD", [2 ** 62] * count, [2 ** 62] * count) == \
+        [2 ** 63] * count
+    assert apply_values("VMUL", [-2 ** 40] * count, [2 ** 40] * count) == \
+        [-2 ** 80] * count
+    assert apply_values("VSUB", array.array('q', [-2 ** 62] * count),
+                        array.array('q', [2 ** 62] * count)) == \
+        [-2 ** 63] * count
+
+    # Floats and booleans stay the same as by Python operators
+    assert apply_values("VADD", [0.5] * count, [1] * count) == \
+        [1.5] * count
+    assert apply_values("VXOR", [True] * count, [False] * count) == \
+        [True] * count
+
+    left = array.array('q', range(-count, count))
+    right = array.array('q', range(2 * count))
+
+    for operation_name, func in vector_ops.VECTOR_OPERATIONS.items():
+        assert list(apply_values(operation_name, left, right)) == \
+            list(map(func, left, right))
+
+
+def test_numpy_imported_lazily():
+    # Short ranges don't need NumPy, so it's not imported with VM
+    code = (
+        "import sys\n"
+        "from interpreter.src.virtual_machine.vm.vector_ops import "
+        "apply_values\n"
+        "from interpreter.src.virtual_machine.vm.vm_executor import "
+        "execute_bytecode\n"
+        "apply_values('VADD', [1, 2], [3, 4])\n"
+        "assert 'numpy' not in sys.modules\n"
+    )
+
+    subprocess.run([sys.executable, "-c", code], check=True)
+
+
+def test_sum_values(with_numpy):
+    count = NUMPY_MIN_COUNT + 3
+    floats = [0.1 * index for index in range(count)]
+
+    # Floats are added in order of cells
+    assert sum_values(0.3, floats) == \
+        functools.reduce(operator.add, floats, 0.3)
+    assert sum_values(1, [2 ** 62] * count) == 1 + count * 2 ** 62
+    assert sum_values(1, array.array('q', range(count))) == \
+        1 + sum(range(count))
+    assert sum_values(1, array.array('q', [2 ** 62] * count)) == \
+        1 + count * 2 ** 62
+    assert sum_values(1, []) == 1
+
+
+@pytest.mark.parametrize("size", [1024, 2 ** 20])
+def test_vector_apply_overlap(with_numpy, size):
+    memory = make_memory(size)
+    count = 2 * NUMPY_MIN_COUNT
+
+    memory.write_values(100, list(range(count + 1)))
+
+    # Both ranges are read before write
+    vector_apply(memory, "VADD", 101, 100, count)
+
+    assert list(memory.read_values(100, count + 1)) == \
+        [0] + [2 * index + 1 for index in range(count)]
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("line", ["VADD @r2, @r1", "VXOR @r1, @r2",
+                                  "VSUM r2, @r1"])
+def test_vector_fault(engine, line):
+    with pytest.raises(MemoryFault) as exc_info:
+        execute_bytecode(gen_program("MOV r1, 1020", "MOV A, 5", line),
+                         engine=engine)
+
+    assert exc_info.value.address == 1024
+
+
+@pytest.mark.parametrize("engine", ENGINES)
+@pytest.mark.parametrize("line,message", [
+    ("VADD @r2, @r1", "Bad count of cells for VADD"),
+    ("VSUM r2, @r1", "Bad count of cells for VSUM"),
+    ("VMUL @r2, r1", "Bad argument for VMUL"),
+    ("VSUB r2, @r1", "Bad argument on VSUB"),
+    ("VSUM r2, 1", "Bad argument for VSUM"),
+    ("VSUM 1, @r2", "Bad argument on VSUM"),
+])
+def test_vector_errors(engine, line, message):
+    with pytest.raises(Exception, match=message):
+        execute_bytecode(gen_program("SUB A, 1", line), engine=engine)
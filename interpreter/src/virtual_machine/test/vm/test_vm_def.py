@@ -0,0 +1,63 @@
+import copy
+
+import pytest
+
+from interpreter.src.virtual_machine.vm.vm_def import (
+    REGISTER_NAMES,
+    REGISTERS_COUNT,
+    VmRegister,
+    VmState,
+)
+
+from interpreter.src.virtual_machine.test.vm.test_binary_ops import (
+    gen_program
+)
+
+
+def test_register_file():
+    state = VmState(vm_program=gen_program("NOP"))
+
+    assert state.vm_register_file == [0] * REGISTERS_COUNT
+    assert REGISTER_NAMES == ("r1", "r2", "r3", "r4", "A",
+                              "EQ", "LT", "GT", "NE")
+
+
+def test_registers_view():
+    state = VmState(vm_program=gen_program("NOP"))
+
+    state.vm_register_file[4] = 10
+
+    register = state.vm_registers[4]
+
+    assert register.name == "A"
+    assert register.value == 10
+    assert register == VmRegister([0, 0, 0, 0, 10], 4)
+    assert register != VmRegister([0, 0, 0, 0, 10], 3)
+    assert repr(register) == "VmRegister(name='A', value=10)"
+
+    register.value = 5
+    state.vm_registers[0].value = 7
+
+    assert state.vm_register_file[:5] == [7, 0, 0, 0, 5]
+
+    assert len(state.vm_registers) == REGISTERS_COUNT
+    assert list(state.vm_registers) == list(range(REGISTERS_COUNT))
+    assert {
+        register.name: register.value
+        for register in state.vm_registers.values()
+    } == dict(zip(REGISTER_NAMES, state.vm_register_file))
+
+    with pytest.raises(KeyError):
+        state.vm_registers[REGISTERS_COUNT]
+
+
+def test_registers_compare_and_copy():
+    state = VmState(vm_program=gen_program("NOP"))
+    state_copy = copy.deepcopy(state)
+
+    assert state.vm_registers == state_copy.vm_registers
+
+    state_copy.vm_registers[1].value = 1
+
+    assert state.vm_registers != state_copy.vm_registers
+    assert state.vm_register_file[1] == 0
@@ -24,10 +24,27 @@ from interpreter.src.virtual_machine.vm.jumps_and_labels import (
 )
 from interpreter.src.virtual_machine.vm.io_ops import (
     vm_input,
-    vm_print
+    vm_print,
+    vm_input_async,
+    vm_print_async,
+)
+from interpreter.src.virtual_machine.vm.memory_ops import (
+    vm_memcpy,
+    vm_memset,
+    vm_memcmp,
+)
+from interpreter.src.virtual_machine.vm.vector_ops import (
+    vm_vadd,
+    vm_vsub,
+    vm_vmul,
+    vm_vand,
+    vm_vxor,
+    vm_vsum,
 )
 
-from interpreter.src.virtual_machine.bytecode import BYTECODES
+from interpreter.src.virtual_machine.vm.helpers import vm_snapshot
+
+from interpreter.src.virtual_machine.bytecode import BYTECODES, Keyword
 
 
 FUNCTIONS = (
@@ -35,20 +52,32 @@ FUNCTIONS = (
     vm_and, vm_or, vm_xor, vm_not,
     vm_mov, vm_cmp, vm_jmp, vm_jump_eq,
     vm_jump_gt, vm_jump_lt, vm_jump_ne,
-    vm_label, vm_print, vm_input, vm_nop, vm_end, vm_call, vm_ret
+    vm_label, vm_print, vm_input, vm_nop, vm_end, vm_call, vm_ret,
+    vm_memcpy, vm_memset, vm_memcmp,
+    vm_vadd, vm_vsub, vm_vmul, vm_vand, vm_vxor, vm_vsum
 )
 
 
-VM_BYTECODE_FUNC = {
-    bytecode: func
-    for bytecode, func in zip(
-        [bytecode for _, bytecode in BYTECODES.items()],
-        FUNCTIONS,
+# Operations indexed by bytecode
+VM_BYTECODE_FUNC = tuple(
+    func
+    for _, func in sorted(
+        zip(BYTECODES.values(), FUNCTIONS),
+        key=lambda bytecode_func: bytecode_func[0]
     )
-}
+)
+
+
+# Same operations, but every one of them returns new VmState
+VM_SNAPSHOT_BYTECODE_FUNC = tuple(
+    vm_snapshot(func)
+    for func in VM_BYTECODE_FUNC
+)
 
 
-VM_LABEL_FUNC = {
-    bytecode: vm_nop if func.__name__ != 'vm_label' else vm_label
-    for bytecode, func in VM_BYTECODE_FUNC.items()
+# Awaitable operations used by async executor instead of operations
+# with same bytecode
+VM_ASYNC_BYTECODE_FUNC = {
+    BYTECODES[Keyword("INPUT")]: vm_input_async,
+    BYTECODES[Keyword("PRINT")]: vm_print_async,
 }
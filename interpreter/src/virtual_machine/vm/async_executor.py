@@ -0,0 +1,128 @@
+"""Module with async executor of VM.
+
+Program is executed by interpreter inside of coroutine, which gives
+control to event loop after every quantum of instructions. INPUT and
+PRINT operations are awaited, so VM waiting for input or for free space
+in output doesn't block other tasks and thousands of VMs can be executed
+in one thread::
+
+    reader, writer = await asyncio.open_connection(host, port)
+    await run_async(program, reader, writer)
+
+Execution is stopped by cancel of task, e.g. by ``asyncio.wait_for``
+with timeout.
+"""
+
+import asyncio
+import typing
+
+from interpreter.src.virtual_machine.errors import ExecutionLimitExceeded
+from interpreter.src.virtual_machine.vm import (
+    VM_ASYNC_BYTECODE_FUNC,
+    VM_BYTECODE_FUNC
+)
+from interpreter.src.virtual_machine.vm.async_streams import (
+    as_async_sink,
+    as_async_source
+)
+from interpreter.src.virtual_machine.vm.program import Bytecode, Program
+from interpreter.src.virtual_machine.vm.vm_def import VmState
+from interpreter.src.virtual_machine.vm.vm_executor import initialize_vm
+
+# Count of instructions executed between switches to event loop
+DEFAULT_QUANTUM: int = 1000
+
+# Operations indexed by bytecode, awaitable operations replace usual ones
+VM_ASYNC_DISPATCH = tuple(
+    VM_ASYNC_BYTECODE_FUNC.get(bytecode, func)
+    for bytecode, func in enumerate(VM_BYTECODE_FUNC)
+)
+
+# Flags of awaitable operations, indexed by bytecode
+VM_ASYNC_AWAITED: typing.Tuple[bool, ...] = tuple(
+    bytecode in VM_ASYNC_BYTECODE_FUNC
+    for bytecode in range(len(VM_BYTECODE_FUNC))
+)
+
+
+async def run_async(program: typing.Union[Bytecode, Program],
+                    stdin=None,
+                    stdout=None,
+                    quantum: int = DEFAULT_QUANTUM,
+                    max_steps: typing.Optional[int] = None) -> VmState:
+    """Execute program in coroutine.
+
+    :param program: Bytecode or already decoded Program for executing
+    :type program: bytes-like object, io.BytesIO or :class:`~.Program`
+
+    :param stdin: Source of input values: asyncio.StreamReader with
+        integers separated by whitespaces, asyncio.Queue of values (None
+        ends input), async or usual input source or iterable of values.
+        No values by default
+    :param stdout: Sink for printed values: asyncio.StreamWriter (one
+        value per line), asyncio.Queue, async or usual output sink.
+        Console by default. It's flushed after executing, even if
+        execution failed
+
+    :param int quantum: Count of instructions executed before switch
+                        to event loop
+
+    :param max_steps: Max count of executed instructions
+    :type max_steps: Optional[int]
+
+    :raise InputExhausted: If INPUT executed when input source is empty
+    :raise ExecutionLimitExceeded: If limit of instructions is exceeded
+    :raise ValueError: If quantum is not positive
+
+    :return: VmState at end of executing
+    :rtype: :class:`~.VmState`
+    """
+    if quantum < 1:
+        raise ValueError("Quantum must be positive")
+
+    vm_state = initialize_vm(program)
+    vm_state.vm_input = as_async_source(stdin)
+    vm_state.vm_output = as_async_sink(stdout)
+
+    funcs = VM_ASYNC_DISPATCH
+    awaited = VM_ASYNC_AWAITED
+
+    op_codes = vm_state.vm_program.op_codes
+    code_size = len(op_codes)
+
+    steps = vm_state.vm_steps
+    steps_limit = steps + max_steps if max_steps is not None else None
+
+    try:
+        while True:
+            quantum_end = steps + quantum
+
+            if steps_limit is not None and steps_limit < quantum_end:
+                quantum_end = steps_limit
+
+            while vm_state.vm_code_pointer < code_size and \
+                    steps < quantum_end:
+                opcode = op_codes[vm_state.vm_code_pointer]
+
+                if awaited[opcode]:
+                    vm_state = await funcs[opcode](vm_state)
+                else:
+                    vm_state = funcs[opcode](vm_state)
+
+                steps += 1
+
+            vm_state.vm_steps = steps
+
+            if vm_state.vm_code_pointer >= code_size:
+                return vm_state
+
+            if steps_limit is not None and steps >= steps_limit:
+                raise ExecutionLimitExceeded(
+                    f"Limit of {max_steps} instructions exceeded", vm_state
+                )
+
+            await asyncio.sleep(0)
+    finally:
+        vm_state.vm_steps = steps
+
+        await vm_state.vm_output.flush()
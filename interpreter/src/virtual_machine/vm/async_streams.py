@@ -0,0 +1,274 @@
+"""Module with async output sinks and input sources of Virtual Machine.
+
+Async executor awaits every value of INPUT operation from async input
+source and awaits every write of PRINT operation to async output sink,
+so VM which waits for socket or queue doesn't block event loop. Streams
+of asyncio, queues and usual sinks and sources are wrapped by
+:func:`as_async_source` and :func:`as_async_sink`.
+"""
+
+import abc
+import codecs
+import asyncio
+import typing
+
+from interpreter.src.virtual_machine.errors import InputExhausted
+from interpreter.src.virtual_machine.vm.io_streams import (
+    DEFAULT_CHUNK_SIZE,
+    DEFAULT_FLUSH_THRESHOLD,
+    ConsoleSink,
+    InputSource,
+    IterableSource,
+    OutputSink,
+    split_tokens
+)
+
+
+class AsyncInputSource(abc.ABC):
+    """Base class of async input sources."""
+
+    @abc.abstractmethod
+    async def read(self) -> int:
+        """Read one value, waits while source has no value.
+
+        :raise InputExhausted: If source has no more values
+        """
+
+
+class StreamSource(AsyncInputSource):
+    """Integers separated by whitespaces, read from asyncio stream.
+
+    :param reader: Stream of text in UTF-8
+    :type reader: asyncio.StreamReader
+
+    :param int chunk_size: Count of bytes read at once
+    """
+
+    def __init__(self, reader: asyncio.StreamReader,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.reader = reader
+        self.chunk_size = chunk_size
+        # Character can be split between chunks of bytes
+        self.decoder = codecs.getincrementaldecoder('utf-8')()
+        self.tokens: typing.List[str] = []
+        self.position = 0
+        self.tail = ''
+
+    async def read(self) -> int:
+        """Read next integer.
+
+        :raise InputExhausted: If stream has no more integers
+        :raise Exception: If not integer found in stream
+        """
+        if self.position >= len(self.tokens):
+            await self.read_chunk()
+
+        token = self.tokens[self.position]
+        self.position += 1
+
+        try:
+            return int(token)
+        except ValueError:
+            raise Exception(f"Bad input value {token}")
+
+    async def read_chunk(self):
+        """Read tokens of next chunk which has any token."""
+        self.tokens = []
+        self.position = 0
+
+        while not self.tokens:
+            chunk = await self.reader.read(self.chunk_size)
+
+            if not chunk:
+                self.tail += self.decoder.decode(b'', final=True)
+
+                if not self.tail:
+                    raise InputExhausted("Input is exhausted")
+
+                self.tokens = [self.tail]
+                self.tail = ''
+                return
+
+            self.tokens, self.tail = split_tokens(
+                self.tail + self.decoder.decode(chunk)
+            )
+
+
+class QueueSource(AsyncInputSource):
+    """Values from asyncio queue, None put to queue ends input.
+
+    :param queue: Queue of values
+    :type queue: asyncio.Queue
+    """
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+        self.exhausted = False
+
+    async def read(self) -> int:
+        """Wait for next value of queue.
+
+        :raise InputExhausted: If None got from queue
+        """
+        if not self.exhausted:
+            value = await self.queue.get()
+
+            if value is not None:
+                return value
+
+            self.exhausted = True
+
+        raise InputExhausted("Input is exhausted")
+
+
+class SyncSource(AsyncInputSource):
+    """Async wrapper of usual input source, it never waits.
+
+    :param source: Wrapped source
+    :type source: :class:`~.InputSource`
+    """
+
+    def __init__(self, source: InputSource):
+        self.source = source
+
+    async def read(self) -> int:
+        """Read value of wrapped source."""
+        return self.source.read()
+
+
+class AsyncOutputSink(abc.ABC):
+    """Base class of async output sinks."""
+
+    @abc.abstractmethod
+    async def write(self, value: int):
+        """Write one value, waits while sink is full."""
+
+    async def flush(self):
+        """Write buffered values, called at end of execution."""
+
+
+class StreamSink(AsyncOutputSink):
+    """Values written to asyncio stream, one value per line.
+
+    Lines are buffered and written to stream with waiting for drain of
+    stream, so slow reader slows down VM instead of memory growth.
+
+    :param writer: Stream for output
+    :type writer: asyncio.StreamWriter
+
+    :param int flush_threshold: Count of values buffered before write
+    """
+
+    def __init__(self, writer: asyncio.StreamWriter,
+                 flush_threshold: int = DEFAULT_FLUSH_THRESHOLD):
+        self.writer = writer
+        self.flush_threshold = flush_threshold
+        self.lines: typing.List[str] = []
+
+    async def write(self, value: int):
+        """Buffer line of value, write buffer when it's full."""
+        self.lines.append(f'{value}\n')
+
+        if len(self.lines) >= self.flush_threshold:
+            await self.flush()
+
+    async def flush(self):
+        """Write buffered lines and wait for drain of stream."""
+        if self.lines:
+            self.writer.write(''.join(self.lines).encode('utf-8'))
+            self.lines.clear()
+
+        await self.writer.drain()
+
+
+class QueueSink(AsyncOutputSink):
+    """Values put to asyncio queue, waits while bounded queue is full.
+
+    :param queue: Queue for values
+    :type queue: asyncio.Queue
+    """
+
+    def __init__(self, queue: asyncio.Queue):
+        self.queue = queue
+
+    async def write(self, value: int):
+        """Put value to queue."""
+        await self.queue.put(value)
+
+
+class SyncSink(AsyncOutputSink):
+    """Async wrapper of usual output sink, it never waits.
+
+    :param sink: Wrapped sink
+    :type sink: :class:`~.OutputSink`
+    """
+
+    def __init__(self, sink: OutputSink):
+        self.sink = sink
+
+    async def write(self, value: int):
+        """Write value to wrapped sink."""
+        self.sink.write(value)
+
+    async def flush(self):
+        """Flush wrapped sink."""
+        self.sink.flush()
+
+
+def as_async_source(
+        source: typing.Optional[typing.Union[
+            AsyncInputSource, asyncio.StreamReader, asyncio.Queue,
+            InputSource, typing.Iterable[int]]] = None
+) -> AsyncInputSource:
+    """Wrap stream, queue, input source or iterable into async source.
+
+    :param source: Source of input values, no values by default
+
+    :return: Async input source
+    :rtype: AsyncInputSource
+    """
+    if isinstance(source, AsyncInputSource):
+        return source
+
+    if isinstance(source, asyncio.StreamReader):
+        return StreamSource(source)
+
+    if isinstance(source, asyncio.Queue):
+        return QueueSource(source)
+
+    if isinstance(source, InputSource):
+        return SyncSource(source)
+
+    return SyncSource(IterableSource(source if source is not None else ()))
+
+
+def as_async_sink(
+        sink: typing.Optional[typing.Union[
+            AsyncOutputSink, asyncio.StreamWriter, asyncio.Queue,
+            OutputSink]] = None
+) -> AsyncOutputSink:
+    """Wrap stream, queue or output sink into async sink.
+
+    :param sink: Sink for printed values, console by default
+
+    :raise ValueError: If sink of unknown type given
+
+    :return: Async output sink
+    :rtype: AsyncOutputSink
+    """
+    if isinstance(sink, AsyncOutputSink):
+        return sink
+
+    if isinstance(sink, asyncio.StreamWriter):
+        return StreamSink(sink)
+
+    if isinstance(sink, asyncio.Queue):
+        return QueueSink(sink)
+
+    if isinstance(sink, OutputSink):
+        return SyncSink(sink)
+
+    if sink is None:
+        return SyncSink(ConsoleSink())
+
+    raise ValueError(f"Unknown output sink {sink!r}")
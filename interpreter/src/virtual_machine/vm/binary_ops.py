@@ -36,10 +36,10 @@ def gen_binary_operation(operation_name: str,
         assert VM_OPERATION_TO_BYTECODE[op_code] == operation_name
 
         if arg2_type == 2:  # Register
-            input_value = vm_state.vm_registers[arg2].value
+            input_value = vm_state.vm_register_file[arg2]
 
         elif arg2_type == 3:  # Register pointer
-            input_value_addr = vm_state.vm_registers[arg2].value
+            input_value_addr = vm_state.vm_register_file[arg2]
             input_value = vm_state.vm_memory[input_value_addr]
 
         elif arg2_type == 4:  # In-place value
@@ -49,11 +49,11 @@ def gen_binary_operation(operation_name: str,
             raise Exception(f"Bad argument for {operation_name}")
 
         if arg1_type == 2:  # Register
-            output_val = vm_state.vm_registers[arg1].value
-            vm_state.vm_registers[arg1].value = func(output_val, input_value)
+            output_val = vm_state.vm_register_file[arg1]
+            vm_state.vm_register_file[arg1] = func(output_val, input_value)
 
         elif arg1_type == 3:  # RegisterPointer
-            mem_index = vm_state.vm_registers[arg1].value
+            mem_index = vm_state.vm_register_file[arg1]
             output_val = vm_state.vm_memory[mem_index]
             vm_state.vm_memory[mem_index] = func(output_val, input_value)
 
@@ -0,0 +1,380 @@
+"""Module with checkpoints of VmState in compact binary format.
+
+Checkpoint keeps everything needed to continue execution of the same
+program: code pointer, registers, memory, call stack and count of
+executed instructions. Streams of input and output are not saved, they
+are given again to restored VmState::
+
+    data = save_checkpoint(vm_state)
+    vm_state = initialize_vm(program, output, input_source)
+    restore_checkpoint(vm_state, data)
+
+Checkpoint format, all numbers are little-endian::
+
+    | 4 byte | 2 byte  |    16 byte     |    4 byte    |   8 byte    |
+    | magic  | version | program digest | code pointer | all steps   |
+
+and after header three sections:
+
+    * registers - values
+    * memory - count of values, page size and count of written pages,
+      every written page is page number (4 byte) and its values, pages
+      with zeros only and not allocated pages of paged memory are not
+      written
+    * call stack - count of addresses (4 byte) and addresses (4 byte)
+
+Values are int64, values which are not int64 (floats made by DIV,
+booleans made by comparisons and integers out of range) are written
+after values as list of special values: count (4 byte), then index
+(4 byte), kind (1 byte) and float64 for float, 1 byte for boolean or
+size (2 byte) and bytes of integer.
+"""
+
+import sys
+import time
+import array
+import struct
+import typing
+import pathlib
+
+from interpreter.src.virtual_machine.bytecode_cache import write_atomic
+from interpreter.src.virtual_machine.vm.io_streams import INT64_MIN
+from interpreter.src.virtual_machine.vm.memory import (
+    int64_array,
+    make_memory
+)
+from interpreter.src.virtual_machine.vm.vm_def import (
+    REGISTERS_COUNT,
+    VmState
+)
+
+CHECKPOINT_MAGIC: bytes = b"SLCP"
+
+# Change it on every change of format
+CHECKPOINT_VERSION: int = 2
+
+CHECKPOINT_HEADER = struct.Struct('<4sH16sIQ')
+
+# Count of values in page of memory
+CHECKPOINT_PAGE_SIZE: int = 256
+
+# Seconds between checkpoints written by Checkpointer
+DEFAULT_CHECKPOINT_INTERVAL: float = 5.0
+
+INT64_MAX: int = 2 ** 63 - 1
+
+COUNT_STRUCT = struct.Struct('<I')
+PAGES_STRUCT = struct.Struct('<IHI')
+SPECIAL_STRUCT = struct.Struct('<IB')
+FLOAT_STRUCT = struct.Struct('<d')
+SIZE_STRUCT = struct.Struct('<H')
+BOOLEAN_STRUCT = struct.Struct('<?')
+
+SPECIAL_FLOAT: int = 1
+SPECIAL_INTEGER: int = 2
+SPECIAL_BOOLEAN: int = 3
+
+Special = typing.Tuple[int, typing.Union[int, float]]
+
+
+def program_digest(vm_state: VmState) -> bytes:
+    """Digest of program, cached in program."""
+    program = vm_state.vm_program
+
+    if 'checkpoint' not in program.engine_cache:
+        program.engine_cache['checkpoint'] = bytes.fromhex(program.digest())
+
+    return program.engine_cache['checkpoint']
+
+
+def split_values(
+        values: typing.Sequence[typing.Union[int, float]]
+) -> typing.Tuple[array.array, typing.List[Special]]:
+    """Split values into int64 array and special values.
+
+    :return: Values with zeros instead of special values, and special
+             values with their indexes
+    :rtype: Tuple[array.array, List[Tuple[int, Union[int, float]]]]
+    """
+    # Pages of int64 values are copied as is, lists are checked for
+    # booleans, which are not converted to integers
+    try:
+        if isinstance(values, array.array):
+            return array.array('q', values), []
+
+        return int64_array(values), []
+    except (OverflowError, TypeError):
+        pass
+
+    raw = array.array('q', bytes(8 * len(values)))
+    specials = []
+
+    for index, value in enumerate(values):
+        if isinstance(value, bool):
+            specials.append((index, value))
+        elif isinstance(value, int) and INT64_MIN <= value <= INT64_MAX:
+            raw[index] = value
+        elif isinstance(value, (int, float)):
+            specials.append((index, value))
+        else:
+            raise Exception(f"Bad value {value!r} for checkpoint")
+
+    return raw, specials
+
+
+def pack_raw(raw: array.array) -> bytes:
+    """Int64 values as little-endian bytes."""
+    if sys.byteorder == 'big':
+        raw = array.array('q', raw)
+        raw.byteswap()
+
+    return raw.tobytes()
+
+
+def pack_specials(specials: typing.List[Special]) -> bytes:
+    """Special values in format of checkpoint."""
+    parts = [COUNT_STRUCT.pack(len(specials))]
+
+    for index, value in specials:
+        if isinstance(value, bool):
+            parts += [SPECIAL_STRUCT.pack(index, SPECIAL_BOOLEAN),
+                      BOOLEAN_STRUCT.pack(value)]
+        elif isinstance(value, float):
+            parts += [SPECIAL_STRUCT.pack(index, SPECIAL_FLOAT),
+                      FLOAT_STRUCT.pack(value)]
+        else:
+            size = (value.bit_length() + 8) // 8
+            parts += [SPECIAL_STRUCT.pack(index, SPECIAL_INTEGER),
+                      SIZE_STRUCT.pack(size),
+                      value.to_bytes(size, 'little', signed=True)]
+
+    return b"".join(parts)
+
+
+def save_checkpoint(vm_state: VmState) -> bytes:
+    """Save state of execution into checkpoint.
+
+    :param vm_state: VmState between instructions
+    :type vm_state: :class:`~.VmState`
+
+    :raise Exception: If register or memory has value which is not
+                      a number
+
+    :return: Checkpoint
+    :rtype: bytes
+    """
+    parts = [CHECKPOINT_HEADER.pack(
+        CHECKPOINT_MAGIC,
+        CHECKPOINT_VERSION,
+        program_digest(vm_state),
+        vm_state.vm_code_pointer,
+        vm_state.vm_steps
+    )]
+
+    registers, specials = split_values(vm_state.vm_register_file)
+    parts += [pack_raw(registers), pack_specials(specials)]
+
+    # Only allocated regions are read, they start at borders of pages
+    page_bytes = CHECKPOINT_PAGE_SIZE * 8
+    zero_page = bytes(page_bytes)
+
+    pages = []
+    specials = []
+
+    for region_start, values in vm_state.vm_memory.regions():
+        region, region_specials = split_values(values)
+        region_data = memoryview(pack_raw(region))
+
+        specials += [
+            (region_start + index, value)
+            for index, value in region_specials
+        ]
+
+        for start in range(0, len(region_data), page_bytes):
+            page = region_data[start:start + page_bytes]
+
+            if page != zero_page[:len(page)]:
+                number = (region_start * 8 + start) // page_bytes
+                pages += [COUNT_STRUCT.pack(number), page]
+
+    parts += [
+        PAGES_STRUCT.pack(len(vm_state.vm_memory), CHECKPOINT_PAGE_SIZE,
+                          len(pages) // 2),
+        *pages,
+        pack_specials(specials),
+    ]
+
+    call_stack = array.array('I', vm_state.vm_call_stack)
+
+    if sys.byteorder == 'big':
+        call_stack.byteswap()
+
+    parts += [COUNT_STRUCT.pack(len(call_stack)), call_stack.tobytes()]
+
+    return b"".join(parts)
+
+
+class CheckpointReader:
+    """Reader of checkpoint fields, it checks size of checkpoint.
+
+    :param bytes data: Checkpoint
+    """
+
+    def __init__(self, data: bytes):
+        self.data = memoryview(data)
+        self.position = 0
+
+    def take(self, size: int) -> memoryview:
+        """Take next bytes.
+
+        :raise Exception: If checkpoint is shorter
+        """
+        if self.position + size > len(self.data):
+            raise Exception("Bad size of checkpoint")
+
+        chunk = self.data[self.position:self.position + size]
+        self.position += size
+
+        return chunk
+
+    def unpack(self, format_struct: struct.Struct) -> typing.Tuple:
+        """Unpack next fields."""
+        return format_struct.unpack(self.take(format_struct.size))
+
+    def read_raw(self, count: int) -> array.array:
+        """Read int64 values."""
+        raw = array.array('q')
+        raw.frombytes(self.take(count * raw.itemsize))
+
+        if sys.byteorder == 'big':
+            raw.byteswap()
+
+        return raw
+
+    def read_specials(self, values: typing.MutableSequence[
+            typing.Union[int, float]]):
+        """Read special values into list of values or memory.
+
+        :raise Exception: If kind or index of value is unknown
+        """
+        count, = self.unpack(COUNT_STRUCT)
+
+        for _ in range(count):
+            index, kind = self.unpack(SPECIAL_STRUCT)
+
+            if index >= len(values):
+                raise Exception("Bad index of value in checkpoint")
+
+            if kind == SPECIAL_FLOAT:
+                values[index], = self.unpack(FLOAT_STRUCT)
+
+            elif kind == SPECIAL_BOOLEAN:
+                values[index], = self.unpack(BOOLEAN_STRUCT)
+
+            elif kind == SPECIAL_INTEGER:
+                size, = self.unpack(SIZE_STRUCT)
+                values[index] = int.from_bytes(self.take(size), 'little',
+                                               signed=True)
+
+            else:
+                raise Exception("Bad kind of value in checkpoint")
+
+
+def restore_checkpoint(vm_state: VmState, data: bytes) -> VmState:
+    """Restore state of execution from checkpoint.
+
+    :param vm_state: VmState of the same program, e.g. just initialized,
+        its registers, memory and call stack are replaced
+    :type vm_state: :class:`~.VmState`
+
+    :param bytes data: Checkpoint
+
+    :raise Exception: If data is not a checkpoint or it's made for other
+                      program
+
+    :return: Given VmState
+    :rtype: :class:`~.VmState`
+    """
+    reader = CheckpointReader(data)
+
+    magic, version, digest, code_pointer, steps = \
+        reader.unpack(CHECKPOINT_HEADER)
+
+    if magic != CHECKPOINT_MAGIC or version != CHECKPOINT_VERSION:
+        raise Exception("Bad checkpoint")
+
+    if digest != program_digest(vm_state):
+        raise Exception("Bad program for checkpoint")
+
+    if code_pointer > len(vm_state.vm_program):
+        raise Exception("Bad code pointer in checkpoint")
+
+    registers = reader.read_raw(REGISTERS_COUNT).tolist()
+    reader.read_specials(registers)
+
+    memory_size, page_size, page_count = reader.unpack(PAGES_STRUCT)
+
+    try:
+        memory = make_memory(memory_size)
+    except ValueError:
+        raise Exception("Bad size of memory in checkpoint")
+
+    for _ in range(page_count):
+        number, = reader.unpack(COUNT_STRUCT)
+        start = number * page_size
+
+        if start >= memory_size:
+            raise Exception("Bad page of memory in checkpoint")
+
+        memory.write_values(
+            start,
+            reader.read_raw(min(page_size, memory_size - start))
+        )
+
+    reader.read_specials(memory)
+
+    call_stack_size, = reader.unpack(COUNT_STRUCT)
+    call_stack = array.array('I')
+    call_stack.frombytes(reader.take(call_stack_size * call_stack.itemsize))
+
+    if sys.byteorder == 'big':
+        call_stack.byteswap()
+
+    vm_state.vm_code_pointer = code_pointer
+    vm_state.vm_steps = steps
+    vm_state.vm_register_file[:] = registers
+    vm_state.vm_memory = memory
+    vm_state.vm_call_stack = call_stack.tolist()
+
+    return vm_state
+
+
+class Checkpointer:
+    """Writer of checkpoints into file, not more often than interval.
+
+    File is replaced atomically, so it always has complete checkpoint.
+
+    :param filename: Checkpoint file
+    :type filename: str or pathlib.Path
+
+    :param float interval: Seconds between checkpoints
+    """
+
+    def __init__(self, filename: typing.Union[str, pathlib.Path],
+                 interval: float = DEFAULT_CHECKPOINT_INTERVAL):
+        self.filename = filename
+        self.interval = interval
+        self.saved_at = time.monotonic()
+        self.count = 0
+
+    def save(self, vm_state: VmState):
+        """Write checkpoint of VmState."""
+        write_atomic(self.filename, save_checkpoint(vm_state))
+
+        self.saved_at = time.monotonic()
+        self.count += 1
+
+    def save_periodically(self, vm_state: VmState):
+        """Write checkpoint if interval is passed after last one."""
+        if time.monotonic() - self.saved_at >= self.interval:
+            self.save(vm_state)
@@ -2,7 +2,6 @@
 
 import copy
 import typing
-import struct
 import functools
 
 from interpreter.src.virtual_machine.vm.vm_def import VmState
@@ -11,26 +10,69 @@ from interpreter.src.virtual_machine.vm.vm_def import VmState
 def vm_operation(func: typing.Callable):
     """Decorator around operations on VmState.
 
-    Copies vm state, unpack operation into numbers and provide it to
-    decorated function as op_bytecode keyword argument.
+    Take current decoded operation and provide it to decorated function
+    as op_bytecode keyword argument. Code pointer moved to next operation
+    before call, so jumps just set it to address of target operation.
+    If operation fails, code pointer is moved back to it.
+    Decorated function changes given VmState in place.
 
     :param func: Function for decorate
     :type func: Callable
     """
     @functools.wraps(func)
-    def wrapper(vm_state, *args, **kwargs):
-        new_state: VmState = copy.deepcopy(vm_state)
-        operation_bytecode = struct.unpack(
-            '=hbibi',
-            new_state.vm_code_buffer.read1(12)
-        )
+    def wrapper(vm_state: VmState) -> VmState:
+        address = vm_state.vm_code_pointer
+        op_bytecode = vm_state.vm_program[address]
+
+        vm_state.vm_code_pointer = address + 1
+
+        try:
+            return func(vm_state, op_bytecode=op_bytecode)
+        except BaseException:
+            vm_state.vm_code_pointer = address
+            raise
+
+    return wrapper
 
-        kwargs['op_bytecode'] = operation_bytecode
 
-        new_state = func(new_state, *args, **kwargs)
+def vm_async_operation(func: typing.Callable):
+    """Decorator around awaitable operations on VmState.
+
+    Works same way as :func:`vm_operation`, but decorated function is
+    a coroutine function and result must be awaited.
+
+    :param func: Coroutine function for decorate
+    :type func: Callable
+    """
+    @functools.wraps(func)
+    async def wrapper(vm_state: VmState) -> VmState:
+        address = vm_state.vm_code_pointer
+        op_bytecode = vm_state.vm_program[address]
+
+        vm_state.vm_code_pointer = address + 1
 
-        new_state.vm_code_pointer += 12
+        try:
+            return await func(vm_state, op_bytecode=op_bytecode)
+        except BaseException:
+            vm_state.vm_code_pointer = address
+            raise
+
+    return wrapper
+
+
+def vm_snapshot(func: typing.Callable):
+    """Decorator which runs operation on a copy of VmState.
+
+    Given VmState stays untouched and every operation returns new one,
+    so that mode can be used for debugging and replaying of execution.
+
+    :param func: Operation for decorate
+    :type func: Callable
+    """
+    @functools.wraps(func)
+    def wrapper(vm_state, *args, **kwargs):
+        new_state: VmState = copy.deepcopy(vm_state)
 
-        return new_state
+        return func(new_state, *args, **kwargs)
 
     return wrapper
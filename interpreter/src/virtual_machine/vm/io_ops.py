@@ -1,60 +1,99 @@
-"""Module with IO operations for VmState execution."""
+"""Module with IO operations for VmState execution.
+
+Every operation has awaitable version, used by async executor, which
+reads value from async input source and writes it to async output sink.
+"""
 
 from interpreter.src.virtual_machine.vm.vm_def import (
     VmState,
     VM_OPERATION_TO_BYTECODE
 )
-from interpreter.src.virtual_machine.vm.helpers import vm_operation
-
-
-@vm_operation
-def vm_input(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
-    """Input value from stdin and write it to memory or register."""
-    op_code, arg1_type, arg1, _, _ = op_bytecode
-
-    assert VM_OPERATION_TO_BYTECODE[op_code] == "INPUT"
+from interpreter.src.virtual_machine.vm.helpers import (
+    vm_async_operation,
+    vm_operation
+)
 
-    while True:
-        try:
-            input_value = int(input("VM INPUT: "))
-        except ValueError:
-            continue
-        else:
-            break
 
+def store_input_value(vm_state: VmState, arg1_type: int, arg1: int,
+                      input_value: int):
+    """Write input value to memory or register of INPUT argument."""
     if arg1_type == 2:  # Register
-        vm_state.vm_registers[arg1].value = input_value
+        vm_state.vm_register_file[arg1] = input_value
 
     elif arg1_type == 3:  # Register pointer
-        mem_address = vm_state.vm_registers[arg1].value
+        mem_address = vm_state.vm_register_file[arg1]
         vm_state.vm_memory[mem_address] = input_value
 
     else:
         raise Exception("Bad input destination")
 
+
+def load_print_value(vm_state: VmState, arg1_type: int, arg1: int) -> int:
+    """Read value of PRINT argument from register or memory."""
+    if arg1_type == 2:  # Register
+        return vm_state.vm_register_file[arg1]
+
+    if arg1_type == 3:  # Register pointer
+        mem_address = vm_state.vm_register_file[arg1]
+        return vm_state.vm_memory[mem_address]
+
+    if arg1_type == 4:  # In-place value
+        return arg1
+
+    raise Exception("Bad print source")
+
+
+@vm_operation
+def vm_input(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
+    """Read value from input source and write it to memory or register."""
+    op_code, arg1_type, arg1, _, _ = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "INPUT"
+
+    input_value = vm_state.vm_input.read()
+
+    store_input_value(vm_state, arg1_type, arg1, input_value)
+
     return vm_state
 
 
 @vm_operation
 def vm_print(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
-    """Read value from register or memory and print it to stdout."""
+    """Read value from register or memory and write it to output sink."""
     op_code, arg1_type, arg1, _, _ = op_bytecode
 
     assert VM_OPERATION_TO_BYTECODE[op_code] == "PRINT"
 
-    if arg1_type == 2:  # Register
-        value_for_print = vm_state.vm_registers[arg1].value
+    vm_state.vm_output.write(load_print_value(vm_state, arg1_type, arg1))
 
-    elif arg1_type == 3:  # Register pointer
-        mem_address = vm_state.vm_registers[arg1].value
-        value_for_print = vm_state.vm_memory[mem_address]
+    return vm_state
 
-    elif arg1_type == 4:  # In-place value
-        value_for_print = arg1
 
-    else:
-        raise Exception("Bad print source")
+@vm_async_operation
+async def vm_input_async(vm_state: VmState, *args, op_bytecode=None,
+                         **kwargs) -> VmState:
+    """Await value from async input source, write it like INPUT does."""
+    op_code, arg1_type, arg1, _, _ = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "INPUT"
+
+    input_value = await vm_state.vm_input.read()
+
+    store_input_value(vm_state, arg1_type, arg1, input_value)
+
+    return vm_state
+
+
+@vm_async_operation
+async def vm_print_async(vm_state: VmState, *args, op_bytecode=None,
+                         **kwargs) -> VmState:
+    """Write value to async output sink, waits while sink is full."""
+    op_code, arg1_type, arg1, _, _ = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "PRINT"
 
-    print(f'VM PRINT: {value_for_print}')
+    await vm_state.vm_output.write(
+        load_print_value(vm_state, arg1_type, arg1)
+    )
 
     return vm_state
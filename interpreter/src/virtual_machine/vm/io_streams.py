@@ -0,0 +1,438 @@
+"""Module with output sinks and input sources of Virtual Machine.
+
+Every value printed by PRINT operation is written to output sink of
+VmState and every value for INPUT operation is read from input source of
+VmState. Sinks and sources are shared by all copies of VmState, so
+snapshots of state work with the same streams.
+"""
+
+import io
+import abc
+import sys
+import array
+import typing
+
+from interpreter.src.virtual_machine.errors import InputExhausted
+
+PRINT_PREFIX: str = "VM PRINT: "
+INPUT_PROMPT: str = "VM INPUT: "
+
+# Count of values buffered before write to stream
+DEFAULT_FLUSH_THRESHOLD: int = 4096
+
+# Count of characters or values read from stream at once
+DEFAULT_CHUNK_SIZE: int = 65536
+
+INT64_MIN: int = -2 ** 63
+
+
+class OutputSink(abc.ABC):
+    """Base class of output sinks."""
+
+    @abc.abstractmethod
+    def write(self, value: int):
+        """Write one printed value."""
+
+    def flush(self):
+        """Write buffered values to stream."""
+
+    def close(self):
+        """Flush sink, stream of sink is not closed."""
+        self.flush()
+
+    def __deepcopy__(self, memo) -> 'OutputSink':
+        """Every copy of VmState writes to the same sink."""
+        return self
+
+
+class ConsoleSink(OutputSink):
+    """Unbuffered text output, value printed right after PRINT.
+
+    Used by default, it's suitable for interactive programs.
+
+    :param stream: Text stream for output, current stdout by default
+    :type stream: Optional[TextIO]
+    """
+
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None):
+        self.stream = stream
+
+    def write(self, value: int):
+        """Print value with prefix."""
+        if self.stream is None:
+            # Stdout is looked up on every print, so it can be replaced
+            print(f'{PRINT_PREFIX}{value}')
+        else:
+            print(f'{PRINT_PREFIX}{value}', file=self.stream)
+
+
+class TextSink(OutputSink):
+    """Buffered text output, one value with prefix per line.
+
+    :param stream: Text stream for output, stdout by default
+    :type stream: Optional[TextIO]
+
+    :param str prefix: Prefix of every line
+    :param int flush_threshold: Count of values buffered before write
+    """
+
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None,
+                 prefix: str = PRINT_PREFIX,
+                 flush_threshold: int = DEFAULT_FLUSH_THRESHOLD):
+        self.stream = stream if stream is not None else sys.stdout
+        self.prefix = prefix
+        self.flush_threshold = flush_threshold
+        self.lines: typing.List[str] = []
+
+    def write(self, value: int):
+        """Buffer line of value, write buffer when it's full."""
+        self.lines.append(f'{self.prefix}{value}\n')
+
+        if len(self.lines) >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """Write buffered lines to stream."""
+        if self.lines:
+            self.stream.write(''.join(self.lines))
+            self.lines.clear()
+
+        self.stream.flush()
+
+
+class RawSink(TextSink):
+    """Buffered text output, one value per line without prefix."""
+
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None,
+                 flush_threshold: int = DEFAULT_FLUSH_THRESHOLD):
+        super().__init__(stream, '', flush_threshold)
+
+
+class BinarySink(OutputSink):
+    """Buffered binary output, every value is little-endian signed int64.
+
+    Values out of int64 range are wrapped, not integer values are
+    truncated.
+
+    :param stream: Binary stream for output, stdout by default
+    :type stream: Optional[BinaryIO]
+
+    :param int flush_threshold: Count of values buffered before write
+    """
+
+    def __init__(self, stream: typing.Optional[typing.BinaryIO] = None,
+                 flush_threshold: int = DEFAULT_FLUSH_THRESHOLD):
+        self.stream = stream if stream is not None else sys.stdout.buffer
+        self.flush_threshold = flush_threshold
+        self.values = array.array('q')
+
+    def write(self, value: int):
+        """Buffer value, write buffer when it's full."""
+        try:
+            self.values.append(value)
+        except (OverflowError, TypeError):
+            self.values.append(wrap_int64(int(value)))
+
+        if len(self.values) >= self.flush_threshold:
+            self.flush()
+
+    def flush(self):
+        """Write buffered values to stream."""
+        if self.values:
+            if sys.byteorder == 'big':
+                self.values.byteswap()
+
+            self.stream.write(self.values.tobytes())
+            self.values = array.array('q')
+
+        self.stream.flush()
+
+
+class ListSink(OutputSink):
+    """Output to list, used for embedding of VM.
+
+    :param values: List for printed values, new list by default
+    :type values: Optional[List[int]]
+    """
+
+    def __init__(self, values: typing.Optional[typing.List[int]] = None):
+        self.values = values if values is not None else []
+
+    def write(self, value: int):
+        """Append value to list."""
+        self.values.append(value)
+
+
+def wrap_int64(value: int) -> int:
+    """Wrap integer into signed int64 range."""
+    return (value - INT64_MIN) % 2 ** 64 + INT64_MIN
+
+
+def read_binary_output(data: bytes) -> typing.List[int]:
+    """Read values written by :class:`~.BinarySink`.
+
+    :param bytes data: Written bytes
+
+    :return: Printed values
+    :rtype: List[int]
+    """
+    values = array.array('q')
+    values.frombytes(data)
+
+    if sys.byteorder == 'big':
+        values.byteswap()
+
+    return values.tolist()
+
+
+# Sinks selectable by name, they are created with output stream
+OUTPUT_SINKS: typing.Dict[str, typing.Type[OutputSink]] = {
+    "console": ConsoleSink,
+    "text": TextSink,
+    "raw": RawSink,
+    "binary": BinarySink,
+}
+
+
+def open_output_sink(
+        kind: str,
+        stream: typing.Optional[typing.Union[typing.TextIO,
+                                             typing.BinaryIO]] = None,
+        flush_threshold: int = DEFAULT_FLUSH_THRESHOLD
+) -> OutputSink:
+    """Create output sink by name.
+
+    :param str kind: Name of sink from OUTPUT_SINKS
+    :param stream: Stream for output, stdout by default
+    :param int flush_threshold: Count of values buffered before write
+
+    :raise ValueError: If unknown kind of sink given
+
+    :return: Output sink
+    :rtype: :class:`~.OutputSink`
+    """
+    if kind not in OUTPUT_SINKS:
+        raise ValueError(f"Unknown output sink {kind}")
+
+    if kind == "console":
+        return ConsoleSink(stream)
+
+    if kind == "binary" and isinstance(stream, io.TextIOBase):
+        stream = stream.buffer
+
+    return OUTPUT_SINKS[kind](stream, flush_threshold=flush_threshold)
+
+
+class InputSource(abc.ABC):
+    """Base class of input sources."""
+
+    @abc.abstractmethod
+    def read(self) -> int:
+        """Read one value.
+
+        :raise InputExhausted: If source has no more values
+        """
+
+    def __deepcopy__(self, memo) -> 'InputSource':
+        """Every copy of VmState reads from the same source."""
+        return self
+
+
+class ConsoleSource(InputSource):
+    """Interactive input from stdin with prompt.
+
+    Prompt is asked again while entered text is not a number.
+    """
+
+    def read(self) -> int:
+        """Ask value from user."""
+        while True:
+            try:
+                return int(input(INPUT_PROMPT))
+            except ValueError:
+                continue
+            except EOFError:
+                raise InputExhausted("Input is exhausted")
+
+
+def split_tokens(text: str) -> typing.Tuple[typing.List[str], str]:
+    """Split chunk of text by whitespaces.
+
+    :return: Complete tokens and last token, which can be continued in
+             next chunk, or empty string
+    :rtype: Tuple[List[str], str]
+    """
+    tokens = text.split()
+
+    if tokens and not text[-1].isspace():
+        return tokens[:-1], tokens[-1]
+
+    return tokens, ''
+
+
+class TextSource(InputSource):
+    """Integers separated by whitespaces, read from text stream by chunks.
+
+    :param stream: Text stream for input, stdin by default
+    :type stream: Optional[TextIO]
+
+    :param int chunk_size: Count of characters read at once
+    """
+
+    def __init__(self, stream: typing.Optional[typing.TextIO] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.stream = stream if stream is not None else sys.stdin
+        self.chunk_size = chunk_size
+        self.tokens: typing.List[str] = []
+        self.position = 0
+        # Last token of chunk can be continued in next chunk
+        self.tail = ''
+
+    def read(self) -> int:
+        """Read next integer.
+
+        :raise InputExhausted: If stream has no more integers
+        :raise Exception: If not integer found in stream
+        """
+        if self.position >= len(self.tokens):
+            self.read_chunk()
+
+        token = self.tokens[self.position]
+        self.position += 1
+
+        try:
+            return int(token)
+        except ValueError:
+            raise Exception(f"Bad input value {token}")
+
+    def read_chunk(self):
+        """Read tokens of next chunk which has any token."""
+        self.tokens = []
+        self.position = 0
+
+        while not self.tokens:
+            chunk = self.stream.read(self.chunk_size)
+
+            if not chunk:
+                if not self.tail:
+                    raise InputExhausted("Input is exhausted")
+
+                self.tokens = [self.tail]
+                self.tail = ''
+                return
+
+            self.tokens, self.tail = split_tokens(self.tail + chunk)
+
+
+class BinarySource(InputSource):
+    """Little-endian signed int64 values read from binary stream by chunks.
+
+    :param stream: Binary stream for input, stdin by default
+    :type stream: Optional[BinaryIO]
+
+    :param int chunk_size: Count of values read at once
+    """
+
+    def __init__(self, stream: typing.Optional[typing.BinaryIO] = None,
+                 chunk_size: int = DEFAULT_CHUNK_SIZE):
+        self.stream = stream if stream is not None else sys.stdin.buffer
+        self.chunk_size = chunk_size
+        self.values = array.array('q')
+        self.position = 0
+        # Bytes of value which is not read completely
+        self.tail = b''
+
+    def read(self) -> int:
+        """Read next value.
+
+        :raise InputExhausted: If stream has no more values
+        :raise Exception: If stream ends in the middle of value
+        """
+        if self.position >= len(self.values):
+            self.read_chunk()
+
+        value = self.values[self.position]
+        self.position += 1
+
+        return value
+
+    def read_chunk(self):
+        """Read values of next chunk."""
+        item_size = self.values.itemsize
+        self.values = array.array('q')
+        self.position = 0
+
+        while not self.values:
+            chunk = self.stream.read(self.chunk_size * item_size)
+
+            if not chunk:
+                if self.tail:
+                    raise Exception("Bad size of binary input")
+
+                raise InputExhausted("Input is exhausted")
+
+            data = self.tail + chunk
+            size = len(data) - len(data) % item_size
+
+            self.values.frombytes(data[:size])
+            self.tail = data[size:]
+
+        if sys.byteorder == 'big':
+            self.values.byteswap()
+
+
+class IterableSource(InputSource):
+    """Input from iterable, used for embedding of VM.
+
+    :param values: Values for INPUT operations
+    :type values: Iterable[int]
+    """
+
+    def __init__(self, values: typing.Iterable[int]):
+        self.values = iter(values)
+
+    def read(self) -> int:
+        """Get next value of iterable."""
+        try:
+            return next(self.values)
+        except StopIteration:
+            raise InputExhausted("Input is exhausted")
+
+
+# Sources selectable by name, they are created with input stream
+INPUT_SOURCES: typing.Dict[str, typing.Type[InputSource]] = {
+    "console": ConsoleSource,
+    "text": TextSource,
+    "binary": BinarySource,
+}
+
+
+def open_input_source(
+        kind: str,
+        stream: typing.Optional[typing.Union[typing.TextIO,
+                                             typing.BinaryIO]] = None,
+        chunk_size: int = DEFAULT_CHUNK_SIZE
+) -> InputSource:
+    """Create input source by name.
+
+    Console source is interactive, it always reads from stdin.
+
+    :param str kind: Name of source from INPUT_SOURCES
+    :param stream: Stream for input, stdin by default
+    :param int chunk_size: Count of characters or values read at once
+
+    :raise ValueError: If unknown kind of source given
+
+    :return: Input source
+    :rtype: :class:`~.InputSource`
+    """
+    if kind not in INPUT_SOURCES:
+        raise ValueError(f"Unknown input source {kind}")
+
+    if kind == "console":
+        return ConsoleSource()
+
+    if kind == "binary" and isinstance(stream, io.TextIOBase):
+        stream = stream.buffer
+
+    return INPUT_SOURCES[kind](stream, chunk_size=chunk_size)
@@ -21,6 +21,9 @@ def generate_jump(jmp_name: str, cond: typing.Callable):
 
         Jump will work only if compare operation before set NE register to True
 
+    Labels are resolved by compiler, so argument of jump is an address
+    of operation to jump on.
+
     :param str jump_name: Name of jump operation for checks and exceptions
 
     :param cond: Function around VmState wich checks NE, EQ, GT, LT registers
@@ -35,13 +38,8 @@ def generate_jump(jmp_name: str, cond: typing.Callable):
 
         assert VM_OPERATION_TO_BYTECODE[op_code] == jmp_name
 
-        label_index = arg1
-
-        if label_index not in vm_state.vm_labels:
-            raise Exception(f"Bad label {label_index}")
-
         if cond(vm_state):
-            vm_state.vm_code_pointer = vm_state.vm_labels[label_index]
+            vm_state.vm_code_pointer = arg1
 
         return vm_state
 
@@ -53,14 +51,14 @@ def generate_jump(jmp_name: str, cond: typing.Callable):
 
 # Jumps
 vm_jmp = generate_jump("JMP", lambda _: True)
-vm_jump_eq = generate_jump("JMP_EQ", lambda state: state.vm_registers[5].value)
-vm_jump_lt = generate_jump("JMP_LT", lambda state: state.vm_registers[6].value)
-vm_jump_gt = generate_jump("JMP_GT", lambda state: state.vm_registers[7].value)
-vm_jump_ne = generate_jump("JMP_NE", lambda state: state.vm_registers[8].value)
+vm_jump_eq = generate_jump("JMP_EQ", lambda state: state.vm_register_file[5])
+vm_jump_lt = generate_jump("JMP_LT", lambda state: state.vm_register_file[6])
+vm_jump_gt = generate_jump("JMP_GT", lambda state: state.vm_register_file[7])
+vm_jump_ne = generate_jump("JMP_NE", lambda state: state.vm_register_file[8])
 
 
 def set_called_subroutine(state: VmState) -> bool:
-    """Set subroutine call."""
+    """Set subroutine call, code pointer already points to return address."""
     state.vm_call_stack.append(state.vm_code_pointer)
 
     return True
@@ -87,16 +85,13 @@ def vm_ret(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
 
 @vm_operation
 def vm_label(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
-    """LABEL operation for virtual machine."""
-    op_code, _, arg1, _, _ = op_bytecode
-
-    assert VM_OPERATION_TO_BYTECODE[op_code] == "LABEL"
+    """LABEL operation for virtual machine.
 
-    label_index = arg1
-    label_position = vm_state.vm_code_pointer
+    Labels are resolved by compiler, so it does nothing.
+    """
+    op_code, _, _, _, _ = op_bytecode
 
-    if label_index not in vm_state.vm_labels:
-        vm_state.vm_labels[label_index] = label_position
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "LABEL"
 
     return vm_state
 
@@ -109,10 +104,10 @@ def vm_cmp(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
     assert VM_OPERATION_TO_BYTECODE[op_code] == "CMP"
 
     if arg2_type == 2:  # Register
-        right_value = vm_state.vm_registers[arg2].value
+        right_value = vm_state.vm_register_file[arg2]
 
     elif arg2_type == 3:  # Register pointer
-        input_value_addr = vm_state.vm_registers[arg2].value
+        input_value_addr = vm_state.vm_register_file[arg2]
         right_value = vm_state.vm_memory[input_value_addr]
 
     elif arg2_type == 4:  # In-place value
@@ -122,10 +117,10 @@ def vm_cmp(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
         raise Exception(f"Bad argument for CMP")
 
     if arg1_type == 2:  # Register
-        left_value = vm_state.vm_registers[arg1].value
+        left_value = vm_state.vm_register_file[arg1]
 
     elif arg1_type == 3:  # RegisterPointer
-        mem_index = vm_state.vm_registers[arg1].value
+        mem_index = vm_state.vm_register_file[arg1]
         left_value = vm_state.vm_memory[mem_index]
 
     elif arg1_type == 4:  # In-place value
@@ -134,19 +129,25 @@ def vm_cmp(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
     else:
         raise Exception(f"Bad argument on CMP")
 
+    set_compare_registers(vm_state, left_value, right_value)
+
+    return vm_state
+
+
+def set_compare_registers(vm_state: VmState, left_value: int,
+                          right_value: int):
+    """Set EQ, LT, GT, NE registers by result of compare."""
     if left_value > right_value:
-        vm_state.vm_registers[7].value = True
-        vm_state.vm_registers[8].value = True
+        vm_state.vm_register_file[7] = True
+        vm_state.vm_register_file[8] = True
     elif left_value < right_value:
-        vm_state.vm_registers[6].value = True
-        vm_state.vm_registers[8].value = True
+        vm_state.vm_register_file[6] = True
+        vm_state.vm_register_file[8] = True
     elif left_value == right_value:
-        vm_state.vm_registers[5].value = True
-        vm_state.vm_registers[6].value = False
-        vm_state.vm_registers[7].value = False
-        vm_state.vm_registers[8].value = False
-
-    return vm_state
+        vm_state.vm_register_file[5] = True
+        vm_state.vm_register_file[6] = False
+        vm_state.vm_register_file[7] = False
+        vm_state.vm_register_file[8] = False
 
 
 @vm_operation
@@ -166,10 +167,6 @@ def vm_end(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
 
     assert VM_OPERATION_TO_BYTECODE[op_code] == "END"
 
-    last_code_addr = vm_state.vm_code_pointer
-
-    end_pointer = len(vm_state.vm_code_buffer.read1())
-
-    vm_state.vm_code_pointer = last_code_addr + end_pointer
+    vm_state.vm_code_pointer = len(vm_state.vm_program)
 
     return vm_state
@@ -0,0 +1,1154 @@
+"""Module with lockstep engine of VM, it runs one program on many inputs.
+
+Every lane of engine is a separate execution of program with own input
+values. Every register and every memory cell is a NumPy array with value
+for every lane, so one operation is executed for many lanes at once::
+
+    result = run_lockstep(program, numpy.arange(1, 1000001))
+    result.output  # N rows of printed values
+
+Lanes with the same code pointer make a group, which is executed
+together. Lanes split into groups by conditional jumps and RET, groups
+with the same code pointer are merged. Group with smallest code pointer
+is executed first, so lanes split by conditional jump meet again after
+the branch. Code pointers are stored per group, not per lane, so while
+all lanes are at the same instruction, lanes are never indexed.
+
+Differences from other engines:
+
+    * values are int64 and overflow wraps around, programs with DIV use
+      float64 values and bitwise operations are made on int64 values
+    * division by zero, bad memory address, RET before CALL, end of
+      input and bad count of cells of block memory operation stop only
+      the failed lane, fault of lane is stored in result
+    * count of steps is a count of instructions executed by all lanes
+
+NumPy is optional dependency of VM, it's needed only by this engine.
+"""
+
+import typing
+import dataclasses
+
+try:
+    import numpy
+except ImportError:  # pragma: no cover
+    numpy = None
+
+from interpreter.src.virtual_machine.bytecode import BYTECODES, Keyword
+from interpreter.src.virtual_machine.vm.program import Program
+from interpreter.src.virtual_machine.vm.memory_ops import COUNT_REGISTER
+from interpreter.src.virtual_machine.vm.vm_def import (
+    REGISTERS_COUNT,
+    VM_MEM_SIZE
+)
+
+# Index of lanes when all lanes are executed
+ALL_LANES = slice(None)
+
+# Faults of lanes, code of fault - message
+LANE_FAULTS: typing.Tuple[str, ...] = (
+    "",
+    "Division by zero",
+    "Bad memory address",
+    "Bad RET before CALL.",
+    "Input is exhausted",
+    "Bad count of cells",
+)
+
+FAULT_DIVISION, FAULT_MEMORY, FAULT_RET, FAULT_INPUT, FAULT_COUNT = \
+    range(1, 6)
+
+# Count of lanes executed at once, so arrays of registers fit in cache
+DEFAULT_LANES_PER_RUN: int = 65536
+
+# Max size of memory of lanes executed at once
+MAX_MEMORY_BYTES: int = 64 * 2 ** 20
+
+# Initial count of rows of output and call stack, they grow when needed
+INITIAL_ROWS: int = 4
+
+Lanes = typing.Union[slice, 'numpy.ndarray']
+LockstepOperation = typing.Callable[['LockstepMachine', Lanes], None]
+
+
+@dataclasses.dataclass
+class LockstepResult:
+    """Result of lockstep execution, row of every array is a lane.
+
+    :param output: Values printed by lanes, row is padded by zeros
+        to the longest output
+    :type output: numpy.ndarray with shape (lanes, max count of values)
+
+    :param output_counts: Count of values printed by every lane
+    :type output_counts: numpy.ndarray with shape (lanes, )
+
+    :param registers: Register files at end of executing
+    :type registers: numpy.ndarray with shape (lanes, REGISTERS_COUNT)
+
+    :param faults: Codes of LANE_FAULTS, 0 if lane finished program
+    :type faults: numpy.ndarray with shape (lanes, )
+
+    :param int steps: Count of instructions executed by all lanes
+    """
+
+    output: 'numpy.ndarray'
+    output_counts: 'numpy.ndarray'
+    registers: 'numpy.ndarray'
+    faults: 'numpy.ndarray'
+    steps: int = 0
+
+    @property
+    def failed(self) -> 'numpy.ndarray':
+        """Mask of lanes stopped by fault."""
+        return self.faults != 0
+
+    def fault_message(self, lane: int) -> str:
+        """Message of fault of lane, empty if lane finished program."""
+        return LANE_FAULTS[self.faults[lane]]
+
+
+class LockstepMachine:
+    """State of all lanes of lockstep execution.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :param inputs: Input values of every lane
+    :type inputs: numpy.ndarray with shape (lanes, count of values)
+    """
+
+    def __init__(self, program: Program, inputs: 'numpy.ndarray'):
+        lanes_count = len(inputs)
+
+        self.code_size = len(program)
+        self.memory_size = get_memory_size(program)
+        self.dtype = get_dtype(program)
+        self.lane_range = numpy.arange(lanes_count)
+
+        self.registers = numpy.zeros((REGISTERS_COUNT, lanes_count),
+                                     self.dtype)
+
+        # Memory is allocated only for programs which use it
+        self.memory = None
+
+        if uses_memory(program):
+            self.memory = numpy.zeros((self.memory_size, lanes_count),
+                                      self.dtype)
+
+        # Groups of lanes waiting for execution, code pointer - lanes
+        self.groups: typing.Dict[int, typing.List[Lanes]] = {}
+
+        if lanes_count:
+            self.groups[0] = [ALL_LANES]
+
+        self.call_stack = numpy.zeros((INITIAL_ROWS, lanes_count),
+                                      numpy.int64)
+        self.call_depth = numpy.zeros(lanes_count, numpy.int64)
+
+        self.inputs = inputs
+        self.input_positions = numpy.zeros(lanes_count, numpy.int64)
+
+        self.output = numpy.zeros((INITIAL_ROWS, lanes_count), self.dtype)
+        self.output_counts = numpy.zeros(lanes_count, numpy.int64)
+
+        self.faults = numpy.zeros(lanes_count, numpy.int8)
+        self.steps = 0
+
+    def lane_ids(self, lanes: Lanes) -> 'numpy.ndarray':
+        """Numbers of lanes."""
+        return self.lane_range[lanes]
+
+    def jump(self, lanes: Lanes, target: int):
+        """Set code pointer of lanes, lanes at end of code are finished.
+
+        :param lanes: Index of lanes
+        :param int target: Address of next instruction
+        """
+        if target < self.code_size and (lanes is ALL_LANES or len(lanes)):
+            self.groups.setdefault(target, []).append(lanes)
+
+    def branch(self, lanes: Lanes, condition: 'numpy.ndarray',
+               target: int, next_address: int):
+        """Set code pointer of lanes by condition of every lane.
+
+        :param lanes: Index of lanes
+        :param condition: Mask of lanes which jump to target
+        :param int target: Address of jump
+        :param int next_address: Address for other lanes
+        """
+        if condition.all():
+            self.jump(lanes, target)
+        elif not condition.any():
+            self.jump(lanes, next_address)
+        else:
+            lane_ids = self.lane_ids(lanes)
+
+            self.jump(lane_ids[condition], target)
+            self.jump(lane_ids[~condition], next_address)
+
+    def jump_each(self, lanes: Lanes, targets: 'numpy.ndarray'):
+        """Set code pointer of every lane.
+
+        :param lanes: Index of lanes
+        :param targets: Address for every lane
+        """
+        if not len(targets):
+            return
+
+        if (targets == targets[0]).all():
+            self.jump(lanes, int(targets[0]))
+            return
+
+        lane_ids = self.lane_ids(lanes)
+
+        for target in numpy.unique(targets):
+            self.jump(lane_ids[targets == target], int(target))
+
+    def stop(self, lanes: Lanes, bad: 'numpy.ndarray',
+             fault: int) -> 'numpy.ndarray':
+        """Stop lanes with fault.
+
+        :param lanes: Index of executed lanes
+        :param bad: Mask of failed lanes among executed lanes
+        :param int fault: Code of fault
+
+        :return: Numbers of executed lanes without failed lanes
+        :rtype: numpy.ndarray
+        """
+        lane_ids = self.lane_ids(lanes)
+
+        self.faults[lane_ids[bad]] = fault
+
+        return lane_ids[~bad]
+
+    def check_pointers(self, lanes: Lanes,
+                       registers: typing.Tuple[int, ...]) -> Lanes:
+        """Stop lanes where registers point out of memory.
+
+        :return: Index of lanes with good pointers
+        """
+        bad = None
+
+        for register in registers:
+            address = self.registers[register, lanes]
+            out_of_memory = (address < 0) | (address >= self.memory_size)
+
+            if self.dtype is numpy.float64:
+                out_of_memory |= address != numpy.floor(address)
+
+            bad = out_of_memory if bad is None else bad | out_of_memory
+
+        if bad is not None and bad.any():
+            return self.stop(lanes, bad, FAULT_MEMORY)
+
+        return lanes
+
+    def check_ranges(self, lanes: Lanes,
+                     registers: typing.Tuple[int, ...]) -> Lanes:
+        """Stop lanes with bad ranges of cells of block memory operation.
+
+        Count of cells is in register A, ranges start at addresses
+        in registers.
+
+        :return: Index of lanes with good ranges
+        """
+        count = self.registers[COUNT_REGISTER, lanes]
+        bad = count < 0
+
+        if self.dtype is numpy.float64:
+            bad |= count != numpy.floor(count)
+
+        if bad.any():
+            lanes = self.stop(lanes, bad, FAULT_COUNT)
+            count = self.registers[COUNT_REGISTER, lanes]
+
+        bad = None
+
+        for register in registers:
+            address = self.registers[register, lanes]
+            out_of_memory = (address < 0) | \
+                (address + count > self.memory_size)
+
+            if self.dtype is numpy.float64:
+                out_of_memory |= address != numpy.floor(address)
+
+            bad = out_of_memory if bad is None else bad | out_of_memory
+
+        if bad.any():
+            return self.stop(lanes, bad, FAULT_MEMORY)
+
+        return lanes
+
+    def uniform_ranges(self, lanes: Lanes,
+                       registers: typing.Tuple[int, ...]) -> typing.Optional[
+                           typing.List[slice]]:
+        """Ranges of rows of memory when all lanes have the same ranges.
+
+        :return: Slice of rows for every register or None if lanes have
+                 different ranges
+        """
+        if lanes is not ALL_LANES:
+            return None
+
+        count = self.registers[COUNT_REGISTER]
+        addresses = [self.registers[register] for register in registers]
+
+        if any((values != values[0]).any() for values in [count, *addresses]):
+            return None
+
+        return [
+            slice(int(address[0]), int(address[0]) + int(count[0]))
+            for address in addresses
+        ]
+
+    def range_index(self, lanes: Lanes, register: int,
+                    offsets: 'numpy.ndarray') -> typing.Tuple[
+                        'numpy.ndarray', 'numpy.ndarray']:
+        """Index of memory cells of ranges pointed by register of lanes.
+
+        :param offsets: Offsets of cells in ranges, column
+        :type offsets: numpy.ndarray with shape (max count, 1)
+
+        :return: Index of cells with shape (max count, lanes), cells
+                 after end of range are replaced by first cell of memory,
+                 because empty range can start at end of memory
+        """
+        address = self.registers[register, lanes].astype(numpy.int64)
+        count = self.registers[COUNT_REGISTER, lanes].astype(numpy.int64)
+
+        rows = numpy.where(offsets < count, address + offsets, 0)
+
+        return rows, self.lane_ids(lanes)
+
+    def memory_index(self, lanes: Lanes, register: int) -> typing.Tuple[
+            'numpy.ndarray', 'numpy.ndarray']:
+        """Index of memory cells pointed by register of lanes."""
+        address = self.registers[register, lanes].astype(numpy.int64)
+
+        return address, self.lane_ids(lanes)
+
+    def write_output(self, lanes: Lanes, value):
+        """Append value to output of lanes."""
+        counts = self.output_counts[lanes]
+
+        if counts.max() >= len(self.output):
+            self.output = grow(self.output)
+
+        self.output[counts, self.lane_ids(lanes)] = value
+        self.output_counts[lanes] += 1
+
+    def read_input(self, lanes: Lanes) -> typing.Tuple[Lanes,
+                                                       'numpy.ndarray']:
+        """Read next input value of lanes, lanes without input are stopped.
+
+        :return: Index of lanes with input and their values
+        """
+        positions = self.input_positions[lanes]
+        bad = positions >= self.inputs.shape[1]
+
+        if bad.any():
+            lanes = self.stop(lanes, bad, FAULT_INPUT)
+            positions = self.input_positions[lanes]
+
+        values = self.inputs[self.lane_ids(lanes), positions]
+        self.input_positions[lanes] += 1
+
+        return lanes, values
+
+    def push_call(self, lanes: Lanes, return_address: int):
+        """Push return address to call stack of lanes."""
+        depth = self.call_depth[lanes]
+
+        if depth.max() >= len(self.call_stack):
+            self.call_stack = grow(self.call_stack)
+
+        self.call_stack[depth, self.lane_ids(lanes)] = return_address
+        self.call_depth[lanes] += 1
+
+    def pop_call(self, lanes: Lanes) -> typing.Tuple[Lanes,
+                                                     'numpy.ndarray']:
+        """Pop return addresses of lanes, lanes without call are stopped.
+
+        :return: Index of lanes with call and their return addresses
+        """
+        bad = self.call_depth[lanes] == 0
+
+        if bad.any():
+            lanes = self.stop(lanes, bad, FAULT_RET)
+
+        self.call_depth[lanes] -= 1
+
+        return lanes, self.call_stack[self.call_depth[lanes],
+                                      self.lane_ids(lanes)]
+
+    def run(self, code: typing.Tuple[LockstepOperation, ...]):
+        """Execute code until all lanes are at end of code."""
+        lanes_count = len(self.lane_range)
+        groups = self.groups
+
+        while groups:
+            address = min(groups)
+            group = groups.pop(address)
+
+            if len(group) == 1:
+                lanes = group[0]
+            else:
+                lanes = numpy.concatenate([
+                    self.lane_ids(lanes) for lanes in group
+                ])
+
+            self.steps += lanes_count if lanes is ALL_LANES else len(lanes)
+
+            code[address](self, lanes)
+
+    def result(self) -> LockstepResult:
+        """Result of executed lanes."""
+        output_width = int(self.output_counts.max(initial=0))
+
+        return LockstepResult(
+            output=self.output[:output_width].T.copy(),
+            output_counts=self.output_counts,
+            registers=self.registers.T.copy(),
+            faults=self.faults,
+            steps=self.steps,
+        )
+
+
+def grow(rows: 'numpy.ndarray') -> 'numpy.ndarray':
+    """Double count of rows of array, new rows are zeros."""
+    return numpy.concatenate([rows, numpy.zeros_like(rows)])
+
+
+def get_dtype(program: Program):
+    """Type of values, DIV makes float values."""
+    if BYTECODES[Keyword("DIV")] in program.op_codes:
+        return numpy.float64
+
+    return numpy.int64
+
+
+def get_memory_size(program: Program) -> int:
+    """Size of memory of every lane, lanes have dense memory."""
+    return program.memory_size or VM_MEM_SIZE
+
+
+def uses_memory(program: Program) -> bool:
+    """Check that any argument of program is a register pointer."""
+    return 3 in program.arg1_types or 3 in program.arg2_types
+
+
+def build_error(message: str) -> LockstepOperation:
+    """Build operation which fails only when it's executed."""
+    def op(machine: LockstepMachine, lanes: Lanes):
+        raise Exception(message)
+
+    return op
+
+
+def build_load(arg_type: int, arg: int) -> typing.Optional[typing.Callable]:
+    """Build function which reads value of argument for lanes.
+
+    :return: Function which reads value from machine or None for bad type
+    :rtype: Optional[Callable[[LockstepMachine, Lanes], Any]]
+    """
+    if arg_type == 2:  # Register
+        def load(machine: LockstepMachine, lanes: Lanes):
+            return machine.registers[arg, lanes]
+
+    elif arg_type == 3:  # Register pointer
+        def load(machine: LockstepMachine, lanes: Lanes):
+            return machine.memory[machine.memory_index(lanes, arg)]
+
+    elif arg_type == 4:  # In-place value
+        def load(machine: LockstepMachine, lanes: Lanes):
+            return arg
+
+    else:
+        return None
+
+    return load
+
+
+def build_store(arg_type: int,
+                arg: int) -> typing.Optional[typing.Callable]:
+    """Build function which writes value into argument for lanes.
+
+    :return: Function which writes value or None for bad type
+    :rtype: Optional[Callable[[LockstepMachine, Lanes, Any], None]]
+    """
+    if arg_type == 2:  # Register
+        def store(machine: LockstepMachine, lanes: Lanes, value):
+            machine.registers[arg, lanes] = value
+
+    elif arg_type == 3:  # Register pointer
+        def store(machine: LockstepMachine, lanes: Lanes, value):
+            machine.memory[machine.memory_index(lanes, arg)] = value
+
+    else:
+        return None
+
+    return store
+
+
+def with_pointer_checks(op: LockstepOperation, arg1_type: int, arg1: int,
+                        arg2_type: int, arg2: int) -> LockstepOperation:
+    """Wrap operation by check of its register pointers."""
+    registers = tuple(
+        arg
+        for arg_type, arg in ((arg1_type, arg1), (arg2_type, arg2))
+        if arg_type == 3  # Register pointer
+    )
+
+    if not registers:
+        return op
+
+    def checked_op(machine: LockstepMachine, lanes: Lanes):
+        lanes = machine.check_pointers(lanes, registers)
+
+        if lanes is ALL_LANES or len(lanes):
+            op(machine, lanes)
+
+    return checked_op
+
+
+def bitwise(func: 'numpy.ufunc') -> typing.Callable:
+    """Make bitwise function for float values, it works on int64 values."""
+    def operation(left, right):
+        return func(
+            numpy.asarray(left).astype(numpy.int64),
+            numpy.asarray(right).astype(numpy.int64)
+        ).astype(numpy.float64)
+
+    return operation
+
+
+def gen_binary_builder(operation_name: str, func: 'numpy.ufunc'):
+    """Generate builder for binary operations.
+
+    Most used form ``OP reg, value`` for all lanes is made in place.
+
+    :param str operation_name: Name of operation for exceptions
+    :param func: Function of values of lanes
+    :type func: numpy.ufunc
+
+    :return: Builder of lockstep operation
+    :rtype: Callable
+    """
+    def build(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int,
+              dtype) -> LockstepOperation:
+        next_address = address + 1
+        load = build_load(arg2_type, arg2)
+        load_destination = build_load(arg1_type, arg1)
+        store = build_store(arg1_type, arg1)
+        operation = func
+
+        if load is None:
+            return build_error(f"Bad argument for {operation_name}")
+
+        if store is None:
+            return build_error(f"Bad argument on {operation_name}")
+
+        if dtype is numpy.float64 and operation_name in BITWISE_OPERATIONS:
+            operation = bitwise(func)
+
+        def op(machine: LockstepMachine, lanes: Lanes):
+            value = load(machine, lanes)
+
+            if operation_name == "DIV" and numpy.any(value == 0):
+                lanes = machine.stop(
+                    lanes,
+                    numpy.broadcast_to(value == 0,
+                                       machine.lane_ids(lanes).shape),
+                    FAULT_DIVISION
+                )
+                value = load(machine, lanes)
+
+            if lanes is ALL_LANES and arg1_type == 2 and operation is func:
+                register = machine.registers[arg1]
+                func(register, value, out=register)
+            else:
+                store(machine, lanes,
+                      operation(load_destination(machine, lanes), value))
+
+            machine.jump(lanes, next_address)
+
+        return with_pointer_checks(op, arg1_type, arg1, arg2_type, arg2)
+
+    return build
+
+
+def build_mov(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build MOV operation, NOT works same way with inverted value."""
+    return build_unary(address, arg1_type, arg1, arg2_type, arg2,
+                       "MOV", lambda value: value)
+
+
+def build_not(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build NOT operation, it's a parser dependent hack like in VM."""
+    if dtype is numpy.float64:
+        def invert(value):
+            return numpy.invert(
+                numpy.asarray(value).astype(numpy.int64)
+            ).astype(numpy.float64)
+    else:
+        invert = numpy.invert
+
+    return build_unary(address, arg1_type, arg1, arg2_type, arg2,
+                       "NOT", invert)
+
+
+def build_unary(address: int, arg1_type: int, arg1: int,
+                arg2_type: int, arg2: int, operation_name: str,
+                func: typing.Callable) -> LockstepOperation:
+    """Build operation which writes function of second argument to first."""
+    next_address = address + 1
+    load = build_load(arg2_type, arg2)
+    store = build_store(arg1_type, arg1)
+
+    if load is None:
+        return build_error(f"Bad argument for {operation_name}")
+
+    if store is None:
+        return build_error(f"Bad argument on {operation_name}")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        store(machine, lanes, func(load(machine, lanes)))
+        machine.jump(lanes, next_address)
+
+    return with_pointer_checks(op, arg1_type, arg1, arg2_type, arg2)
+
+
+def build_cmp(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build CMP operation, flags are set like in VM for every lane."""
+    next_address = address + 1
+    load_left = build_load(arg1_type, arg1)
+    load_right = build_load(arg2_type, arg2)
+
+    if load_right is None:
+        return build_error("Bad argument for CMP")
+
+    if load_left is None:
+        return build_error("Bad argument on CMP")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        set_compare_flags(machine, lanes, load_left(machine, lanes),
+                          load_right(machine, lanes))
+        machine.jump(lanes, next_address)
+
+    return with_pointer_checks(op, arg1_type, arg1, arg2_type, arg2)
+
+
+def set_compare_flags(machine: LockstepMachine, lanes: Lanes, left, right):
+    """Set EQ, LT, GT, NE registers of lanes by result of compare."""
+    registers = machine.registers
+
+    greater = left > right
+    less = left < right
+    not_equal = left != right
+
+    # Flags are set only by true result, EQ resets other flags
+    registers[5, lanes] = numpy.logical_or(registers[5, lanes],
+                                           left == right)
+    registers[6, lanes] = numpy.logical_and(
+        numpy.logical_or(registers[6, lanes], less), not_equal
+    )
+    registers[7, lanes] = numpy.logical_and(
+        numpy.logical_or(registers[7, lanes], greater), not_equal
+    )
+    registers[8, lanes] = numpy.logical_and(
+        numpy.logical_or(registers[8, lanes], greater | less), not_equal
+    )
+
+
+def range_offsets(machine: LockstepMachine, lanes: Lanes) -> typing.Tuple[
+        'numpy.ndarray', 'numpy.ndarray']:
+    """Offsets of cells in ranges of block memory operation.
+
+    :return: Offsets with shape (max count, 1) and mask of cells inside
+             of ranges of lanes with shape (max count, lanes), there is
+             one offset at least
+    """
+    count = machine.registers[COUNT_REGISTER, lanes].astype(numpy.int64)
+    offsets = numpy.arange(max(int(count.max()), 1))[:, numpy.newaxis]
+
+    return offsets, offsets < count
+
+
+def with_range_checks(op: LockstepOperation,
+                      registers: typing.Tuple[int, ...]) -> LockstepOperation:
+    """Wrap block memory operation by check of its ranges of cells."""
+    def checked_op(machine: LockstepMachine, lanes: Lanes):
+        lanes = machine.check_ranges(lanes, registers)
+
+        if lanes is ALL_LANES or len(lanes):
+            op(machine, lanes)
+
+    return checked_op
+
+
+def build_memcpy(address: int, arg1_type: int, arg1: int,
+                 arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build MEMCPY operation, lanes can copy different ranges."""
+    next_address = address + 1
+
+    if arg2_type != 3:  # Register pointer
+        return build_error("Bad argument for MEMCPY")
+
+    if arg1_type != 3:  # Register pointer
+        return build_error("Bad argument on MEMCPY")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        memory = machine.memory
+        ranges = machine.uniform_ranges(lanes, (arg1, arg2))
+
+        if ranges is not None:
+            destination, source = ranges
+            memory[destination] = memory[source]
+        else:
+            offsets, inside = range_offsets(machine, lanes)
+            destination, lane_ids = machine.range_index(lanes, arg1, offsets)
+            source, _ = machine.range_index(lanes, arg2, offsets)
+            lane_ids = numpy.broadcast_to(lane_ids, inside.shape)[inside]
+
+            # Values are read before write, like from temporary copy
+            memory[destination[inside], lane_ids] = \
+                memory[source[inside], lane_ids]
+
+        machine.jump(lanes, next_address)
+
+    return with_range_checks(op, (arg1, arg2))
+
+
+def build_memset(address: int, arg1_type: int, arg1: int,
+                 arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build MEMSET operation, lanes can fill different ranges."""
+    next_address = address + 1
+    load = build_load(arg2_type, arg2)
+
+    if load is None:
+        return build_error("Bad argument for MEMSET")
+
+    if arg1_type != 3:  # Register pointer
+        return build_error("Bad argument on MEMSET")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        value = load(machine, lanes)
+        ranges = machine.uniform_ranges(lanes, (arg1, ))
+
+        if ranges is not None:
+            machine.memory[ranges[0]] = value
+        else:
+            offsets, inside = range_offsets(machine, lanes)
+            start, lane_ids = machine.range_index(lanes, arg1, offsets)
+
+            machine.memory[
+                start[inside],
+                numpy.broadcast_to(lane_ids, inside.shape)[inside]
+            ] = numpy.broadcast_to(value, inside.shape)[inside]
+
+        machine.jump(lanes, next_address)
+
+    # Value is read by address before check of range
+    return with_pointer_checks(with_range_checks(op, (arg1, )),
+                               0, 0, arg2_type, arg2)
+
+
+def build_memcmp(address: int, arg1_type: int, arg1: int,
+                 arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build MEMCMP operation, flags are set by first different cells."""
+    next_address = address + 1
+
+    if arg2_type != 3:  # Register pointer
+        return build_error("Bad argument for MEMCMP")
+
+    if arg1_type != 3:  # Register pointer
+        return build_error("Bad argument on MEMCMP")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        offsets, inside = range_offsets(machine, lanes)
+        left_rows, lane_ids = machine.range_index(lanes, arg1, offsets)
+        right_rows, _ = machine.range_index(lanes, arg2, offsets)
+
+        left = machine.memory[left_rows, lane_ids]
+        right = machine.memory[right_rows, lane_ids]
+
+        # Equal ranges are compared as zeros
+        different = (left != right) & inside
+        first = different.argmax(axis=0)
+        found = different.any(axis=0)
+        columns = numpy.arange(len(lane_ids))
+
+        set_compare_flags(machine, lanes,
+                          numpy.where(found, left[first, columns], 0),
+                          numpy.where(found, right[first, columns], 0))
+
+        machine.jump(lanes, next_address)
+
+    return with_range_checks(op, (arg1, arg2))
+
+
+def gen_jump_builder(register: typing.Optional[int]) -> typing.Callable:
+    """Generate builder for jumps.
+
+    :param register: Register checked by conditional jump, None for JMP
+    :type register: Optional[int]
+
+    :return: Builder of lockstep operation
+    :rtype: Callable
+    """
+    def build(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+        next_address = address + 1
+
+        if register is None:
+            def op(machine: LockstepMachine, lanes: Lanes):
+                machine.jump(lanes, arg1)
+
+            return op
+
+        def op(machine: LockstepMachine, lanes: Lanes):
+            machine.branch(lanes, machine.registers[register, lanes] != 0,
+                           arg1, next_address)
+
+        return op
+
+    return build
+
+
+def build_call(address: int, arg1_type: int, arg1: int,
+               arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build CALL operation, it saves address of next instruction."""
+    next_address = address + 1
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        machine.push_call(lanes, next_address)
+        machine.jump(lanes, arg1)
+
+    return op
+
+
+def build_ret(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build RET operation, lanes can return to different addresses."""
+    def op(machine: LockstepMachine, lanes: Lanes):
+        lanes, return_addresses = machine.pop_call(lanes)
+
+        machine.jump_each(lanes, return_addresses)
+
+    return op
+
+
+def build_nop(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build NOP operation, LABEL works same way."""
+    next_address = address + 1
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        machine.jump(lanes, next_address)
+
+    return op
+
+
+def build_end(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build END operation, it jumps to end of code."""
+    def op(machine: LockstepMachine, lanes: Lanes):
+        machine.jump(lanes, machine.code_size)
+
+    return op
+
+
+def build_print(address: int, arg1_type: int, arg1: int,
+                arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build PRINT operation, values are appended to output of lanes."""
+    next_address = address + 1
+    load = build_load(arg1_type, arg1)
+
+    if load is None:
+        return build_error("Bad print source")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        machine.write_output(lanes, load(machine, lanes))
+        machine.jump(lanes, next_address)
+
+    return with_pointer_checks(op, arg1_type, arg1, arg2_type, arg2)
+
+
+def build_input(address: int, arg1_type: int, arg1: int,
+                arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build INPUT operation, every lane reads own input values."""
+    next_address = address + 1
+    store = build_store(arg1_type, arg1)
+
+    if store is None:
+        return build_error("Bad input destination")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        lanes, values = machine.read_input(lanes)
+
+        store(machine, lanes, values)
+        machine.jump(lanes, next_address)
+
+    return with_pointer_checks(op, arg1_type, arg1, arg2_type, arg2)
+
+
+def gen_vector_builder(operation_name: str, func: 'numpy.ufunc'):
+    """Generate builder for vector operations on two ranges.
+
+    :param str operation_name: Name of operation for exceptions
+    :param func: Function of values of cells
+    :type func: numpy.ufunc
+
+    :return: Builder of lockstep operation
+    :rtype: Callable
+    """
+    def build(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int,
+              dtype) -> LockstepOperation:
+        next_address = address + 1
+        operation = func
+
+        if arg2_type != 3:  # Register pointer
+            return build_error(f"Bad argument for {operation_name}")
+
+        if arg1_type != 3:  # Register pointer
+            return build_error(f"Bad argument on {operation_name}")
+
+        if dtype is numpy.float64 and operation_name in BITWISE_OPERATIONS:
+            operation = bitwise(func)
+
+        def op(machine: LockstepMachine, lanes: Lanes):
+            memory = machine.memory
+            ranges = machine.uniform_ranges(lanes, (arg1, arg2))
+
+            if ranges is not None:
+                destination, source = ranges
+                memory[destination] = operation(memory[destination],
+                                                memory[source])
+            else:
+                offsets, inside = range_offsets(machine, lanes)
+                destination, lane_ids = machine.range_index(lanes, arg1,
+                                                            offsets)
+                source, _ = machine.range_index(lanes, arg2, offsets)
+
+                destination = destination[inside]
+                source = source[inside]
+                lane_ids = numpy.broadcast_to(lane_ids, inside.shape)[inside]
+
+                memory[destination, lane_ids] = operation(
+                    memory[destination, lane_ids], memory[source, lane_ids]
+                )
+
+            machine.jump(lanes, next_address)
+
+        return with_range_checks(op, (arg1, arg2))
+
+    return build
+
+
+def build_vsum(address: int, arg1_type: int, arg1: int,
+               arg2_type: int, arg2: int, dtype) -> LockstepOperation:
+    """Build VSUM operation, lanes can sum different ranges."""
+    next_address = address + 1
+    load = build_load(arg1_type, arg1)
+    store = build_store(arg1_type, arg1)
+
+    if arg2_type != 3:  # Register pointer
+        return build_error("Bad argument for VSUM")
+
+    if store is None:
+        return build_error("Bad argument on VSUM")
+
+    def op(machine: LockstepMachine, lanes: Lanes):
+        offsets, inside = range_offsets(machine, lanes)
+        source, lane_ids = machine.range_index(lanes, arg2, offsets)
+
+        values = numpy.where(inside, machine.memory[source, lane_ids], 0)
+        value = numpy.broadcast_to(load(machine, lanes), lane_ids.shape)
+
+        # Floats are added one by one in order of cells, like in VM
+        store(machine, lanes, numpy.concatenate([
+            value[numpy.newaxis], values
+        ]).cumsum(axis=0)[-1])
+
+        machine.jump(lanes, next_address)
+
+    # Destination is read by address before check of range
+    return with_pointer_checks(with_range_checks(op, (arg2, )),
+                               arg1_type, arg1, 0, 0)
+
+
+# Bitwise operations are made on int64 values in programs with DIV
+BITWISE_OPERATIONS = ("AND", "OR", "XOR", "VAND", "VXOR")
+
+LOCKSTEP_BUILDERS: typing.Dict[Keyword, typing.Callable] = {}
+
+if numpy is not None:
+    LOCKSTEP_BUILDERS = {
+        Keyword("ADD"): gen_binary_builder("ADD", numpy.add),
+        Keyword("SUB"): gen_binary_builder("SUB", numpy.subtract),
+        Keyword("DIV"): gen_binary_builder("DIV", numpy.true_divide),
+        Keyword("MUL"): gen_binary_builder("MUL", numpy.multiply),
+        Keyword("AND"): gen_binary_builder("AND", numpy.bitwise_and),
+        Keyword("OR"): gen_binary_builder("OR", numpy.bitwise_or),
+        Keyword("XOR"): gen_binary_builder("XOR", numpy.bitwise_xor),
+        Keyword("NOT"): build_not,
+        Keyword("MOV"): build_mov,
+        Keyword("CMP"): build_cmp,
+        Keyword("JMP"): gen_jump_builder(None),
+        Keyword("JMP_EQ"): gen_jump_builder(5),
+        Keyword("JMP_GT"): gen_jump_builder(7),
+        Keyword("JMP_LT"): gen_jump_builder(6),
+        Keyword("JMP_NE"): gen_jump_builder(8),
+        Keyword("LABEL"): build_nop,
+        Keyword("PRINT"): build_print,
+        Keyword("INPUT"): build_input,
+        Keyword("NOP"): build_nop,
+        Keyword("END"): build_end,
+        Keyword("CALL"): build_call,
+        Keyword("RET"): build_ret,
+        Keyword("MEMCPY"): build_memcpy,
+        Keyword("MEMSET"): build_memset,
+        Keyword("MEMCMP"): build_memcmp,
+        Keyword("VADD"): gen_vector_builder("VADD", numpy.add),
+        Keyword("VSUB"): gen_vector_builder("VSUB", numpy.subtract),
+        Keyword("VMUL"): gen_vector_builder("VMUL", numpy.multiply),
+        Keyword("VAND"): gen_vector_builder("VAND", numpy.bitwise_and),
+        Keyword("VXOR"): gen_vector_builder("VXOR", numpy.bitwise_xor),
+        Keyword("VSUM"): build_vsum,
+    }
+
+
+def compile_lockstep(
+        program: Program
+) -> typing.Tuple[LockstepOperation, ...]:
+    """Build lockstep operation for every instruction of program.
+
+    Result is cached in program, so it's built only once.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :return: Operations indexed by address of instruction
+    :rtype: Tuple[Callable[[LockstepMachine, Lanes], None], ...]
+    """
+    if 'lockstep' not in program.engine_cache:
+        builders = {
+            BYTECODES[keyword]: builder
+            for keyword, builder in LOCKSTEP_BUILDERS.items()
+        }
+        dtype = get_dtype(program)
+
+        program.engine_cache['lockstep'] = tuple(
+            builders[op_code](address, *arguments, dtype)
+            for address, (op_code, *arguments) in enumerate(zip(
+                program.op_codes,
+                program.arg1_types,
+                program.arg1s,
+                program.arg2_types,
+                program.arg2s,
+            ))
+        )
+
+    return program.engine_cache['lockstep']
+
+
+def run_lockstep(program: Program, inputs: typing.Any,
+                 lanes_per_run: typing.Optional[int] = None
+                 ) -> LockstepResult:
+    """Execute program for every row of inputs.
+
+    Lanes are executed by parts of DEFAULT_LANES_PER_RUN lanes, smaller
+    for programs with memory, so memory of lanes executed at once is not
+    bigger than MAX_MEMORY_BYTES. Memory of every lane is dense, so
+    program with memory bigger than MAX_MEMORY_BYTES is not executed.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :param inputs: Input values of lanes, one value per lane
+        for 1-dimensional array
+    :type inputs: array-like with shape (lanes, ) or (lanes, values)
+
+    :param lanes_per_run: Count of lanes executed at once
+    :type lanes_per_run: Optional[int]
+
+    :raise ImportError: If NumPy is not installed
+    :raise ValueError: If inputs are not 1 or 2 dimensional or memory of
+                       one lane is bigger than MAX_MEMORY_BYTES
+
+    :return: Result of every lane
+    :rtype: LockstepResult
+    """
+    if numpy is None:
+        raise ImportError("Lockstep engine requires numpy")
+
+    inputs = numpy.asarray(inputs, dtype=get_dtype(program))
+
+    if inputs.ndim == 1:
+        inputs = inputs[:, numpy.newaxis]
+
+    if inputs.ndim != 2:
+        raise ValueError("Inputs must be 1 or 2 dimensional")
+
+    if lanes_per_run is None:
+        lanes_per_run = DEFAULT_LANES_PER_RUN
+
+    if uses_memory(program):
+        lane_memory_bytes = get_memory_size(program) * inputs.itemsize
+
+        if lane_memory_bytes > MAX_MEMORY_BYTES:
+            raise ValueError(
+                "Memory of program is too big for lockstep engine, "
+                f"max {MAX_MEMORY_BYTES // inputs.itemsize} cells"
+            )
+
+        lanes_per_run = min(lanes_per_run,
+                            MAX_MEMORY_BYTES // lane_memory_bytes)
+
+    code = compile_lockstep(program)
+    results = []
+
+    for start in range(0, len(inputs), lanes_per_run) or [0]:
+        machine = LockstepMachine(program,
+                                  inputs[start:start + lanes_per_run])
+        machine.run(code)
+        results.append(machine.result())
+
+    if len(results) == 1:
+        return results[0]
+
+    return merge_results(results, get_dtype(program))
+
+
+def merge_results(results: typing.List[LockstepResult],
+                  dtype) -> LockstepResult:
+    """Merge results of parts of lanes, outputs are padded by zeros."""
+    output_width = max(result.output.shape[1] for result in results)
+    output = numpy.zeros(
+        (sum(len(result.output) for result in results), output_width),
+        dtype
+    )
+
+    start = 0
+
+    for result in results:
+        rows, width = result.output.shape
+        output[start:start + rows, :width] = result.output
+        start += rows
+
+    return LockstepResult(
+        output=output,
+        output_counts=numpy.concatenate(
+            [result.output_counts for result in results]
+        ),
+        registers=numpy.concatenate(
+            [result.registers for result in results]
+        ),
+        faults=numpy.concatenate([result.faults for result in results]),
+        steps=sum(result.steps for result in results),
+    )
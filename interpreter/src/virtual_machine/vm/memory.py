@@ -0,0 +1,412 @@
+"""Module with memory of Virtual Machine.
+
+Memory is an address space of fixed size, every cell has a value and
+cells never written are zeros. Small memory is one list of values, big
+memory is split into pages of PAGE_SIZE values, which are allocated on
+first write, so program can have millions of cells and pay only for
+touched regions::
+
+    memory = make_memory(2 ** 24)
+    memory[10000000] = 5
+
+Pages keep values as int64 in ``array('q')``, page becomes a list of
+Python values when value out of int64 is written into it (float made by
+DIV, big integer or boolean made by comparison), so values are read the
+same as from small memory. Address out of memory, including negative one,
+raises :class:`~.MemoryFault`.
+
+Ranges of cells are read, filled and copied by slices of lists and
+arrays, without access to every cell by address.
+"""
+
+import abc
+import array
+import typing
+
+from interpreter.src.virtual_machine.errors import MemoryFault
+
+# Count of values in page of paged memory is 2 ** PAGE_BITS
+PAGE_BITS: int = 12
+PAGE_SIZE: int = 1 << PAGE_BITS
+PAGE_MASK: int = PAGE_SIZE - 1
+
+# Memory of this size or smaller is one list of values
+DENSE_MEMORY_LIMIT: int = 1 << 16
+
+# Size of memory is written into 4 byte field of bytecode header
+MAX_MEMORY_SIZE: int = 2 ** 32 - 1
+
+ZERO_PAGE = array.array('q', bytes(PAGE_SIZE * 8))
+
+Value = typing.Union[int, float]
+
+
+def is_zero(value: Value) -> bool:
+    """Check that value is an integer zero, value of not allocated cell."""
+    return value == 0 and type(value) is int
+
+
+def int64_array(values: typing.Iterable[Value]) -> array.array:
+    """Array of int64 values.
+
+    :raise TypeError: If any value is not an integer, booleans are not
+                      converted to integers
+    :raise OverflowError: If any integer is out of int64
+    """
+    values = list(values)
+
+    if any(type(value) is bool for value in values):
+        raise TypeError("Boolean can't be stored in int64 array")
+
+    return array.array('q', values)
+
+
+class VmMemory(abc.ABC):
+    """Base class of memory, values are read and written by address.
+
+    :param int size: Count of cells
+    """
+
+    __slots__ = ('size', )
+
+    def __init__(self, size: int):
+        self.size = size
+
+    def __len__(self) -> int:
+        return self.size
+
+    @abc.abstractmethod
+    def __getitem__(self, address: int) -> Value:
+        """Read value of cell by address.
+
+        :raise MemoryFault: If address is out of memory
+        """
+
+    @abc.abstractmethod
+    def __setitem__(self, address: int, value: Value):
+        """Write value into cell by address.
+
+        :raise MemoryFault: If address is out of memory
+        """
+
+    @abc.abstractmethod
+    def regions(self) -> typing.Iterator[
+            typing.Tuple[int, typing.Sequence[Value]]]:
+        """Allocated regions of memory, cells out of them are zeros.
+
+        :return: Address of first cell and values of every region
+        :rtype: Iterator[Tuple[int, Sequence[Union[int, float]]]]
+        """
+
+    @abc.abstractmethod
+    def read_values(self, start: int,
+                    count: int) -> typing.Sequence[Value]:
+        """Read values of count cells from start address.
+
+        :raise MemoryFault: If range of cells is out of memory
+        """
+
+    @abc.abstractmethod
+    def write_values(self, start: int, values: typing.Sequence[Value]):
+        """Write values into cells from start address.
+
+        :raise MemoryFault: If range of cells is out of memory
+        """
+
+    @abc.abstractmethod
+    def fill(self, start: int, count: int, value: Value):
+        """Write value into count cells from start address.
+
+        :raise MemoryFault: If range of cells is out of memory
+        """
+
+    def copy_values(self, destination: int, source: int, count: int):
+        """Copy values of count cells, ranges can overlap.
+
+        :raise MemoryFault: If any of ranges is out of memory
+        """
+        self.write_values(destination, self.read_values(source, count))
+
+    def check_range(self, start: int, count: int):
+        """Check that range of cells starts and ends inside of memory.
+
+        Empty range can start at end of memory, e.g. after last cell of
+        range which ends at end of memory.
+
+        :raise MemoryFault: If range of cells is out of memory
+        """
+        if start < 0 or start + count > self.size:
+            self.fault(start if not 0 <= start < self.size
+                       else start + count - 1)
+
+    @abc.abstractmethod
+    def copy(self) -> 'VmMemory':
+        """Copy of memory, values are immutable, so copy is shallow."""
+
+    def cells(self) -> typing.MutableSequence[Value]:
+        """Cells indexed by address, which is already checked by caller.
+
+        Used by generated code, which checks address once and accesses
+        list of dense memory directly.
+        """
+        return self
+
+    def items(self) -> typing.Iterator[typing.Tuple[int, Value]]:
+        """Addresses and values of not zero cells."""
+        for start, values in self.regions():
+            for offset, value in enumerate(values):
+                if value:
+                    yield start + offset, value
+
+    def fault(self, address: int) -> typing.NoReturn:
+        """Raise fault of memory access by address."""
+        raise MemoryFault(address, self.size)
+
+    def __deepcopy__(self, memo) -> 'VmMemory':
+        return self.copy()
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VmMemory):
+            return NotImplemented
+
+        return self.size == other.size and \
+            dict(self.items()) == dict(other.items())
+
+    def __repr__(self) -> str:
+        return f"{type(self).__name__}(size={self.size})"
+
+
+class DenseMemory(VmMemory):
+    """Memory of small size, list of values of all cells.
+
+    :param int size: Count of cells
+    """
+
+    __slots__ = ('values', )
+
+    def __init__(self, size: int):
+        super().__init__(size)
+        self.values: typing.List[Value] = [0] * size
+
+    def __getitem__(self, address: int) -> Value:
+        if 0 <= address < self.size:
+            return self.values[address]
+
+        self.fault(address)
+
+    def __setitem__(self, address: int, value: Value):
+        if 0 <= address < self.size:
+            self.values[address] = value
+        else:
+            self.fault(address)
+
+    def regions(self) -> typing.Iterator[
+            typing.Tuple[int, typing.Sequence[Value]]]:
+        """One region with all cells."""
+        yield 0, self.values
+
+    def read_values(self, start: int,
+                    count: int) -> typing.Sequence[Value]:
+        """Read values of count cells from start address."""
+        self.check_range(start, count)
+
+        return self.values[start:start + count]
+
+    def write_values(self, start: int, values: typing.Sequence[Value]):
+        """Write values into cells from start address."""
+        self.check_range(start, len(values))
+
+        self.values[start:start + len(values)] = values
+
+    def fill(self, start: int, count: int, value: Value):
+        """Write value into count cells from start address."""
+        self.check_range(start, count)
+
+        self.values[start:start + count] = [value] * count
+
+    def cells(self) -> typing.MutableSequence[Value]:
+        """List of values of all cells."""
+        return self.values
+
+    def copy(self) -> 'DenseMemory':
+        """Copy of memory."""
+        memory = DenseMemory.__new__(DenseMemory)
+        memory.size = self.size
+        memory.values = self.values.copy()
+
+        return memory
+
+
+class PagedMemory(VmMemory):
+    """Memory of big size, pages are allocated on first write.
+
+    :param int size: Count of cells
+    """
+
+    __slots__ = ('pages', )
+
+    def __init__(self, size: int):
+        super().__init__(size)
+        # Number of page - values of page
+        self.pages: typing.Dict[int, typing.MutableSequence[Value]] = {}
+
+    def __getitem__(self, address: int) -> Value:
+        if 0 <= address < self.size:
+            page = self.pages.get(address >> PAGE_BITS)
+
+            return 0 if page is None else page[address & PAGE_MASK]
+
+        self.fault(address)
+
+    def __setitem__(self, address: int, value: Value):
+        if not 0 <= address < self.size:
+            self.fault(address)
+
+        number = address >> PAGE_BITS
+        page = self.pages.get(number)
+
+        if page is None:
+            page = self.pages[number] = ZERO_PAGE[:]
+
+        if type(value) is bool and isinstance(page, array.array):
+            page = self.pages[number] = page.tolist()
+
+        try:
+            page[address & PAGE_MASK] = value
+        except (OverflowError, TypeError):
+            page = self.pages[number] = page.tolist()
+            page[address & PAGE_MASK] = value
+
+    def regions(self) -> typing.Iterator[
+            typing.Tuple[int, typing.Sequence[Value]]]:
+        """Allocated pages in order of addresses."""
+        for number in sorted(self.pages):
+            start = number << PAGE_BITS
+
+            # Cells of last page after end of memory are not a part of it
+            yield start, self.pages[number][:self.size - start]
+
+    def split_range(self, start: int, count: int) -> typing.Iterator[
+            typing.Tuple[int, int, int, int]]:
+        """Split range of cells by pages.
+
+        :return: Number of page, offset in page, offset in range and count
+                 of cells of every part of range
+        :rtype: Iterator[Tuple[int, int, int, int]]
+        """
+        position = 0
+
+        while position < count:
+            address = start + position
+            offset = address & PAGE_MASK
+            part_size = min(PAGE_SIZE - offset, count - position)
+
+            yield address >> PAGE_BITS, offset, position, part_size
+
+            position += part_size
+
+    def read_values(self, start: int,
+                    count: int) -> typing.Sequence[Value]:
+        """Read values, it's int64 array if all of them are int64."""
+        self.check_range(start, count)
+
+        parts = []
+
+        for number, offset, _, part_size in self.split_range(start, count):
+            page = self.pages.get(number)
+
+            if page is None:
+                parts.append(ZERO_PAGE[:part_size])
+            else:
+                parts.append(page[offset:offset + part_size])
+
+        if all(isinstance(part, array.array) for part in parts):
+            values = array.array('q')
+
+            for part in parts:
+                values += part
+
+            return values
+
+        return [value for part in parts for value in part]
+
+    def write_values(self, start: int, values: typing.Sequence[Value]):
+        """Write values, pages are not allocated for zeros."""
+        self.check_range(start, len(values))
+
+        for number, offset, position, part_size in self.split_range(
+                start, len(values)):
+            chunk = values[position:position + part_size]
+            page = self.pages.get(number)
+
+            if page is None:
+                if not any(chunk) and all(map(is_zero, chunk)):
+                    continue
+
+                page = self.pages[number] = ZERO_PAGE[:]
+
+            try:
+                if isinstance(page, array.array) and \
+                        not isinstance(chunk, array.array):
+                    chunk = int64_array(chunk)
+
+                page[offset:offset + part_size] = chunk
+            except (OverflowError, TypeError):
+                # Chunk isn't an int64 array, values are written one by one
+                for index, value in enumerate(chunk, start + position):
+                    self[index] = value
+
+    def fill(self, start: int, count: int, value: Value):
+        """Write value, pages are not allocated for zeros."""
+        self.check_range(start, count)
+
+        try:
+            value_array = int64_array([value])
+        except (OverflowError, TypeError):
+            value_array = None
+
+        for number, offset, _, part_size in self.split_range(start, count):
+            page = self.pages.get(number)
+
+            if page is None:
+                if is_zero(value):
+                    continue
+
+                page = self.pages[number] = ZERO_PAGE[:]
+
+            if value_array is None and isinstance(page, array.array):
+                page = self.pages[number] = page.tolist()
+
+            page[offset:offset + part_size] = (
+                [value] * part_size if value_array is None
+                else value_array * part_size
+            )
+
+    def copy(self) -> 'PagedMemory':
+        """Copy of memory, pages are copied too."""
+        memory = PagedMemory(self.size)
+        memory.pages = {
+            number: page[:]
+            for number, page in self.pages.items()
+        }
+
+        return memory
+
+
+def make_memory(size: int) -> VmMemory:
+    """Make memory of given size, dense for small size, paged for big one.
+
+    :param int size: Count of cells
+
+    :raise ValueError: If size is not positive or it's too big
+
+    :return: Memory with zeros in all cells
+    :rtype: VmMemory
+    """
+    if not 0 < size <= MAX_MEMORY_SIZE:
+        raise ValueError(f"Bad memory size {size}")
+
+    if size <= DENSE_MEMORY_LIMIT:
+        return DenseMemory(size)
+
+    return PagedMemory(size)
@@ -0,0 +1,154 @@
+"""Module with block memory operations implementation.
+
+Operations work on ranges of cells, start of every range is given by
+register pointer and count of cells is a value of register A, because
+operation has two arguments only::
+
+    MOV A, 100
+    MEMSET @r1, 0     - write 0 into 100 cells from address r1
+    MEMCPY @r2, @r1   - copy 100 cells from address r1 to address r2
+    MEMCMP @r2, @r1   - compare 100 cells and set EQ, LT, GT, NE registers
+
+MEMCPY copies overlapped ranges as by temporary copy of source range.
+Ranges are compared as sequences, by first different cells. Range out
+of memory raises :class:`~.MemoryFault`, nothing is written then.
+"""
+
+import typing
+
+from interpreter.src.virtual_machine.vm.memory import Value, VmMemory
+from interpreter.src.virtual_machine.vm.vm_def import (
+    VmState,
+    VM_OPERATION_TO_BYTECODE
+)
+from interpreter.src.virtual_machine.vm.helpers import vm_operation
+from interpreter.src.virtual_machine.vm.jumps_and_labels import (
+    set_compare_registers
+)
+
+# Index of register A with count of cells
+COUNT_REGISTER: int = 4
+
+
+def check_count(operation_name: str, count: int):
+    """Check count of cells for block operation.
+
+    :raise Exception: If count is not an integer or it's negative
+    """
+    if not isinstance(count, int) or count < 0:
+        raise Exception(f"Bad count of cells for {operation_name}")
+
+
+def memory_copy(memory: VmMemory, destination: int, source: int,
+                count: int):
+    """Copy count cells from source to destination address."""
+    check_count("MEMCPY", count)
+
+    memory.copy_values(destination, source, count)
+
+
+def memory_set(memory: VmMemory, start: int, count: int, value: Value):
+    """Write value into count cells from start address."""
+    check_count("MEMSET", count)
+
+    memory.fill(start, count, value)
+
+
+def memory_compare(memory: VmMemory, left: int, right: int,
+                   count: int) -> typing.Tuple[Value, Value]:
+    """Compare count cells from left and right addresses.
+
+    :return: First different values of ranges, zeros for equal ranges
+    :rtype: Tuple[Union[int, float], Union[int, float]]
+    """
+    check_count("MEMCMP", count)
+
+    left_values = memory.read_values(left, count)
+    right_values = memory.read_values(right, count)
+
+    if left_values != right_values:
+        for left_value, right_value in zip(left_values, right_values):
+            if left_value != right_value:
+                return left_value, right_value
+
+    return 0, 0
+
+
+@vm_operation
+def vm_memcpy(vm_state: VmState, *args, op_bytecode=None,
+              **kwargs) -> VmState:
+    """MEMCPY operation for virtual machine."""
+    op_code, arg1_type, arg1, arg2_type, arg2 = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "MEMCPY"
+
+    if arg2_type != 3:  # Register pointer
+        raise Exception("Bad argument for MEMCPY")
+
+    if arg1_type != 3:  # Register pointer
+        raise Exception("Bad argument on MEMCPY")
+
+    memory_copy(vm_state.vm_memory,
+                vm_state.vm_register_file[arg1],
+                vm_state.vm_register_file[arg2],
+                vm_state.vm_register_file[COUNT_REGISTER])
+
+    return vm_state
+
+
+@vm_operation
+def vm_memset(vm_state: VmState, *args, op_bytecode=None,
+              **kwargs) -> VmState:
+    """MEMSET operation for virtual machine."""
+    op_code, arg1_type, arg1, arg2_type, arg2 = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "MEMSET"
+
+    if arg2_type == 2:  # Register
+        value = vm_state.vm_register_file[arg2]
+
+    elif arg2_type == 3:  # Register pointer
+        value_addr = vm_state.vm_register_file[arg2]
+        value = vm_state.vm_memory[value_addr]
+
+    elif arg2_type == 4:  # In-place value
+        value = arg2
+
+    else:
+        raise Exception("Bad argument for MEMSET")
+
+    if arg1_type != 3:  # Register pointer
+        raise Exception("Bad argument on MEMSET")
+
+    memory_set(vm_state.vm_memory,
+               vm_state.vm_register_file[arg1],
+               vm_state.vm_register_file[COUNT_REGISTER],
+               value)
+
+    return vm_state
+
+
+@vm_operation
+def vm_memcmp(vm_state: VmState, *args, op_bytecode=None,
+              **kwargs) -> VmState:
+    """MEMCMP operation for virtual machine."""
+    op_code, arg1_type, arg1, arg2_type, arg2 = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "MEMCMP"
+
+    if arg2_type != 3:  # Register pointer
+        raise Exception("Bad argument for MEMCMP")
+
+    if arg1_type != 3:  # Register pointer
+        raise Exception("Bad argument on MEMCMP")
+
+    left_value, right_value = memory_compare(
+        vm_state.vm_memory,
+        vm_state.vm_register_file[arg1],
+        vm_state.vm_register_file[arg2],
+        vm_state.vm_register_file[COUNT_REGISTER]
+    )
+
+    set_compare_registers(vm_state, left_value, right_value)
+
+    return vm_state
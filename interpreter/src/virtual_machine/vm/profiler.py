@@ -0,0 +1,416 @@
+"""Module with execution profiler of VM.
+
+Profiler has own dispatch table with every operation of VM_BYTECODE_FUNC
+wrapped by measuring code. Interpreter uses that table only while
+profiling, so usual execution has no overhead::
+
+    profiler = Profiler(program, symbols)
+    execute_bytecode(program, profiler=profiler)
+    print(profiler.report().format_table())
+
+Time of subroutine is measured by time of its operations, so time of
+profiler itself is not counted:
+
+    * inclusive - time of operations from CALL to RET, with called
+      subroutines
+    * exclusive - inclusive time without time of called subroutines
+
+Loop is found by taken jump back, loop time is time of operations
+between target of jump and jump.
+"""
+
+import json
+import time
+import typing
+import dataclasses
+
+from interpreter.src.virtual_machine.bytecode import BYTECODES, Keyword
+from interpreter.src.virtual_machine.vm import VM_BYTECODE_FUNC
+from interpreter.src.virtual_machine.vm.program import Program
+from interpreter.src.virtual_machine.vm.vm_def import (
+    VmState,
+    VM_OPERATION_TO_BYTECODE
+)
+
+VmOperation = typing.Callable[[VmState], VmState]
+
+# Count of loops in report
+HOTTEST_LOOPS_COUNT: int = 10
+
+CALL_CODE = BYTECODES[Keyword("CALL")]
+RET_CODE = BYTECODES[Keyword("RET")]
+
+JUMP_CODES = frozenset(
+    BYTECODES[Keyword(keyword)]
+    for keyword in ("JMP", "JMP_EQ", "JMP_GT", "JMP_LT", "JMP_NE")
+)
+
+
+@dataclasses.dataclass
+class OperationProfile:
+    """Executions of one operation code.
+
+    :param str name: Name of operation
+    :param int count: Count of executions
+    :param float seconds: Total time of executions
+    """
+
+    name: str
+    count: int = 0
+    seconds: float = 0.0
+
+
+@dataclasses.dataclass
+class LabelProfile:
+    """Executions of code from label till next label.
+
+    :param str label: Name of label
+    :param int address: Address of first operation after label
+    :param int hits: Count of executions of first operation
+    :param int count: Count of executed operations
+    :param float seconds: Time of executed operations
+    """
+
+    label: str
+    address: int
+    hits: int = 0
+    count: int = 0
+    seconds: float = 0.0
+
+
+@dataclasses.dataclass
+class CallProfile:
+    """Calls of subroutine.
+
+    :param str label: Name of subroutine
+    :param int address: Address of subroutine
+    :param int calls: Count of calls
+    :param float inclusive: Time with called subroutines
+    :param float exclusive: Time without called subroutines
+    """
+
+    label: str
+    address: int
+    calls: int = 0
+    inclusive: float = 0.0
+    exclusive: float = 0.0
+
+
+@dataclasses.dataclass
+class LoopProfile:
+    """Iterations of loop.
+
+    :param str label: Name of label at beginning of loop
+    :param int start: Address of first operation of loop
+    :param int end: Address of jump back to beginning
+    :param int iterations: Count of taken jumps back
+    :param float seconds: Time of operations of loop
+    """
+
+    label: str
+    start: int
+    end: int
+    iterations: int = 0
+    seconds: float = 0.0
+
+
+@dataclasses.dataclass
+class ProfileReport:
+    """Report of profiler, every list sorted from the most expensive.
+
+    :param int steps: Count of executed operations
+    :param float seconds: Time of executed operations
+
+    :param operations: Executions by operation codes
+    :type operations: List[OperationProfile]
+
+    :param labels: Executions by labels
+    :type labels: List[LabelProfile]
+
+    :param calls: Calls by subroutines
+    :type calls: List[CallProfile]
+
+    :param loops: The hottest loops
+    :type loops: List[LoopProfile]
+    """
+
+    steps: int = 0
+    seconds: float = 0.0
+    operations: typing.List[OperationProfile] = \
+        dataclasses.field(default_factory=list)
+    labels: typing.List[LabelProfile] = \
+        dataclasses.field(default_factory=list)
+    calls: typing.List[CallProfile] = \
+        dataclasses.field(default_factory=list)
+    loops: typing.List[LoopProfile] = \
+        dataclasses.field(default_factory=list)
+
+    def to_json(self) -> str:
+        """Report as JSON object."""
+        return json.dumps(dataclasses.asdict(self), indent=2)
+
+    def format_table(self) -> str:
+        """Report as text tables."""
+        lines = [f"Executed {self.steps} operations"
+                 f" in {self.seconds * 1000:.3f} ms."]
+
+        lines += format_table(
+            "Operations",
+            ("operation", "count", "ms", "%"),
+            [
+                (item.name, item.count, item.seconds * 1000,
+                 percent(item.seconds, self.seconds))
+                for item in self.operations
+            ]
+        )
+        lines += format_table(
+            "Labels",
+            ("label", "address", "hits", "operations", "ms", "%"),
+            [
+                (item.label, item.address, item.hits, item.count,
+                 item.seconds * 1000, percent(item.seconds, self.seconds))
+                for item in self.labels
+            ]
+        )
+        lines += format_table(
+            "Calls",
+            ("subroutine", "address", "calls", "inclusive ms",
+             "exclusive ms"),
+            [
+                (item.label, item.address, item.calls,
+                 item.inclusive * 1000, item.exclusive * 1000)
+                for item in self.calls
+            ]
+        )
+        lines += format_table(
+            "Hottest loops",
+            ("loop", "start", "end", "iterations", "ms", "%"),
+            [
+                (item.label, item.start, item.end, item.iterations,
+                 item.seconds * 1000, percent(item.seconds, self.seconds))
+                for item in self.loops
+            ]
+        )
+
+        return "\n".join(lines)
+
+
+def percent(part: float, whole: float) -> float:
+    """Part of whole in percents, 0 for empty whole."""
+    return part / whole * 100 if whole else 0.0
+
+
+def format_table(title: str, header: typing.Tuple[str, ...],
+                 rows: typing.List[typing.Tuple]) -> typing.List[str]:
+    """Format rows as table with right aligned columns.
+
+    :return: Lines of table, empty if there are no rows
+    :rtype: List[str]
+    """
+    if not rows:
+        return []
+
+    cells = [header] + [
+        tuple(
+            f"{value:.3f}" if isinstance(value, float) else str(value)
+            for value in row
+        )
+        for row in rows
+    ]
+    widths = [max(len(row[column]) for row in cells)
+              for column in range(len(header))]
+
+    lines = ["", title]
+
+    for row in cells:
+        lines.append("  ".join(
+            cell.ljust(width) if column == 0 else cell.rjust(width)
+            for column, (cell, width) in enumerate(zip(row, widths))
+        ))
+
+    return lines
+
+
+class Profiler:
+    """Profiler of program execution by interpreter.
+
+    :param program: Profiled program
+    :type program: :class:`~.Program`
+
+    :param symbols: Addresses of labels from symbol section,
+                    label name - address
+    :type symbols: Optional[Dict[str, int]]
+    """
+
+    def __init__(self, program: Program,
+                 symbols: typing.Optional[typing.Dict[str, int]] = None):
+        self.program = program
+        self.symbols = symbols or {}
+
+        self.counts = [0] * len(program)
+        self.times = [0.0] * len(program)
+        # Time of all executed operations
+        self.clock = 0.0
+
+        # Open calls, [address of subroutine, clock at call, time of calls]
+        self.frames: typing.List[typing.List] = []
+        self.calls: typing.Dict[int, CallProfile] = {}
+
+        # Taken jumps back, (target, address of jump) - count
+        self.back_jumps: typing.Dict[typing.Tuple[int, int], int] = {}
+
+        self.dispatch_table: typing.Tuple[VmOperation, ...] = tuple(
+            self.wrap_operation(op_code, func)
+            for op_code, func in enumerate(VM_BYTECODE_FUNC)
+        )
+
+    def wrap_operation(self, op_code: int,
+                       func: VmOperation) -> VmOperation:
+        """Wrap operation by measuring of count and time of execution.
+
+        :param int op_code: Code of operation
+        :param func: Operation of VM_BYTECODE_FUNC
+
+        :return: Wrapped operation
+        """
+        counts = self.counts
+        times = self.times
+
+        def measured(vm_state: VmState) -> VmState:
+            address = vm_state.vm_code_pointer
+
+            started = time.perf_counter()
+            vm_state = func(vm_state)
+            elapsed = time.perf_counter() - started
+
+            counts[address] += 1
+            times[address] += elapsed
+            self.clock += elapsed
+
+            return vm_state
+
+        if op_code == CALL_CODE:
+            def call(vm_state: VmState) -> VmState:
+                vm_state = measured(vm_state)
+                self.frames.append([vm_state.vm_code_pointer, self.clock, 0.0])
+                return vm_state
+
+            return call
+
+        if op_code == RET_CODE:
+            def ret(vm_state: VmState) -> VmState:
+                vm_state = measured(vm_state)
+                self.close_frame()
+                return vm_state
+
+            return ret
+
+        if op_code in JUMP_CODES:
+            def jump(vm_state: VmState) -> VmState:
+                address = vm_state.vm_code_pointer
+                vm_state = measured(vm_state)
+
+                if vm_state.vm_code_pointer <= address:
+                    edge = (vm_state.vm_code_pointer, address)
+                    self.back_jumps[edge] = self.back_jumps.get(edge, 0) + 1
+
+                return vm_state
+
+            return jump
+
+        return measured
+
+    def close_frame(self):
+        """Finish last open call and add its time to caller."""
+        if not self.frames:
+            return
+
+        address, started, children = self.frames.pop()
+        inclusive = self.clock - started
+
+        profile = self.calls.setdefault(
+            address,
+            CallProfile(self.label_name(address), address)
+        )
+        profile.calls += 1
+        profile.inclusive += inclusive
+        profile.exclusive += inclusive - children
+
+        if self.frames:
+            self.frames[-1][2] += inclusive
+
+    def finish(self):
+        """Finish calls which are not returned, e.g. after END."""
+        while self.frames:
+            self.close_frame()
+
+    def label_name(self, address: int) -> str:
+        """Names of labels at address or address if there are no labels."""
+        names = [
+            name for name, label_address in self.symbols.items()
+            if label_address == address
+        ]
+
+        return ",".join(names) if names else f"@{address}"
+
+    def report(self) -> ProfileReport:
+        """Make report of executed code.
+
+        :return: Report of profiler
+        :rtype: ProfileReport
+        """
+        self.finish()
+
+        operations: typing.Dict[int, OperationProfile] = {}
+
+        for op_code, count, seconds in zip(self.program.op_codes,
+                                           self.counts, self.times):
+            profile = operations.setdefault(
+                op_code,
+                OperationProfile(VM_OPERATION_TO_BYTECODE[op_code])
+            )
+            profile.count += count
+            profile.seconds += seconds
+
+        starts = sorted(set(
+            address for address in self.symbols.values()
+            if address < len(self.program)
+        ))
+        labels = [
+            LabelProfile(
+                self.label_name(start),
+                start,
+                self.counts[start],
+                sum(self.counts[start:end]),
+                sum(self.times[start:end])
+            )
+            for start, end in zip(starts, starts[1:] + [len(self.program)])
+        ]
+
+        loops = [
+            LoopProfile(
+                self.label_name(start),
+                start,
+                end,
+                iterations,
+                sum(self.times[start:end + 1])
+            )
+            for (start, end), iterations in self.back_jumps.items()
+        ]
+
+        def by_time(profile) -> float:
+            return -profile.seconds
+
+        return ProfileReport(
+            steps=sum(self.counts),
+            seconds=self.clock,
+            operations=sorted(
+                (profile for profile in operations.values()
+                 if profile.count),
+                key=by_time
+            ),
+            labels=sorted(labels, key=by_time),
+            calls=sorted(self.calls.values(),
+                         key=lambda profile: -profile.inclusive),
+            loops=sorted(loops, key=by_time)[:HOTTEST_LOOPS_COUNT],
+        )
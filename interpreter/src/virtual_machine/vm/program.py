@@ -0,0 +1,372 @@
+"""Module with decoded program representation for Virtual Machine."""
+
+import io
+import os
+import mmap
+import array
+import struct
+import operator
+import typing
+import hashlib
+import pathlib
+import contextlib
+import dataclasses
+
+from interpreter.src.lexer.keywords import LANGUAGE_OPTYPES
+from interpreter.src.parser.operation import (
+    Operation,
+    OperationArgument,
+    OperationArgumentType,
+)
+from interpreter.src.virtual_machine.bytecode import (
+    BLOCK_END_BYTECODES,
+    BYTECODES,
+    JUMP_BYTECODES,
+    OPERATION_STRUCT
+)
+from interpreter.src.virtual_machine.errors import BadOperationSize
+
+Bytecode = typing.Union[bytes, bytearray, memoryview, io.BytesIO]
+
+# Type code of array.array and offset of every OPERATION_STRUCT field
+OPERATION_COLUMNS: typing.Tuple[typing.Tuple[str, int], ...] = tuple(
+    (type_code, struct.calcsize(OPERATION_STRUCT.format[:index]))
+    for index, type_code in enumerate(OPERATION_STRUCT.format[1:], 1)
+)
+
+
+@dataclasses.dataclass(frozen=True)
+class Program:
+    """Bytecode decoded once into parallel columns of operation fields.
+
+    Instruction number N is described by N-th item of every column.
+
+    :param op_codes: Operation codes
+    :type op_codes: array.array of 'h'
+
+    :param arg1_types: Types of first arguments
+    :type arg1_types: array.array of 'b'
+
+    :param arg1s: First arguments
+    :type arg1s: array.array of 'i'
+
+    :param arg2_types: Types of second arguments
+    :type arg2_types: array.array of 'b'
+
+    :param arg2s: Second arguments
+    :type arg2s: array.array of 'i'
+
+    :param int memory_size: Size of VM memory from bytecode header,
+                            0 - default size
+
+    :param engine_cache: Code of program prepared by execution engines
+    :type engine_cache: Dict[str, Any]
+    """
+
+    op_codes: array.array = \
+        dataclasses.field(default_factory=lambda: array.array('h'))
+    arg1_types: array.array = \
+        dataclasses.field(default_factory=lambda: array.array('b'))
+    arg1s: array.array = \
+        dataclasses.field(default_factory=lambda: array.array('i'))
+    arg2_types: array.array = \
+        dataclasses.field(default_factory=lambda: array.array('b'))
+    arg2s: array.array = \
+        dataclasses.field(default_factory=lambda: array.array('i'))
+
+    memory_size: int = 0
+
+    # Filled lazily, key - engine name
+    engine_cache: typing.Dict[str, typing.Any] = dataclasses.field(
+        default_factory=dict,
+        compare=False,
+        repr=False
+    )
+
+    def __len__(self) -> int:
+        """Count of instructions in program."""
+        return len(self.op_codes)
+
+    def __getitem__(self, index: int) -> typing.Tuple[int, ...]:
+        """Get instruction as (op_code, arg1_type, arg1, arg2_type, arg2)."""
+        return (
+            self.op_codes[index],
+            self.arg1_types[index],
+            self.arg1s[index],
+            self.arg2_types[index],
+            self.arg2s[index],
+        )
+
+    def __deepcopy__(self, memo) -> 'Program':
+        """Program never changes, so every VmState copy can share it."""
+        return self
+
+    def digest(self) -> str:
+        """Digest of program code, used for checks of cached data."""
+        code_hash = hashlib.blake2b(digest_size=16)
+
+        for column in (self.op_codes, self.arg1_types, self.arg1s,
+                       self.arg2_types, self.arg2s):
+            code_hash.update(column.tobytes())
+
+        return code_hash.hexdigest()
+
+
+@contextlib.contextmanager
+def map_file(
+        filename: typing.Union[str, pathlib.Path]
+) -> typing.Iterator[memoryview]:
+    """Map file into memory for reading without copies.
+
+    Pages of mapped file are shared by all processes which map same file.
+    Views made from given memoryview must be released before exit from
+    context (e.g. used as context managers), else mapping can't be closed.
+
+    :param filename: Name of file to map
+    :type filename: str or pathlib.Path
+
+    :return: Context manager with read-only view of whole file
+    :rtype: ContextManager[memoryview]
+    """
+    with open(filename, 'rb') as mapped_file:
+        # Empty file can't be mapped
+        if os.fstat(mapped_file.fileno()).st_size == 0:
+            yield memoryview(b'')
+            return
+
+        with mmap.mmap(mapped_file.fileno(), 0,
+                       access=mmap.ACCESS_READ) as file_map:
+            with memoryview(file_map) as file_view:
+                yield file_view
+
+
+def load_program(bytecode: Bytecode, memory_size: int = 0) -> Program:
+    """Decode whole code section into Program.
+
+    Every field is copied from bytecode straight into its column, no
+    tuple is made per operation.
+
+    :param bytecode: Code section of bytecode
+    :type bytecode: bytes-like object or io.BytesIO
+
+    :param int memory_size: Size of VM memory, 0 - default size
+
+    :raise BadOperationSize: If code size is not multiple of operation size
+    :raise Exception: If unknown operation code or bad jump address found
+
+    :return: Decoded program
+    :rtype: :class:`~.Program`
+    """
+    if isinstance(bytecode, io.BytesIO):
+        bytecode = bytecode.getvalue()
+
+    with memoryview(bytecode) as code_view, code_view.cast('B') as code:
+        if len(code) % OPERATION_STRUCT.size:
+            raise BadOperationSize("Bad size of code provided")
+
+        op_codes, arg1_types, arg1s, arg2_types, arg2s = (
+            _decode_column(code, type_code, offset)
+            for type_code, offset in OPERATION_COLUMNS
+        )
+
+    if not op_codes:
+        return Program(memory_size=memory_size)
+
+    if min(op_codes) < 0 or max(op_codes) >= len(BYTECODES):
+        raise Exception("Bad opcode provided")
+
+    code_size = len(op_codes)
+    address_type = OperationArgumentType.Address.value
+
+    for op_code, arg1_type, arg1 in zip(op_codes, arg1_types, arg1s):
+        if op_code not in JUMP_BYTECODES:
+            continue
+
+        # Jumps are allowed only to address inside of code or to its end
+        if arg1_type != address_type or not 0 <= arg1 <= code_size:
+            raise Exception(f"Bad label {arg1}")
+
+    return Program(
+        op_codes=op_codes,
+        arg1_types=arg1_types,
+        arg1s=arg1s,
+        arg2_types=arg2_types,
+        arg2s=arg2s,
+        memory_size=memory_size,
+    )
+
+
+def _decode_column(code: memoryview, type_code: str,
+                   offset: int) -> array.array:
+    """Decode one field of every operation into column.
+
+    Bytes of field are gathered by strided slices of code, so no objects
+    are made per operation.
+
+    :param code: Code section as view of unsigned bytes
+    :type code: memoryview
+
+    :param str type_code: Type code of field for array.array
+    :param int offset: Offset of field inside of operation
+
+    :return: Values of field, indexed by address of operation
+    :rtype: array.array
+    """
+    column = array.array(type_code)
+    field_size = column.itemsize
+    operation_size = OPERATION_STRUCT.size
+
+    if field_size == 1:
+        column.frombytes(code[offset::operation_size].tobytes())
+        return column
+
+    column_bytes = bytearray(len(code) // operation_size * field_size)
+
+    for byte in range(field_size):
+        column_bytes[byte::field_size] = \
+            code[offset + byte::operation_size].tobytes()
+
+    column.frombytes(column_bytes)
+
+    return column
+
+
+def block_ends(program: Program) -> typing.List[int]:
+    """Address after basic block of every instruction, cached in program.
+
+    Block starts at beginning of code, at target of jump and after every
+    jump, call, return and end of program, so instructions from address
+    to its block end are executed one after another.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :return: Address after last instruction of block, indexed by address
+    :rtype: List[int]
+    """
+    if 'block_ends' in program.engine_cache:
+        return program.engine_cache['block_ends']
+
+    code_size = len(program)
+    starts = {0}
+
+    for address, (op_code, arg1) in enumerate(zip(program.op_codes,
+                                                  program.arg1s)):
+        if op_code in BLOCK_END_BYTECODES:
+            starts.add(address + 1)
+
+            if op_code in JUMP_BYTECODES:
+                starts.add(arg1)
+
+    ends = [code_size] * code_size
+    next_start = code_size
+
+    for address in range(code_size - 1, -1, -1):
+        ends[address] = next_start
+
+        if address in starts:
+            next_start = address
+
+    program.engine_cache['block_ends'] = ends
+
+    return ends
+
+
+def code_blocks(program: Program, code: typing.Sequence,
+                name: str) -> typing.List[typing.Optional[typing.Tuple]]:
+    """Split code of engine into basic blocks, cached in program by name.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :param code: Items of engine indexed by address, e.g. operation codes
+    :type code: Sequence
+
+    :param str name: Name of engine code for cache
+
+    :return: Items of every block at address of its start, None at other
+             addresses, execution starts there only after resume
+    :rtype: List[Optional[Tuple]]
+    """
+    key = f'{name}_blocks'
+
+    if key not in program.engine_cache:
+        ends = block_ends(program)
+        blocks: typing.List[typing.Optional[typing.Tuple]] = \
+            [None] * len(ends)
+
+        for address, end in enumerate(ends):
+            # Block starts where previous block ends
+            if address == 0 or ends[address - 1] == address:
+                blocks[address] = tuple(code[address:end])
+
+        program.engine_cache[key] = blocks
+
+    return program.engine_cache[key]
+
+
+def count_executed(block: typing.Sequence, operations: typing.Iterator,
+                   error: BaseException) -> int:
+    """Count operations of block executed before error.
+
+    Operation which raised error is not executed, error raised between
+    operations (e.g. KeyboardInterrupt) leaves taken operations executed.
+
+    :param block: Operations of block
+    :type block: Sequence
+
+    :param operations: Iterator over block used by engine
+    :type operations: Iterator
+
+    :param error: Error caught in engine loop
+    :type error: BaseException
+
+    :return: Count of executed operations of block
+    :rtype: int
+    """
+    taken = len(block) - operator.length_hint(operations)
+
+    # Traceback goes further than engine loop if operation failed
+    if taken and error.__traceback__.tb_next is not None:
+        return taken - 1
+
+    return taken
+
+
+def decode_operations(program: Program) -> typing.List[Operation]:
+    """Decode program back into list of operations.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :return: Operations with resolved labels
+    :rtype: List[Operation]
+    """
+    keywords = {
+        bytecode: keyword
+        for keyword, bytecode in BYTECODES.items()
+    }
+
+    return [
+        Operation(
+            op_type=LANGUAGE_OPTYPES[keywords[op_code]],
+            op_word=keywords[op_code],
+            op_args=[
+                OperationArgument(
+                    arg_type=OperationArgumentType(arg1_type),
+                    arg_word=arg1
+                ),
+                OperationArgument(
+                    arg_type=OperationArgumentType(arg2_type),
+                    arg_word=arg2
+                ),
+            ]
+        )
+        for op_code, arg1_type, arg1, arg2_type, arg2 in zip(
+            program.op_codes,
+            program.arg1_types,
+            program.arg1s,
+            program.arg2_types,
+            program.arg2s,
+        )
+    ]
@@ -0,0 +1,573 @@
+"""Module with threaded code engine of VM.
+
+Every instruction of program turned once into closure with pre-bound
+arguments, specialized for types of its arguments. Closure changes
+VmState in place and returns address of next instruction, so execution
+is just ``pc = code[pc](vm_state)``.
+"""
+
+import typing
+import operator
+
+from interpreter.src.virtual_machine.bytecode import BYTECODES, Keyword
+from interpreter.src.virtual_machine.vm.vm_def import VmState
+from interpreter.src.virtual_machine.vm.program import (
+    Program,
+    block_ends,
+    code_blocks,
+    count_executed
+)
+from interpreter.src.virtual_machine.vm.jumps_and_labels import (
+    set_compare_registers
+)
+from interpreter.src.virtual_machine.vm.memory_ops import (
+    COUNT_REGISTER,
+    memory_copy,
+    memory_set,
+    memory_compare
+)
+from interpreter.src.virtual_machine.vm.vector_ops import (
+    vector_apply,
+    vector_sum
+)
+
+ThreadedOperation = typing.Callable[[VmState], int]
+OperationBuilder = typing.Callable[..., ThreadedOperation]
+
+
+def build_error(message: str) -> ThreadedOperation:
+    """Build operation which fails only when it's executed."""
+    def op(vm_state: VmState) -> int:
+        raise Exception(message)
+
+    return op
+
+
+def build_load(
+        arg_type: int,
+        arg: int
+) -> typing.Optional[typing.Callable[[VmState], int]]:
+    """Build function which reads value of argument.
+
+    :param int arg_type: Type of argument
+    :param int arg: Argument
+
+    :return: Function which reads value from VmState or None for bad type
+    :rtype: Optional[Callable[[VmState], int]]
+    """
+    if arg_type == 2:  # Register
+        def load(vm_state: VmState) -> int:
+            return vm_state.vm_register_file[arg]
+
+    elif arg_type == 3:  # Register pointer
+        def load(vm_state: VmState) -> int:
+            return vm_state.vm_memory[vm_state.vm_register_file[arg]]
+
+    elif arg_type == 4:  # In-place value
+        def load(vm_state: VmState) -> int:
+            return arg
+
+    else:
+        return None
+
+    return load
+
+
+def gen_binary_builder(operation_name: str,
+                       func: typing.Callable) -> OperationBuilder:
+    """Generate builder for binary operations.
+
+    Most used forms ``OP reg, value`` and ``OP reg, reg`` read arguments
+    directly, other forms read second argument with pre-built loader.
+
+    :param str operation_name: Name of operation for exceptions
+
+    :param func: Function makes operations and return value for set into 1 arg
+    :type func: Callable[[int, int], int]
+
+    :return: Builder of threaded operation
+    :rtype: Callable
+    """
+    def build(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+        next_address = address + 1
+        load = build_load(arg2_type, arg2)
+
+        if load is None:
+            return build_error(f"Bad argument for {operation_name}")
+
+        if arg1_type == 2 and arg2_type == 4:  # Register, in-place value
+            def op(vm_state: VmState) -> int:
+                registers = vm_state.vm_register_file
+                registers[arg1] = func(registers[arg1], arg2)
+                return next_address
+
+        elif arg1_type == 2 and arg2_type == 2:  # Register, register
+            def op(vm_state: VmState) -> int:
+                registers = vm_state.vm_register_file
+                registers[arg1] = func(registers[arg1], registers[arg2])
+                return next_address
+
+        elif arg1_type == 2:  # Register
+            def op(vm_state: VmState) -> int:
+                registers = vm_state.vm_register_file
+                registers[arg1] = func(registers[arg1], load(vm_state))
+                return next_address
+
+        elif arg1_type == 3:  # Register pointer
+            def op(vm_state: VmState) -> int:
+                memory = vm_state.vm_memory
+                mem_index = vm_state.vm_register_file[arg1]
+                memory[mem_index] = func(memory[mem_index], load(vm_state))
+                return next_address
+
+        else:
+            return build_error(f"Bad argument on {operation_name}")
+
+        return op
+
+    return build
+
+
+def build_mov(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build MOV operation, it doesn't read value of first argument."""
+    next_address = address + 1
+    load = build_load(arg2_type, arg2)
+
+    if load is None:
+        return build_error("Bad argument for MOV")
+
+    if arg1_type == 2 and arg2_type == 4:  # Register, in-place value
+        def op(vm_state: VmState) -> int:
+            vm_state.vm_register_file[arg1] = arg2
+            return next_address
+
+    elif arg1_type == 2 and arg2_type == 2:  # Register, register
+        def op(vm_state: VmState) -> int:
+            registers = vm_state.vm_register_file
+            registers[arg1] = registers[arg2]
+            return next_address
+
+    elif arg1_type == 2:  # Register
+        def op(vm_state: VmState) -> int:
+            vm_state.vm_register_file[arg1] = load(vm_state)
+            return next_address
+
+    elif arg1_type == 3:  # Register pointer
+        def op(vm_state: VmState) -> int:
+            mem_index = vm_state.vm_register_file[arg1]
+            vm_state.vm_memory[mem_index] = load(vm_state)
+            return next_address
+
+    else:
+        return build_error("Bad argument on MOV")
+
+    return op
+
+
+def build_cmp(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build CMP operation."""
+    next_address = address + 1
+    load_left = build_load(arg1_type, arg1)
+    load_right = build_load(arg2_type, arg2)
+
+    if load_right is None:
+        return build_error("Bad argument for CMP")
+
+    if load_left is None:
+        return build_error("Bad argument on CMP")
+
+    if arg1_type == 2 and arg2_type == 4:  # Register, in-place value
+        def op(vm_state: VmState) -> int:
+            set_compare_registers(
+                vm_state,
+                vm_state.vm_register_file[arg1],
+                arg2
+            )
+            return next_address
+
+    else:
+        def op(vm_state: VmState) -> int:
+            set_compare_registers(
+                vm_state,
+                load_left(vm_state),
+                load_right(vm_state)
+            )
+            return next_address
+
+    return op
+
+
+def gen_jump_builder(register: typing.Optional[int]) -> OperationBuilder:
+    """Generate builder for jumps.
+
+    :param register: Register checked by conditional jump, None for JMP
+    :type register: Optional[int]
+
+    :return: Builder of threaded operation
+    :rtype: Callable
+    """
+    def build(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+        next_address = address + 1
+
+        if register is None:
+            def op(vm_state: VmState) -> int:
+                return arg1
+
+        else:
+            def op(vm_state: VmState) -> int:
+                if vm_state.vm_register_file[register]:
+                    return arg1
+                return next_address
+
+        return op
+
+    return build
+
+
+def build_call(address: int, arg1_type: int, arg1: int,
+               arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build CALL operation, it saves address of next instruction."""
+    next_address = address + 1
+
+    def op(vm_state: VmState) -> int:
+        vm_state.vm_call_stack.append(next_address)
+        return arg1
+
+    return op
+
+
+def build_ret(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build RET operation."""
+    def op(vm_state: VmState) -> int:
+        try:
+            return vm_state.vm_call_stack.pop()
+        except IndexError:
+            raise Exception("Bad RET before CALL.")
+
+    return op
+
+
+def build_nop(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build NOP operation, LABEL works same way."""
+    next_address = address + 1
+
+    def op(vm_state: VmState) -> int:
+        return next_address
+
+    return op
+
+
+def build_end(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build END operation, it jumps to end of code."""
+    def op(vm_state: VmState) -> int:
+        return len(vm_state.vm_program)
+
+    return op
+
+
+def build_print(address: int, arg1_type: int, arg1: int,
+                arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build PRINT operation."""
+    next_address = address + 1
+    load = build_load(arg1_type, arg1)
+
+    if load is None:
+        return build_error("Bad print source")
+
+    def op(vm_state: VmState) -> int:
+        vm_state.vm_output.write(load(vm_state))
+        return next_address
+
+    return op
+
+
+def build_input(address: int, arg1_type: int, arg1: int,
+                arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build INPUT operation."""
+    next_address = address + 1
+
+    if arg1_type == 2:  # Register
+        def op(vm_state: VmState) -> int:
+            vm_state.vm_register_file[arg1] = vm_state.vm_input.read()
+            return next_address
+
+    elif arg1_type == 3:  # Register pointer
+        def op(vm_state: VmState) -> int:
+            input_value = vm_state.vm_input.read()
+            mem_index = vm_state.vm_register_file[arg1]
+            vm_state.vm_memory[mem_index] = input_value
+            return next_address
+
+    else:
+        return build_error("Bad input destination")
+
+    return op
+
+
+def build_memcpy(address: int, arg1_type: int, arg1: int,
+                 arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build MEMCPY operation."""
+    next_address = address + 1
+
+    if arg2_type != 3:  # Register pointer
+        return build_error("Bad argument for MEMCPY")
+
+    if arg1_type != 3:  # Register pointer
+        return build_error("Bad argument on MEMCPY")
+
+    def op(vm_state: VmState) -> int:
+        registers = vm_state.vm_register_file
+        memory_copy(vm_state.vm_memory, registers[arg1], registers[arg2],
+                    registers[COUNT_REGISTER])
+        return next_address
+
+    return op
+
+
+def build_memset(address: int, arg1_type: int, arg1: int,
+                 arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build MEMSET operation."""
+    next_address = address + 1
+    load = build_load(arg2_type, arg2)
+
+    if load is None:
+        return build_error("Bad argument for MEMSET")
+
+    if arg1_type != 3:  # Register pointer
+        return build_error("Bad argument on MEMSET")
+
+    def op(vm_state: VmState) -> int:
+        registers = vm_state.vm_register_file
+        memory_set(vm_state.vm_memory, registers[arg1],
+                   registers[COUNT_REGISTER], load(vm_state))
+        return next_address
+
+    return op
+
+
+def build_memcmp(address: int, arg1_type: int, arg1: int,
+                 arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build MEMCMP operation."""
+    next_address = address + 1
+
+    if arg2_type != 3:  # Register pointer
+        return build_error("Bad argument for MEMCMP")
+
+    if arg1_type != 3:  # Register pointer
+        return build_error("Bad argument on MEMCMP")
+
+    def op(vm_state: VmState) -> int:
+        registers = vm_state.vm_register_file
+        set_compare_registers(vm_state, *memory_compare(
+            vm_state.vm_memory, registers[arg1], registers[arg2],
+            registers[COUNT_REGISTER]
+        ))
+        return next_address
+
+    return op
+
+
+def gen_vector_builder(operation_name: str) -> OperationBuilder:
+    """Generate builder for vector operations on two ranges.
+
+    :param str operation_name: Name of operation
+
+    :return: Builder of threaded operation
+    :rtype: Callable
+    """
+    def build(address: int, arg1_type: int, arg1: int,
+              arg2_type: int, arg2: int) -> ThreadedOperation:
+        next_address = address + 1
+
+        if arg2_type != 3:  # Register pointer
+            return build_error(f"Bad argument for {operation_name}")
+
+        if arg1_type != 3:  # Register pointer
+            return build_error(f"Bad argument on {operation_name}")
+
+        def op(vm_state: VmState) -> int:
+            registers = vm_state.vm_register_file
+            vector_apply(vm_state.vm_memory, operation_name, registers[arg1],
+                         registers[arg2], registers[COUNT_REGISTER])
+            return next_address
+
+        return op
+
+    return build
+
+
+def build_vsum(address: int, arg1_type: int, arg1: int,
+               arg2_type: int, arg2: int) -> ThreadedOperation:
+    """Build VSUM operation."""
+    next_address = address + 1
+
+    if arg2_type != 3:  # Register pointer
+        return build_error("Bad argument for VSUM")
+
+    if arg1_type == 2:  # Register
+        def op(vm_state: VmState) -> int:
+            registers = vm_state.vm_register_file
+            registers[arg1] = vector_sum(
+                vm_state.vm_memory, registers[arg1], registers[arg2],
+                registers[COUNT_REGISTER]
+            )
+            return next_address
+
+    elif arg1_type == 3:  # Register pointer
+        def op(vm_state: VmState) -> int:
+            registers = vm_state.vm_register_file
+            memory = vm_state.vm_memory
+            mem_index = registers[arg1]
+            memory[mem_index] = vector_sum(
+                memory, memory[mem_index], registers[arg2],
+                registers[COUNT_REGISTER]
+            )
+            return next_address
+
+    else:
+        return build_error("Bad argument on VSUM")
+
+    return op
+
+
+THREADED_BUILDERS: typing.Dict[Keyword, OperationBuilder] = {
+    Keyword("ADD"): gen_binary_builder("ADD", operator.add),
+    Keyword("SUB"): gen_binary_builder("SUB", operator.sub),
+    Keyword("DIV"): gen_binary_builder("DIV", operator.truediv),
+    Keyword("MUL"): gen_binary_builder("MUL", operator.mul),
+    Keyword("AND"): gen_binary_builder("AND", operator.and_),
+    Keyword("OR"): gen_binary_builder("OR", operator.or_),
+    Keyword("XOR"): gen_binary_builder("XOR", operator.xor),
+    # NOT operation works because it's a parser dependent hack
+    Keyword("NOT"): gen_binary_builder("NOT", lambda _, y: ~y),
+    Keyword("MOV"): build_mov,
+    Keyword("CMP"): build_cmp,
+    Keyword("JMP"): gen_jump_builder(None),
+    Keyword("JMP_EQ"): gen_jump_builder(5),
+    Keyword("JMP_GT"): gen_jump_builder(7),
+    Keyword("JMP_LT"): gen_jump_builder(6),
+    Keyword("JMP_NE"): gen_jump_builder(8),
+    Keyword("LABEL"): build_nop,
+    Keyword("PRINT"): build_print,
+    Keyword("INPUT"): build_input,
+    Keyword("NOP"): build_nop,
+    Keyword("END"): build_end,
+    Keyword("CALL"): build_call,
+    Keyword("RET"): build_ret,
+    Keyword("MEMCPY"): build_memcpy,
+    Keyword("MEMSET"): build_memset,
+    Keyword("MEMCMP"): build_memcmp,
+    Keyword("VADD"): gen_vector_builder("VADD"),
+    Keyword("VSUB"): gen_vector_builder("VSUB"),
+    Keyword("VMUL"): gen_vector_builder("VMUL"),
+    Keyword("VAND"): gen_vector_builder("VAND"),
+    Keyword("VXOR"): gen_vector_builder("VXOR"),
+    Keyword("VSUM"): build_vsum,
+}
+
+
+# Builders indexed by bytecode
+THREADED_BYTECODE_BUILDERS: typing.Tuple[OperationBuilder, ...] = tuple(
+    THREADED_BUILDERS[keyword]
+    for keyword, _ in sorted(
+        BYTECODES.items(),
+        key=lambda keyword_bytecode: keyword_bytecode[1]
+    )
+)
+
+
+def compile_threaded(
+        program: Program
+) -> typing.Tuple[ThreadedOperation, ...]:
+    """Build threaded operation for every instruction of program.
+
+    Result is cached in program, so it's built only once.
+
+    :param program: Decoded program
+    :type program: :class:`~.Program`
+
+    :return: Operations indexed by address of instruction
+    :rtype: Tuple[Callable[[VmState], int], ...]
+    """
+    if 'threaded' not in program.engine_cache:
+        program.engine_cache['threaded'] = tuple(
+            THREADED_BYTECODE_BUILDERS[op_code](address, *arguments)
+            for address, (op_code, *arguments) in enumerate(zip(
+                program.op_codes,
+                program.arg1_types,
+                program.arg1s,
+                program.arg2_types,
+                program.arg2s,
+            ))
+        )
+
+    return program.engine_cache['threaded']
+
+
+def run_threaded(vm_state: VmState,
+                 max_steps: typing.Optional[int] = None) -> VmState:
+    """Execute program of VmState from current instruction with threaded code.
+
+    :param vm_state: Initialized VmState
+    :type vm_state: :class:`~.VmState`
+
+    :param max_steps: Execution stops when count of executed instructions
+                      reaches it, code pointer stays before end of code
+    :type max_steps: Optional[int]
+
+    :return: VmState at end of executing
+    :rtype: :class:`~.VmState`
+    """
+    code = compile_threaded(vm_state.vm_program)
+    code_size = len(code)
+    ends = block_ends(vm_state.vm_program)
+    blocks = code_blocks(vm_state.vm_program, code, 'threaded')
+    code_pointer = vm_state.vm_code_pointer
+    steps = block_steps = vm_state.vm_steps
+    block = operations = ()
+
+    try:
+        # Instructions are counted and limit is checked once per block
+        if max_steps is None:
+            while code_pointer < code_size:
+                block = blocks[code_pointer] or \
+                    code[code_pointer:ends[code_pointer]]
+                operations = iter(block)
+                block_steps = steps
+
+                for operation in operations:
+                    code_pointer = operation(vm_state)
+
+                steps = block_steps + len(block)
+        else:
+            while code_pointer < code_size and steps < max_steps:
+                block = blocks[code_pointer] or \
+                    code[code_pointer:ends[code_pointer]]
+
+                if steps + len(block) > max_steps:
+                    # Last block is executed till limit
+                    block = block[:max_steps - steps]
+
+                operations = iter(block)
+                block_steps = steps
+
+                for operation in operations:
+                    code_pointer = operation(vm_state)
+
+                steps = block_steps + len(block)
+    except BaseException as error:
+        steps = block_steps + count_executed(block, operations, error)
+        raise
+    finally:
+        # On errors points to failed instruction
+        vm_state.vm_code_pointer = code_pointer
+        vm_state.vm_steps = steps
+
+    return vm_state
@@ -0,0 +1,455 @@
+"""Module with instruction trace of VM.
+
+Tracer keeps last executed instructions in ring buffer: address,
+operation with arguments and value written by operation. Buffer is
+a set of preallocated arrays, one per field, so tracing doesn't allocate
+objects per instruction. Like profiler, tracer has own dispatch table
+with wrapped operations of VM_BYTECODE_FUNC, which is used by interpreter
+only while tracing::
+
+    tracer = Tracer(program, size=4096, dump_file="program.small_trace")
+    execute_bytecode(program, tracer=tracer)
+
+Trace is written to dump file automatically when VM raises one of its
+errors: ``MemoryFault``, ``UndefinedLabel`` or ``Bad ...`` error, or by
+:meth:`Tracer.dump` on demand.
+
+Trace file format, all numbers are little-endian::
+
+    | 4 byte | 2 byte  |    4 byte    |  8 byte   |   2 byte   | N byte |
+    | magic  | version | record count | all steps | error size | error  |
+
+and after header every field of records as array of record count items,
+from the oldest record to the newest:
+
+    address (int32), op_code (int16), arg1 type (int8), arg1 (int32),
+    arg2 type (int8), arg2 (int32), kind of written value (int8),
+    register or memory address of written value (int32), value (int64)
+"""
+
+import sys
+import array
+import struct
+import typing
+import dataclasses
+
+from interpreter.src.virtual_machine.bytecode import BYTECODES, Keyword
+from interpreter.src.virtual_machine.errors import (
+    BadOperationSize,
+    MemoryFault,
+    UndefinedLabel
+)
+from interpreter.src.virtual_machine.vm import VM_BYTECODE_FUNC
+from interpreter.src.virtual_machine.vm.io_streams import wrap_int64
+from interpreter.src.virtual_machine.vm.program import Program
+from interpreter.src.virtual_machine.vm.vm_def import (
+    REGISTER_NAMES,
+    VmState,
+    VM_OPERATION_TO_BYTECODE
+)
+
+VmOperation = typing.Callable[[VmState], VmState]
+
+TRACE_MAGIC: bytes = b"SLTR"
+TRACE_VERSION: int = 1
+
+# Magic, version, count of records, count of all steps, size of error
+TRACE_HEADER = struct.Struct('<4sHIQH')
+
+# Fields of record, name - type of array
+TRACE_FIELDS: typing.Tuple[typing.Tuple[str, str], ...] = (
+    ("address", "i"),
+    ("op_code", "h"),
+    ("arg1_type", "b"),
+    ("arg1", "i"),
+    ("arg2_type", "b"),
+    ("arg2", "i"),
+    ("written_kind", "b"),
+    ("written_at", "i"),
+    ("written_value", "q"),
+)
+
+# Count of records in ring buffer by default
+DEFAULT_TRACE_SIZE: int = 4096
+
+# Errors of VM with own classes, trace is dumped on them
+VM_ERRORS: typing.Tuple[typing.Type[Exception], ...] = (
+    BadOperationSize,
+    MemoryFault,
+    UndefinedLabel
+)
+
+# Kinds of written values
+WRITTEN_NOTHING, WRITTEN_REGISTER, WRITTEN_MEMORY, WRITTEN_FLAGS = range(4)
+
+# Operations which write value to first argument, block memory and
+# vector operations are traced by first cell of range
+WRITING_OPERATIONS = frozenset(
+    BYTECODES[Keyword(keyword)]
+    for keyword in ("ADD", "SUB", "DIV", "MUL", "AND", "OR", "XOR", "NOT",
+                    "MOV", "INPUT", "MEMCPY", "MEMSET", "VADD", "VSUB",
+                    "VMUL", "VAND", "VXOR", "VSUM")
+)
+
+# Operations which set flags registers
+COMPARE_OPERATIONS = frozenset(
+    BYTECODES[Keyword(keyword)]
+    for keyword in ("CMP", "MEMCMP")
+)
+
+# Flags registers EQ, LT, GT, NE packed into bits of value
+FLAGS_REGISTERS = (5, 6, 7, 8)
+
+
+@dataclasses.dataclass(frozen=True)
+class TraceRecord:
+    """Executed instruction.
+
+    :param int step: Number of instruction in execution
+    :param int address: Address of instruction
+    :param int op_code: Code of operation
+    :param int arg1_type: Type of first argument
+    :param int arg1: First argument
+    :param int arg2_type: Type of second argument
+    :param int arg2: Second argument
+    :param int written_kind: Kind of written value, WRITTEN_* constant
+    :param int written_at: Register or memory address of written value
+    :param int written_value: Written value, packed flags for CMP
+    """
+
+    step: int
+    address: int
+    op_code: int
+    arg1_type: int
+    arg1: int
+    arg2_type: int
+    arg2: int
+    written_kind: int = WRITTEN_NOTHING
+    written_at: int = 0
+    written_value: int = 0
+
+    @property
+    def operation_name(self) -> str:
+        """Name of operation."""
+        return VM_OPERATION_TO_BYTECODE.get(self.op_code,
+                                            f"OP{self.op_code}")
+
+    def format(self) -> str:
+        """Instruction in form of source with written value."""
+        arguments = ", ".join(
+            format_argument(arg_type, arg)
+            for arg_type, arg in ((self.arg1_type, self.arg1),
+                                  (self.arg2_type, self.arg2))
+            if arg_type > 1  # Not Nop and not Label
+        )
+
+        line = f"{self.step:>10} {self.address:>6}: {self.operation_name}"
+
+        if arguments:
+            line += f" {arguments}"
+
+        if self.written_kind == WRITTEN_REGISTER:
+            line += (f"  ; {REGISTER_NAMES[self.written_at]}"
+                     f" = {self.written_value}")
+
+        elif self.written_kind == WRITTEN_MEMORY:
+            line += f"  ; [{self.written_at}] = {self.written_value}"
+
+        elif self.written_kind == WRITTEN_FLAGS:
+            flags = " ".join(
+                REGISTER_NAMES[register]
+                for bit, register in enumerate(FLAGS_REGISTERS)
+                if self.written_value & (1 << bit)
+            )
+            line += f"  ; flags {flags or '-'}"
+
+        return line
+
+
+@dataclasses.dataclass
+class Trace:
+    """Decoded trace.
+
+    :param int steps: Count of all executed instructions
+    :param str error: Error of execution, empty if trace dumped on demand
+
+    :param records: The last executed instructions, from the oldest
+    :type records: List[TraceRecord]
+    """
+
+    steps: int = 0
+    error: str = ""
+    records: typing.List[TraceRecord] = \
+        dataclasses.field(default_factory=list)
+
+    def format(self) -> str:
+        """Trace as text, one instruction per line."""
+        lines = [f"Last {len(self.records)} of {self.steps} instructions."]
+
+        if self.error:
+            lines.append(f"Error: {self.error}")
+
+        lines += [record.format() for record in self.records]
+
+        return "\n".join(lines)
+
+
+def format_argument(arg_type: int, arg: int) -> str:
+    """Argument in form of source."""
+    if arg_type == 2:  # Register
+        return REGISTER_NAMES[arg]
+
+    if arg_type == 3:  # Register pointer
+        return f"@{REGISTER_NAMES[arg]}"
+
+    if arg_type == 5:  # Address
+        return f"<{arg}>"
+
+    return str(arg)
+
+
+def is_vm_error(exception: BaseException) -> bool:
+    """Check that exception is one of errors of VM."""
+    if isinstance(exception, VM_ERRORS):
+        return True
+
+    # Errors of bad arguments or stack are raised as plain exceptions
+    return type(exception) is Exception and \
+        str(exception).startswith("Bad")
+
+
+class Tracer:
+    """Recorder of the last executed instructions into ring buffer.
+
+    :param program: Traced program
+    :type program: :class:`~.Program`
+
+    :param int size: Count of records in ring buffer
+
+    :param dump_file: File for trace dumped on error of VM,
+                      trace is not dumped automatically if it's None
+    :type dump_file: Optional[str]
+    """
+
+    def __init__(self, program: Program, size: int = DEFAULT_TRACE_SIZE,
+                 dump_file: typing.Optional[str] = None):
+        if size <= 0:
+            raise ValueError("Size of trace must be positive")
+
+        self.program = program
+        self.size = size
+        self.dump_file = dump_file
+
+        self.fields: typing.Dict[str, array.array] = {
+            name: array.array(typecode, [0]) * size
+            for name, typecode in TRACE_FIELDS
+        }
+        # Count of recorded instructions, next record is steps % size
+        self.steps = 0
+        self.error = ""
+
+        self.dispatch_table: typing.Tuple[VmOperation, ...] = tuple(
+            self.wrap_operation(op_code, func)
+            for op_code, func in enumerate(VM_BYTECODE_FUNC)
+        )
+
+    def wrap_operation(self, op_code: int,
+                       func: VmOperation) -> VmOperation:
+        """Wrap operation by recording of instruction.
+
+        Instruction is recorded before execution, so failed instruction
+        is the last record of trace. Written value is recorded after
+        execution.
+
+        :param int op_code: Code of operation
+        :param func: Operation of VM_BYTECODE_FUNC
+
+        :return: Wrapped operation
+        """
+        program = self.program
+        fields = self.fields
+        size = self.size
+
+        addresses = fields["address"]
+        op_codes = fields["op_code"]
+        arg1_types = fields["arg1_type"]
+        arg1s = fields["arg1"]
+        arg2_types = fields["arg2_type"]
+        arg2s = fields["arg2"]
+        written_kinds = fields["written_kind"]
+        written_ats = fields["written_at"]
+        written_values = fields["written_value"]
+
+        def record(vm_state: VmState) -> int:
+            address = vm_state.vm_code_pointer
+            slot = self.steps % size
+
+            addresses[slot] = address
+            op_codes[slot] = op_code
+            arg1_types[slot] = program.arg1_types[address]
+            arg1s[slot] = program.arg1s[address]
+            arg2_types[slot] = program.arg2_types[address]
+            arg2s[slot] = program.arg2s[address]
+            written_kinds[slot] = WRITTEN_NOTHING
+
+            self.steps += 1
+
+            return slot
+
+        def write_value(slot: int, kind: int, at: int, value):
+            written_kinds[slot] = kind
+            written_ats[slot] = at
+
+            try:
+                written_values[slot] = value
+            except (OverflowError, TypeError):
+                written_values[slot] = wrap_int64(int(value))
+
+        if op_code in WRITING_OPERATIONS:
+            def traced(vm_state: VmState) -> VmState:
+                slot = record(vm_state)
+                vm_state = func(vm_state)
+
+                register = arg1s[slot]
+
+                if arg1_types[slot] == 2:  # Register
+                    write_value(slot, WRITTEN_REGISTER, register,
+                                vm_state.vm_register_file[register])
+
+                elif arg1_types[slot] == 3:  # Register pointer
+                    mem_address = vm_state.vm_register_file[register]
+                    write_value(slot, WRITTEN_MEMORY, mem_address,
+                                vm_state.vm_memory[mem_address])
+
+                return vm_state
+
+        elif op_code in COMPARE_OPERATIONS:
+            def traced(vm_state: VmState) -> VmState:
+                slot = record(vm_state)
+                vm_state = func(vm_state)
+
+                registers = vm_state.vm_register_file
+                write_value(slot, WRITTEN_FLAGS, 0, sum(
+                    1 << bit
+                    for bit, register in enumerate(FLAGS_REGISTERS)
+                    if registers[register]
+                ))
+
+                return vm_state
+
+        else:
+            def traced(vm_state: VmState) -> VmState:
+                record(vm_state)
+                return func(vm_state)
+
+        return traced
+
+    def trace(self) -> Trace:
+        """Decode records of ring buffer.
+
+        :return: Trace from the oldest record
+        :rtype: Trace
+        """
+        return read_trace(self.to_bytes())
+
+    def to_bytes(self) -> bytes:
+        """Trace in format of trace file."""
+        count = min(self.steps, self.size)
+        start = self.steps % self.size if self.steps > self.size else 0
+        error = self.error.encode('utf-8')[:0xFFFF]
+
+        parts = [
+            TRACE_HEADER.pack(TRACE_MAGIC, TRACE_VERSION, count,
+                              self.steps, len(error)),
+            error,
+        ]
+
+        for name, _ in TRACE_FIELDS:
+            field = self.fields[name]
+            # Ring buffer is rotated, so records are from the oldest
+            values = field[start:count] + field[:start]
+
+            if sys.byteorder == 'big':
+                values.byteswap()
+
+            parts.append(values.tobytes())
+
+        return b"".join(parts)
+
+    def dump(self, filename: typing.Optional[str] = None):
+        """Write trace to file.
+
+        :param filename: Trace file, dump file of tracer by default
+        :type filename: Optional[str]
+
+        :raise ValueError: If no file given and tracer has no dump file
+        """
+        filename = filename or self.dump_file
+
+        if not filename:
+            raise ValueError("No file for trace")
+
+        with open(filename, 'wb') as trace_file:
+            trace_file.write(self.to_bytes())
+
+    def dump_on_error(self, exception: BaseException):
+        """Write trace to dump file if error is one of VM errors."""
+        if not is_vm_error(exception):
+            return
+
+        self.error = str(exception)
+
+        if self.dump_file:
+            self.dump()
+
+
+def read_trace(data: bytes) -> Trace:
+    """Decode trace file.
+
+    :param bytes data: Content of trace file
+
+    :raise Exception: If data is not a trace
+
+    :return: Decoded trace
+    :rtype: Trace
+    """
+    if len(data) < TRACE_HEADER.size:
+        raise Exception("Bad trace file")
+
+    magic, version, count, steps, error_size = \
+        TRACE_HEADER.unpack_from(data)
+
+    if magic != TRACE_MAGIC or version != TRACE_VERSION:
+        raise Exception("Bad trace file")
+
+    position = TRACE_HEADER.size
+    error = data[position:position + error_size].decode('utf-8')
+    position += error_size
+
+    fields = []
+
+    for _, typecode in TRACE_FIELDS:
+        values = array.array(typecode)
+        size = values.itemsize * count
+
+        if len(data) < position + size:
+            raise Exception("Bad size of trace file")
+
+        values.frombytes(data[position:position + size])
+        position += size
+
+        if sys.byteorder == 'big':
+            values.byteswap()
+
+        fields.append(values)
+
+    first_step = steps - count
+
+    return Trace(
+        steps=steps,
+        error=error,
+        records=[
+            TraceRecord(first_step + index, *record)
+            for index, record in enumerate(zip(*fields))
+        ]
+    )
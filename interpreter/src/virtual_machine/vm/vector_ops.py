@@ -0,0 +1,230 @@
+"""Module with vector operations on ranges of memory cells.
+
+Vector operation works as scalar operation on every cell of range, count
+of cells is a value of register A like in block memory operations::
+
+    MOV A, 100
+    VADD @r1, @r2   - ADD @r1, @r2 for 100 pairs of cells from r1 and r2
+    VSUM r3, @r2    - ADD r3, @r2 for 100 cells from r2
+
+VADD, VSUB, VMUL, VAND and VXOR read both ranges before write of result,
+so overlapped ranges are used as by temporary copy.
+
+Results are the same as results of scalar operations. Ranges read from
+int64 pages of paged memory are viewed as NumPy arrays without copy and
+computed by NumPy, when it's installed and result can't overflow int64.
+Other ranges are computed by Python operators one by one: values of
+dense memory are a list, and its conversion to NumPy array costs more
+than operation itself. NumPy is imported on the first operation on
+long range, so start of VM doesn't wait for its import.
+"""
+
+import array
+import typing
+import operator
+import functools
+
+from interpreter.src.virtual_machine.vm.memory import Value, VmMemory
+from interpreter.src.virtual_machine.vm.memory_ops import (
+    COUNT_REGISTER,
+    check_count
+)
+from interpreter.src.virtual_machine.vm.vm_def import (
+    VmState,
+    VM_OPERATION_TO_BYTECODE
+)
+from interpreter.src.virtual_machine.vm.helpers import vm_operation
+
+if typing.TYPE_CHECKING:  # pragma: no cover
+    import numpy
+
+# Shorter ranges are computed by Python, NumPy is slower for them
+NUMPY_MIN_COUNT: int = 128
+
+INT64_LIMIT: int = 2 ** 63
+
+VECTOR_OPERATIONS: typing.Dict[str, typing.Callable] = {
+    # Operators work same way on values and on NumPy arrays
+    "VADD": operator.add,
+    "VSUB": operator.sub,
+    "VMUL": operator.mul,
+    "VAND": operator.and_,
+    "VXOR": operator.xor,
+}
+
+# Check that result can't overflow int64 by max absolute values
+NO_OVERFLOW: typing.Dict[str, typing.Callable[[int, int], bool]] = {
+    "VADD": lambda left, right: left + right < INT64_LIMIT,
+    "VSUB": lambda left, right: left + right < INT64_LIMIT,
+    "VMUL": lambda left, right: left * right < INT64_LIMIT,
+    "VAND": lambda left, right: True,
+    "VXOR": lambda left, right: True,
+}
+
+
+@functools.lru_cache(maxsize=None)
+def load_numpy():
+    """Import NumPy once.
+
+    :return: NumPy module or None if it's not installed
+    :rtype: Optional[module]
+    """
+    try:
+        import numpy
+    except ImportError:  # pragma: no cover
+        return None
+
+    return numpy
+
+
+def as_int64(values: typing.Sequence[Value]) -> typing.Optional[
+        'numpy.ndarray']:
+    """NumPy view of int64 array of values.
+
+    :return: Array or None if values are not an int64 array
+    :rtype: Optional[numpy.ndarray]
+    """
+    if isinstance(values, array.array):
+        numpy = load_numpy()
+        return numpy.frombuffer(values, numpy.int64)
+
+    return None
+
+
+def max_abs(values: 'numpy.ndarray') -> int:
+    """Max absolute value of not empty int64 array."""
+    return max(int(values.max()), -int(values.min()))
+
+
+def apply_values(operation_name: str, left: typing.Sequence[Value],
+                 right: typing.Sequence[Value]) -> typing.Sequence[Value]:
+    """Apply operation to every pair of values.
+
+    :return: Results, int64 array when computed by NumPy
+    :rtype: Sequence[Union[int, float]]
+    """
+    func = VECTOR_OPERATIONS[operation_name]
+
+    if len(left) >= NUMPY_MIN_COUNT and load_numpy() is not None:
+        left_array = as_int64(left)
+        right_array = as_int64(right)
+
+        if left_array is not None and right_array is not None and \
+                NO_OVERFLOW[operation_name](max_abs(left_array),
+                                            max_abs(right_array)):
+            return array.array('q', func(left_array, right_array).tobytes())
+
+    return list(map(func, left, right))
+
+
+def sum_values(value: Value, values: typing.Sequence[Value]) -> Value:
+    """Add values to value one by one."""
+    if len(values) >= NUMPY_MIN_COUNT and isinstance(value, int) and \
+            load_numpy() is not None:
+        values_array = as_int64(values)
+
+        if values_array is not None and \
+                len(values_array) * max_abs(values_array) < INT64_LIMIT:
+            return value + int(values_array.sum())
+
+    # Floats are added in order of cells, like by scalar operations
+    return functools.reduce(operator.add, values, value)
+
+
+def vector_apply(memory: VmMemory, operation_name: str, destination: int,
+                 source: int, count: int):
+    """Apply operation to count cells from destination and source.
+
+    :raise Exception: If count of cells is bad
+    :raise MemoryFault: If any of ranges is out of memory
+    """
+    check_count(operation_name, count)
+
+    left = memory.read_values(destination, count)
+    right = memory.read_values(source, count)
+
+    memory.write_values(destination, apply_values(operation_name, left, right))
+
+
+def vector_sum(memory: VmMemory, value: Value, source: int,
+               count: int) -> Value:
+    """Add values of count cells from source address to value.
+
+    :raise Exception: If count of cells is bad
+    :raise MemoryFault: If range is out of memory
+    """
+    check_count("VSUM", count)
+
+    return sum_values(value, memory.read_values(source, count))
+
+
+def gen_vector_operation(operation_name: str) -> typing.Callable:
+    """Generate function for vector operations on two ranges.
+
+    :param str operation_name: Name of operation for checks and exceptions
+
+    :return: Builded function for make that operation on VmState
+    :rtype: Callable
+    """
+    @vm_operation
+    def gen(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
+        op_code, arg1_type, arg1, arg2_type, arg2 = op_bytecode
+
+        assert VM_OPERATION_TO_BYTECODE[op_code] == operation_name
+
+        if arg2_type != 3:  # Register pointer
+            raise Exception(f"Bad argument for {operation_name}")
+
+        if arg1_type != 3:  # Register pointer
+            raise Exception(f"Bad argument on {operation_name}")
+
+        vector_apply(vm_state.vm_memory, operation_name,
+                     vm_state.vm_register_file[arg1],
+                     vm_state.vm_register_file[arg2],
+                     vm_state.vm_register_file[COUNT_REGISTER])
+
+        return vm_state
+
+    # Need for easy debugging
+    gen.__name__ = f"vm_{operation_name.lower()}"
+
+    return gen
+
+
+@vm_operation
+def vm_vsum(vm_state: VmState, *args, op_bytecode=None, **kwargs) -> VmState:
+    """VSUM operation for virtual machine."""
+    op_code, arg1_type, arg1, arg2_type, arg2 = op_bytecode
+
+    assert VM_OPERATION_TO_BYTECODE[op_code] == "VSUM"
+
+    if arg2_type != 3:  # Register pointer
+        raise Exception("Bad argument for VSUM")
+
+    source = vm_state.vm_register_file[arg2]
+    count = vm_state.vm_register_file[COUNT_REGISTER]
+
+    if arg1_type == 2:  # Register
+        vm_state.vm_register_file[arg1] = vector_sum(
+            vm_state.vm_memory, vm_state.vm_register_file[arg1],
+            source, count
+        )
+
+    elif arg1_type == 3:  # RegisterPointer
+        mem_index = vm_state.vm_register_file[arg1]
+        vm_state.vm_memory[mem_index] = vector_sum(
+            vm_state.vm_memory, vm_state.vm_memory[mem_index], source, count
+        )
+
+    else:
+        raise Exception("Bad argument on VSUM")
+
+    return vm_state
+
+
+# Vector operations
+vm_vadd = gen_vector_operation("VADD")
+vm_vsub = gen_vector_operation("VSUB")
+vm_vmul = gen_vector_operation("VMUL")
+vm_vand = gen_vector_operation("VAND")
+vm_vxor = gen_vector_operation("VXOR")
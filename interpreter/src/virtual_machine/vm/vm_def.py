@@ -1,11 +1,19 @@
 """Module with basic definitions for Virtual Machine."""
 
-import io
 import typing
 import dataclasses
+import collections.abc
 
 from interpreter.src.lexer.keywords import LANGUAGE_REGISTERS
 from interpreter.src.virtual_machine.bytecode import BYTECODES
+from interpreter.src.virtual_machine.vm.io_streams import (
+    ConsoleSink,
+    InputSource,
+    OutputSink,
+    TextSource
+)
+from interpreter.src.virtual_machine.vm.memory import VmMemory, make_memory
+from interpreter.src.virtual_machine.vm.program import Program
 
 
 VM_OPERATION_TO_BYTECODE = {
@@ -13,67 +21,156 @@ VM_OPERATION_TO_BYTECODE = {
     for operation, bytecode in BYTECODES.items()
 }
 
+# Size of memory if it's not set for program or for execution
 VM_MEM_SIZE = 1024
 
 
-@dataclasses.dataclass
+# Names of registers, index in register file - name
+REGISTER_NAMES: typing.Tuple[str, ...] = tuple(LANGUAGE_REGISTERS)
+
+REGISTERS_COUNT: int = len(REGISTER_NAMES)
+
+
 class VmRegister:
     """Register representation of virtual machine.
 
-    :param str name: Name of register
-    :param int value: value of register
+    It's a view of one value of register file, used for debugging and
+    display, virtual machine itself works with register file directly.
+
+    :param register_file: Register file of VmState
+    :type register_file: List[int]
+
+    :param int index: Index of register in register file
+    """
+
+    __slots__ = ('register_file', 'index')
+
+    def __init__(self, register_file: typing.List[int], index: int):
+        self.register_file = register_file
+        self.index = index
+
+    @property
+    def name(self) -> str:
+        """Name of register."""
+        return REGISTER_NAMES[self.index]
+
+    @property
+    def value(self) -> int:
+        """Value of register."""
+        return self.register_file[self.index]
+
+    @value.setter
+    def value(self, value: int):
+        self.register_file[self.index] = value
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, VmRegister):
+            return NotImplemented
+
+        return (self.name, self.value) == (other.name, other.value)
+
+    def __repr__(self) -> str:
+        return f"VmRegister(name={self.name!r}, value={self.value!r})"
+
+
+class VmRegisters(collections.abc.Mapping):
+    """Registers of virtual machine, register number - register object.
+
+    :param register_file: Register file of VmState
+    :type register_file: List[int]
     """
 
-    name: str
-    value: int
+    __slots__ = ('register_file', )
+
+    def __init__(self, register_file: typing.List[int]):
+        self.register_file = register_file
+
+    def __getitem__(self, index: int) -> VmRegister:
+        if not 0 <= index < REGISTERS_COUNT:
+            raise KeyError(index)
+
+        return VmRegister(self.register_file, index)
 
+    def __iter__(self) -> typing.Iterator[int]:
+        return iter(range(REGISTERS_COUNT))
 
-def get_registers_map() -> typing.Dict[int, VmRegister]:
-    """Generates registers mapping."""
-    return {
-        reg_index: VmRegister(name=name, value=0)
-        for reg_index, name in enumerate(LANGUAGE_REGISTERS)
-    }
+    def __len__(self) -> int:
+        return REGISTERS_COUNT
 
+    def __repr__(self) -> str:
+        return f"VmRegisters({dict(self)!r})"
 
-def get_default_memory() -> typing.List[int]:
+
+def get_register_file() -> typing.List[int]:
+    """Generates register file with zero values."""
+    return [0] * REGISTERS_COUNT
+
+
+def get_default_memory() -> VmMemory:
     """Generates base memory."""
-    return [0 for _ in range(VM_MEM_SIZE)]
+    return make_memory(VM_MEM_SIZE)
 
 
 @dataclasses.dataclass
 class VmState:
     """Virtual Machine State representation.
 
-    :param vm_registers: Dict[register number, register object]
-    :type vm_registers: Dict[int, VmRegister]
+    :param vm_register_file: Values of registers, index of register in
+        LANGUAGE_REGISTERS - value
+    :type vm_register_file: List[int] with size=REGISTERS_COUNT
 
     :param vm_memory: Memory of virtual machine
-    :type vm_memory: List[int] with size=VM_MEM_SIZE
+    :type vm_memory: :class:`~.VmMemory`, size=VM_MEM_SIZE by default
+
+    :param int vm_code_pointer: Number of current code instruction
 
-    :param int vm_code_pointer: Points to current code instruction
+    :param vm_program: Decoded code for execute in VM
+    :type vm_program: :class:`~.Program`
 
-    :param vm_code_buffer: Buffer with code for execute in VM
-    :type vm_code_buffer: io.BytesIO
+    :param vm_output: Sink for values printed by PRINT
+    :type vm_output: :class:`~.OutputSink`
 
-    :param vm_labels: Lookup for labels and jumps throught execution
-    :type vm_labels: Dict[int, int]
+    :param vm_input: Source of values for INPUT, integers from stdin
+                     without prompt by default
+    :type vm_input: :class:`~.InputSource`
+
+    :param int vm_steps: Count of executed instructions
     """
 
     # Code execution
-    vm_code_buffer: io.BytesIO
+    vm_program: Program
     vm_code_pointer: int = 0
 
     # Registers
-    vm_registers: typing.Dict[int, VmRegister] = \
-        dataclasses.field(default_factory=get_registers_map)
+    vm_register_file: typing.List[int] = \
+        dataclasses.field(default_factory=get_register_file)
 
     # Memory
-    vm_memory: typing.List[int] = \
+    vm_memory: VmMemory = \
         dataclasses.field(default_factory=get_default_memory)
 
-    # Labels map, key - label, value label position
-    vm_labels: typing.Dict[int, int] = dataclasses.field(default_factory=dict)
-
     # Used for RET and CALL
     vm_call_stack: typing.List[int] = dataclasses.field(default_factory=list)
+
+    # IO
+    vm_output: OutputSink = dataclasses.field(
+        default_factory=ConsoleSink,
+        compare=False,
+        repr=False
+    )
+    vm_input: InputSource = dataclasses.field(
+        default_factory=TextSource,
+        compare=False,
+        repr=False
+    )
+
+    # Statistics
+    vm_steps: int = dataclasses.field(default=0, compare=False)
+
+    @property
+    def vm_registers(self) -> VmRegisters:
+        """Registers with names, register number - register object.
+
+        Values of registers are changed through register objects in place.
+        """
+        return VmRegisters(self.vm_register_file)
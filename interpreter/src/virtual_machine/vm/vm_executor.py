@@ -1,68 +1,399 @@
 """Module with main executor of VM."""
 
-import io
-import struct
+import time
+import typing
+import functools
 
-from interpreter.src.virtual_machine.vm.vm_def import VmState
+from interpreter.src.virtual_machine.errors import ExecutionLimitExceeded
+from interpreter.src.virtual_machine.py_jit import run_pyjit
+from interpreter.src.virtual_machine.vm.checkpoint import (
+    Checkpointer,
+    restore_checkpoint
+)
+from interpreter.src.virtual_machine.vm.memory import make_memory
+from interpreter.src.virtual_machine.vm.vm_def import VM_MEM_SIZE, VmState
+from interpreter.src.virtual_machine.vm.io_streams import (
+    InputSource,
+    IterableSource,
+    OutputSink
+)
+from interpreter.src.virtual_machine.vm.profiler import Profiler
+from interpreter.src.virtual_machine.vm.program import (
+    Bytecode,
+    Program,
+    block_ends,
+    code_blocks,
+    count_executed,
+    load_program
+)
+from interpreter.src.virtual_machine.vm.threaded import run_threaded
+from interpreter.src.virtual_machine.vm.tracer import Tracer
 
-from interpreter.src.virtual_machine.vm import VM_BYTECODE_FUNC, VM_LABEL_FUNC
+from interpreter.src.virtual_machine.vm import (
+    VM_BYTECODE_FUNC,
+    VM_SNAPSHOT_BYTECODE_FUNC,
+)
 
 
-def initialize_vm(bytecode: io.BytesIO) -> VmState:
+def initialize_vm(
+        bytecode: typing.Union[Bytecode, Program],
+        output: typing.Optional[OutputSink] = None,
+        input_source: typing.Optional[
+            typing.Union[InputSource, typing.Iterable[int]]] = None,
+        memory_size: typing.Optional[int] = None
+) -> VmState:
     """Init vm state with given bytecode.
 
-    :param bytecode: Bytecode
-    :type bytecode: io.BytesIO
+    Labels are resolved by compiler, so VM ready to execute code
+    right after bytecode decoded.
+
+    Size of memory is taken from argument, else from bytecode header,
+    else it's VM_MEM_SIZE.
+
+    :param bytecode: Bytecode or already decoded Program
+    :type bytecode: bytes-like object, io.BytesIO or :class:`~.Program`
+
+    :param output: Sink for printed values, console by default
+    :type output: Optional[OutputSink]
+
+    :param input_source: Source of input values or iterable of them,
+        integers from stdin without prompt by default
+    :type input_source: Optional[Union[InputSource, Iterable[int]]]
+
+    :param memory_size: Count of memory cells
+    :type memory_size: Optional[int]
+
+    :raise ValueError: If memory size is not positive or it's too big
 
     :return: Initialized VmState
     :rtype: VmState
     """
-    code_size = len(bytecode.read1())
+    if not isinstance(bytecode, Program):
+        bytecode = load_program(bytecode)
 
     vm_state = VmState(
-        vm_code_buffer=bytecode
+        vm_program=bytecode,
+        vm_memory=make_memory(
+            memory_size or bytecode.memory_size or VM_MEM_SIZE
+        )
     )
 
-    # Prefetch all labels
+    if output is not None:
+        vm_state.vm_output = output
+
+    if input_source is not None:
+        if not isinstance(input_source, InputSource):
+            input_source = IterableSource(input_source)
+
+        vm_state.vm_input = input_source
+
+    return vm_state
+
+
+def run_interpreter(
+        vm_state: VmState,
+        snapshots: bool = False,
+        dispatch_table: typing.Optional[
+            typing.Sequence[typing.Callable[[VmState], VmState]]] = None,
+        max_steps: typing.Optional[int] = None
+) -> VmState:
+    """Execute program of VmState from current instruction.
+
+    Operations are dispatched by bytecode of current instruction.
+
+    :param vm_state: Initialized VmState
+    :type vm_state: :class:`~.VmState`
+
+    :param bool snapshots: Copy VmState on every operation
+
+    :param dispatch_table: Operations indexed by bytecode, used instead
+        of operations of VM, e.g. by profiler
+    :type dispatch_table: Optional[Sequence[Callable[[VmState], VmState]]]
+
+    :param max_steps: Execution stops when count of executed instructions
+                      reaches it, code pointer stays before end of code
+    :type max_steps: Optional[int]
+
+    :return: VmState at end of executing
+    :rtype: :class:`~.VmState`
+    """
+    funcs = VM_SNAPSHOT_BYTECODE_FUNC if snapshots else VM_BYTECODE_FUNC
+
+    if dispatch_table is not None:
+        funcs = dispatch_table
+
+    op_codes = vm_state.vm_program.op_codes
+    code_size = len(op_codes)
+    ends = block_ends(vm_state.vm_program)
+    blocks = code_blocks(vm_state.vm_program, op_codes, 'interpreter')
+
+    steps = block_steps = vm_state.vm_steps
+    block = operations = ()
 
-    while vm_state.vm_code_pointer < code_size:
-        vm_state.vm_code_buffer.seek(vm_state.vm_code_pointer)
+    try:
+        # Instructions are counted and limit is checked once per block
+        if max_steps is None:
+            while vm_state.vm_code_pointer < code_size:
+                start = vm_state.vm_code_pointer
+                block = blocks[start] or op_codes[start:ends[start]]
+                operations = iter(block)
+                block_steps = steps
 
-        bcode = vm_state.vm_code_buffer.read1(2)
-        opcode = struct.unpack('=h', bcode)[0]
+                for opcode in operations:
+                    vm_state = funcs[opcode](vm_state)
 
-        vm_state.vm_code_buffer.seek(vm_state.vm_code_pointer)
+                steps = block_steps + len(block)
+        else:
+            while vm_state.vm_code_pointer < code_size and steps < max_steps:
+                start = vm_state.vm_code_pointer
+                block = blocks[start] or op_codes[start:ends[start]]
 
-        vm_state = VM_LABEL_FUNC[opcode](vm_state)
+                if steps + len(block) > max_steps:
+                    # Last block is executed till limit
+                    block = block[:max_steps - steps]
 
-    vm_state.vm_code_pointer = 0
-    vm_state.vm_code_buffer.seek(0)
+                operations = iter(block)
+                block_steps = steps
+
+                for opcode in operations:
+                    vm_state = funcs[opcode](vm_state)
+
+                steps = block_steps + len(block)
+    except BaseException as error:
+        steps = block_steps + count_executed(block, operations, error)
+        raise
+    finally:
+        vm_state.vm_steps = steps
 
     return vm_state
 
 
-def execute_bytecode(bytecode: io.BytesIO) -> VmState:
+# Execution engine runs initialized VmState, it stops before end of code
+# when count of executed instructions reaches max_steps keyword argument
+Engine = typing.Callable[..., VmState]
+
+# Execution engines, name - function which runs initialized VmState
+ENGINES: typing.Dict[str, Engine] = {
+    "interpreter": run_interpreter,
+    "threaded": run_threaded,
+    "pyjit": run_pyjit,
+}
+
+# Count of instructions executed between checks of time limit and
+# between checks of checkpoint interval
+TIME_CHECK_STEPS: int = 10000
+
+
+def run_limited(vm_state: VmState, run_engine: Engine,
+                max_steps: typing.Optional[int] = None,
+                timeout: typing.Optional[float] = None,
+                checkpointer: typing.Optional[Checkpointer] = None
+                ) -> VmState:
+    """Execute program by engine with limits of instructions and time.
+
+    Engine checks only count of executed instructions, so time is checked
+    between slices of TIME_CHECK_STEPS instructions. Engines check count
+    per instruction or per basic block (pyjit), so pyjit can exceed limit
+    by instructions of one block.
+
+    Checkpoints are written between slices too, and when execution is
+    stopped by limit, so it can be continued later.
+
+    :param vm_state: Initialized VmState
+    :type vm_state: :class:`~.VmState`
+
+    :param run_engine: Function of execution engine
+
+    :param max_steps: Max count of executed instructions
+    :type max_steps: Optional[int]
+
+    :param timeout: Max time of execution in seconds
+    :type timeout: Optional[float]
+
+    :param checkpointer: Writer of checkpoints
+    :type checkpointer: Optional[Checkpointer]
+
+    :raise ExecutionLimitExceeded: If any of limits is exceeded
+
+    :return: VmState at end of executing
+    :rtype: :class:`~.VmState`
+    """
+    if max_steps is None and timeout is None and checkpointer is None:
+        return run_engine(vm_state)
+
+    code_size = len(vm_state.vm_program)
+    steps_limit = None
+    deadline = None
+
+    if max_steps is not None:
+        steps_limit = vm_state.vm_steps + max_steps
+
+    if timeout is not None:
+        deadline = time.monotonic() + timeout
+
+    while True:
+        slice_limit = steps_limit
+
+        if deadline is not None or checkpointer is not None:
+            slice_end = vm_state.vm_steps + TIME_CHECK_STEPS
+
+            if slice_limit is None or slice_end < slice_limit:
+                slice_limit = slice_end
+
+        vm_state = run_engine(vm_state, max_steps=slice_limit)
+
+        if vm_state.vm_code_pointer >= code_size:
+            return vm_state
+
+        error = None
+
+        if steps_limit is not None and vm_state.vm_steps >= steps_limit:
+            error = f"Limit of {max_steps} instructions exceeded"
+
+        elif deadline is not None and time.monotonic() >= deadline:
+            error = f"Limit of {timeout} seconds exceeded"
+
+        if error is not None:
+            if checkpointer is not None:
+                checkpointer.save(vm_state)
+
+            raise ExecutionLimitExceeded(error, vm_state)
+
+        if checkpointer is not None:
+            checkpointer.save_periodically(vm_state)
+
+
+def execute_bytecode(bytecode: typing.Union[Bytecode, Program],
+                     snapshots: bool = False,
+                     engine: str = "interpreter",
+                     output: typing.Optional[OutputSink] = None,
+                     input_source: typing.Optional[
+                         typing.Union[InputSource,
+                                      typing.Iterable[int]]] = None,
+                     profiler: typing.Optional[Profiler] = None,
+                     tracer: typing.Optional[Tracer] = None,
+                     max_steps: typing.Optional[int] = None,
+                     timeout: typing.Optional[float] = None,
+                     checkpointer: typing.Optional[Checkpointer] = None,
+                     resume: typing.Optional[bytes] = None,
+                     memory_size: typing.Optional[int] = None
+                     ) -> VmState:
     """Execute bytecode into Virtual Machine.
 
-    :param bytecode: Bytecode for executing
-    :type bytecode: io.BytesIO
+    Bytecode decoded once into Program, and after that executed
+    by one of engines:
+
+        * interpreter - dispatches operations by bytecode of instruction
+        * threaded - runs closures pre-built for every instruction
+        * pyjit - runs program translated into Python function
+
+    By default every operation changes one VmState in place. With
+    snapshots enabled every operation works on a copy of previous
+    VmState, which is slow and must be used only for debugging.
+
+    With profiler program is executed by interpreter with dispatch table
+    of profiler, execution is measured by profiler. Same way tracer
+    records executed instructions and dumps them on ``Bad ...`` errors.
+
+    Untrusted program can be limited by count of executed instructions
+    and by time of execution, execution stops with
+    :class:`~.ExecutionLimitExceeded` which has VmState at moment of stop.
+
+    Long execution can be saved periodically into checkpoint file by
+    checkpointer and continued later from saved checkpoint.
+
+    :param bytecode: Bytecode or already decoded Program for executing
+    :type bytecode: bytes-like object, io.BytesIO or :class:`~.Program`
+
+    :param bool snapshots: Copy VmState on every operation
+    :param str engine: Name of execution engine
+
+    :param output: Sink for printed values, console by default. It's
+        flushed after executing, even if execution failed
+    :type output: Optional[OutputSink]
+
+    :param input_source: Source of input values or iterable of them,
+        integers from stdin without prompt by default
+    :type input_source: Optional[Union[InputSource, Iterable[int]]]
+
+    :param profiler: Profiler of execution
+    :type profiler: Optional[Profiler]
+
+    :param tracer: Recorder of the last executed instructions
+    :type tracer: Optional[Tracer]
+
+    :param max_steps: Max count of executed instructions
+    :type max_steps: Optional[int]
+
+    :param timeout: Max time of execution in seconds, time of waiting
+        for input is counted, but waiting itself is not interrupted
+    :type timeout: Optional[float]
+
+    :param checkpointer: Writer of checkpoints
+    :type checkpointer: Optional[Checkpointer]
+
+    :param resume: Checkpoint of the same program to continue execution
+    :type resume: Optional[bytes]
+
+    :param memory_size: Count of memory cells, size from bytecode header
+        or VM_MEM_SIZE by default
+    :type memory_size: Optional[int]
+
+    :raise InputExhausted: If INPUT executed when input source is empty
+    :raise MemoryFault: If address out of memory is read or written
+    :raise ExecutionLimitExceeded: If limit of instructions or time is
+        exceeded
+    :raise ValueError: If unknown engine or snapshots are not supported
 
     :return: VmState at end of executing
     :rtype: :class:`~.VmState`
     """
-    code_size = len(bytecode.read())
-    bytecode.seek(0)
-    vm_state = initialize_vm(bytecode)
+    if engine not in ENGINES:
+        raise ValueError(f"Unknown engine {engine}")
 
-    while vm_state.vm_code_pointer < code_size:
-        vm_state.vm_code_buffer.seek(vm_state.vm_code_pointer)
-        bcode = vm_state.vm_code_buffer.read1(2)
-        opcode = struct.unpack('=h', bcode)[0]
+    if (snapshots or profiler or tracer) and engine != "interpreter":
+        raise ValueError(
+            "Snapshots, profiling and tracing supported only"
+            " by interpreter engine"
+        )
 
-        vm_state.vm_code_buffer.seek(
-            vm_state.vm_code_pointer
+    if sum(map(bool, (snapshots, profiler, tracer))) > 1:
+        raise ValueError(
+            "Only one of snapshots, profiling and tracing can be used"
         )
 
-        vm_state = VM_BYTECODE_FUNC[opcode](vm_state)
+    run_engine = ENGINES[engine]
 
-    return vm_state
+    if snapshots:
+        run_engine = functools.partial(run_interpreter, snapshots=True)
+
+    if profiler:
+        run_engine = functools.partial(
+            run_interpreter,
+            dispatch_table=profiler.dispatch_table
+        )
+
+    if tracer:
+        run_engine = functools.partial(
+            run_interpreter,
+            dispatch_table=tracer.dispatch_table
+        )
+
+    vm_state = initialize_vm(bytecode, output, input_source, memory_size)
+
+    if resume is not None:
+        restore_checkpoint(vm_state, resume)
+
+    try:
+        return run_limited(vm_state, run_engine, max_steps, timeout,
+                           checkpointer)
+    except Exception as exception:
+        if tracer:
+            tracer.dump_on_error(exception)
+
+        raise
+    finally:
+        vm_state.vm_output.flush()
+
+        if profiler:
+            profiler.finish()
@@ -0,0 +1,332 @@
+import os
+import json
+
+import mock
+import pytest
+
+import simple_lang
+from simple_lang import (
+    CompileResult,
+    CompileSummary,
+    calculate_file_checksums,
+    compile_directory,
+    compile_file,
+    compile_worker,
+    main,
+    parse_args,
+    read_manifest,
+)
+from interpreter.src.optimizer.optimizer import Optimizer
+from interpreter.src.parser.parser import Parser
+from interpreter.src.virtual_machine.batch_runner import Job
+from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler
+from interpreter.src.virtual_machine.bytecode_cache import (
+    cache_path,
+    load_program_file,
+)
+
+PROGRAM = """
+MOV r1, 2
+ADD r1, 3
+PRINT r1
+"""
+
+DOUBLE_INPUT = """
+INPUT r1
+ADD r1, r1
+PRINT r1
+"""
+
+# Jumps and calls to labels defined later are back-patched
+FORWARD_LABELS = """
+LABEL main
+    MOV r1, 5
+    CALL double
+    JMP finish
+
+LABEL skipped
+    PRINT r1
+
+LABEL double
+    ADD r1, r1
+    CMP r1, 100
+    JMP_LT double
+    RET
+
+LABEL finish
+    PRINT r1
+    END
+"""
+
+UNDEFINED_LABEL = """
+MOV r1, 1
+JMP nowhere
+"""
+
+
+def write_sources(path):
+    (path / "sub").mkdir()
+    (path / "first.small").write_text(PROGRAM)
+    (path / "sub" / "second.small").write_text(PROGRAM)
+    (path / "broken.small").write_text(UNDEFINED_LABEL)
+    # Only *.small files are compiled
+    (path / "notes.txt").write_text(PROGRAM)
+
+
+@pytest.mark.parametrize("optimization_level", [0, 2])
+def test_compile_file_same_as_compiler(tmp_path, optimization_level):
+    source_file = tmp_path / "program.small"
+    source_file.write_text(FORWARD_LABELS)
+
+    assert compile_file(str(source_file), optimization_level)
+
+    parser = Parser()
+    code = parser.parse(FORWARD_LABELS)
+
+    if optimization_level:
+        code = Optimizer(optimization_level).optimize(code)
+
+    file_crc, digest = calculate_file_checksums(str(source_file))
+    bytecode = BytecodeCompiler(
+        file_crc,
+        digest,
+        optimization_level
+    ).compile(code, parser.labels_table).getvalue()
+
+    # Streamed and back-patched bytecode is the same as compiled at once
+    assert (tmp_path / "program.small_c").read_bytes() == bytecode
+
+
+def test_compile_file_with_cache(tmp_path):
+    cache_dir = tmp_path / "cache"
+    first_file = tmp_path / "first.small"
+    first_file.write_text(PROGRAM)
+
+    # Miss, compiled bytecode is stored in cache
+    assert compile_file(str(first_file), 1, str(cache_dir))
+
+    _, digest = calculate_file_checksums(str(first_file))
+    cached_file = cache_path(cache_dir, digest, 1)
+
+    assert os.path.samefile(tmp_path / "first.small_c", cached_file)
+    assert not compile_file(str(first_file), 1, str(cache_dir))
+
+    # Hit, file with same source is a link to cached bytecode
+    second_file = tmp_path / "second.small"
+    second_file.write_text(PROGRAM)
+
+    with mock.patch.object(simple_lang, "BytecodeCompiler") as compiler:
+        assert compile_file(str(second_file), 1, str(cache_dir))
+
+    compiler.assert_not_called()
+    assert os.path.samefile(tmp_path / "second.small_c", cached_file)
+
+    # Stale file is recompiled, cached bytecode of old source stays
+    cached_bytecode = cached_file.read_bytes()
+    first_file.write_text(PROGRAM + "PRINT r1\n")
+
+    assert compile_file(str(first_file), 1, str(cache_dir))
+    assert cached_file.read_bytes() == cached_bytecode
+    assert not os.path.samefile(tmp_path / "first.small_c", cached_file)
+
+    _, digest = calculate_file_checksums(str(first_file))
+
+    assert os.path.samefile(tmp_path / "first.small_c",
+                            cache_path(cache_dir, digest, 1))
+
+    # Bytecode is compiled from new source with one more PRINT
+    assert len(load_program_file(tmp_path / "first.small_c")) == \
+        len(load_program_file(cached_file)) + 1
+
+    # Bytecode of other level is not taken from cache
+    assert compile_file(str(second_file), 0, str(cache_dir))
+    assert not os.path.samefile(tmp_path / "second.small_c", cached_file)
+
+
+def test_compile_summary():
+    summary = CompileSummary([
+        CompileResult("a.small", "compiled"),
+        CompileResult("b.small", "skipped"),
+        CompileResult("c.small", "failed", message="Undefined label x"),
+        CompileResult("d.small", "compiled"),
+    ])
+
+    assert [result.filename for result in summary.compiled] == \
+        ["a.small", "d.small"]
+    assert [result.filename for result in summary.skipped] == ["b.small"]
+    assert [result.filename for result in summary.failed] == ["c.small"]
+    assert summary.with_status("unknown") == []
+
+
+def test_compile_worker(tmp_path):
+    source_file = tmp_path / "program.small"
+    source_file.write_text(PROGRAM)
+
+    result = compile_worker(str(source_file))
+
+    assert result.status == "compiled"
+    assert (tmp_path / "program.small_c").exists()
+
+    assert compile_worker(str(source_file)).status == "skipped"
+
+
+def test_compile_worker_checksums(tmp_path):
+    source_file = tmp_path / "program.small"
+    source_file.write_text(PROGRAM)
+    checksums = calculate_file_checksums(str(source_file))
+
+    with mock.patch.object(simple_lang, "calculate_file_checksums") as calc:
+        result = compile_worker(str(source_file), checksums)
+
+    # Checksums of parent are used, file is not read for them again
+    calc.assert_not_called()
+    assert result.status == "compiled"
+    assert compile_worker(str(source_file)).status == "skipped"
+
+
+@pytest.mark.parametrize("optimization_level", [0, 2])
+def test_compile_worker_failed(tmp_path, optimization_level):
+    source_file = tmp_path / "broken.small"
+    source_file.write_text(UNDEFINED_LABEL)
+
+    result = compile_worker(str(source_file),
+                            optimization_level=optimization_level)
+
+    assert result.status == "failed"
+    # Report of optimizer is not mixed with error
+    assert result.message == "Undefined label nowhere"
+    assert not (tmp_path / "broken.small_c").exists()
+
+
+@pytest.mark.parametrize("workers", [1, 2])
+def test_compile_directory(tmp_path, workers):
+    write_sources(tmp_path)
+
+    summary = compile_directory(str(tmp_path), workers=workers)
+
+    assert sorted(result.filename for result in summary.compiled) == [
+        str(tmp_path / "first.small"),
+        str(tmp_path / "sub" / "second.small"),
+    ]
+    assert [result.filename for result in summary.failed] == \
+        [str(tmp_path / "broken.small")]
+    assert summary.failed[0].message == "Undefined label nowhere"
+    assert summary.skipped == []
+    assert len(summary.results) == 3
+    assert not (tmp_path / "notes.txt_c").exists()
+
+
+def test_compile_directory_skips_actual(tmp_path):
+    write_sources(tmp_path)
+    compile_directory(str(tmp_path), workers=1)
+
+    (tmp_path / "first.small").write_text(PROGRAM + "PRINT r1\n")
+
+    with mock.patch.object(simple_lang, "compile_file",
+                           wraps=simple_lang.compile_file) as compile_file:
+        summary = compile_directory(str(tmp_path), workers=1)
+
+    assert [result.filename for result in summary.compiled] == \
+        [str(tmp_path / "first.small")]
+    assert [result.filename for result in summary.skipped] == \
+        [str(tmp_path / "sub" / "second.small")]
+    assert len(summary.failed) == 1
+    # Actual files are skipped by parent, they are not sent to workers
+    assert sorted(call[0][0] for call in compile_file.call_args_list) == [
+        str(tmp_path / "broken.small"),
+        str(tmp_path / "first.small"),
+    ]
+
+    # Bytecode compiled with other level is not actual
+    summary = compile_directory(str(tmp_path), optimization_level=1,
+                                workers=1)
+
+    assert len(summary.compiled) == 2
+
+
+def test_compile_directory_cli(tmp_path, capsys):
+    write_sources(tmp_path)
+    args = parse_args(["--compile-dir", str(tmp_path), "--workers", "1"])
+
+    assert args.workers == 1
+
+    config = {"compile_dir": args.compile_dir, "workers": args.workers}
+
+    # Failed file fails whole command
+    assert main(config) == 1
+
+    output = capsys.readouterr().out
+
+    assert f"Failed {tmp_path / 'broken.small'}" in output
+    assert ": Undefined label nowhere\n" in output
+    assert "Compiled 2, skipped 0, failed 1 of 3 files" in output
+
+    (tmp_path / "broken.small").unlink()
+
+    assert main(config) == 0
+    assert "Compiled 0, skipped 2, failed 0 of 2 files" in \
+        capsys.readouterr().out
+
+
+def write_manifest(path, lines):
+    (path / "double.small").write_text(DOUBLE_INPUT)
+    compile_file(str(path / "double.small"))
+
+    manifest = path / "jobs.jsonl"
+    manifest.write_text("".join(line + "\n" for line in lines))
+
+    return manifest
+
+
+def test_read_manifest(tmp_path):
+    manifest = write_manifest(tmp_path, [
+        '{"file": "double.small_c", "input": [10]}',
+        '',
+        '{"file": "sub/other.small_c"}',
+    ])
+
+    assert list(read_manifest(str(manifest))) == [
+        Job(str(tmp_path / "double.small_c"), (10, )),
+        Job(str(tmp_path / "sub" / "other.small_c"), ()),
+    ]
+
+
+def test_execute_many_cli(tmp_path, capsys):
+    manifest = write_manifest(tmp_path, [
+        '{"file": "double.small_c", "input": [21]}',
+        '{"file": "missing.small_c", "input": [1]}',
+        '{"file": "double.small_c"}',
+    ])
+    args = parse_args(["--execute-many", str(manifest), "--workers", "1"])
+    config = {"execute_many": args.execute_many, "workers": args.workers}
+
+    # Failed job fails whole command, other jobs are executed
+    assert main(config) == 1
+
+    results = sorted(
+        (json.loads(line) for line in capsys.readouterr().out.splitlines()),
+        key=lambda result: result["index"]
+    )
+
+    assert [result["index"] for result in results] == [0, 1, 2]
+
+    assert results[0]["output"] == [42]
+    assert results[0]["error"] is None
+    assert results[0]["steps"] == 3
+
+    assert results[1]["filename"] == str(tmp_path / "missing.small_c")
+    assert results[1]["error"].startswith("FileNotFoundError")
+    assert results[1]["output"] == []
+    assert results[1]["registers"] == []
+    assert results[1]["steps"] == 0
+
+    # State of failed job is state at failed INPUT
+    assert results[2]["error"] == "InputExhausted: Input is exhausted"
+    assert results[2]["output"] == []
+    assert results[2]["steps"] == 0
+    assert len(results[2]["registers"]) > 0
+
+    manifest.write_text('{"file": "double.small_c", "input": [1]}\n')
+
+    assert main(config) == 0
+    assert json.loads(capsys.readouterr().out)["output"] == [2]
@@ -1,99 +1,666 @@
 import io
-import struct
+import os
+import json
+import time
+import signal
+import zlib
 import pathlib
 import argparse
 import typing
-
+import functools
+import contextlib
+import dataclasses
+import concurrent.futures
+
+from interpreter.src.optimizer.optimizer import (
+    OPTIMIZATION_LEVELS,
+    OptimizationReport,
+    Optimizer
+)
 from interpreter.src.parser.parser import Parser, ParsingError
-from interpreter.src.virtual_machine.byte_cc import BytecodeCompiler, MAG_NUM
-from interpreter.src.virtual_machine.vm.vm_executor import execute_bytecode
-
-META_SIZE: int = 8
+from interpreter.src.virtual_machine.batch_runner import Job, run_many
+from interpreter.src.virtual_machine.byte_cc import (
+    BytecodeCompiler,
+    new_digest,
+)
+from interpreter.src.virtual_machine.bytecode_cache import (
+    cache_path,
+    is_actual,
+    link_atomic,
+    load_program_file,
+    load_symbols_file,
+    open_atomic,
+    store_file,
+)
+from interpreter.src.virtual_machine.errors import (
+    ExecutionLimitExceeded,
+    InputExhausted,
+    MemoryFault,
+    UndefinedLabel
+)
+from interpreter.src.virtual_machine.py_jit import compile_program
+from interpreter.src.virtual_machine.vm.checkpoint import (
+    DEFAULT_CHECKPOINT_INTERVAL,
+    Checkpointer
+)
+from interpreter.src.virtual_machine.vm.io_streams import (
+    DEFAULT_FLUSH_THRESHOLD,
+    OUTPUT_SINKS,
+    InputSource,
+    OutputSink,
+    open_input_source,
+    open_output_sink
+)
+from interpreter.src.virtual_machine.vm.profiler import Profiler
+from interpreter.src.virtual_machine.vm.tracer import Tracer, read_trace
+from interpreter.src.virtual_machine.vm.vm_executor import (
+    ENGINES,
+    execute_bytecode
+)
+
+# Size of chunks of source file read for checksums
+CHECKSUM_CHUNK_SIZE: int = 1 << 20
+
+
+def calculate_file_checksums(filename: str) -> typing.Tuple[int, bytes]:
+    """Calculate CRC and digest of file, which is read by chunks.
+
+    :param str filename: File name
+
+    :return: CRC32 and digest of file data
+    :rtype: Tuple[int, bytes]
+    """
+    file_crc = 0
+    digest = new_digest()
 
+    with open(filename, 'rb') as source_file:
+        for chunk in iter(
+                functools.partial(source_file.read, CHECKSUM_CHUNK_SIZE),
+                b''):
+            file_crc = zlib.crc32(chunk, file_crc)
+            digest.update(chunk)
 
-def calcualte_crc(file_data: bytes) -> int:
-    """Calcualte file crc.
+    return file_crc, digest.digest()
 
-    :param bytes file_data: Data of file
 
-    :return: number crc of file data
-    :rtype: int
-    """
-    result = sum(map(int, file_data)) % 100000
+def compile_file(filename: str, optimization_level: int = 0,
+                 cache_dir: typing.Optional[str] = None,
+                 memory_size: int = 0,
+                 checksums: typing.Optional[typing.Tuple[int, bytes]] = None
+                 ) -> bool:
+    """Compile file.
 
-    return result
+    If have *.small_c file checks crc and digest of source, compiler version,
+    optimization level and memory size from bytecode header. If any of them
+    is changed recompile file else do nothing.
 
+    If cache directory is given, bytecode compiled from same source with
+    same level is taken from cache, new bytecode is stored there.
 
-def compile_file(filename: str) -> bool:
-    """Compile file.
+    :param str filename: File name to compile
+    :param int optimization_level: Level of optimizer, 0 - no optimizations
+    :param cache_dir: Directory of content-addressed bytecode cache
+    :type cache_dir: Optional[str]
 
-    If have *.small_c file checks the file crc from bytecode and current file,
-    If crc is changed recompile file else do nothing.
+    :param int memory_size: Size of VM memory written into bytecode
+                            header, 0 - default size
 
-    :param str filename: File name to compile
+    :param checksums: CRC32 and digest of source if they are already
+                      calculated, file is read for them by default
+    :type checksums: Optional[Tuple[int, bytes]]
 
     :return: True if file recompiled or False if bytecode is actual
     :rtype: bool
     """
     bytecode_file = pathlib.Path(filename + "_c")
 
-    file_crc = None
-
-    if bytecode_file.is_file():
-        # Bytecode exists
-        bytecode = bytecode_file.read_bytes()
-        meta, _ = bytecode[:META_SIZE], bytecode[META_SIZE:]
-        file_mag_number, file_crc = struct.unpack('hI', meta)
+    file_crc, source_digest = (checksums
+                               or calculate_file_checksums(filename))
 
-        if file_mag_number != MAG_NUM:
-            file_crc = None
+    if is_actual(bytecode_file, file_crc, source_digest, optimization_level,
+                 memory_size):
+        return False
 
-    source_code = pathlib.Path(filename).read_text()
+    if cache_dir:
+        cached_file = cache_path(cache_dir, source_digest, optimization_level,
+                                 memory_size)
 
-    current_file_crc = calcualte_crc(bytes(source_code, 'utf-8'))
+        if is_actual(cached_file, file_crc, source_digest,
+                     optimization_level, memory_size):
+            link_atomic(cached_file, bytecode_file)
+            return True
 
-    if current_file_crc == file_crc:
-        return False
+    parser = Parser()
+    optimizer = None
 
     try:
-        code_operations = Parser().parse(source_code)
+        with open(filename) as source_file, \
+                open_atomic(bytecode_file) as bytecode_output:
+            # Lines are parsed while operations are compiled
+            code_operations = parser.iter_parse(source_file)
+
+            if optimization_level:
+                # Optimizer needs whole program
+                optimizer = Optimizer(optimization_level)
+                code_operations = optimizer.optimize(list(code_operations))
+
+            BytecodeCompiler(
+                file_crc,
+                source_digest,
+                optimization_level,
+                memory_size
+            ).compile_stream(
+                code_operations,
+                bytecode_output,
+                parser.labels_table
+            )
     except ParsingError as pe:
         print(f"Parse error \"{pe.exception}\" at"
-              f" line {pe.line_index}, {pe.line_code}")
+              f" line {pe.line_index}, column {pe.column}, {pe.line_code}")
         raise
+    except UndefinedLabel as ul:
+        label_names = {
+            label_index: name
+            for name, label_index in parser.labels_table.items()
+        }
+        print(f"Undefined label {label_names[ul.label_index]}")
+        raise
+
+    # Report is printed only for compiled file, so it is not mixed with errors
+    if optimizer is not None:
+        print_optimization_report(optimizer.report)
 
-    bytecode_gen = BytecodeCompiler(current_file_crc).compile(code_operations)
-    bytecode_gen.seek(0)
-    bytecode_file.write_bytes(bytecode_gen.read1())
+    if cache_dir:
+        store_file(cache_dir, source_digest, optimization_level,
+                   bytecode_file, memory_size)
 
     return True
 
 
-def execute_file(filename: str) -> bool:
-    """Execute bytecode of file."""
+@dataclasses.dataclass(frozen=True)
+class CompileResult:
+    """Result of compilation of one file from directory.
+
+    :param str filename: Source file name
+    :param str status: One of COMPILE_STATUSES
+    :param float seconds: Time of compilation
+    :param str message: Messages of compiler, e.g. parse error
+    """
+
+    filename: str
+    status: str
+    seconds: float = 0.0
+    message: str = ''
+
+
+COMPILE_STATUSES: typing.Tuple[str, ...] = ('compiled', 'skipped', 'failed')
+
+
+@dataclasses.dataclass
+class CompileSummary:
+    """Summary of compilation of directory.
+
+    :param results: Results of every found file
+    :type results: List[CompileResult]
+
+    :param float seconds: Wall time of compilation
+    """
+
+    results: typing.List[CompileResult] = dataclasses.field(
+        default_factory=list
+    )
+    seconds: float = 0.0
+
+    def with_status(self, status: str) -> typing.List[CompileResult]:
+        """Results with given status."""
+        return [result for result in self.results if result.status == status]
+
+    @property
+    def compiled(self) -> typing.List[CompileResult]:
+        """Results of compiled files."""
+        return self.with_status('compiled')
+
+    @property
+    def skipped(self) -> typing.List[CompileResult]:
+        """Results of files with actual bytecode."""
+        return self.with_status('skipped')
+
+    @property
+    def failed(self) -> typing.List[CompileResult]:
+        """Results of files which can't be compiled."""
+        return self.with_status('failed')
+
+
+def compile_worker(filename: str,
+                   checksums: typing.Optional[typing.Tuple[int, bytes]] = None,
+                   optimization_level: int = 0,
+                   cache_dir: typing.Optional[str] = None,
+                   memory_size: int = 0) -> CompileResult:
+    """Compile one file of directory, errors are returned in result.
+
+    Messages printed by compiler are captured, so output of workers
+    is not mixed.
+
+    :param str filename: Source file name
+
+    :param checksums: CRC32 and digest of source calculated by parent,
+                      so file is not read twice
+    :type checksums: Optional[Tuple[int, bytes]]
+
+    :param int optimization_level: Level of optimizer
+    :param cache_dir: Directory of content-addressed bytecode cache
+    :type cache_dir: Optional[str]
+
+    :param int memory_size: Size of VM memory, 0 - default size
+
+    :return: Result of compilation
+    :rtype: CompileResult
+    """
+    messages = io.StringIO()
+    started = time.perf_counter()
+
+    try:
+        with contextlib.redirect_stdout(messages):
+            updated = compile_file(filename, optimization_level, cache_dir,
+                                   memory_size, checksums)
+    except (ParsingError, UndefinedLabel):
+        status = 'failed'
+    except Exception as exception:
+        status = 'failed'
+        messages.write(f'{exception}\n')
+    else:
+        status = 'compiled' if updated else 'skipped'
+
+    return CompileResult(
+        filename,
+        status,
+        time.perf_counter() - started,
+        messages.getvalue().strip()
+    )
+
+
+def compile_directory(path: str, optimization_level: int = 0,
+                      cache_dir: typing.Optional[str] = None,
+                      workers: typing.Optional[int] = None,
+                      memory_size: int = 0) -> CompileSummary:
+    """Compile all *.small files in directory and its subdirectories.
+
+    Files with actual bytecode are skipped by header of bytecode file,
+    other files are compiled in pool of processes. Every source is read
+    for checksums once, they are sent to workers with file names.
+    Bytecode files are written atomically, so directory can be compiled
+    while programs are executed.
+
+    :param str path: Directory with source files
+    :param int optimization_level: Level of optimizer, 0 - no optimizations
+    :param cache_dir: Directory of content-addressed bytecode cache
+    :type cache_dir: Optional[str]
+
+    :param workers: Count of processes, count of CPUs by default,
+                    files are compiled in current process if it's 1
+    :type workers: Optional[int]
+
+    :param int memory_size: Size of VM memory, 0 - default size
+
+    :return: Results of every file
+    :rtype: CompileSummary
+    """
+    started = time.perf_counter()
+    summary = CompileSummary()
+    changed_files = []
+    changed_checksums = []
+
+    for source_file in sorted(pathlib.Path(path).rglob('*.small')):
+        filename = str(source_file)
+        file_crc, source_digest = calculate_file_checksums(filename)
+
+        if is_actual(pathlib.Path(filename + "_c"), file_crc, source_digest,
+                     optimization_level, memory_size):
+            summary.results.append(CompileResult(filename, 'skipped'))
+        else:
+            changed_files.append(filename)
+            changed_checksums.append((file_crc, source_digest))
+
+    compile_one = functools.partial(
+        compile_worker,
+        optimization_level=optimization_level,
+        cache_dir=cache_dir,
+        memory_size=memory_size
+    )
+
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1 or len(changed_files) <= 1:
+        summary.results.extend(
+            map(compile_one, changed_files, changed_checksums)
+        )
+    else:
+        with concurrent.futures.ProcessPoolExecutor(workers) as executor:
+            # Files are small, so they are sent to workers by chunks
+            chunk_size = max(1, len(changed_files) // (workers * 4))
+            summary.results.extend(
+                executor.map(compile_one, changed_files, changed_checksums,
+                             chunksize=chunk_size)
+            )
+
+    summary.seconds = time.perf_counter() - started
+
+    return summary
+
+
+def print_compile_summary(summary: CompileSummary):
+    """Print compiled and failed files with timings and counts of files."""
+    for result in summary.compiled:
+        print(f'Compiled {result.filename}'
+              f' in {result.seconds * 1000:.1f} ms.')
+
+    for result in summary.failed:
+        print(f'Failed {result.filename}'
+              f' in {result.seconds * 1000:.1f} ms: {result.message}')
+
+    compile_time = sum(result.seconds for result in summary.results)
+
+    print(f'Compiled {len(summary.compiled)}, skipped {len(summary.skipped)},'
+          f' failed {len(summary.failed)} of {len(summary.results)} files'
+          f' in {summary.seconds:.2f} s'
+          f' (compilation time {compile_time:.2f} s).')
+
+
+def print_optimization_report(report: OptimizationReport):
+    """Print how many operations removed by optimizer."""
+    passes = ', '.join(
+        f'{pass_name}: {count}'
+        for pass_name, count in report.removed.items()
+    )
+
+    print(f'Optimizer -O{report.level} removed {report.removed_count}'
+          f' of {report.operations_before} operations'
+          + (f' ({passes})' if passes else '') + '.')
+
+    if report.threaded_jumps:
+        print(f'Optimizer threaded {report.threaded_jumps} jumps.')
+
+
+def execute_file(filename: str, engine: str = "interpreter",
+                 output: typing.Optional[OutputSink] = None,
+                 input_source: typing.Optional[InputSource] = None,
+                 profile: bool = False,
+                 profile_file: typing.Optional[str] = None,
+                 trace_size: int = 0,
+                 trace_file: typing.Optional[str] = None,
+                 max_steps: typing.Optional[int] = None,
+                 timeout: typing.Optional[float] = None,
+                 checkpoint_file: typing.Optional[str] = None,
+                 checkpoint_interval: float = DEFAULT_CHECKPOINT_INTERVAL,
+                 resume_file: typing.Optional[str] = None,
+                 memory_size: typing.Optional[int] = None) -> bool:
+    """Execute bytecode of file.
+
+    Python code generated by pyjit engine is cached in *.small_py file
+    next to bytecode file.
+
+    Profiled file is executed by interpreter, report of profiler is
+    printed or written as JSON after execution, even if it's failed.
+
+    Traced file is executed by interpreter too, the last instructions
+    are written to trace file on VM error or on SIGUSR1 signal.
+
+    State of execution is written to checkpoint file periodically and
+    when execution is stopped by limit, it can be continued from this
+    file by any engine.
+
+    :param str filename: Bytecode file name to execute
+    :param str engine: Name of VM execution engine
+
+    :param output: Sink for printed values, console by default
+    :type output: Optional[OutputSink]
+
+    :param input_source: Source of input values, integers from stdin
+                         without prompt by default
+    :type input_source: Optional[InputSource]
+
+    :param bool profile: Print report of profiler
+
+    :param profile_file: File for report of profiler in JSON
+    :type profile_file: Optional[str]
+
+    :param int trace_size: Count of traced instructions, 0 - no tracing
+
+    :param trace_file: File for trace, *.small_trace by default
+    :type trace_file: Optional[str]
+
+    :param max_steps: Max count of executed instructions
+    :type max_steps: Optional[int]
+
+    :param timeout: Max time of execution in seconds
+    :type timeout: Optional[float]
+
+    :param checkpoint_file: File for checkpoints of execution
+    :type checkpoint_file: Optional[str]
+
+    :param float checkpoint_interval: Seconds between checkpoints
+
+    :param resume_file: Checkpoint file to continue execution from
+    :type resume_file: Optional[str]
+
+    :param memory_size: Count of memory cells, size from bytecode header
+                        by default
+    :type memory_size: Optional[int]
+
+    :raise ExecutionLimitExceeded: If limit of instructions or time is
+                                   exceeded
+
+    :return: True if file executed or False if it's not a bytecode file
+    :rtype: bool
+    """
     bytecode_file = pathlib.Path(filename)
+    program = load_program_file(bytecode_file)
+
+    if program is None:
+        return False
+
+    run = functools.partial(
+        execute_bytecode,
+        program,
+        output=output,
+        input_source=input_source,
+        max_steps=max_steps,
+        timeout=timeout,
+        checkpointer=(Checkpointer(checkpoint_file, checkpoint_interval)
+                      if checkpoint_file else None),
+        resume=(pathlib.Path(resume_file).read_bytes()
+                if resume_file else None),
+        memory_size=memory_size
+    )
+
+    if trace_size:
+        tracer = Tracer(
+            program,
+            trace_size,
+            trace_file or str(bytecode_file.with_suffix('.small_trace'))
+        )
+
+        with dump_on_signal(tracer):
+            run(tracer=tracer)
+
+        return True
+
+    if not (profile or profile_file):
+        if engine == 'pyjit':
+            compile_program(program, bytecode_file.with_suffix('.small_py'))
+
+        run(engine=engine)
+
+        return True
+
+    profiler = Profiler(program, load_symbols_file(bytecode_file))
+
+    try:
+        run(profiler=profiler)
+    finally:
+        report = profiler.report()
+
+        if profile:
+            print(report.format_table())
+
+        if profile_file:
+            pathlib.Path(profile_file).write_text(report.to_json())
+
+    return True
 
-    bytecode = bytecode_file.read_bytes()
 
-    meta, code = bytecode[:META_SIZE], bytecode[META_SIZE:]
-    file_mag_number, _ = struct.unpack('hI', meta)
+@contextlib.contextmanager
+def dump_on_signal(tracer: Tracer) -> typing.Iterator[None]:
+    """Dump trace on SIGUSR1 signal, if platform has it."""
+    if not hasattr(signal, 'SIGUSR1'):
+        yield
+        return
+
+    previous = signal.signal(
+        signal.SIGUSR1,
+        lambda signum, frame: tracer.dump()
+    )
+
+    try:
+        yield
+    finally:
+        signal.signal(signal.SIGUSR1, previous)
 
-    if file_mag_number != MAG_NUM:
+
+def decode_trace(filename: str) -> bool:
+    """Print trace file as text.
+
+    :return: True if file decoded or False if it's not a trace file
+    :rtype: bool
+    """
+    try:
+        trace = read_trace(pathlib.Path(filename).read_bytes())
+    except Exception as exception:
+        print(exception)
         return False
 
-    execute_bytecode(io.BytesIO(code))
+    print(trace.format())
 
     return True
 
 
-def main(config: typing.Dict[str, str]) -> int:
+def read_manifest(filename: str) -> typing.Iterator[Job]:
+    """Read jobs from manifest lazily.
+
+    Every line of manifest is JSON object with bytecode file and input
+    values of job, file is relative to directory of manifest::
+
+        {"file": "fibonacci.small_c", "input": [10]}
+
+    :param str filename: Manifest file name
+
+    :return: Iterator of jobs
+    :rtype: Iterator[Job]
+    """
+    directory = pathlib.Path(filename).parent
+
+    with open(filename) as manifest:
+        for line in manifest:
+            if not line.strip():
+                continue
+
+            job = json.loads(line)
+
+            yield Job(
+                str(directory / job['file']),
+                tuple(job.get('input', ()))
+            )
+
+
+def execute_many(manifest: str, engine: str = "interpreter",
+                 workers: typing.Optional[int] = None) -> bool:
+    """Execute jobs of manifest in pool of processes.
+
+    Result of every job is printed as JSON line in order of completion.
+
+    :param str manifest: Manifest file name
+    :param str engine: Name of VM execution engine
+
+    :param workers: Count of processes, count of CPUs by default
+    :type workers: Optional[int]
+
+    :return: True if all jobs finished without errors
+    :rtype: bool
+    """
+    succeeded = True
+
+    for result in run_many(read_manifest(manifest), engine, workers):
+        succeeded = succeeded and result.error is None
+        print(json.dumps(dataclasses.asdict(result)), flush=True)
+
+    return succeeded
+
+
+@contextlib.contextmanager
+def open_output(config: typing.Dict[str, typing.Any]) -> typing.Iterator[
+        OutputSink]:
+    """Open output sink selected in config, sink writes to file or stdout.
+
+    :return: Context manager with output sink
+    :rtype: ContextManager[OutputSink]
+    """
+    kind = config.get('output', 'console')
+    flush_threshold = config.get('flush_threshold', DEFAULT_FLUSH_THRESHOLD)
+
+    if not config.get('output_file'):
+        yield open_output_sink(kind, flush_threshold=flush_threshold)
+        return
+
+    mode = 'wb' if kind == 'binary' else 'w'
+
+    with open(config['output_file'], mode) as output_file:
+        output = open_output_sink(kind, output_file, flush_threshold)
+
+        try:
+            yield output
+        finally:
+            output.close()
+
+
+@contextlib.contextmanager
+def open_input(config: typing.Dict[str, typing.Any]) -> typing.Iterator[
+        InputSource]:
+    """Open input source selected in config, source reads file or stdin.
+
+    In interactive mode values are asked from user with prompt.
+
+    :return: Context manager with input source
+    :rtype: ContextManager[InputSource]
+    """
+    if config.get('interactive'):
+        yield open_input_source('console')
+        return
+
+    kind = config.get('input', 'text')
+
+    if not config.get('input_file'):
+        yield open_input_source(kind)
+        return
+
+    mode = 'rb' if kind == 'binary' else 'r'
+
+    with open(config['input_file'], mode) as input_file:
+        yield open_input_source(kind, input_file)
+
+
+def main(config: typing.Dict[str, typing.Any]) -> int:
     """Main function for running compile of execute."""
     if 'compile' in config:
         file_to_compile = config['compile']
 
         try:
-            updated = compile_file(file_to_compile)
-        except ParsingError:
+            updated = compile_file(
+                file_to_compile,
+                config.get('optimization_level', 0),
+                config.get('cache_dir'),
+                config.get('memory_size') or 0
+            )
+        except (ParsingError, UndefinedLabel):
             return 1
         else:
             if updated:
@@ -101,15 +668,71 @@ def main(config: typing.Dict[str, str]) -> int:
             else:
                 print(f'File {file_to_compile} bytecode are up-to date.')
 
+    elif 'compile_dir' in config:
+        summary = compile_directory(
+            config['compile_dir'],
+            config.get('optimization_level', 0),
+            config.get('cache_dir'),
+            config.get('workers'),
+            config.get('memory_size') or 0
+        )
+
+        print_compile_summary(summary)
+
+        if summary.failed:
+            return 1
+
+    elif 'execute_many' in config:
+        succeeded = execute_many(
+            config['execute_many'],
+            config.get('engine', 'interpreter'),
+            config.get('workers')
+        )
+
+        if not succeeded:
+            return 1
+
     elif 'execute' in config:
         file_to_exec = config['execute']
 
-        exec_result = execute_file(file_to_exec)
+        try:
+            with open_input(config) as input_source, \
+                    open_output(config) as output:
+                exec_result = execute_file(
+                    file_to_exec,
+                    config.get('engine', 'interpreter'),
+                    output,
+                    input_source,
+                    config.get('profile', False),
+                    config.get('profile_file'),
+                    config.get('trace', 0),
+                    config.get('trace_file'),
+                    config.get('max_steps'),
+                    config.get('timeout'),
+                    config.get('checkpoint'),
+                    config.get('checkpoint_interval',
+                               DEFAULT_CHECKPOINT_INTERVAL),
+                    config.get('resume'),
+                    config.get('memory_size')
+                )
+        except InputExhausted:
+            print('Input is exhausted.')
+            return 1
+        except ExecutionLimitExceeded as limit:
+            print(f'{limit} after {limit.steps} instructions.')
+            return 1
+        except MemoryFault as fault:
+            print(f'Memory fault: {fault}.')
+            return 1
 
         if not exec_result:
             print('Unable to execute bytecode file.')
             return 1
 
+    elif 'decode_trace' in config:
+        if not decode_trace(config['decode_trace']):
+            return 1
+
     return 0
 
 
@@ -124,6 +747,19 @@ def parse_args(args):
         default=''
     )
 
+    parser.add_argument(
+        '--compile-dir',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--workers',
+        action='store',
+        type=int,
+        default=None
+    )
+
     parser.add_argument(
         '--execute',
         '-e',
@@ -131,6 +767,144 @@ def parse_args(args):
         default=''
     )
 
+    parser.add_argument(
+        '--execute-many',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '-O',
+        dest='optimization_level',
+        action='store',
+        type=int,
+        choices=OPTIMIZATION_LEVELS,
+        default=0
+    )
+
+    parser.add_argument(
+        '--cache-dir',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--memory-size',
+        action='store',
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        '--engine',
+        action='store',
+        choices=list(ENGINES),
+        default='interpreter'
+    )
+
+    parser.add_argument(
+        '--profile',
+        action='store_true',
+        default=False
+    )
+
+    parser.add_argument(
+        '--profile-file',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--max-steps',
+        action='store',
+        type=int,
+        default=None
+    )
+
+    parser.add_argument(
+        '--timeout',
+        action='store',
+        type=float,
+        default=None
+    )
+
+    parser.add_argument(
+        '--checkpoint',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--checkpoint-interval',
+        action='store',
+        type=float,
+        default=DEFAULT_CHECKPOINT_INTERVAL
+    )
+
+    parser.add_argument(
+        '--resume',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--trace',
+        action='store',
+        type=int,
+        default=0
+    )
+
+    parser.add_argument(
+        '--trace-file',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--decode-trace',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--output',
+        action='store',
+        choices=list(OUTPUT_SINKS),
+        default='console'
+    )
+
+    parser.add_argument(
+        '--output-file',
+        action='store',
+        default=''
+    )
+
+    parser.add_argument(
+        '--flush-threshold',
+        action='store',
+        type=int,
+        default=DEFAULT_FLUSH_THRESHOLD
+    )
+
+    parser.add_argument(
+        '--interactive',
+        action='store_true',
+        default=False
+    )
+
+    parser.add_argument(
+        '--input',
+        action='store',
+        choices=['text', 'binary'],
+        default='text'
+    )
+
+    parser.add_argument(
+        '--input-file',
+        action='store',
+        default=''
+    )
+
     return parser.parse_args(args)
 
 
@@ -140,11 +914,38 @@ if __name__ == '__main__':
     args = sys.argv[1:]
     args_obj = parse_args(args)
 
-    config = {}
+    config = {
+        'engine': args_obj.engine,
+        'optimization_level': args_obj.optimization_level,
+        'cache_dir': args_obj.cache_dir,
+        'memory_size': args_obj.memory_size,
+        'workers': args_obj.workers,
+        'profile': args_obj.profile,
+        'profile_file': args_obj.profile_file,
+        'max_steps': args_obj.max_steps,
+        'timeout': args_obj.timeout,
+        'checkpoint': args_obj.checkpoint,
+        'checkpoint_interval': args_obj.checkpoint_interval,
+        'resume': args_obj.resume,
+        'trace': args_obj.trace,
+        'trace_file': args_obj.trace_file,
+        'output': args_obj.output,
+        'output_file': args_obj.output_file,
+        'flush_threshold': args_obj.flush_threshold,
+        'interactive': args_obj.interactive,
+        'input': args_obj.input,
+        'input_file': args_obj.input_file,
+    }
 
     if args_obj.compile:
         config['compile'] = args_obj.compile
+    elif args_obj.compile_dir:
+        config['compile_dir'] = args_obj.compile_dir
     elif args_obj.execute:
         config['execute'] = args_obj.execute
+    elif args_obj.execute_many:
+        config['execute_many'] = args_obj.execute_many
+    elif args_obj.decode_trace:
+        config['decode_trace'] = args_obj.decode_trace
 
     sys.exit(main(config))